@@ -12,6 +12,8 @@ from dataclasses import dataclass
 from enum import Enum, auto
 from typing import Dict, Optional
 
+from utils.memo import memoized
+
 
 class MusicalRole(Enum):
     """The musical function an instrument typically serves."""
@@ -1294,8 +1296,13 @@ GM_DRUM_MAP: Dict[int, DrumMapping] = {
 }
 
 
+@memoized("instrument_mapping", maxsize=256)
 def get_instrument_mapping(program: int) -> InstrumentMapping:
-    """Get the NES mapping for a GM program number."""
+    """Get the NES mapping for a GM program number.
+
+    Memoized, so repeated unknown programs share one fallback mapping --
+    callers only read mappings, never mutate them.
+    """
     if program in GM_INSTRUMENT_MAP:
         return GM_INSTRUMENT_MAP[program]
     # Default fallback
@@ -1309,8 +1316,10 @@ def get_instrument_mapping(program: int) -> InstrumentMapping:
     )
 
 
+@memoized("drum_mapping", maxsize=256)
 def get_drum_mapping(note: int) -> DrumMapping:
-    """Get the NES mapping for a GM drum note."""
+    """Get the NES mapping for a GM drum note (memoized, like
+    get_instrument_mapping)."""
     if note in GM_DRUM_MAP:
         return GM_DRUM_MAP[note]
     # Default fallback - generic noise hit
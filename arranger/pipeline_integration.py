@@ -11,6 +11,7 @@ from typing import Dict, List, Tuple
 from .role_analyzer import VoiceRoleAnalyzer, NoteInfo, ArrangementPlan
 from .voice_allocator import allocate_with_arpeggiation
 from nes.pitch_table import NES_NOTE_TABLE, NES_TRIANGLE_TABLE
+from utils.tracing import span
 
 
 def _apply_sustain(notes: List[NoteInfo], max_gap: int) -> List[NoteInfo]:
@@ -266,8 +267,10 @@ def arrange_for_nes(
     Returns:
         Dict with channel names as keys, each containing frame_number -> frame_data
     """
-    # Analyze the MIDI
-    plan, notes_by_track, total_frames = analyze_midi_events(midi_events)
+    # Analyze the MIDI: pair note-ons with note-offs into NoteInfo and
+    # build the role/arrangement plan.
+    with span("note_pairing", cat="arranger"):
+        plan, notes_by_track, total_frames = analyze_midi_events(midi_events)
 
     if verbose:
         # Print arrangement analysis
@@ -283,12 +286,13 @@ def arrange_for_nes(
         print("=" * 60)
 
     # Allocate with arpeggiation
-    frames = allocate_with_arpeggiation(
-        notes_by_track,
-        plan,
-        total_frames + 60,  # Add a second of buffer
-        arp_speed=arp_speed,
-    )
+    with span("voice_allocation", cat="arranger", frames=total_frames):
+        frames = allocate_with_arpeggiation(
+            notes_by_track,
+            plan,
+            total_frames + 60,  # Add a second of buffer
+            arp_speed=arp_speed,
+        )
 
     # Convert to format expected by existing pipeline
     # The existing format uses 'pitch' not 'note', and needs additional fields
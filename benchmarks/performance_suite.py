@@ -9,6 +9,7 @@ from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass, field
 from contextlib import contextmanager
 import tempfile
+import threading
 import os
 
 # Import pipeline components
@@ -21,12 +22,34 @@ from nes.emulator_core import NESEmulatorCore, frames_to_events
 from tracker.pattern_detector_parallel import ParallelPatternDetector
 from tracker.tempo_map import EnhancedTempoMap
 from exporter.exporter_ca65 import CA65Exporter
-from utils.profiling import _tracemalloc_acquire, _tracemalloc_release
+from arranger import arrange_for_nes
+from nes.project_builder import NESProjectBuilder
+from mappers.factory import MapperFactory
+from compiler import compile_rom, CC65Wrapper
+from core.exceptions import ToolchainError
+from debug.batch_validator import validate_rom_file
+from utils.profiling import (
+    _tracemalloc_acquire,
+    _tracemalloc_release,
+    diff_allocation_snapshots,
+    take_allocation_snapshot,
+)
+from utils.tracing import span
+from utils.memo import cache_stats, diff_cache_stats
+from utils.stage_profiler import is_profiling_stages, profile_stage
+from benchmarks.regression_stats import describe_samples, detect_shift
 # Shared with main.py's production call sites so the benchmark measures the same
 # pattern-length work profile the pipeline actually runs (#262/PERF-11).
 from constants import PATTERN_MIN_LENGTH, PATTERN_MAX_LENGTH
 
 
+# Measured repetitions per benchmark run and leading runs discarded as
+# warm-up. Seven samples give the exact one-sided Mann-Whitney test a
+# smallest attainable p of 1/3432, comfortably under DEFAULT_REGRESSION_ALPHA.
+DEFAULT_REPETITIONS = 7
+DEFAULT_WARMUP_RUNS = 1
+
+
 @dataclass
 class BenchmarkResult:
     """Individual benchmark result."""
@@ -42,6 +65,18 @@ class BenchmarkResult:
     success: bool
     error_message: str = ""
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # tracemalloc peak for this stage alone (Python allocations only).
+    # memory_peak_mb above is a running max over RSS and every earlier
+    # stage, so it can't show how one stage's memory grows with input size.
+    traced_peak_mb: float = 0.0
+    # Highest RSS sampled while this stage ran (see _RssSampler). Unlike
+    # memory_peak_mb this is not carried over from earlier stages.
+    peak_rss_mb: float = 0.0
+    # Net Python heap blocks the stage left allocated
+    # (sys.getallocatedblocks() delta). Deterministic for a given input, so
+    # unlike time it can be compared against the baseline without noise.
+    # Pool workers' allocations are not included.
+    allocated_blocks: int = 0
 
 
 @dataclass
@@ -54,6 +89,10 @@ class PipelineBenchmark:
     stages: List[BenchmarkResult] = field(default_factory=list)
     timestamp: str = ""
     midi_info: Dict[str, Any] = field(default_factory=dict)
+    # Stages not run for this file, with the reason (e.g. compile/validate
+    # without a cc65 toolchain). Kept out of `stages` so a skip never enters
+    # the medians as a 0ms run.
+    skipped_stages: Dict[str, str] = field(default_factory=dict)
 
 
 class ProfileHandle:
@@ -69,15 +108,59 @@ class ProfileHandle:
         self.result: Optional[BenchmarkResult] = None
 
 
+class _RssSampler:
+    """Background thread polling RSS to catch a stage's peak.
+
+    RSS read at stage start/end misses everything freed before the end --
+    the transient peak is what runs a machine out of memory. The OS
+    high-water mark (ru_maxrss) can't be reset per stage, so poll instead.
+    """
+
+    INTERVAL_S = 0.005
+
+    def __init__(self, process):
+        self._process = process
+        self._stop = threading.Event()
+        self.peak_bytes = process.memory_info().rss
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.INTERVAL_S):
+            try:
+                self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+            except psutil.Error:
+                return
+
+    def stop(self) -> float:
+        """Stop sampling; returns the peak RSS in MB (including a final read)."""
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+        return self.peak_bytes / 1024 / 1024
+
+
 class PerformanceProfiler:
-    """Performance profiler for individual operations."""
+    """Performance profiler for individual operations.
 
-    def __init__(self):
+    With `snapshot_allocations`, each stage is bracketed by heap snapshots
+    and its result's `metadata['allocations']` lists the source lines and
+    object types that grew (see utils.profiling.diff_allocation_snapshots).
+    The snapshots sit outside the timed region but still cost O(heap) per
+    stage, so leave it off for timing runs.
+    """
+
+    def __init__(self, snapshot_allocations: bool = False):
         self.process = psutil.Process()
+        self.snapshot_allocations = snapshot_allocations
+        self._start_snapshot = None
+        self._start_cache_stats: Dict[str, Dict[str, Any]] = {}
         self._start_time = None
         self._start_memory = None
         self._start_cpu_times = None
         self._peak_memory = 0
+        self._rss_sampler: Optional[_RssSampler] = None
+        self._start_blocks = 0
 
     @contextmanager
     def profile(self, stage_name: str):
@@ -89,7 +172,8 @@ class PerformanceProfiler:
         handle = ProfileHandle()
         self._start_profiling()
         try:
-            yield handle
+            with span(stage_name, cat="benchmark"), profile_stage(stage_name):
+                yield handle
 
             # End profiling and get results
             handle.result = self._end_profiling(stage_name, True)
@@ -103,6 +187,8 @@ class PerformanceProfiler:
         """Start performance monitoring."""
         # Start memory tracing (nesting-safe, shared with utils.profiling, #118)
         _tracemalloc_acquire()
+        if self.snapshot_allocations:
+            self._start_snapshot = take_allocation_snapshot()
 
         # Record initial state
         self._start_time = time.perf_counter()
@@ -117,11 +203,22 @@ class PerformanceProfiler:
         # profiled interval.
         self._start_cpu_times = self.process.cpu_times()
         self._peak_memory = self._start_memory
+        # The sampler thread would show up in a --profile-stages cProfile
+        # (3.12+ profiles every thread); RSS falls back to start/end reads.
+        self._rss_sampler = None if is_profiling_stages() else _RssSampler(self.process)
+        self._start_blocks = sys.getallocatedblocks()
+        self._start_cache_stats = cache_stats()
 
     def _end_profiling(self, stage_name: str, success: bool, error_msg: str = "") -> BenchmarkResult:
         """End profiling and create result."""
         # Calculate metrics
         elapsed_seconds = time.perf_counter() - self._start_time
+        allocated_blocks = sys.getallocatedblocks() - self._start_blocks
+        if self._rss_sampler is not None:
+            peak_rss = self._rss_sampler.stop()
+            self._rss_sampler = None
+        else:
+            peak_rss = max(self._start_memory, self.process.memory_info().rss / 1024 / 1024)
         duration = elapsed_seconds * 1000  # ms
         current_memory = self.process.memory_info().rss / 1024 / 1024  # MB
         memory_delta = current_memory - self._start_memory
@@ -130,10 +227,22 @@ class PerformanceProfiler:
                         + (end_cpu_times.system - self._start_cpu_times.system))
         cpu_percent = (cpu_seconds / elapsed_seconds) * 100 if elapsed_seconds > 0 else 0.0
 
+        metadata = {}
+        if self._start_snapshot is not None:
+            metadata['allocations'] = diff_allocation_snapshots(
+                self._start_snapshot, take_allocation_snapshot())
+            self._start_snapshot = None
+        # Memo-cache hits/misses during this stage (performance.enable_caching).
+        cache_deltas = diff_cache_stats(self._start_cache_stats, cache_stats())
+        if cache_deltas:
+            metadata['caches'] = cache_deltas
+
         # Get memory tracing info
+        stage_traced_peak = 0.0
         try:
             current_trace, peak_trace = tracemalloc.get_traced_memory()
             peak_memory_traced = peak_trace / 1024 / 1024  # MB
+            stage_traced_peak = peak_memory_traced
         except RuntimeError:
             peak_memory_traced = current_memory
         finally:
@@ -149,24 +258,43 @@ class PerformanceProfiler:
             memory_delta_mb=memory_delta,
             cpu_percent=cpu_percent,
             success=success,
-            error_message=error_msg
+            error_message=error_msg,
+            traced_peak_mb=stage_traced_peak,
+            peak_rss_mb=peak_rss,
+            allocated_blocks=allocated_blocks,
+            metadata=metadata,
         )
 
 
 class PerformanceBenchmark:
     """Comprehensive performance benchmarking system."""
     
-    def __init__(self, output_dir: Optional[str] = None):
+    def __init__(self, output_dir: Optional[str] = None, snapshot_allocations: bool = False):
         """
         Initialize benchmark suite.
         
         Args:
             output_dir: Directory to save benchmark results
+            snapshot_allocations: Record per-stage allocation-site and
+                object-type diffs (see PerformanceProfiler)
         """
         self.output_dir = Path(output_dir) if output_dir else Path("benchmark_results")
         self.output_dir.mkdir(exist_ok=True)
-        self.profiler = PerformanceProfiler()
+        self.profiler = PerformanceProfiler(snapshot_allocations)
         self.results: List[PipelineBenchmark] = []
+        self._toolchain_checked = False
+        self._toolchain_error: Optional[str] = None
+
+    def toolchain_unavailable_reason(self) -> Optional[str]:
+        """Why the compile/validate stages can't run here, or None if the
+        cc65 toolchain is usable. Probed once per benchmark instance."""
+        if not self._toolchain_checked:
+            try:
+                CC65Wrapper().check_toolchain()
+            except ToolchainError as e:
+                self._toolchain_error = str(e)
+            self._toolchain_checked = True
+        return self._toolchain_error
     
     def benchmark_pipeline_stage(self, stage_func: Callable, stage_name: str, *args, **kwargs):
         """
@@ -215,6 +343,15 @@ class PerformanceBenchmark:
 
         return result, handle.result
     
+    def benchmark_arranger_stage(self, parsed_data: Dict[str, Any]) -> tuple:
+        """Benchmark the --arranger path (role analysis, voice allocation and
+        arpeggiation) -- the alternative to map + frames."""
+        with self.profiler.profile("arranger") as handle:
+            # Same arp speed run_full_pipeline uses for --arranger builds.
+            result = arrange_for_nes(parsed_data["events"], arp_speed=3)
+
+        return result, handle.result
+
     def benchmark_frames_stage(self, mapped_data: Dict[str, Any]) -> tuple:
         """Benchmark frame generation performance."""
         def frames_wrapper():
@@ -257,32 +394,71 @@ class PerformanceBenchmark:
 
         return result, handle.result
     
-    def benchmark_export_stage(self, frames_data: Dict[str, Any], patterns: Dict[str, Any] = None) -> tuple:
-        """Benchmark export performance."""
+    def benchmark_export_stage(self, frames_data: Dict[str, Any], patterns: Dict[str, Any] = None,
+                               output_path: Optional[str] = None) -> tuple:
+        """Benchmark export performance.
+
+        With `output_path` the assembly is written there and kept for the
+        prepare stage; otherwise it goes to a temp file deleted afterwards.
+        Exports non-standalone, as the production pipeline does before
+        handing music.asm to NESProjectBuilder.
+        """
         def export_wrapper():
-            with tempfile.NamedTemporaryFile(suffix='.s', delete=False) as f:
-                temp_path = f.name
-            
+            if output_path is not None:
+                temp_path = None
+                target = output_path
+            else:
+                with tempfile.NamedTemporaryFile(suffix='.s', delete=False) as f:
+                    temp_path = f.name
+                target = temp_path
+
             try:
                 exporter = CA65Exporter()
                 patterns_dict = patterns.get('patterns', {}) if patterns else {}
                 references_dict = patterns.get('references', {}) if patterns else {}
-                
+
                 exporter.export_tables_with_patterns(
                     frames_data,
                     patterns_dict,
                     references_dict,
-                    temp_path
+                    target,
+                    standalone=False,
                 )
-                return temp_path
+                return target
             finally:
-                if os.path.exists(temp_path):
+                if temp_path is not None and os.path.exists(temp_path):
                     os.unlink(temp_path)
-        
+
         with self.profiler.profile("export") as handle:
             result = export_wrapper()
 
         return result, handle.result
+
+    def benchmark_prepare_stage(self, music_asm: str, project_dir: str, mapper) -> tuple:
+        """Benchmark NES project generation around an exported music.asm."""
+        with self.profiler.profile("prepare") as handle:
+            builder = NESProjectBuilder(str(project_dir), mapper=mapper)
+            if not builder.prepare_project(str(music_asm)):
+                raise RuntimeError("Failed to prepare NES project")
+
+        return project_dir, handle.result
+
+    def benchmark_compile_stage(self, project_dir: str, rom_path: str, mapper) -> tuple:
+        """Benchmark ca65 + ld65 (and any mapper post-process) into a ROM."""
+        with self.profiler.profile("compile") as handle:
+            if not compile_rom(Path(project_dir), Path(rom_path), mapper=mapper):
+                raise RuntimeError("ROM compilation failed")
+
+        return rom_path, handle.result
+
+    def benchmark_validate_stage(self, rom_path: str) -> tuple:
+        """Benchmark ROM validation with the pipeline's boot-fatal rule."""
+        with self.profiler.profile("validate") as handle:
+            entry = validate_rom_file(str(rom_path))
+            if not entry.passed:
+                raise RuntimeError(f"ROM validation failed: {entry.fatal_defects or entry.error}")
+
+        return entry, handle.result
     
     def run_full_pipeline(self, midi_file: str) -> PipelineBenchmark:
         """
@@ -309,16 +485,30 @@ class PerformanceBenchmark:
         
         pipeline_start = time.perf_counter()
         memory_start = self.profiler.process.memory_info().rss / 1024 / 1024
-        
+        workspace = tempfile.TemporaryDirectory(prefix="midi2nes_bench_")
+        work_dir = Path(workspace.name)
+
         try:
             # Stage 1: Parse MIDI
             print(f"  Benchmarking parse stage...")
             parsed_data, parse_result = self.benchmark_parse_stage(midi_file)
             benchmark.stages.append(parse_result)
+            # `events` maps track name -> event list; iterating the dict
+            # itself summed the lengths of the track *names*.
             benchmark.midi_info = {
-                "tracks": len(parsed_data.get("events", [])),
-                "total_events": sum(len(track) for track in parsed_data.get("events", [])),
+                "tracks": len(parsed_data.get("events", {})),
+                "total_events": sum(len(track) for track in parsed_data.get("events", {}).values()),
             }
+
+            # The --arranger path replaces map + frames. It is timed from the
+            # same parse output, and its failure is recorded without aborting
+            # the legacy stages below (nothing downstream consumes it).
+            print(f"  Benchmarking arranger stage...")
+            try:
+                _, arranger_result = self.benchmark_arranger_stage(parsed_data)
+            except Exception as e:
+                arranger_result = _failed_stage("arranger", e)
+            benchmark.stages.append(arranger_result)
             
             # Stage 2: Map tracks
             print(f"  Benchmarking map stage...")
@@ -337,23 +527,41 @@ class PerformanceBenchmark:
             
             # Stage 5: Export
             print(f"  Benchmarking export stage...")
-            export_result_path, export_result = self.benchmark_export_stage(frames_data, patterns_data)
+            music_asm = work_dir / "music.asm"
+            export_result_path, export_result = self.benchmark_export_stage(
+                frames_data, patterns_data, output_path=str(music_asm))
             benchmark.stages.append(export_result)
-            
+
+            # Stage 6: Prepare the NES project. The default pipeline builds
+            # on MMC3 (and forces it for the macro-bytecode engine).
+            print(f"  Benchmarking prepare stage...")
+            mapper = MapperFactory.get_mapper('mmc3')
+            project_dir = work_dir / "nes_project"
+            _, prepare_result = self.benchmark_prepare_stage(str(music_asm), str(project_dir), mapper)
+            benchmark.stages.append(prepare_result)
+
+            # Stages 7-8: Compile and validate -- only with a cc65 toolchain.
+            skip_reason = self.toolchain_unavailable_reason()
+            if skip_reason:
+                print(f"  Skipping compile/validate stages: {skip_reason}")
+                benchmark.skipped_stages = {"compile": skip_reason, "validate": skip_reason}
+            else:
+                print(f"  Benchmarking compile stage...")
+                rom_path = work_dir / "benchmark.nes"
+                _, compile_result = self.benchmark_compile_stage(str(project_dir), str(rom_path), mapper)
+                benchmark.stages.append(compile_result)
+
+                print(f"  Benchmarking validate stage...")
+                _, validate_result = self.benchmark_validate_stage(str(rom_path))
+                benchmark.stages.append(validate_result)
+
         except Exception as e:
             print(f"  Pipeline failed: {str(e)}")
             # Add failed stage to results
-            failed_result = BenchmarkResult(
-                stage="pipeline_error",
-                duration_ms=0,
-                memory_peak_mb=0,
-                memory_delta_mb=0,
-                cpu_percent=0,
-                success=False,
-                error_message=str(e)
-            )
-            benchmark.stages.append(failed_result)
-        
+            benchmark.stages.append(_failed_stage("pipeline_error", e))
+        finally:
+            workspace.cleanup()
+
         # Calculate totals
         benchmark.total_duration_ms = (time.perf_counter() - pipeline_start) * 1000
         benchmark.total_memory_mb = self.profiler.process.memory_info().rss / 1024 / 1024 - memory_start
@@ -383,13 +591,55 @@ class PerformanceBenchmark:
                 print(f"  Failed: {str(e)}")
         
         return results
+
+    def run_repeated_benchmarks(
+        self,
+        midi_files: List[str],
+        repetitions: int = DEFAULT_REPETITIONS,
+        warmup: int = DEFAULT_WARMUP_RUNS,
+    ) -> List[List[PipelineBenchmark]]:
+        """
+        Run the batch `warmup + repetitions` times, discarding the warm-up runs.
+
+        The first pass over a fixture pays for imports, lazily built tables,
+        page faults and pool start-up that no later run sees; keeping it
+        would put an outlier in every sample.
+
+        Args:
+            midi_files: List of MIDI file paths
+            repetitions: Measured runs over the whole batch
+            warmup: Leading runs to discard
+
+        Returns:
+            One list of PipelineBenchmark per measured repetition (these are
+            also the only runs left in `self.results`).
+        """
+        if repetitions < 1:
+            raise ValueError(f"repetitions must be >= 1, got {repetitions}")
+        if warmup < 0:
+            raise ValueError(f"warmup must be >= 0, got {warmup}")
+
+        kept = len(self.results)
+        for i in range(warmup):
+            print(f"Warm-up run {i + 1}/{warmup} (discarded)")
+            self.run_batch_benchmarks(midi_files)
+        del self.results[kept:]
+
+        runs = []
+        for i in range(repetitions):
+            print(f"Repetition {i + 1}/{repetitions}")
+            runs.append(self.run_batch_benchmarks(midi_files))
+        return runs
     
-    def generate_report(self, output_path: str):
+    def generate_report(self, output_path: str,
+                        distributions: Optional[Dict[str, Dict[str, Any]]] = None):
         """
         Generate comprehensive performance report.
         
         Args:
             output_path: Path to save the JSON report
+            distributions: Per-stage repetition statistics from
+                `stage_distributions()`, included in the report if given
         """
         if not self.results:
             print("No benchmark results to report")
@@ -445,6 +695,9 @@ class PerformanceBenchmark:
                 'success_rate': successful_runs / total_files if total_files > 0 else 0,
             },
             'summary_statistics': summary_stats,
+            'stage_distributions': distributions or {},
+            'allocation_summary': summarize_allocations(self.results),
+            'cache_summary': summarize_caches(self.results),
             'detailed_results': [
                 {
                     'file_path': r.file_path,
@@ -452,12 +705,16 @@ class PerformanceBenchmark:
                     'total_duration_ms': r.total_duration_ms,
                     'total_memory_mb': r.total_memory_mb,
                     'midi_info': r.midi_info,
+                    'skipped_stages': r.skipped_stages,
                     'stages': [
                         {
                             'stage': s.stage,
                             'duration_ms': s.duration_ms,
                             'memory_peak_mb': s.memory_peak_mb,
                             'memory_delta_mb': s.memory_delta_mb,
+                            'traced_peak_mb': s.traced_peak_mb,
+                            'peak_rss_mb': s.peak_rss_mb,
+                            'allocated_blocks': s.allocated_blocks,
                             'cpu_percent': s.cpu_percent,
                             'success': s.success,
                             'error_message': s.error_message,
@@ -487,10 +744,129 @@ class PerformanceBenchmark:
             print(f"  {stage:20} {stats['average_duration_ms']:8.1f}ms avg  "
                   f"{stats['peak_memory_mb']:6.1f}MB peak  "
                   f"{stats['success_rate']*100:5.1f}% success")
+
+        if report['allocation_summary']:
+            print("\nRetained allocations per stage (net, summed over runs):")
+            for stage, summary in report['allocation_summary'].items():
+                sites = ", ".join(f"{site['site']} {site['size_kb']:.0f}KB"
+                                  for site in summary['top_sites'][:3]) or "-"
+                types = ", ".join(f"{t['type']} +{t['count']:,}"
+                                  for t in summary['object_types'][:3]) or "-"
+                print(f"  {stage:20} sites: {sites}")
+                print(f"  {'':20} types: {types}")
+
+        if report['cache_summary']:
+            print("\nLookup caches (all stages):")
+            for cache_name, stats in report['cache_summary'].items():
+                print(f"  {cache_name:24} {stats['hits']:>9,} hits {stats['misses']:>7,} misses "
+                      f"({stats['hit_rate']:.0%})")
         
         return report
 
 
+def summarize_caches(results: List[PipelineBenchmark]) -> Dict[str, Dict[str, Any]]:
+    """Memo-cache hits/misses per cache, summed over every stage of every
+    result (from each stage's metadata['caches'])."""
+    totals: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        for stage in result.stages:
+            for cache_name, counts in stage.metadata.get('caches', {}).items():
+                entry = totals.setdefault(cache_name, {'hits': 0, 'misses': 0})
+                entry['hits'] += counts['hits']
+                entry['misses'] += counts['misses']
+    for entry in totals.values():
+        lookups = entry['hits'] + entry['misses']
+        entry['hit_rate'] = entry['hits'] / lookups if lookups else 0.0
+    return dict(sorted(totals.items()))
+
+
+def stage_distributions(runs: List[List[PipelineBenchmark]]) -> Dict[str, Dict[str, Any]]:
+    """Per-stage distributions over repeated runs of the same file batch.
+
+    Each repetition contributes one sample per stage: the stage's duration
+    summed over every file (so every sample measures the same workload),
+    its highest peak RSS, and its summed allocated-block count. A stage that
+    failed or didn't run for some file in a repetition contributes nothing
+    for that repetition; `success_rate` records how often that happened.
+    """
+    samples: Dict[str, Dict[str, list]] = {}
+    attempts: Dict[str, int] = {}
+    for batch in runs:
+        per_stage: Dict[str, List[BenchmarkResult]] = {}
+        for result in batch:
+            for stage in result.stages:
+                per_stage.setdefault(stage.stage, []).append(stage)
+        for name, stages in per_stage.items():
+            attempts[name] = attempts.get(name, 0) + 1
+            if len(stages) != len(batch) or not all(s.success for s in stages):
+                continue
+            bucket = samples.setdefault(name, {'durations': [], 'rss': [], 'blocks': []})
+            bucket['durations'].append(sum(s.duration_ms for s in stages))
+            bucket['rss'].append(max(s.peak_rss_mb for s in stages))
+            bucket['blocks'].append(sum(s.allocated_blocks for s in stages))
+
+    distributions = {}
+    for name, bucket in samples.items():
+        durations = describe_samples(bucket['durations'])
+        distributions[name] = {
+            'median_duration_ms': durations['median'],
+            'mad_duration_ms': durations['mad'],
+            'p95_duration_ms': durations['p95'],
+            'samples_ms': [round(d, 4) for d in bucket['durations']],
+            'median_peak_rss_mb': describe_samples(bucket['rss'])['median'],
+            'median_allocated_blocks': describe_samples(bucket['blocks'])['median'],
+            'success_rate': len(bucket['durations']) / attempts[name],
+            'repetitions': len(bucket['durations']),
+        }
+    return distributions
+
+
+def summarize_allocations(results: List[PipelineBenchmark], top_n: int = 10) -> Dict[str, Dict[str, list]]:
+    """Per-stage allocation diffs (metadata['allocations']) summed over every
+    run that recorded one; {} unless the runs used snapshot_allocations."""
+    sites: Dict[str, Dict[str, Dict[str, float]]] = {}
+    types: Dict[str, Dict[str, int]] = {}
+    for result in results:
+        for stage in result.stages:
+            allocations = stage.metadata.get('allocations')
+            if not allocations:
+                continue
+            stage_sites = sites.setdefault(stage.stage, {})
+            for site in allocations['top_sites']:
+                entry = stage_sites.setdefault(site['site'], {'size_kb': 0.0, 'count': 0})
+                entry['size_kb'] += site['size_kb']
+                entry['count'] += site['count']
+            stage_types = types.setdefault(stage.stage, {})
+            for obj in allocations['object_types']:
+                stage_types[obj['type']] = stage_types.get(obj['type'], 0) + obj['count']
+
+    summary = {}
+    for stage, stage_sites in sites.items():
+        ranked = sorted(stage_sites.items(), key=lambda item: item[1]['size_kb'], reverse=True)
+        summary[stage] = {
+            'top_sites': [{'site': site, **totals} for site, totals in ranked[:top_n]],
+            'object_types': [
+                {'type': name, 'count': count}
+                for name, count in sorted(types[stage].items(), key=lambda item: item[1],
+                                          reverse=True)[:top_n]
+            ],
+        }
+    return summary
+
+
+def _failed_stage(stage_name: str, error: Exception) -> BenchmarkResult:
+    """Placeholder result for a stage that raised before reporting its own."""
+    return BenchmarkResult(
+        stage=stage_name,
+        duration_ms=0,
+        memory_peak_mb=0,
+        memory_delta_mb=0,
+        cpu_percent=0,
+        success=False,
+        error_message=str(error)
+    )
+
+
 # ---------------------------------------------------------------------------
 # Baseline regression gate (#372/PERF-A-02)
 #
@@ -503,9 +879,27 @@ class PerformanceBenchmark:
 # ---------------------------------------------------------------------------
 
 # A stage's median duration failing more than 50% slower than the checked-in
-# baseline is treated as a performance regression by default.
+# baseline is treated as a performance regression by default. Only used
+# when either side lacks enough repetition samples for the statistical test
+# below (e.g. a baseline written before samples were recorded), and for
+# peak RSS.
 DEFAULT_BASELINE_REGRESSION_MARGIN = 1.5
 
+# Statistical gate over repetition samples (see benchmarks/regression_stats.py):
+# a stage regresses when Mann-Whitney finds it slower at p < ALPHA *and* the
+# bootstrap 95% CI says the median is at least MIN_EFFECT times the
+# baseline's. Catches a consistent 20-30% slowdown the 1.5x margin let
+# through, without flagging a significant-but-trivial few percent.
+DEFAULT_REGRESSION_ALPHA = 0.01
+DEFAULT_REGRESSION_MIN_EFFECT = 1.15
+MIN_SAMPLES_FOR_TEST = 5
+
+# Allocated-block counts barely move between runs, so a tighter margin
+# applies; stages retaining fewer blocks than the floor are ignored (their
+# net count is dominated by whatever the GC happened to collect).
+DEFAULT_ALLOCATION_MARGIN = 1.25
+ALLOCATION_FLOOR_BLOCKS = 1000
+
 
 def load_baseline(baseline_path) -> Dict[str, Dict[str, float]]:
     """Load the checked-in performance baseline (#372/PERF-A-02).
@@ -520,18 +914,42 @@ def load_baseline(baseline_path) -> Dict[str, Dict[str, float]]:
     return json.loads(path.read_text())
 
 
+def merge_baseline(
+    baseline: Dict[str, Dict[str, float]],
+    summary_stats: Dict[str, Dict[str, Any]],
+) -> Dict[str, Dict[str, float]]:
+    """New baseline from this run's per-stage stats, keeping the old entry
+    for any stage this run didn't measure -- so refreshing the baseline on a
+    machine without cc65 doesn't silently drop the compile/validate medians
+    recorded on one that has it."""
+    merged = dict(baseline)
+    merged.update(summary_stats)
+    return merged
+
+
 def compare_to_baseline(
     summary_stats: Dict[str, Dict[str, Any]],
     baseline: Dict[str, Dict[str, float]],
     margin: float = DEFAULT_BASELINE_REGRESSION_MARGIN,
+    alpha: float = DEFAULT_REGRESSION_ALPHA,
+    min_effect: float = DEFAULT_REGRESSION_MIN_EFFECT,
 ) -> List[str]:
-    """Compare this run's per-stage median duration against a baseline.
+    """Compare this run's per-stage statistics against a baseline.
+
+    Duration: when both sides carry at least MIN_SAMPLES_FOR_TEST
+    repetition samples (`samples_ms`, from `stage_distributions()`), a stage
+    regresses only if `detect_shift` finds it slower (Mann-Whitney p <
+    `alpha` and bootstrap CI lower bound > `min_effect`). Otherwise the
+    medians are compared with the fixed `margin`.
+
+    Memory: `median_allocated_blocks` past DEFAULT_ALLOCATION_MARGIN and
+    `median_peak_rss_mb` past `margin` are flagged as well.
 
     Returns a list of human-readable regression messages; empty if nothing
     regressed (including when the baseline is empty). A stage present in
     `summary_stats` but absent from `baseline` (e.g. a newly added pipeline
     stage) is not flagged — there is nothing to compare it against yet, and
-    a missing/zero median on either side is skipped rather than raising.
+    a missing/zero value on either side is skipped rather than raising.
     """
     regressions = []
     for stage, current in summary_stats.items():
@@ -540,15 +958,43 @@ def compare_to_baseline(
             continue
         baseline_median = baseline_stage.get('median_duration_ms')
         current_median = current.get('median_duration_ms')
-        if not baseline_median or not current_median:
-            continue
-        threshold = baseline_median * margin
-        if current_median > threshold:
-            pct_slower = (current_median / baseline_median - 1) * 100
+        if baseline_median and current_median:
+            current_samples = current.get('samples_ms') or []
+            baseline_samples = baseline_stage.get('samples_ms') or []
+            if min(len(current_samples), len(baseline_samples)) >= MIN_SAMPLES_FOR_TEST:
+                shift = detect_shift(current_samples, baseline_samples, alpha, min_effect)
+                if shift:
+                    regressions.append(
+                        f"{stage}: median {current_median:.1f}ms is "
+                        f"{(shift['ratio'] - 1) * 100:.0f}% slower than baseline "
+                        f"{baseline_median:.1f}ms (95% CI {shift['ratio_low']:.2f}-"
+                        f"{shift['ratio_high']:.2f}x, Mann-Whitney p={shift['p_value']:.4f})"
+                    )
+            else:
+                threshold = baseline_median * margin
+                if current_median > threshold:
+                    pct_slower = (current_median / baseline_median - 1) * 100
+                    regressions.append(
+                        f"{stage}: median {current_median:.1f}ms is {pct_slower:.0f}% slower than "
+                        f"baseline {baseline_median:.1f}ms (threshold: {threshold:.1f}ms, "
+                        f"margin: {margin}x)"
+                    )
+
+        baseline_blocks = baseline_stage.get('median_allocated_blocks')
+        current_blocks = current.get('median_allocated_blocks')
+        if (baseline_blocks and current_blocks and baseline_blocks >= ALLOCATION_FLOOR_BLOCKS
+                and current_blocks > baseline_blocks * DEFAULT_ALLOCATION_MARGIN):
+            regressions.append(
+                f"{stage}: {current_blocks:,.0f} allocated blocks vs baseline "
+                f"{baseline_blocks:,.0f} (margin: {DEFAULT_ALLOCATION_MARGIN}x)"
+            )
+
+        baseline_rss = baseline_stage.get('median_peak_rss_mb')
+        current_rss = current.get('median_peak_rss_mb')
+        if baseline_rss and current_rss and current_rss > baseline_rss * margin:
             regressions.append(
-                f"{stage}: median {current_median:.1f}ms is {pct_slower:.0f}% slower than "
-                f"baseline {baseline_median:.1f}ms (threshold: {threshold:.1f}ms, "
-                f"margin: {margin}x)"
+                f"{stage}: peak RSS {current_rss:.1f}MB vs baseline {baseline_rss:.1f}MB "
+                f"(margin: {margin}x)"
             )
     return regressions
 
@@ -0,0 +1,165 @@
+"""Distribution statistics for the benchmark regression gate.
+
+The original gate (#372/PERF-A-02) compared one run's median against the
+baseline median with a fixed 1.5x margin. One run of a ~10ms stage moves by
+tens of percent from scheduler noise alone, so the margin had to be wide
+enough to absorb that -- and a real 30% slowdown fit comfortably under it.
+
+With several warm repetitions on each side, the question becomes "is the
+current distribution shifted above the baseline one?", which these
+functions answer without assuming normality:
+
+- `mann_whitney_greater`: one-sided Mann-Whitney U test (exact for the
+  small, tie-free samples a benchmark run produces; normal approximation
+  with tie correction otherwise).
+- `bootstrap_ratio_ci`: percentile-bootstrap confidence interval for
+  median(current) / median(baseline) -- the effect size, so a statistically
+  significant but tiny shift isn't reported as a regression.
+
+Pure Python on purpose: samples are a handful of floats per stage, and the
+benchmark harness shouldn't grow a SciPy dependency for two tests.
+"""
+
+import math
+import random
+from statistics import median
+from typing import Dict, Optional, Sequence, Tuple
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation between ranks."""
+    if not values:
+        raise ValueError("percentile of an empty sample")
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def median_abs_deviation(values: Sequence[float]) -> float:
+    """Median absolute deviation from the median (unscaled)."""
+    center = median(values)
+    return median(abs(v - center) for v in values)
+
+
+def describe_samples(values: Sequence[float]) -> Dict[str, float]:
+    """median / MAD / p95 / min / max of a sample."""
+    return {
+        'median': median(values),
+        'mad': median_abs_deviation(values),
+        'p95': percentile(values, 95),
+        'min': min(values),
+        'max': max(values),
+    }
+
+
+def _exact_u_distribution(m: int, n: int):
+    """Counts of each U value over all C(m+n, m) orderings of two tie-free
+    samples of sizes m and n (index = U)."""
+    # counts[j][u]: orderings of a size-i sample against a size-j one with
+    # statistic u, built up one x-value at a time.
+    counts = [[1] for _ in range(n + 1)]
+    for _ in range(m):
+        new = [[1]]
+        for j in range(1, n + 1):
+            # Largest x either sits above all j y-values (adds j to U, from
+            # the previous i) or the largest y is above it (drops to j-1).
+            above = [0] * j + counts[j]
+            below = new[j - 1]
+            size = max(len(above), len(below))
+            new.append([(above[u] if u < len(above) else 0) + (below[u] if u < len(below) else 0)
+                        for u in range(size)])
+        counts = new
+    return counts[n]
+
+
+# Above this many combined samples the exact distribution table gets large;
+# the normal approximation is accurate well before that.
+_EXACT_MAX_TOTAL = 40
+
+
+def mann_whitney_greater(current: Sequence[float], baseline: Sequence[float]) -> float:
+    """One-sided Mann-Whitney U p-value for "current tends to be larger
+    than baseline" (i.e. slower, when the samples are durations)."""
+    m, n = len(current), len(baseline)
+    if m == 0 or n == 0:
+        raise ValueError("Mann-Whitney needs two non-empty samples")
+
+    # U = number of (current, baseline) pairs with current > baseline,
+    # ties counting half.
+    u = 0.0
+    for x in current:
+        for y in baseline:
+            if x > y:
+                u += 1.0
+            elif x == y:
+                u += 0.5
+
+    combined = list(current) + list(baseline)
+    has_ties = len(set(combined)) < len(combined)
+    if not has_ties and m + n <= _EXACT_MAX_TOTAL:
+        dist = _exact_u_distribution(m, n)
+        total = sum(dist)
+        return sum(dist[int(u):]) / total
+
+    # Normal approximation with tie and continuity correction.
+    mean_u = m * n / 2.0
+    tie_term = 0.0
+    for value in set(combined):
+        t = combined.count(value)
+        tie_term += t ** 3 - t
+    total = m + n
+    var_u = m * n / 12.0 * ((total + 1) - tie_term / (total * (total - 1)))
+    if var_u <= 0:
+        return 1.0  # every value identical: no evidence either way
+    z = (u - mean_u - 0.5) / math.sqrt(var_u)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def bootstrap_ratio_ci(
+    current: Sequence[float],
+    baseline: Sequence[float],
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> Tuple[float, float]:
+    """Percentile-bootstrap CI for median(current) / median(baseline).
+
+    Seeded so the same samples always produce the same interval -- a gate
+    that flips on reruns of identical data is worse than no gate.
+    """
+    if not current or not baseline:
+        raise ValueError("bootstrap needs two non-empty samples")
+    rng = random.Random(seed)
+    ratios = []
+    for _ in range(resamples):
+        base = median(rng.choices(baseline, k=len(baseline)))
+        cur = median(rng.choices(current, k=len(current)))
+        if base > 0:
+            ratios.append(cur / base)
+    if not ratios:
+        return (math.nan, math.nan)
+    tail = (1.0 - confidence) / 2 * 100
+    return (percentile(ratios, tail), percentile(ratios, 100 - tail))
+
+
+def detect_shift(
+    current: Sequence[float],
+    baseline: Sequence[float],
+    alpha: float,
+    min_effect: float,
+) -> Optional[Dict[str, float]]:
+    """Regression verdict for one metric's samples.
+
+    Flagged only when both tests agree: Mann-Whitney says current is
+    significantly larger (p < alpha) AND the bootstrap CI's lower bound on
+    the median ratio clears `min_effect` (e.g. 1.15 = "at least 15% slower
+    with 95% confidence"). Returns the evidence dict when flagged, else None.
+    """
+    p_value = mann_whitney_greater(current, baseline)
+    low, high = bootstrap_ratio_ci(current, baseline)
+    if p_value < alpha and low > min_effect:
+        return {'p_value': p_value, 'ratio_low': low, 'ratio_high': high,
+                'ratio': median(current) / median(baseline)}
+    return None
@@ -14,7 +14,13 @@ from benchmarks.performance_suite import (
     PerformanceBenchmark,
     compare_to_baseline,
     load_baseline,
+    merge_baseline,
+    stage_distributions,
     DEFAULT_BASELINE_REGRESSION_MARGIN,
+    DEFAULT_REGRESSION_ALPHA,
+    DEFAULT_REGRESSION_MIN_EFFECT,
+    DEFAULT_REPETITIONS,
+    DEFAULT_WARMUP_RUNS,
 )
 from utils.profiling import log_memory_usage
 
@@ -54,14 +60,22 @@ def run_baseline_benchmark(
     check_baseline: bool = True,
     update_baseline: bool = False,
     margin: float = DEFAULT_BASELINE_REGRESSION_MARGIN,
+    repetitions: int = DEFAULT_REPETITIONS,
+    warmup: int = DEFAULT_WARMUP_RUNS,
+    alpha: float = DEFAULT_REGRESSION_ALPHA,
+    min_effect: float = DEFAULT_REGRESSION_MIN_EFFECT,
 ) -> bool:
     """Run the baseline benchmark against the deterministic fixture set.
 
+    The fixture batch runs `warmup` discarded times, then `repetitions`
+    measured times; the baseline stores and is checked against the
+    per-stage distributions of those repetitions (see compare_to_baseline).
+
     Returns True if the run completed with no detected regression (or
     `check_baseline` is False / `update_baseline` is True), False if a
-    stage regressed past `margin` versus the checked-in baseline — the
-    caller should exit non-zero on False so a regression actually fails a
-    CI/local run instead of only printing a warning (#372/PERF-A-02).
+    stage regressed versus the checked-in baseline — the caller should
+    exit non-zero on False so a regression actually fails a CI/local run
+    instead of only printing a warning (#372/PERF-A-02).
     """
     print("=== MIDI2NES Baseline Performance Benchmark ===")
 
@@ -86,13 +100,15 @@ def run_baseline_benchmark(
     log_memory_usage("Pre-benchmark")
 
     # Run benchmarks
-    results = benchmark.run_batch_benchmarks(test_files)
+    runs = benchmark.run_repeated_benchmarks(test_files, repetitions, warmup)
+    results = [result for batch in runs for result in batch]
+    distributions = stage_distributions(runs)
 
     log_memory_usage("Post-benchmark")
 
     # Generate report
     report_path = "benchmark_results/performance_report.json"
-    report = benchmark.generate_report(report_path)
+    report = benchmark.generate_report(report_path, distributions)
 
     regression_free = True
 
@@ -105,15 +121,24 @@ def run_baseline_benchmark(
         print("\nNo benchmark results to compare against the baseline.")
         regression_free = False
     elif update_baseline:
-        BASELINE_PATH.write_text(json.dumps(report['summary_statistics'], indent=2) + "\n")
-        print(f"\nBaseline updated: {BASELINE_PATH}")
+        merged = merge_baseline(load_baseline(BASELINE_PATH), distributions)
+        BASELINE_PATH.write_text(json.dumps(merged, indent=2) + "\n")
+        print(f"\nBaseline updated: {BASELINE_PATH} ({repetitions} repetitions)")
+        kept = sorted(set(merged) - set(distributions))
+        if kept:
+            print(f"  Kept previous entries for stages not run here: {', '.join(kept)}")
     elif check_baseline:
         baseline = load_baseline(BASELINE_PATH)
         if not baseline:
             print(f"\nNo baseline found at {BASELINE_PATH} yet — "
                   "run with --update-baseline to create one.")
         else:
-            regressions = compare_to_baseline(report['summary_statistics'], baseline, margin)
+            regressions = compare_to_baseline(distributions, baseline, margin, alpha, min_effect)
+            unmeasured = sorted(set(baseline) - set(distributions))
+            if unmeasured:
+                # e.g. compile/validate on a machine without cc65 -- say so
+                # rather than let a skipped stage read as a passing one.
+                print(f"\nNot measured this run (no regression check): {', '.join(unmeasured)}")
             if regressions:
                 regression_free = False
                 print("\n⚠ PERFORMANCE REGRESSIONS DETECTED (vs baseline):")
@@ -121,6 +146,7 @@ def run_baseline_benchmark(
                     print(f"  - {r}")
             else:
                 print("\n✅ No performance regressions vs baseline.")
+            _print_distribution_table(distributions, baseline)
 
     # Print additional analysis
     if results:
@@ -179,6 +205,18 @@ def run_baseline_benchmark(
     return regression_free
 
 
+def _print_distribution_table(distributions, baseline) -> None:
+    """Per-stage median ± MAD this run vs the baseline median."""
+    print(f"\n{'stage':20} {'median':>10} {'MAD':>8} {'p95':>10} {'baseline':>10} "
+          f"{'peak RSS':>9} {'blocks':>9}")
+    for stage, stats in distributions.items():
+        base = baseline.get(stage, {}).get('median_duration_ms')
+        base_col = f"{base:.1f}ms" if base else "-"
+        print(f"  {stage:18} {stats['median_duration_ms']:8.1f}ms {stats['mad_duration_ms']:6.1f}ms "
+              f"{stats['p95_duration_ms']:8.1f}ms {base_col:>10} "
+              f"{stats['median_peak_rss_mb']:7.1f}MB {stats['median_allocated_blocks']:9,.0f}")
+
+
 def run_custom_benchmark(files: List[str], output_dir: str = "benchmark_results"):
     """
     Run benchmark on custom set of files.
@@ -285,10 +323,40 @@ Examples:
         "--baseline-margin",
         type=float,
         default=DEFAULT_BASELINE_REGRESSION_MARGIN,
-        help=f"Fail if a stage's median exceeds baseline * margin "
+        help=f"Fail if a stage's median exceeds baseline * margin when too few samples "
+             f"exist for the statistical test, or its peak RSS does "
              f"(default: {DEFAULT_BASELINE_REGRESSION_MARGIN})"
     )
 
+    parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=DEFAULT_REPETITIONS,
+        help=f"Measured runs over the fixture set (default: {DEFAULT_REPETITIONS})"
+    )
+
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=DEFAULT_WARMUP_RUNS,
+        help=f"Discarded warm-up runs before measuring (default: {DEFAULT_WARMUP_RUNS})"
+    )
+
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=DEFAULT_REGRESSION_ALPHA,
+        help=f"Mann-Whitney significance level for a regression (default: {DEFAULT_REGRESSION_ALPHA})"
+    )
+
+    parser.add_argument(
+        "--min-effect",
+        type=float,
+        default=DEFAULT_REGRESSION_MIN_EFFECT,
+        help=f"Smallest slowdown ratio the 95%% CI must exclude to flag a regression "
+             f"(default: {DEFAULT_REGRESSION_MIN_EFFECT})"
+    )
+
     args = parser.parse_args()
 
     # Determine which files to benchmark
@@ -306,6 +374,10 @@ Examples:
             check_baseline=not args.no_baseline_check,
             update_baseline=args.update_baseline,
             margin=args.baseline_margin,
+            repetitions=args.repetitions,
+            warmup=args.warmup,
+            alpha=args.alpha,
+            min_effect=args.min_effect,
         )
         sys.exit(0 if ok else 1)
 
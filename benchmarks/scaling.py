@@ -0,0 +1,212 @@
+"""Scaling benchmark: per-stage time/memory growth over a size sweep.
+
+Runs PerformanceBenchmark.run_full_pipeline on synthetic songs of
+geometrically increasing size (benchmarks/synthetic_midi.py) and fits a
+power law t = a * n^k to each stage's duration and traced peak memory
+against the song's note-event count. The exponent k is the stage's
+empirical complexity; projecting each fit to MAX_SYNTHETIC_EVENTS shows
+which stage falls over first as source material grows.
+
+Usage:
+    python main.py benchmark scale --max-events 128000 --time-budget 60
+"""
+
+import json
+import math
+import tempfile
+import time
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from benchmarks.performance_suite import PerformanceBenchmark
+from benchmarks.synthetic_midi import (
+    MAX_SYNTHETIC_EVENTS,
+    SyntheticMidiConfig,
+    write_synthetic_midi,
+)
+
+
+@dataclass
+class ScalingPoint:
+    """One stage's measurement at one sweep size."""
+    events: int
+    stage: str
+    duration_ms: float
+    traced_peak_mb: float
+    success: bool
+    error_message: str = ""
+
+
+def geometric_sizes(min_events: int, max_events: int, factor: float = 2.0) -> List[int]:
+    """Event counts min_events, min_events*factor, ... up to max_events
+    (always included as the last point)."""
+    if min_events < 1 or max_events < min_events:
+        raise ValueError(f"need 1 <= min_events <= max_events, got {min_events}..{max_events}")
+    if factor <= 1.0:
+        raise ValueError(f"factor must be > 1, got {factor}")
+    sizes = []
+    size = float(min_events)
+    while round(size) < max_events:
+        sizes.append(int(round(size)))
+        size *= factor
+    sizes.append(max_events)
+    return sizes
+
+
+def fit_power_law(xs: Sequence[float], ys: Sequence[float]) -> Optional[Dict[str, float]]:
+    """Least-squares fit of log(y) = log(a) + k*log(x).
+
+    Returns {'exponent': k, 'coefficient': a, 'r2': ...}, or None with fewer
+    than two usable (positive) points.
+    """
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(p[0] for p in points) / n
+    mean_y = sum(p[1] for p in points) / n
+    sxx = sum((p[0] - mean_x) ** 2 for p in points)
+    if sxx == 0:
+        return None
+    sxy = sum((p[0] - mean_x) * (p[1] - mean_y) for p in points)
+    k = sxy / sxx
+    intercept = mean_y - k * mean_x
+    ss_tot = sum((p[1] - mean_y) ** 2 for p in points)
+    ss_res = sum((p[1] - (intercept + k * p[0])) ** 2 for p in points)
+    r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0
+    return {'exponent': k, 'coefficient': math.exp(intercept), 'r2': r2}
+
+
+def describe_exponent(k: float) -> str:
+    """Coarse complexity class for a fitted exponent. Over the 2-3 decades a
+    sweep covers, n log n fits an exponent of roughly 1.05-1.25."""
+    if k < 0.3:
+        return "~O(1)"
+    if k < 1.05:
+        return "~O(n)"
+    if k < 1.3:
+        return "~O(n log n)"
+    if k < 1.7:
+        return "~O(n^1.5)"
+    if k < 2.3:
+        return "~O(n^2)"
+    return "worse than O(n^2)"
+
+
+def _stage_fit(points: List[ScalingPoint], attr: str) -> Optional[Dict]:
+    fit = fit_power_law([p.events for p in points], [getattr(p, attr) for p in points])
+    if fit is None:
+        return None
+    fit['complexity'] = describe_exponent(fit['exponent'])
+    fit['projected_at_max'] = fit['coefficient'] * MAX_SYNTHETIC_EVENTS ** fit['exponent']
+    return fit
+
+
+def run_scaling_benchmark(
+    sizes: Sequence[int],
+    base_config: Optional[SyntheticMidiConfig] = None,
+    output_dir: str = "benchmark_results",
+    time_budget_s: Optional[float] = None,
+) -> Dict:
+    """Benchmark every pipeline stage at each size in `sizes`.
+
+    Args:
+        sizes: Target note-event counts, smallest first.
+        base_config: Song shape; its `events` is overridden per size.
+        output_dir: Where PerformanceBenchmark writes its artifacts.
+        time_budget_s: Stop the sweep after the first size whose whole
+            pipeline run exceeds this many seconds (larger sizes would only
+            take longer).
+
+    Returns the report dict: raw points, per-stage fits, and the stages
+    that scale worst.
+    """
+    base_config = base_config or SyntheticMidiConfig()
+    benchmark = PerformanceBenchmark(output_dir=output_dir)
+    points: List[ScalingPoint] = []
+    runs = []
+    stopped_early = False
+
+    with tempfile.TemporaryDirectory(prefix="midi2nes_scale_") as temp_dir:
+        for size in sizes:
+            config = replace(base_config, events=size)
+            midi_path = Path(temp_dir) / f"synthetic_{size}.mid"
+            stats = write_synthetic_midi(midi_path, config)
+            events = stats['note_events']
+
+            print(f"Scaling run: {events:,} events")
+            start = time.perf_counter()
+            result = benchmark.run_full_pipeline(str(midi_path))
+            elapsed = time.perf_counter() - start
+
+            for stage in result.stages:
+                points.append(ScalingPoint(
+                    events=events,
+                    stage=stage.stage,
+                    duration_ms=stage.duration_ms,
+                    traced_peak_mb=stage.traced_peak_mb,
+                    success=stage.success,
+                    error_message=stage.error_message,
+                ))
+            runs.append({'events': events, 'total_duration_ms': result.total_duration_ms,
+                         'success': all(s.success for s in result.stages)})
+            print(f"  {elapsed:.2f}s total")
+
+            if time_budget_s is not None and elapsed > time_budget_s and size != sizes[-1]:
+                print(f"  Stopping sweep: {elapsed:.1f}s exceeds the {time_budget_s:.1f}s budget")
+                stopped_early = True
+                break
+
+    stages = {}
+    for stage in dict.fromkeys(p.stage for p in points):
+        ok = [p for p in points if p.stage == stage and p.success]
+        stages[stage] = {
+            'time': _stage_fit(ok, 'duration_ms'),
+            'memory': _stage_fit(ok, 'traced_peak_mb'),
+            'failed_at_events': [p.events for p in points if p.stage == stage and not p.success],
+        }
+
+    timed = {s: f['time'] for s, f in stages.items() if f['time']}
+    report = {
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'config': asdict(base_config),
+        'sizes': [r['events'] for r in runs],
+        'stopped_early': stopped_early,
+        'runs': runs,
+        'stages': stages,
+        'steepest_stage': max(timed, key=lambda s: timed[s]['exponent']) if timed else None,
+        'slowest_projected_stage': (
+            max(timed, key=lambda s: timed[s]['projected_at_max']) if timed else None),
+        'points': [asdict(p) for p in points],
+    }
+    return report
+
+
+def print_scaling_summary(report: Dict) -> None:
+    """Console table of per-stage fitted complexity."""
+    print("\n=== SCALING SUMMARY ===")
+    sizes = report['sizes']
+    if sizes:
+        print(f"Sizes: {', '.join(f'{s:,}' for s in sizes)} events"
+              f"{' (stopped early: time budget)' if report['stopped_early'] else ''}")
+    print(f"{'stage':20} {'time':>18} {'r2':>5} {'@1M events':>12}  {'memory':>18}")
+    for stage, fits in report['stages'].items():
+        t, m = fits['time'], fits['memory']
+        time_col = f"{t['complexity']} k={t['exponent']:.2f}" if t else "n/a"
+        r2_col = f"{t['r2']:.2f}" if t else ""
+        proj_col = f"{t['projected_at_max'] / 1000:.1f}s" if t else ""
+        mem_col = f"{m['complexity']} k={m['exponent']:.2f}" if m else "n/a"
+        print(f"  {stage:18} {time_col:>18} {r2_col:>5} {proj_col:>12}  {mem_col:>18}")
+        if fits['failed_at_events']:
+            print(f"    failed at: {', '.join(f'{e:,}' for e in fits['failed_at_events'])} events")
+    if report['steepest_stage']:
+        print(f"\nSteepest growth: {report['steepest_stage']}; "
+              f"slowest at {MAX_SYNTHETIC_EVENTS:,} events (projected): "
+              f"{report['slowest_projected_stage']}")
+
+
+def write_scaling_report(report: Dict, output_path) -> None:
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
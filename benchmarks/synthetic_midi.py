@@ -0,0 +1,204 @@
+"""Deterministic synthetic MIDI generator for scaling benchmarks.
+
+The committed fixtures in benchmarks/fixtures/ (#373/PERF-A-03) are a few
+hundred bytes each -- fine for a regression gate, useless for finding out
+how a stage behaves at 100x the size. This generates arbitrarily large,
+musically plausible Standard MIDI Files from a small config and a seed, so
+`benchmark scale` can sweep input size without shipping large binaries.
+
+Files are written straight to SMF bytes rather than through mido message
+objects: a 1M-event file would otherwise hold ~1M Python objects just to
+serialize it, and the generator's own cost would swamp small sweep points.
+
+Usage:
+    from benchmarks.synthetic_midi import SyntheticMidiConfig, write_synthetic_midi
+    stats = write_synthetic_midi("big.mid", SyntheticMidiConfig(events=200_000, tempo_changes=50))
+"""
+
+import math
+import random
+import struct
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Upper bound on generated note events (note_on + note_off messages).
+MAX_SYNTHETIC_EVENTS = 1_000_000
+
+# GM percussion lives on MIDI channel 10 (index 9); melodic tracks skip it.
+DRUM_CHANNEL = 9
+# Kick, snare, closed/open hat, low/high tom, crash, ride -- the GM notes
+# real drum tracks hit most, so the drum mapper sees a realistic mix.
+DRUM_NOTES = (36, 38, 42, 46, 45, 48, 49, 51)
+# Melodic notes stay inside the NES tone range (C1-B6) so the exporter's
+# range clamp doesn't dominate what is being measured.
+MELODIC_RANGE = (36, 84)
+# Chord tones above the root for each polyphony level (root, third, fifth,
+# octave, ...); the 4 is swapped for a 3 on minor voicings.
+CHORD_INTERVALS = (0, 4, 7, 12, 16, 19, 24, 28)
+# Velocities are drawn from a few dynamic levels rather than 1-127: every
+# distinct volume envelope becomes its own instrument in the exporter, and
+# real sequenced material reuses a handful of levels. Uniform random
+# velocities hit the 256-instrument ceiling within a few thousand notes.
+VELOCITY_LEVELS = (64, 80, 96, 112)
+DRUM_VELOCITY_LEVELS = (96, 112, 127)
+
+
+@dataclass
+class SyntheticMidiConfig:
+    """Shape of a generated song.
+
+    Attributes:
+        events: Target number of note events (note_on + note_off messages)
+            across all tracks; the generated file lands within one beat of it.
+        tracks: Melodic tracks, one MIDI channel each.
+        notes_per_beat: Note onsets per beat per melodic track.
+        polyphony: Simultaneous notes per onset (chords).
+        tempo_changes: set_tempo events spread evenly over the song, in
+            addition to the initial tempo.
+        drum_density: Fraction of sixteenth-note slots with a drum hit on an
+            extra channel-10 track (0 disables the drum track).
+        ticks_per_beat: MIDI resolution (PPQ).
+        seed: RNG seed; the same config always produces identical bytes.
+    """
+    events: int = 10_000
+    tracks: int = 4
+    notes_per_beat: float = 2.0
+    polyphony: int = 1
+    tempo_changes: int = 0
+    drum_density: float = 0.0
+    ticks_per_beat: int = 480
+    seed: int = 0
+
+    def validate(self):
+        if not 1 <= self.events <= MAX_SYNTHETIC_EVENTS:
+            raise ValueError(f"events must be between 1 and {MAX_SYNTHETIC_EVENTS:,}, got {self.events}")
+        if not 1 <= self.tracks <= 15:
+            raise ValueError(f"tracks must be between 1 and 15, got {self.tracks}")
+        if not 0 < self.notes_per_beat <= 16:
+            raise ValueError(f"notes_per_beat must be in (0, 16], got {self.notes_per_beat}")
+        if not 1 <= self.polyphony <= 8:
+            raise ValueError(f"polyphony must be between 1 and 8, got {self.polyphony}")
+        if self.tempo_changes < 0:
+            raise ValueError(f"tempo_changes must be >= 0, got {self.tempo_changes}")
+        if not 0.0 <= self.drum_density <= 1.0:
+            raise ValueError(f"drum_density must be in [0, 1], got {self.drum_density}")
+        if self.ticks_per_beat < 16:
+            raise ValueError(f"ticks_per_beat must be >= 16, got {self.ticks_per_beat}")
+        return True
+
+
+def _vlq(value: int) -> bytes:
+    """Encode a MIDI variable-length quantity."""
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _track_chunk(name: str, events: List[Tuple[int, int, bytes]]) -> bytes:
+    """Serialize (abs_tick, order, payload) events into an MTrk chunk.
+
+    `order` breaks ties at one tick: note-offs (0) sort before tempo/program
+    (1) before note-ons (2), so a repeated note is released before it is
+    re-struck rather than cut off by its own release.
+    """
+    events.sort(key=lambda e: (e[0], e[1]))
+    name_bytes = name.encode('ascii')
+    data = bytearray(b'\x00\xff\x03' + _vlq(len(name_bytes)) + name_bytes)
+    last_tick = 0
+    for tick, _order, payload in events:
+        data += _vlq(tick - last_tick)
+        data += payload
+        last_tick = tick
+    data += b'\x00\xff\x2f\x00'
+    return b'MTrk' + struct.pack('>I', len(data)) + bytes(data)
+
+
+def generate_synthetic_midi(config: SyntheticMidiConfig) -> Tuple[bytes, Dict]:
+    """Generate a Standard MIDI File (format 1) for `config`.
+
+    Returns (smf_bytes, stats) where stats records the exact note-event,
+    drum-event and tempo-change counts actually generated plus the config.
+    """
+    config.validate()
+    rng = random.Random(config.seed)
+    tpb = config.ticks_per_beat
+
+    # Note events each beat contributes (x2: every onset is an on + an off).
+    melodic_per_beat = config.tracks * config.notes_per_beat * config.polyphony * 2
+    drum_per_beat = config.drum_density * 4 * 2
+    beats = max(1, math.ceil(config.events / (melodic_per_beat + drum_per_beat)))
+    song_ticks = beats * tpb
+
+    chunks = []
+
+    # Conductor track: initial tempo plus evenly spaced changes (60-200 BPM).
+    tempo_events = [(0, 1, b'\xff\x51\x03' + (500000).to_bytes(3, 'big'))]
+    for i in range(1, config.tempo_changes + 1):
+        tick = i * song_ticks // (config.tempo_changes + 1)
+        tempo = 60_000_000 // rng.randint(60, 200)
+        tempo_events.append((tick, 1, b'\xff\x51\x03' + tempo.to_bytes(3, 'big')))
+    chunks.append(_track_chunk('Conductor', tempo_events))
+
+    note_events = 0
+    budget = config.events
+    onset_step = tpb / config.notes_per_beat
+    for track in range(config.tracks):
+        channel = track if track < DRUM_CHANNEL else track + 1
+        events = [(0, 1, bytes([0xC0 | channel, rng.randrange(0, 128)]))]
+        top_root = MELODIC_RANGE[1] - CHORD_INTERVALS[config.polyphony - 1]
+        root = rng.randint(MELODIC_RANGE[0], top_root)
+        onset = 0.0
+        while onset < song_ticks and budget >= 2:
+            start = int(onset)
+            # Legato-ish lines: mostly the full step, sometimes staccato.
+            length = max(1, int(onset_step * rng.choice((1.0, 1.0, 0.5, 0.75))))
+            root = min(top_root, max(MELODIC_RANGE[0], root + rng.randint(-4, 4)))
+            third = rng.choice((3, 4))  # minor or major voicing
+            chord = [root + (third if iv == 4 else iv) for iv in CHORD_INTERVALS[:config.polyphony]]
+            for note in chord:
+                if budget < 2:
+                    break
+                velocity = rng.choice(VELOCITY_LEVELS)
+                events.append((start, 2, bytes([0x90 | channel, note, velocity])))
+                events.append((start + length, 0, bytes([0x80 | channel, note, 0])))
+                budget -= 2
+                note_events += 2
+            onset += onset_step
+        chunks.append(_track_chunk(f'Synth_{track + 1}', events))
+
+    drum_events = 0
+    if config.drum_density > 0:
+        events = []
+        step = tpb // 4
+        for slot in range(beats * 4):
+            if budget < 2:
+                break
+            if rng.random() < config.drum_density:
+                note = rng.choice(DRUM_NOTES)
+                tick = slot * step
+                events.append((tick, 2, bytes([0x90 | DRUM_CHANNEL, note, rng.choice(DRUM_VELOCITY_LEVELS)])))
+                events.append((tick + step // 2, 0, bytes([0x80 | DRUM_CHANNEL, note, 0])))
+                budget -= 2
+                drum_events += 2
+        chunks.append(_track_chunk('Drums', events))
+
+    header = b'MThd' + struct.pack('>IHHH', 6, 1, len(chunks), tpb)
+    stats = {
+        'note_events': note_events + drum_events,
+        'drum_events': drum_events,
+        'tempo_changes': config.tempo_changes,
+        'beats': beats,
+        'config': asdict(config),
+    }
+    return header + b''.join(chunks), stats
+
+
+def write_synthetic_midi(path, config: SyntheticMidiConfig) -> Dict:
+    """Generate a synthetic song and write it to `path`. Returns its stats."""
+    data, stats = generate_synthetic_midi(config)
+    Path(path).write_bytes(data)
+    return stats
@@ -10,6 +10,7 @@ from pathlib import Path
 from typing import Optional, Tuple, List
 
 from core.exceptions import ToolchainError, CompilationError
+from utils.tracing import span
 
 
 class CC65Wrapper:
@@ -145,13 +146,14 @@ class CC65Wrapper:
                 cmd.extend(["-I", str(path)])
 
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=working_dir,
-                capture_output=True,
-                text=True,
-                timeout=120,
-            )
+            with span("ca65", cat="toolchain", source=source_file.name):
+                result = subprocess.run(
+                    cmd,
+                    cwd=working_dir,
+                    capture_output=True,
+                    text=True,
+                    timeout=120,
+                )
         except subprocess.TimeoutExpired:
             raise CompilationError(
                 f"ca65 timed out assembling {source_file.name}",
@@ -208,13 +210,14 @@ class CC65Wrapper:
                 cmd.extend(["-L", str(path)])
 
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=working_dir,
-                capture_output=True,
-                text=True,
-                timeout=120,
-            )
+            with span("ld65", cat="toolchain", objects=len(object_files)):
+                result = subprocess.run(
+                    cmd,
+                    cwd=working_dir,
+                    capture_output=True,
+                    text=True,
+                    timeout=120,
+                )
         except subprocess.TimeoutExpired:
             raise CompilationError(
                 "ld65 timed out linking ROM",
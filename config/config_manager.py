@@ -61,6 +61,7 @@ class PerformanceConfig:
     enable_caching: bool = True
     parallel_processing: bool = False
     progress_reporting: bool = True
+    max_workers: int = 0  # 0 = derive from usable CPUs (affinity + cgroup quota)
 
 
 @dataclass
@@ -185,7 +186,8 @@ class ConfigManager:
                 "max_memory_mb": 512,
                 "enable_caching": True,
                 "parallel_processing": False,
-                "progress_reporting": True
+                "progress_reporting": True,
+                "max_workers": 0
             },
             "quality": {
                 "envelope_resolution": 16,
@@ -289,6 +291,10 @@ class ConfigManager:
         max_memory = self.get("performance.max_memory_mb", 512)
         if not isinstance(max_memory, int) or max_memory < 64:
             errors.append("performance.max_memory_mb must be at least 64 MB")
+
+        max_workers = self.get("performance.max_workers", 0)
+        if not isinstance(max_workers, int) or isinstance(max_workers, bool) or max_workers < 0:
+            errors.append("performance.max_workers must be a non-negative integer (0 = auto)")
         
         # Validate NSF settings
         load_address = self.get("export.nsf.load_address", 0x8000)
@@ -325,7 +331,8 @@ class ConfigManager:
             max_memory_mb=config_dict.get("max_memory_mb", 512),
             enable_caching=config_dict.get("enable_caching", True),
             parallel_processing=config_dict.get("parallel_processing", False),
-            progress_reporting=config_dict.get("progress_reporting", True)
+            progress_reporting=config_dict.get("progress_reporting", True),
+            max_workers=config_dict.get("max_workers", 0)
         )
     
     @classmethod
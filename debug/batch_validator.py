@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+MIDI2NES Batch ROM Validator
+============================
+
+Validates a whole directory of ROMs in one call -- the batch counterpart of
+main.py's single-ROM `validate_rom` gate, for nightly soundtrack builds that
+produce hundreds of ROMs at once.
+
+- Each ROM is graded by the same ROMDiagnostics engine and the same
+  boot-fatal rule (`boot_fatal_defects`) the pipeline uses, so a ROM that
+  passes here passes the post-build gate and vice versa.
+- Diagnostics run across a process pool; ROMDiagnostics is pure-Python and
+  CPU-bound (the pattern-density scan alone walks every PRG byte), so
+  threads would serialize on the GIL.
+- Results are cached by the ROM's SHA-256, so an unchanged ROM is never
+  re-diagnosed on the next run.
+
+Usage:
+    python main.py validate-batch build/roms --json report.json --csv report.csv
+
+    from debug.batch_validator import validate_roms_batch, find_rom_files
+    entries = validate_roms_batch(find_rom_files("build/roms"))
+"""
+
+import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from debug.rom_diagnostics import ROMDiagnostics, boot_fatal_defects
+from utils.executor import (
+    default_workers, get_shared_executor, reset_shared_executor, submit_bounded,
+)
+
+# Bump whenever ROMDiagnostics' scoring or boot_fatal_defects' rule changes
+# meaning: a cached verdict recorded under an older rule must not be replayed
+# as if the current rule had produced it.
+CACHE_VERSION = 1
+
+# Default cache file, written next to the ROMs being validated so two build
+# trees never share (and clobber) one another's cache.
+DEFAULT_CACHE_NAME = ".midi2nes_validation_cache.json"
+
+# Below this many ROMs to (re)validate, diagnosing serially finishes before a
+# process pool would even finish spawning -- same trade-off as the pattern
+# detector's SERIAL_EVENT_THRESHOLD (#333/PERF-13).
+SERIAL_ROM_THRESHOLD = 2
+
+# CSV column order; matches the BatchValidationEntry fields a human scans
+# first, with the list-valued fields flattened to '; '-joined text.
+CSV_FIELDS = [
+    'rom_path', 'passed', 'overall_health', 'file_size', 'prg_banks',
+    'chr_banks', 'duration_ms', 'cached', 'sha256', 'fatal_defects',
+    'issues', 'error',
+]
+
+
+@dataclass
+class BatchValidationEntry:
+    """Verdict for one ROM in a batch validation run."""
+    rom_path: str
+    sha256: str
+    passed: bool
+    overall_health: str
+    file_size: int = 0
+    prg_banks: int = 0
+    chr_banks: int = 0
+    fatal_defects: List[str] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+    # Wall time spent diagnosing this ROM. For a cache hit this is the
+    # duration recorded when the verdict was first computed, so the report
+    # still shows what the ROM costs to validate; `cached` says it was not
+    # re-paid this run.
+    duration_ms: float = 0.0
+    cached: bool = False
+    error: str = ""
+
+
+def find_rom_files(directory, pattern: str = "*.nes", recursive: bool = False) -> List[str]:
+    """Return the ROM files under `directory` matching `pattern`, sorted so
+    report order is deterministic across runs/platforms (#117)."""
+    search_dir = Path(directory)
+    if not search_dir.is_dir():
+        raise FileNotFoundError(f"ROM directory not found: {search_dir}")
+    matches = search_dir.rglob(pattern) if recursive else search_dir.glob(pattern)
+    return [str(p) for p in sorted(matches) if p.is_file()]
+
+
+def hash_rom(rom_path) -> str:
+    """SHA-256 of the ROM's bytes -- the cache key, so a rebuilt ROM with
+    identical content is still a cache hit even if its mtime changed."""
+    digest = hashlib.sha256()
+    with open(rom_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def validate_rom_file(rom_path: str, sha256: str = "") -> BatchValidationEntry:
+    """Diagnose one ROM and grade it with the pipeline's pass/fail rule.
+
+    Never raises: a diagnostics failure is recorded on the entry as a failed
+    verdict (same fail-closed stance as main.py's validate_rom, #177/PL-04),
+    so one unreadable ROM can't abort a batch of hundreds. Top-level so it
+    can be pickled into a worker process.
+    """
+    start = time.perf_counter()
+    try:
+        result = ROMDiagnostics(verbose=False).diagnose_rom(rom_path)
+    except Exception as e:
+        return BatchValidationEntry(
+            rom_path=rom_path, sha256=sha256, passed=False,
+            overall_health="ERROR",
+            duration_ms=(time.perf_counter() - start) * 1000,
+            error=f"{type(e).__name__}: {e}",
+        )
+
+    fatal = boot_fatal_defects(result)
+    return BatchValidationEntry(
+        rom_path=rom_path,
+        sha256=sha256,
+        passed=not fatal and result.overall_health != "ERROR",
+        overall_health=result.overall_health,
+        file_size=result.file_size,
+        prg_banks=result.prg_banks,
+        chr_banks=result.chr_banks,
+        fatal_defects=fatal,
+        issues=list(result.issues),
+        duration_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+def load_validation_cache(cache_path) -> Dict[str, Dict]:
+    """Load the hash-keyed verdict cache, or {} if it is missing, corrupt, or
+    was written under a different CACHE_VERSION. A bad cache only costs a
+    re-validation, so it is discarded rather than raised."""
+    path = Path(cache_path)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+        return {}
+    entries = data.get('entries')
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_validation_cache(cache_path, cache: Dict[str, Dict]) -> None:
+    """Write the verdict cache atomically (write-then-rename), so a run killed
+    mid-write can't leave a truncated cache behind."""
+    path = Path(cache_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(json.dumps({'version': CACHE_VERSION, 'entries': cache},
+                                   separators=(',', ':')))
+    os.replace(tmp_path, path)
+
+
+def _entry_from_cache(rom_path: str, sha256: str, cached: Dict) -> BatchValidationEntry:
+    """Rebuild an entry from a cache record, re-pointing it at this run's
+    path (the same bytes may now live under a different filename)."""
+    return BatchValidationEntry(**{**cached, 'rom_path': rom_path, 'sha256': sha256, 'cached': True})
+
+
+def _cacheable(entry: BatchValidationEntry) -> Dict:
+    """Cache record for an entry. Path-independent fields only; an entry with
+    an `error` (e.g. a transient read failure) is never cached."""
+    record = asdict(entry)
+    for key in ('rom_path', 'sha256', 'cached'):
+        record.pop(key)
+    return record
+
+
+def _default_workers() -> int:
+    """Usable CPU count for this process, leaving one core free like the
+    pattern detector does."""
+    return default_workers()
+
+
+def _validate_task(task: tuple) -> BatchValidationEntry:
+    """`submit_bounded` adapter: `task` is (rom_path, sha256)."""
+    return validate_rom_file(*task)
+
+
+def _validate_uncached(pending: Sequence[tuple], max_workers: int) -> Dict[str, BatchValidationEntry]:
+    """Validate every (rom_path, sha256) in `pending`, returning entries keyed
+    by rom_path. Runs on the process-wide shared pool (utils/executor.py);
+    falls back to in-process validation if the pool can't be used,
+    mirroring ParallelPatternDetector's graceful fallback."""
+    results: Dict[str, BatchValidationEntry] = {}
+    if len(pending) < SERIAL_ROM_THRESHOLD or max_workers <= 1:
+        for rom_path, digest in pending:
+            results[rom_path] = validate_rom_file(rom_path, digest)
+        return results
+
+    workers = min(max_workers, len(pending))
+    try:
+        executor = get_shared_executor(min_workers=workers)
+        for (rom_path, _), future in submit_bounded(executor, _validate_task, pending, workers):
+            results[rom_path] = future.result()
+    except Exception as e:
+        print(f"  ❌ Parallel validation failed, falling back to serial: {e}")
+        if isinstance(e, BrokenProcessPool):
+            reset_shared_executor()
+        for rom_path, digest in pending:
+            if rom_path not in results:
+                results[rom_path] = validate_rom_file(rom_path, digest)
+    return results
+
+
+def validate_roms_batch(
+    rom_paths: Sequence[str],
+    max_workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+) -> List[BatchValidationEntry]:
+    """Validate many ROMs, skipping any whose content hash is already cached.
+
+    Args:
+        rom_paths: ROM files to validate.
+        max_workers: Process-pool size; defaults to the usable core count - 1.
+        cache_path: Hash-keyed verdict cache to read and update. None
+            disables caching entirely.
+
+    Returns:
+        One entry per input ROM, in input order.
+    """
+    if max_workers is None:
+        max_workers = _default_workers()
+    cache = load_validation_cache(cache_path) if cache_path else {}
+
+    entries: Dict[str, BatchValidationEntry] = {}
+    pending = []
+    for rom_path in rom_paths:
+        rom_path = str(rom_path)
+        try:
+            digest = hash_rom(rom_path)
+        except OSError as e:
+            entries[rom_path] = BatchValidationEntry(
+                rom_path=rom_path, sha256="", passed=False,
+                overall_health="ERROR", error=f"{type(e).__name__}: {e}")
+            continue
+        if digest in cache:
+            entries[rom_path] = _entry_from_cache(rom_path, digest, cache[digest])
+        else:
+            pending.append((rom_path, digest))
+
+    fresh = _validate_uncached(pending, max_workers)
+    entries.update(fresh)
+
+    if cache_path:
+        for entry in fresh.values():
+            if not entry.error:
+                cache[entry.sha256] = _cacheable(entry)
+        save_validation_cache(cache_path, cache)
+
+    return [entries[str(p)] for p in rom_paths]
+
+
+def summarize_batch(entries: Sequence[BatchValidationEntry]) -> Dict:
+    """Aggregate counts and timing for a batch report."""
+    durations = [e.duration_ms for e in entries if not e.cached]
+    return {
+        'total': len(entries),
+        'passed': sum(1 for e in entries if e.passed),
+        'failed': sum(1 for e in entries if not e.passed),
+        'cached': sum(1 for e in entries if e.cached),
+        'validated': len(durations),
+        'validation_time_ms': sum(durations),
+    }
+
+
+def write_json_report(entries: Sequence[BatchValidationEntry], output_path) -> None:
+    """Write the combined report: a summary block plus one record per ROM."""
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'summary': summarize_batch(entries),
+        'roms': [asdict(e) for e in entries],
+    }
+    path.write_text(json.dumps(report, indent=2))
+
+
+def write_csv_report(entries: Sequence[BatchValidationEntry], output_path) -> None:
+    """Write one CSV row per ROM (list fields joined with '; ')."""
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for entry in entries:
+            row = asdict(entry)
+            row['fatal_defects'] = '; '.join(entry.fatal_defects)
+            row['issues'] = '; '.join(entry.issues)
+            row['duration_ms'] = f"{entry.duration_ms:.1f}"
+            writer.writerow({k: row[k] for k in CSV_FIELDS})
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Cycle-counting 6502 (2A03) interpreter
+======================================
+
+A small, table-driven interpreter for the official 6502 instruction set,
+used by debug/cycle_harness.py to run generated ROMs headlessly and count
+the CPU cycles each NMI costs. It models what cycle accounting needs and
+nothing else:
+
+- every official opcode, with the documented base cycle counts, the +1
+  page-crossing penalty on indexed reads and the +1/+2 taken-branch
+  penalties;
+- the JMP ($xxFF) page-wrap quirk;
+- NMI/IRQ entry (7 cycles).
+
+The 2A03 has no decimal mode, so ADC/SBC ignore the D flag, exactly like
+the NES CPU. Unofficial opcodes raise `CPUError` -- ca65 never emits them,
+so hitting one means the CPU is executing data.
+
+Memory goes through a bus object with `read(addr)` and `write(addr, value)`.
+"""
+
+from typing import Callable, List, Optional, Tuple
+
+# Status flag bits
+FLAG_C = 0x01
+FLAG_Z = 0x02
+FLAG_I = 0x04
+FLAG_D = 0x08
+FLAG_B = 0x10
+FLAG_U = 0x20
+FLAG_V = 0x40
+FLAG_N = 0x80
+
+NMI_VECTOR = 0xFFFA
+RESET_VECTOR = 0xFFFC
+IRQ_VECTOR = 0xFFFE
+
+OPCODE_JSR = 0x20
+OPCODE_RTI = 0x40
+OPCODE_JMP_ABS = 0x4C
+OPCODE_RTS = 0x60
+
+
+class CPUError(Exception):
+    """The CPU hit an opcode it does not implement (usually: executing data)."""
+
+
+class CPU6502:
+    """6502 core with cycle counting; see the module docstring."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.a = 0
+        self.x = 0
+        self.y = 0
+        self.sp = 0xFD
+        self.p = FLAG_I | FLAG_U
+        self.pc = 0
+        self.cycles = 0
+        # Set by the addressing-mode helpers when an indexed address crosses
+        # a page; read instructions with a penalty add one cycle.
+        self._crossed = False
+
+    # -- memory helpers -------------------------------------------------
+
+    def read16(self, addr: int) -> int:
+        return self.bus.read(addr) | (self.bus.read((addr + 1) & 0xFFFF) << 8)
+
+    def _push(self, value: int) -> None:
+        self.bus.write(0x100 | self.sp, value)
+        self.sp = (self.sp - 1) & 0xFF
+
+    def _pull(self) -> int:
+        self.sp = (self.sp + 1) & 0xFF
+        return self.bus.read(0x100 | self.sp)
+
+    def _set_nz(self, value: int) -> None:
+        self.p = (self.p & 0x7D) | (value & 0x80) | (0 if value else FLAG_Z)
+
+    # -- control ----------------------------------------------------------
+
+    def reset(self) -> None:
+        self.sp = 0xFD
+        self.p = FLAG_I | FLAG_U
+        self.pc = self.read16(RESET_VECTOR)
+        self.cycles += 7
+
+    def _interrupt(self, vector: int, brk: bool = False) -> None:
+        """Push PC and P, set I and jump through `vector` (cycles are
+        counted by the caller: 7 for NMI/IRQ, BRK's table entry)."""
+        self._push(self.pc >> 8)
+        self._push(self.pc & 0xFF)
+        self._push(self.p | FLAG_U | (FLAG_B if brk else 0))
+        self.p |= FLAG_I
+        self.pc = self.read16(vector)
+
+    def nmi(self) -> int:
+        self._interrupt(NMI_VECTOR)
+        self.cycles += 7
+        return 7
+
+    def irq(self) -> int:
+        """Take an IRQ if the I flag allows it; returns the cycles used (0
+        when masked)."""
+        if self.p & FLAG_I:
+            return 0
+        self._interrupt(IRQ_VECTOR)
+        self.cycles += 7
+        return 7
+
+    def step(self) -> int:
+        """Execute one instruction; returns the cycles it took."""
+        opcode = self.bus.read(self.pc)
+        entry = _TABLE[opcode]
+        if entry is None:
+            raise CPUError(f"unimplemented opcode ${opcode:02X} at ${self.pc:04X}")
+        op, mode, cycles, penalty = entry
+        self.pc = (self.pc + 1) & 0xFFFF
+        self._crossed = False
+        addr = mode(self)
+        extra = op(self, addr) or 0
+        if penalty and self._crossed:
+            extra += 1
+        cycles += extra
+        self.cycles += cycles
+        return cycles
+
+
+# -- addressing modes (return the effective address, advance PC) --------------
+
+def _imp(cpu):
+    return None
+
+
+def _imm(cpu):
+    addr = cpu.pc
+    cpu.pc = (addr + 1) & 0xFFFF
+    return addr
+
+
+def _zp(cpu):
+    addr = cpu.bus.read(cpu.pc)
+    cpu.pc = (cpu.pc + 1) & 0xFFFF
+    return addr
+
+
+def _zpx(cpu):
+    addr = (cpu.bus.read(cpu.pc) + cpu.x) & 0xFF
+    cpu.pc = (cpu.pc + 1) & 0xFFFF
+    return addr
+
+
+def _zpy(cpu):
+    addr = (cpu.bus.read(cpu.pc) + cpu.y) & 0xFF
+    cpu.pc = (cpu.pc + 1) & 0xFFFF
+    return addr
+
+
+def _abs(cpu):
+    addr = cpu.read16(cpu.pc)
+    cpu.pc = (cpu.pc + 2) & 0xFFFF
+    return addr
+
+
+def _abx(cpu):
+    base = cpu.read16(cpu.pc)
+    cpu.pc = (cpu.pc + 2) & 0xFFFF
+    addr = (base + cpu.x) & 0xFFFF
+    cpu._crossed = (base ^ addr) > 0xFF
+    return addr
+
+
+def _aby(cpu):
+    base = cpu.read16(cpu.pc)
+    cpu.pc = (cpu.pc + 2) & 0xFFFF
+    addr = (base + cpu.y) & 0xFFFF
+    cpu._crossed = (base ^ addr) > 0xFF
+    return addr
+
+
+def _ind(cpu):
+    ptr = cpu.read16(cpu.pc)
+    cpu.pc = (cpu.pc + 2) & 0xFFFF
+    # JMP ($xxFF) fetches the high byte from $xx00, not the next page.
+    high = (ptr & 0xFF00) | ((ptr + 1) & 0xFF)
+    return cpu.bus.read(ptr) | (cpu.bus.read(high) << 8)
+
+
+def _izx(cpu):
+    zp = (cpu.bus.read(cpu.pc) + cpu.x) & 0xFF
+    cpu.pc = (cpu.pc + 1) & 0xFFFF
+    return cpu.bus.read(zp) | (cpu.bus.read((zp + 1) & 0xFF) << 8)
+
+
+def _izy(cpu):
+    zp = cpu.bus.read(cpu.pc)
+    cpu.pc = (cpu.pc + 1) & 0xFFFF
+    base = cpu.bus.read(zp) | (cpu.bus.read((zp + 1) & 0xFF) << 8)
+    addr = (base + cpu.y) & 0xFFFF
+    cpu._crossed = (base ^ addr) > 0xFF
+    return addr
+
+
+def _rel(cpu):
+    offset = cpu.bus.read(cpu.pc)
+    cpu.pc = (cpu.pc + 1) & 0xFFFF
+    return (cpu.pc + (offset - 256 if offset & 0x80 else offset)) & 0xFFFF
+
+
+# -- operations (addr is None for implied/accumulator forms) --------------------
+
+def _lda(cpu, addr):
+    cpu.a = cpu.bus.read(addr)
+    cpu._set_nz(cpu.a)
+
+
+def _ldx(cpu, addr):
+    cpu.x = cpu.bus.read(addr)
+    cpu._set_nz(cpu.x)
+
+
+def _ldy(cpu, addr):
+    cpu.y = cpu.bus.read(addr)
+    cpu._set_nz(cpu.y)
+
+
+def _sta(cpu, addr):
+    cpu.bus.write(addr, cpu.a)
+
+
+def _stx(cpu, addr):
+    cpu.bus.write(addr, cpu.x)
+
+
+def _sty(cpu, addr):
+    cpu.bus.write(addr, cpu.y)
+
+
+def _adc_value(cpu, value):
+    a = cpu.a
+    total = a + value + (cpu.p & FLAG_C)
+    result = total & 0xFF
+    overflow = FLAG_V if (~(a ^ value) & (a ^ result) & 0x80) else 0
+    cpu.p = (cpu.p & ~(FLAG_C | FLAG_V)) | (FLAG_C if total > 0xFF else 0) | overflow
+    cpu.a = result
+    cpu._set_nz(result)
+
+
+def _adc(cpu, addr):
+    _adc_value(cpu, cpu.bus.read(addr))
+
+
+def _sbc(cpu, addr):
+    _adc_value(cpu, cpu.bus.read(addr) ^ 0xFF)
+
+
+def _and(cpu, addr):
+    cpu.a &= cpu.bus.read(addr)
+    cpu._set_nz(cpu.a)
+
+
+def _ora(cpu, addr):
+    cpu.a |= cpu.bus.read(addr)
+    cpu._set_nz(cpu.a)
+
+
+def _eor(cpu, addr):
+    cpu.a ^= cpu.bus.read(addr)
+    cpu._set_nz(cpu.a)
+
+
+def _compare(cpu, register, addr):
+    value = cpu.bus.read(addr)
+    diff = (register - value) & 0xFF
+    cpu.p = (cpu.p & ~FLAG_C) | (FLAG_C if register >= value else 0)
+    cpu._set_nz(diff)
+
+
+def _cmp(cpu, addr):
+    _compare(cpu, cpu.a, addr)
+
+
+def _cpx(cpu, addr):
+    _compare(cpu, cpu.x, addr)
+
+
+def _cpy(cpu, addr):
+    _compare(cpu, cpu.y, addr)
+
+
+def _bit(cpu, addr):
+    value = cpu.bus.read(addr)
+    cpu.p = ((cpu.p & 0x3D) | (value & 0xC0) | (0 if value & cpu.a else FLAG_Z))
+
+
+def _rmw(shift):
+    """Read-modify-write wrapper: `shift(cpu, value) -> result` applied to
+    memory, or to A when addr is None (accumulator mode)."""
+    def op(cpu, addr):
+        if addr is None:
+            cpu.a = shift(cpu, cpu.a)
+            cpu._set_nz(cpu.a)
+        else:
+            value = shift(cpu, cpu.bus.read(addr))
+            cpu.bus.write(addr, value)
+            cpu._set_nz(value)
+    return op
+
+
+def _shift_asl(cpu, value):
+    cpu.p = (cpu.p & ~FLAG_C) | (value >> 7)
+    return (value << 1) & 0xFF
+
+
+def _shift_lsr(cpu, value):
+    cpu.p = (cpu.p & ~FLAG_C) | (value & 1)
+    return value >> 1
+
+
+def _shift_rol(cpu, value):
+    carry = cpu.p & FLAG_C
+    cpu.p = (cpu.p & ~FLAG_C) | (value >> 7)
+    return ((value << 1) | carry) & 0xFF
+
+
+def _shift_ror(cpu, value):
+    carry = cpu.p & FLAG_C
+    cpu.p = (cpu.p & ~FLAG_C) | (value & 1)
+    return (value >> 1) | (carry << 7)
+
+
+def _inc_value(cpu, value):
+    return (value + 1) & 0xFF
+
+
+def _dec_value(cpu, value):
+    return (value - 1) & 0xFF
+
+
+def _inx(cpu, addr):
+    cpu.x = (cpu.x + 1) & 0xFF
+    cpu._set_nz(cpu.x)
+
+
+def _iny(cpu, addr):
+    cpu.y = (cpu.y + 1) & 0xFF
+    cpu._set_nz(cpu.y)
+
+
+def _dex(cpu, addr):
+    cpu.x = (cpu.x - 1) & 0xFF
+    cpu._set_nz(cpu.x)
+
+
+def _dey(cpu, addr):
+    cpu.y = (cpu.y - 1) & 0xFF
+    cpu._set_nz(cpu.y)
+
+
+def _tax(cpu, addr):
+    cpu.x = cpu.a
+    cpu._set_nz(cpu.x)
+
+
+def _tay(cpu, addr):
+    cpu.y = cpu.a
+    cpu._set_nz(cpu.y)
+
+
+def _txa(cpu, addr):
+    cpu.a = cpu.x
+    cpu._set_nz(cpu.a)
+
+
+def _tya(cpu, addr):
+    cpu.a = cpu.y
+    cpu._set_nz(cpu.a)
+
+
+def _tsx(cpu, addr):
+    cpu.x = cpu.sp
+    cpu._set_nz(cpu.x)
+
+
+def _txs(cpu, addr):
+    cpu.sp = cpu.x
+
+
+def _pha(cpu, addr):
+    cpu._push(cpu.a)
+
+
+def _php(cpu, addr):
+    cpu._push(cpu.p | FLAG_B | FLAG_U)
+
+
+def _pla(cpu, addr):
+    cpu.a = cpu._pull()
+    cpu._set_nz(cpu.a)
+
+
+def _plp(cpu, addr):
+    cpu.p = (cpu._pull() & ~FLAG_B) | FLAG_U
+
+
+def _flag_op(mask, value):
+    def op(cpu, addr):
+        cpu.p = (cpu.p & ~mask) | value
+    return op
+
+
+def _branch(mask, want_set):
+    def op(cpu, target):
+        if bool(cpu.p & mask) != want_set:
+            return 0
+        page_cross = (cpu.pc ^ target) > 0xFF
+        cpu.pc = target
+        return 2 if page_cross else 1
+    return op
+
+
+def _jmp(cpu, addr):
+    cpu.pc = addr
+
+
+def _jsr(cpu, addr):
+    ret = (cpu.pc - 1) & 0xFFFF
+    cpu._push(ret >> 8)
+    cpu._push(ret & 0xFF)
+    cpu.pc = addr
+
+
+def _rts(cpu, addr):
+    low = cpu._pull()
+    cpu.pc = (((cpu._pull() << 8) | low) + 1) & 0xFFFF
+
+
+def _rti(cpu, addr):
+    _plp(cpu, None)
+    low = cpu._pull()
+    cpu.pc = (cpu._pull() << 8) | low
+
+
+def _brk(cpu, addr):
+    cpu.pc = (cpu.pc + 1) & 0xFFFF  # BRK skips a padding byte
+    cpu._interrupt(IRQ_VECTOR, brk=True)
+
+
+def _nop(cpu, addr):
+    pass
+
+
+def _build_table() -> List[Optional[Tuple[Callable, Callable, int, bool]]]:
+    table: List[Optional[Tuple[Callable, Callable, int, bool]]] = [None] * 256
+
+    def add(opcode, op, mode, cycles, penalty=False):
+        table[opcode] = (op, mode, cycles, penalty)
+
+    # The eight "group one" ALU instructions share one addressing layout.
+    group_one = [(0x00, _ora), (0x20, _and), (0x40, _eor), (0x60, _adc),
+                 (0x80, _sta), (0xA0, _lda), (0xC0, _cmp), (0xE0, _sbc)]
+    for base, op in group_one:
+        store = op is _sta
+        if not store:
+            add(base | 0x09, op, _imm, 2)
+        add(base | 0x05, op, _zp, 3)
+        add(base | 0x15, op, _zpx, 4)
+        add(base | 0x0D, op, _abs, 4)
+        add(base | 0x1D, op, _abx, 5 if store else 4, not store)
+        add(base | 0x19, op, _aby, 5 if store else 4, not store)
+        add(base | 0x01, op, _izx, 6)
+        add(base | 0x11, op, _izy, 6 if store else 5, not store)
+
+    # Shifts and INC/DEC: zp 5, zp,X 6, abs 6, abs,X 7.
+    for base, shift in [(0x00, _shift_asl), (0x20, _shift_rol), (0x40, _shift_lsr),
+                        (0x60, _shift_ror), (0xC0, _dec_value), (0xE0, _inc_value)]:
+        op = _rmw(shift)
+        if base < 0x80:
+            add(base | 0x0A, op, _imp, 2)
+        add(base | 0x06, op, _zp, 5)
+        add(base | 0x16, op, _zpx, 6)
+        add(base | 0x0E, op, _abs, 6)
+        add(base | 0x1E, op, _abx, 7)
+
+    add(0xA2, _ldx, _imm, 2)
+    add(0xA6, _ldx, _zp, 3)
+    add(0xB6, _ldx, _zpy, 4)
+    add(0xAE, _ldx, _abs, 4)
+    add(0xBE, _ldx, _aby, 4, True)
+    add(0xA0, _ldy, _imm, 2)
+    add(0xA4, _ldy, _zp, 3)
+    add(0xB4, _ldy, _zpx, 4)
+    add(0xAC, _ldy, _abs, 4)
+    add(0xBC, _ldy, _abx, 4, True)
+    add(0x86, _stx, _zp, 3)
+    add(0x96, _stx, _zpy, 4)
+    add(0x8E, _stx, _abs, 4)
+    add(0x84, _sty, _zp, 3)
+    add(0x94, _sty, _zpx, 4)
+    add(0x8C, _sty, _abs, 4)
+
+    add(0xE0, _cpx, _imm, 2)
+    add(0xE4, _cpx, _zp, 3)
+    add(0xEC, _cpx, _abs, 4)
+    add(0xC0, _cpy, _imm, 2)
+    add(0xC4, _cpy, _zp, 3)
+    add(0xCC, _cpy, _abs, 4)
+    add(0x24, _bit, _zp, 3)
+    add(0x2C, _bit, _abs, 4)
+
+    for opcode, op in [(0xE8, _inx), (0xC8, _iny), (0xCA, _dex), (0x88, _dey),
+                       (0xAA, _tax), (0xA8, _tay), (0x8A, _txa), (0x98, _tya),
+                       (0xBA, _tsx), (0x9A, _txs), (0xEA, _nop)]:
+        add(opcode, op, _imp, 2)
+    add(0x48, _pha, _imp, 3)
+    add(0x08, _php, _imp, 3)
+    add(0x68, _pla, _imp, 4)
+    add(0x28, _plp, _imp, 4)
+
+    for opcode, mask, value in [(0x18, FLAG_C, 0), (0x38, FLAG_C, FLAG_C),
+                                (0x58, FLAG_I, 0), (0x78, FLAG_I, FLAG_I),
+                                (0xB8, FLAG_V, 0), (0xD8, FLAG_D, 0), (0xF8, FLAG_D, FLAG_D)]:
+        add(opcode, _flag_op(mask, value), _imp, 2)
+
+    for opcode, mask, want_set in [(0x10, FLAG_N, False), (0x30, FLAG_N, True),
+                                   (0x50, FLAG_V, False), (0x70, FLAG_V, True),
+                                   (0x90, FLAG_C, False), (0xB0, FLAG_C, True),
+                                   (0xD0, FLAG_Z, False), (0xF0, FLAG_Z, True)]:
+        add(opcode, _branch(mask, want_set), _rel, 2)
+
+    add(OPCODE_JMP_ABS, _jmp, _abs, 3)
+    add(0x6C, _jmp, _ind, 5)
+    add(OPCODE_JSR, _jsr, _abs, 6)
+    add(OPCODE_RTS, _rts, _imp, 6)
+    add(OPCODE_RTI, _rti, _imp, 6)
+    add(0x00, _brk, _imp, 7)
+    return table
+
+
+_TABLE = _build_table()
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Headless NMI cycle-accounting harness
+=====================================
+
+Boots a built `.nes` on the pure-Python 6502 in debug/cpu6502.py (no
+external emulator), then delivers one NMI per frame and counts the CPU
+cycles each one costs. Reports, over N frames:
+
+- the music routine's cycles per frame -- by default the first subroutine
+  the NMI handler calls, which in every ROM NESProjectBuilder emits is
+  `jsr update_music` (audio_engine.asm's `audio_update`, or the
+  direct-export per-channel procs); pass `routine_address` to measure a
+  different one;
+- the whole NMI handler's cycles (entry through RTI);
+- DMC DMA stall cycles, from the DMC rate/length/loop registers the song
+  writes;
+- APU register writes per frame.
+
+Statistics (worst case, p99, mean) and histograms are computed with NumPy,
+so a test can assert a cycle budget directly:
+
+    report = measure_rom_cycles("build/song.nes", frames=600)
+    assert report.stats()['worst'] <= NTSC_VBLANK_CYCLES
+
+Usage:
+    python -m debug.cycle_harness song.nes [--frames 600] [--budget 2273] [--json]
+
+Scope: PRG mapping for NROM, MMC1 and MMC3 (mappers 0, 1, 4). The PPU is
+not emulated: $2002 always reads with the vblank bit set, PPU writes are
+only inspected for the NMI-enable bit, and MMC3 scanline IRQs never fire
+(the engine disables them). The reset code must settle into an idle
+`jmp *` loop, as NESProjectBuilder's `mainloop` does; otherwise the main
+loop is stepped for the rest of each frame.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from debug.cpu6502 import (
+    CPU6502, CPUError, OPCODE_JMP_ABS, OPCODE_JSR, OPCODE_RTI, OPCODE_RTS,
+)
+
+# NTSC 2A03 timing: 341 PPU dots x 262 scanlines / 3 per CPU cycle (the odd
+# frame's skipped dot makes the average 29780.5), and the 20 vblank
+# scanlines before rendering resumes.
+NTSC_FRAME_CYCLES = 29780.5
+NTSC_VBLANK_CYCLES = 2273
+
+# DMC output periods in CPU cycles per bit, indexed by $4010 bits 0-3 (NTSC).
+DMC_RATE_PERIODS = (428, 380, 340, 320, 286, 254, 226, 214,
+                    190, 160, 142, 128, 106, 84, 72, 54)
+# CPU cycles stolen by one DMC sample-byte fetch (3-4 depending on
+# alignment; the worst case is reported).
+DMC_DMA_STALL = 4
+
+BOOT_CYCLE_LIMIT = 5_000_000
+NMI_CYCLE_LIMIT = 200_000
+
+INES_MAGIC = b"NES\x1a"
+PRG_UNIT = 0x4000   # iNES PRG size unit (16KB)
+PRG_RAM_SIZE = 0x2000
+
+
+class HarnessError(Exception):
+    """The ROM could not be loaded or did not behave like a music ROM."""
+
+
+# -- cartridges ---------------------------------------------------------------
+
+class Cartridge:
+    """PRG-ROM mapped into four 8KB CPU slots ($8000/$A000/$C000/$E000)."""
+    mapper_number = -1
+
+    def __init__(self, prg: bytes):
+        if not prg or len(prg) % 0x2000:
+            raise HarnessError(f"PRG-ROM size {len(prg)} is not a multiple of 8KB")
+        self.prg = prg
+        self.bank_count_8k = len(prg) // 0x2000
+        self.slots = [0, 0, 0, 0]   # byte offset into prg for each slot
+        self.reset()
+
+    def reset(self) -> None:
+        last = self.bank_count_8k - 1
+        self.map_8k(0, max(0, last - 3))
+        self.map_8k(1, max(0, last - 2))
+        self.map_8k(2, max(0, last - 1))
+        self.map_8k(3, last)
+
+    def map_8k(self, slot: int, bank: int) -> None:
+        self.slots[slot] = (bank % self.bank_count_8k) * 0x2000
+
+    def map_16k(self, window: int, bank: int) -> None:
+        """Map 16KB `bank` at $8000 (window 0) or $C000 (window 1)."""
+        banks_16k = max(1, self.bank_count_8k // 2)
+        base = (bank % banks_16k) * 2
+        self.map_8k(window * 2, base)
+        self.map_8k(window * 2 + 1, base + 1)
+
+    def read(self, addr: int) -> int:
+        return self.prg[self.slots[(addr >> 13) & 3] + (addr & 0x1FFF)]
+
+    def write(self, addr: int, value: int) -> None:
+        pass
+
+
+class NROMCartridge(Cartridge):
+    """Mapper 0: 16KB (mirrored) or 32KB, no registers."""
+    mapper_number = 0
+
+    def reset(self) -> None:
+        for slot in range(4):
+            self.map_8k(slot, slot)  # map_8k's modulo mirrors a 16KB image
+
+
+class MMC1Cartridge(Cartridge):
+    """Mapper 1: serial 5-write registers; PRG modes 0-3 of the control
+    register. CHR banking has no effect on cycle counts and is ignored."""
+    mapper_number = 1
+
+    def reset(self) -> None:
+        self.shift = 0
+        self.shift_count = 0
+        self.control = 0x0C   # power-on: 16KB mode, last bank fixed at $C000
+        self.prg_bank = 0
+        self._apply()
+
+    def write(self, addr: int, value: int) -> None:
+        if value & 0x80:
+            self.shift = 0
+            self.shift_count = 0
+            self.control |= 0x0C
+            self._apply()
+            return
+        self.shift |= (value & 1) << self.shift_count
+        self.shift_count += 1
+        if self.shift_count < 5:
+            return
+        register = (addr >> 13) & 3
+        if register == 0:
+            self.control = self.shift
+        elif register == 3:
+            self.prg_bank = self.shift & 0x0F
+        self.shift = 0
+        self.shift_count = 0
+        self._apply()
+
+    def _apply(self) -> None:
+        mode = (self.control >> 2) & 3
+        banks_16k = max(1, self.bank_count_8k // 2)
+        if mode in (0, 1):
+            self.map_16k(0, self.prg_bank & 0x0E)
+            self.map_16k(1, (self.prg_bank & 0x0E) + 1)
+        elif mode == 2:
+            self.map_16k(0, 0)
+            self.map_16k(1, self.prg_bank)
+        else:
+            self.map_16k(0, self.prg_bank)
+            self.map_16k(1, banks_16k - 1)
+
+
+class MMC3Cartridge(Cartridge):
+    """Mapper 4: $8000 bank select / $8001 bank data; R6/R7 are the 8KB PRG
+    banks, placed by the PRG-mode bit (bit 6 of bank select). Mirroring,
+    PRG-RAM protect and the scanline IRQ registers are accepted and ignored."""
+    mapper_number = 4
+
+    def reset(self) -> None:
+        self.bank_select = 0
+        self.registers = [0, 2, 4, 5, 6, 7, 0, 1]
+        self._apply()
+
+    def write(self, addr: int, value: int) -> None:
+        if addr >= 0xA000:
+            return
+        if addr & 1:
+            self.registers[self.bank_select & 7] = value
+        else:
+            self.bank_select = value
+        self._apply()
+
+    def _apply(self) -> None:
+        second_last = self.bank_count_8k - 2
+        r6 = self.registers[6] & 0x3F
+        r7 = self.registers[7] & 0x3F
+        if self.bank_select & 0x40:
+            self.map_8k(0, second_last)
+            self.map_8k(2, r6)
+        else:
+            self.map_8k(0, r6)
+            self.map_8k(2, second_last)
+        self.map_8k(1, r7)
+        self.map_8k(3, self.bank_count_8k - 1)
+
+
+CARTRIDGES = {cls.mapper_number: cls for cls in (NROMCartridge, MMC1Cartridge, MMC3Cartridge)}
+
+
+def load_ines(data: bytes) -> Cartridge:
+    """Cartridge for an iNES image (header, optional trainer, PRG; CHR is
+    ignored)."""
+    if len(data) < 16 or data[:4] != INES_MAGIC:
+        raise HarnessError("not an iNES image (missing 'NES\\x1a' header)")
+    prg_size = data[4] * PRG_UNIT
+    mapper = (data[6] >> 4) | (data[7] & 0xF0)
+    offset = 16 + (512 if data[6] & 0x04 else 0)
+    prg = bytes(data[offset:offset + prg_size])
+    if len(prg) < prg_size:
+        raise HarnessError(f"truncated PRG-ROM: header says {prg_size} bytes, "
+                           f"file has {len(prg)}")
+    cartridge_cls = CARTRIDGES.get(mapper)
+    if cartridge_cls is None:
+        raise HarnessError(f"mapper {mapper} is not supported (NROM, MMC1 and MMC3 are)")
+    return cartridge_cls(prg)
+
+
+# -- APU / bus ----------------------------------------------------------------
+
+class DMCTracker:
+    """Enough of the DMC channel to account for its DMA cycle theft."""
+
+    def __init__(self):
+        self.period = DMC_RATE_PERIODS[0]
+        self.loop = False
+        self.length = 1
+        self.remaining = 0
+        self._bit_cycles = 0.0
+
+    def write(self, addr: int, value: int) -> None:
+        if addr == 0x4010:
+            self.period = DMC_RATE_PERIODS[value & 0x0F]
+            self.loop = bool(value & 0x40)
+        elif addr == 0x4013:
+            self.length = value * 16 + 1
+        elif addr == 0x4015:
+            if not value & 0x10:
+                self.remaining = 0
+            elif self.remaining == 0:
+                self.remaining = self.length
+
+    def advance(self, cycles: float) -> int:
+        """Play `cycles` CPU cycles of sample; returns the cycles DMA stole."""
+        if not self.remaining:
+            self._bit_cycles = 0.0
+            return 0
+        self._bit_cycles += cycles
+        fetches = 0
+        byte_cycles = self.period * 8
+        while self.remaining and self._bit_cycles >= byte_cycles:
+            self._bit_cycles -= byte_cycles
+            self.remaining -= 1
+            fetches += 1
+            if not self.remaining and self.loop:
+                self.remaining = self.length
+        return fetches * DMC_DMA_STALL
+
+
+class NESBus:
+    """CPU address space: 2KB RAM, PPU/APU registers, PRG-RAM, cartridge."""
+
+    def __init__(self, cartridge: Cartridge):
+        self.cartridge = cartridge
+        self.ram = bytearray(0x800)
+        self.prg_ram = bytearray(PRG_RAM_SIZE)
+        self.ppu_ctrl = 0
+        self.dmc = DMCTracker()
+        self.apu_writes = 0
+
+    @property
+    def nmi_enabled(self) -> bool:
+        return bool(self.ppu_ctrl & 0x80)
+
+    def read(self, addr: int) -> int:
+        if addr < 0x2000:
+            return self.ram[addr & 0x7FF]
+        if addr >= 0x8000:
+            return self.cartridge.read(addr)
+        if addr >= 0x6000:
+            return self.prg_ram[addr - 0x6000]
+        if addr < 0x4000:
+            # PPUSTATUS always reports vblank so warm-up waits fall through.
+            return 0x80 if (addr & 7) == 2 else 0
+        if addr == 0x4015:
+            return 0x10 if self.dmc.remaining else 0
+        return 0
+
+    def write(self, addr: int, value: int) -> None:
+        if addr < 0x2000:
+            self.ram[addr & 0x7FF] = value
+        elif addr >= 0x8000:
+            self.cartridge.write(addr, value)
+        elif addr >= 0x6000:
+            self.prg_ram[addr - 0x6000] = value
+        elif addr < 0x4000:
+            if (addr & 7) == 0:
+                self.ppu_ctrl = value
+        elif addr <= 0x4017:
+            self.apu_writes += 1
+            self.dmc.write(addr, value)
+
+
+# -- harness ------------------------------------------------------------------
+
+@dataclass
+class CycleReport:
+    """Per-frame cycle counts from `CycleHarness.run`."""
+    rom_path: str
+    mapper: int
+    frames: int
+    routine_address: Optional[int]
+    routine_cycles: List[int] = field(default_factory=list)
+    nmi_cycles: List[int] = field(default_factory=list)
+    dmc_stall_cycles: List[int] = field(default_factory=list)
+    apu_writes: List[int] = field(default_factory=list)
+
+    SERIES = ('routine_cycles', 'nmi_cycles', 'dmc_stall_cycles', 'apu_writes')
+
+    def _series(self, which: str) -> np.ndarray:
+        if which not in self.SERIES:
+            raise ValueError(f"unknown series {which!r}; expected one of {self.SERIES}")
+        return np.asarray(getattr(self, which), dtype=np.int64)
+
+    def stats(self, which: str = 'routine_cycles') -> Dict[str, float]:
+        """Worst case, p99 (an observed frame, not interpolated), mean."""
+        values = self._series(which)
+        if not values.size:
+            return {'worst': 0, 'p99': 0, 'mean': 0.0}
+        return {
+            'worst': int(values.max()),
+            'p99': int(np.percentile(values, 99, method='higher')),
+            'mean': float(values.mean()),
+        }
+
+    def histogram(self, which: str = 'routine_cycles',
+                  bins: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(counts, bin_edges) as returned by numpy.histogram."""
+        return np.histogram(self._series(which), bins=bins)
+
+    def frames_over(self, budget: float, which: str = 'routine_cycles') -> List[int]:
+        """Indices of frames whose count exceeds `budget`."""
+        return np.flatnonzero(self._series(which) > budget).tolist()
+
+    def summary(self) -> Dict:
+        return {
+            'rom_path': self.rom_path,
+            'mapper': self.mapper,
+            'frames': self.frames,
+            'routine_address': self.routine_address,
+            **{which: self.stats(which) for which in self.SERIES},
+        }
+
+
+class CycleHarness:
+    """Boot a ROM and run it frame by frame; see the module docstring."""
+
+    def __init__(self, rom: bytes, routine_address: Optional[int] = None,
+                 rom_path: str = "<memory>"):
+        self.cartridge = load_ines(rom)
+        self.bus = NESBus(self.cartridge)
+        self.cpu = CPU6502(self.bus)
+        self.routine_address = routine_address
+        self.rom_path = rom_path
+        self.idle_loop: Optional[int] = None
+        self.booted = False
+
+    def boot(self, max_cycles: int = BOOT_CYCLE_LIMIT) -> None:
+        """Run the reset handler until it reaches an idle `jmp *` loop (or
+        spends `max_cycles`, for a main loop that does real work)."""
+        cpu, bus = self.cpu, self.bus
+        cpu.reset()
+        limit = cpu.cycles + max_cycles
+        try:
+            while cpu.cycles < limit:
+                pc = cpu.pc
+                if (bus.read(pc) == OPCODE_JMP_ABS
+                        and bus.read(pc + 1) | (bus.read(pc + 2) << 8) == pc):
+                    self.idle_loop = pc
+                    break
+                cpu.step()
+        except CPUError as e:
+            raise HarnessError(f"reset code crashed: {e}") from e
+        if not bus.nmi_enabled:
+            raise HarnessError("reset code never enabled NMI ($2000 bit 7)")
+        self.booted = True
+
+    def run_frame(self) -> Tuple[int, int, int, int]:
+        """Deliver one NMI; returns (routine_cycles, nmi_cycles,
+        dmc_stall_cycles, apu_writes) for the frame."""
+        if not self.booted:
+            self.boot()
+        cpu, bus = self.cpu, self.bus
+        apu_writes_before = bus.apu_writes
+        start = cpu.cycles
+        entry_sp = cpu.sp
+        routine_cycles = 0
+        routine_sp = None        # SP value before the measured JSR
+        routine_start = 0
+        first_only = self.routine_address is None
+        measured = False
+        cpu.nmi()
+        try:
+            while True:
+                pc = cpu.pc
+                opcode = bus.read(pc)
+                if opcode == OPCODE_JSR and routine_sp is None and not (first_only and measured):
+                    target = bus.read(pc + 1) | (bus.read(pc + 2) << 8)
+                    if first_only or target == self.routine_address:
+                        routine_sp = cpu.sp
+                        routine_start = cpu.cycles
+                cpu.step()
+                if opcode == OPCODE_RTS and routine_sp is not None and cpu.sp == routine_sp:
+                    routine_cycles += cpu.cycles - routine_start
+                    routine_sp = None
+                    measured = True
+                elif opcode == OPCODE_RTI and cpu.sp == entry_sp:
+                    break
+                if cpu.cycles - start > NMI_CYCLE_LIMIT:
+                    raise HarnessError(f"NMI handler did not return within "
+                                       f"{NMI_CYCLE_LIMIT:,} cycles")
+        except CPUError as e:
+            raise HarnessError(f"NMI handler crashed: {e}") from e
+        nmi_cycles = cpu.cycles - start
+
+        if self.idle_loop is None:
+            self._run_main(NTSC_FRAME_CYCLES - nmi_cycles)
+        dmc_stall = bus.dmc.advance(NTSC_FRAME_CYCLES)
+        return routine_cycles, nmi_cycles, dmc_stall, bus.apu_writes - apu_writes_before
+
+    def _run_main(self, cycles: float) -> None:
+        cpu = self.cpu
+        end = cpu.cycles + cycles
+        try:
+            while cpu.cycles < end:
+                cpu.step()
+        except CPUError as e:
+            raise HarnessError(f"main loop crashed: {e}") from e
+
+    def run(self, frames: int) -> CycleReport:
+        report = CycleReport(self.rom_path, self.cartridge.mapper_number, frames,
+                             self.routine_address)
+        for _ in range(frames):
+            routine, nmi, stall, writes = self.run_frame()
+            report.routine_cycles.append(routine)
+            report.nmi_cycles.append(nmi)
+            report.dmc_stall_cycles.append(stall)
+            report.apu_writes.append(writes)
+        return report
+
+
+def measure_rom_cycles(rom_path: str, frames: int = 600,
+                       routine_address: Optional[int] = None) -> CycleReport:
+    """Boot `rom_path` and report `frames` frames of NMI cycle counts."""
+    rom = Path(rom_path).read_bytes()
+    return CycleHarness(rom, routine_address, rom_path=str(rom_path)).run(frames)
+
+
+def print_report(report: CycleReport, budget: float = NTSC_VBLANK_CYCLES) -> None:
+    routine = report.stats('routine_cycles')
+    nmi = report.stats('nmi_cycles')
+    stall = report.stats('dmc_stall_cycles')
+    print(f"\n{'='*60}")
+    print(f"⏱️  NMI cycle report: {Path(report.rom_path).name} "
+          f"(mapper {report.mapper}, {report.frames} frames)")
+    print(f"{'='*60}")
+    target = (f"${report.routine_address:04X}" if report.routine_address is not None
+              else "first JSR in NMI")
+    print(f"Music routine ({target}):")
+    print(f"   worst {routine['worst']:,}  p99 {routine['p99']:,}  mean {routine['mean']:,.1f} cycles")
+    print("NMI handler total:")
+    print(f"   worst {nmi['worst']:,}  p99 {nmi['p99']:,}  mean {nmi['mean']:,.1f} cycles")
+    if stall['worst']:
+        print(f"DMC DMA stalls: worst {stall['worst']:,} cycles/frame")
+    print(f"Budget {budget:,.0f} cycles: worst case uses {routine['worst'] / budget * 100:.1f}%")
+    over = report.frames_over(budget)
+    if over:
+        print(f"   ❌ {len(over)} frame(s) over budget (first: frame {over[0]})")
+
+    if report.frames:
+        counts, edges = report.histogram('routine_cycles')
+        peak = max(int(counts.max()), 1)
+        print("Histogram (music routine cycles):")
+        for count, low, high in zip(counts, edges, edges[1:]):
+            bar = '█' * round(int(count) / peak * 40)
+            print(f"   {low:8.0f}-{high:<8.0f} {int(count):6d} {bar}")
+    print(f"{'='*60}\n")
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Count the CPU cycles a MIDI2NES ROM's NMI music routine uses per frame")
+    parser.add_argument('rom_file', help='ROM to run')
+    parser.add_argument('--frames', type=int, default=600, help='Frames to run (default: 600)')
+    parser.add_argument('--routine', type=lambda s: int(s.lstrip('$'), 16),
+                        help='Hex address of the routine to measure (default: first JSR in the NMI handler)')
+    parser.add_argument('--budget', type=float, default=NTSC_VBLANK_CYCLES,
+                        help=f'Per-frame cycle budget; exit 1 if the worst frame exceeds it '
+                             f'(default: {NTSC_VBLANK_CYCLES}, NTSC vblank)')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    args = parser.parse_args()
+
+    try:
+        report = measure_rom_cycles(args.rom_file, args.frames, args.routine)
+    except (OSError, HarnessError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.json:
+        print(json.dumps(report.summary(), indent=2))
+    else:
+        print_report(report, args.budget)
+    sys.exit(1 if report.stats()['worst'] > args.budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,24 @@ class ROMDiagnosticResult:
     recommendations: List[str]
 
 
+def boot_fatal_defects(result: ROMDiagnosticResult) -> List[str]:
+    """Return the defects in `result` that make a ROM unbootable.
+
+    This is the pass/fail rule main.py's post-build `validate_rom` gate
+    applies on top of the advisory health score: invalid $FFFA-$FFFF vectors
+    or no APU init code at all fail the build, every other issue is only
+    warned about. Kept here (not inline in main.py) so the batch validator
+    in debug/batch_validator.py grades ROMs by exactly the same rule instead
+    of a second, drifting copy (#130's lesson, applied to the batch path).
+    """
+    defects = []
+    if not result.reset_vectors_valid:
+        defects.append("invalid reset/NMI/IRQ vectors ($FFFA-$FFFF)")
+    if result.apu_pattern_count == 0:
+        defects.append("no APU initialization code found")
+    return defects
+
+
 class ROMDiagnostics:
     """Comprehensive ROM diagnostics and validation."""
     
@@ -6,6 +6,7 @@ from tracker.pattern_detector import DrumPatternDetector
 from .dpcm_sample_manager import DPCMSampleManager
 from .drum_engine import DEFAULT_MIDI_DRUM_MAPPING, ADVANCED_MIDI_DRUM_MAPPING, DPCM_ROLE_ALIASES
 from .generate_dpcm_index import resolve_dpcm_sample_path
+from utils.memo import memoized
 
 
 @dataclass
@@ -202,6 +203,52 @@ class DrumMapperConfig:
 METALLIC_NOISE_ROLES = {"hihat_closed", "hihat_open", "hihat_pedal", "cowbell"}
 
 
+@memoized("dpcm_sample_candidates", maxsize=4096)
+def _dpcm_sample_candidates(midi_note: int, velocity: int,
+                            use_advanced: bool = True) -> Tuple[str, ...]:
+    """Sample names to try, best first, for a percussion note + velocity.
+
+    Depends only on the static drum mappings, so it is memoized across
+    mappers and songs; EnhancedDrumMapper._resolve_dpcm_sample_name picks the
+    first one its own index actually has.
+    """
+    candidates = []
+    if use_advanced and midi_note in ADVANCED_MIDI_DRUM_MAPPING:
+        drum_config = ADVANCED_MIDI_DRUM_MAPPING[midi_note]
+        velocity_name = _advanced_sample_name(drum_config, velocity)
+        if velocity_name:
+            candidates.append(velocity_name)
+        primary_name = drum_config.get("primary")
+        if primary_name and primary_name not in candidates:
+            candidates.append(primary_name)
+
+    default_name = DEFAULT_MIDI_DRUM_MAPPING.get(midi_note)
+    if default_name and default_name not in candidates:
+        candidates.append(default_name)
+        # Some role names don't match the catalog's filename even though
+        # a real sample exists under a different name (#315/DP-07).
+        alias_name = DPCM_ROLE_ALIASES.get(default_name)
+        if alias_name and alias_name not in candidates:
+            candidates.append(alias_name)
+    return tuple(candidates)
+
+
+def _advanced_sample_name(drum_config: Dict, velocity: int) -> Optional[str]:
+    """Velocity-split sample name from an ADVANCED_MIDI_DRUM_MAPPING entry."""
+    if not drum_config:
+        return None
+
+    sample_name = drum_config.get("primary")
+
+    # Check velocity ranges
+    for (v_min, v_max), v_sample in drum_config.get("velocity_ranges", {}).items():
+        if v_min <= velocity <= v_max:
+            sample_name = v_sample
+            break
+
+    return sample_name
+
+
 class EnhancedDrumMapper:
     def __init__(self, dpcm_index_path: str, config: Optional[DrumMapperConfig] = None):
         self.config = config or DrumMapperConfig()
@@ -452,18 +499,7 @@ class EnhancedDrumMapper:
     def _get_advanced_sample(self, drum_config: Dict,
                            velocity: int) -> Optional[str]:
         """Get appropriate sample name based on velocity and config"""
-        if not drum_config:
-            return None
-
-        sample_name = drum_config.get("primary")
-
-        # Check velocity ranges
-        for (v_min, v_max), v_sample in drum_config.get("velocity_ranges", {}).items():
-            if v_min <= velocity <= v_max:
-                sample_name = v_sample
-                break
-
-        return sample_name
+        return _advanced_sample_name(drum_config, velocity)
 
     def _resolve_dpcm_sample_name(self, midi_note: int, velocity: int,
                                  use_advanced: bool = True) -> Optional[str]:
@@ -474,27 +510,11 @@ class EnhancedDrumMapper:
         first miss: the advanced velocity-split name (e.g. "kick_hard"), then
         the advanced mapping's "primary" name (e.g. "kick"), then the plain
         DEFAULT_MIDI_DRUM_MAPPING role name for this note. Returns None if
-        nothing resolves, so the caller can fall back to noise.
+        nothing resolves, so the caller can fall back to noise. The candidate
+        list is memoized (_dpcm_sample_candidates); only the index lookup is
+        per-mapper.
         """
-        candidates = []
-        if use_advanced and midi_note in ADVANCED_MIDI_DRUM_MAPPING:
-            drum_config = ADVANCED_MIDI_DRUM_MAPPING[midi_note]
-            velocity_name = self._get_advanced_sample(drum_config, velocity)
-            if velocity_name:
-                candidates.append(velocity_name)
-            primary_name = drum_config.get("primary")
-            if primary_name and primary_name not in candidates:
-                candidates.append(primary_name)
-
-        default_name = DEFAULT_MIDI_DRUM_MAPPING.get(midi_note)
-        if default_name and default_name not in candidates:
-            candidates.append(default_name)
-            # Some role names don't match the catalog's filename even though
-            # a real sample exists under a different name (#315/DP-07).
-            alias_name = DPCM_ROLE_ALIASES.get(default_name)
-            if alias_name and alias_name not in candidates:
-                candidates.append(alias_name)
-
+        candidates = _dpcm_sample_candidates(midi_note, velocity, use_advanced)
         for name in candidates:
             if name in self.sample_index:
                 return name
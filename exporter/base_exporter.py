@@ -19,7 +19,7 @@ class BaseExporter:
     pass
 
 
-def atomic_write_text(output_path, content):
+def atomic_write_text(output_path, content, mode='w'):
     """Write `content` to `output_path` atomically (#385/SAFE-2026-07-19-3).
 
     The full output is already assembled in memory before this is called, so
@@ -31,14 +31,26 @@ def atomic_write_text(output_path, content):
     and Windows, so readers only ever see the old complete file or the new
     complete file, never a partial one. On failure the temp file is removed
     and `output_path` is left untouched.
+
+    Binary outputs (the NSF export) go through atomic_write_bytes.
     """
+    atomic_write_chunks(output_path, (content,), mode)
+
+
+def atomic_write_chunks(output_path, chunks, mode='w'):
+    """atomic_write_text for output produced piecewise: each item of the
+    `chunks` iterable is written as it is generated, so the whole document
+    never has to be held in memory (the FamiStudio export of a long song).
+    Same temp-file-and-replace guarantee, including when the generator
+    itself raises partway."""
     output_path = str(output_path)
     directory = os.path.dirname(output_path) or "."
     fd, tmp_path = tempfile.mkstemp(
         dir=directory, prefix=f".{os.path.basename(output_path)}.", suffix=".tmp")
     try:
-        with os.fdopen(fd, 'w') as f:
-            f.write(content)
+        with os.fdopen(fd, mode) as f:
+            for chunk in chunks:
+                f.write(chunk)
         os.replace(tmp_path, output_path)
     except BaseException:
         try:
@@ -46,3 +58,8 @@ def atomic_write_text(output_path, content):
         except OSError:
             pass
         raise
+
+
+def atomic_write_bytes(output_path, content):
+    """atomic_write_text for a `bytes` payload."""
+    atomic_write_text(output_path, content, mode='wb')
@@ -1,6 +1,10 @@
+import numpy as np
+
 from exporter.base_exporter import BaseExporter, atomic_write_text
 from nes.pitch_table import NES_NOTE_TABLE, NES_TRIANGLE_TABLE
 from core.exceptions import ExportError
+from utils.tracing import traced
+from utils.memo import memoized
 
 # NES APU register addresses
 APU_PULSE1_CTRL = 0x4000
@@ -48,23 +52,66 @@ TRIANGLE_CONTROL_ON = TRIANGLE_LINEAR_COUNTER_CONTROL | TRIANGLE_LINEAR_COUNTER_
 # corrupts the played note (#16).
 
 
+@memoized("timer_value", maxsize=512)
+def _timer_value(midi_note, channel):
+    # Clamp instead of returning 0: a 0 base combined with the encoder's
+    # +127-clamped pitch offset overflows the 11-bit timer at runtime
+    # instead of just playing the nearest representable note (#158).
+    midi_note = max(24, min(midi_note, 119))
+    # Use the shared per-channel table so this base timer is on the same
+    # scale as the frame `pitch` it is differenced against (#16, #12).
+    # Triangle uses the /32 table (an octave lower for the same timer), so
+    # mixing it with the pulse base would clamp the offset and corrupt the
+    # bass. Both tables already floor at 8 and clamp to 11-bit.
+    if channel == 'triangle':
+        return NES_TRIANGLE_TABLE[midi_note]
+    return NES_NOTE_TABLE[midi_note]
+
+
+def _timer_table(table):
+    """_timer_value for every MIDI note 0-127, as an array the bytecode
+    serializer indexes with a whole channel's notes at once."""
+    return np.array([table[n] for n in np.clip(np.arange(128), 24, 119).tolist()],
+                    dtype=np.int64)
+
+
+PULSE_TIMER_TABLE = _timer_table(NES_NOTE_TABLE)
+TRIANGLE_TIMER_TABLE = _timer_table(NES_TRIANGLE_TABLE)
+
+
+@memoized("compressed_macro", maxsize=4096)
+def _compress_macro_tuple(data):
+    """Memoized body of CA65Exporter._compress_macro over a tuple; see there."""
+    if not data:
+        return (0xFF,)
+
+    n = len(data)
+
+    # Baseline: No compression, just end with $FF (sustain)
+    best_compression = data + (0xFF,)
+    best_len = len(best_compression)
+
+    # Try Sustain Compression ($FF)
+    # E.g., [15, 14, 13, 10, 10, 10, 10] -> [15, 14, 13, 10, 0xFF]
+    sustain_idx = n - 1
+    while sustain_idx > 0 and data[sustain_idx - 1] == data[-1]:
+        sustain_idx -= 1
+
+    sustain_comp = data[:sustain_idx + 1] + (0xFF,)
+    if len(sustain_comp) < best_len:
+        best_compression = sustain_comp
+        best_len = len(sustain_comp)
+
+    return best_compression
+
+
 class CA65Exporter(BaseExporter):
     def __init__(self):
         super().__init__()
         
     def midi_note_to_timer_value(self, midi_note, channel=None):
-        # Clamp instead of returning 0: a 0 base combined with the encoder's
-        # +127-clamped pitch offset overflows the 11-bit timer at runtime
-        # instead of just playing the nearest representable note (#158).
-        midi_note = max(24, min(midi_note, 119))
-        # Use the shared per-channel table so this base timer is on the same
-        # scale as the frame `pitch` it is differenced against (#16, #12).
-        # Triangle uses the /32 table (an octave lower for the same timer), so
-        # mixing it with the pulse base would clamp the offset and corrupt the
-        # bass. Both tables already floor at 8 and clamp to 11-bit.
-        if channel == 'triangle':
-            return NES_TRIANGLE_TABLE[midi_note]
-        return NES_NOTE_TABLE[midi_note]
+        """Base timer for `midi_note` on `channel` (memoized, see _timer_value)."""
+        return _timer_value(midi_note, channel)
 
     # $FF is the only macro *control* byte the live engine understands:
     # _compress_macro appends it as end/sustain, and EVAL_MACRO
@@ -98,7 +145,7 @@ class CA65Exporter(BaseExporter):
             byte = 0xFD
         return byte
 
-    def estimate_direct_export_size(self, frames):
+    def estimate_direct_export_size(self, frames, runtime='indexed'):
         """Predict export_direct_frames' total RODATA byte count from
         ``frames`` alone, without actually exporting (#255/MAP-2026-07-05-1).
 
@@ -112,15 +159,39 @@ class CA65Exporter(BaseExporter):
         for each active tone channel (note+control+timer_lo+timer_hi), 3 for
         noise (note+ctrl+reg), 1 for dpcm (note) -- so a drift between the
         two would only under/over-estimate, never silently diverge in shape.
+        The 'rle' runtime's size depends on the music, so it is measured by
+        running the same encoder the export uses.
+        """
+        return sum(self._estimate_direct_stream_sizes(frames, runtime).values())
+
+    def largest_direct_stream_size(self, frames, runtime='indexed'):
+        """Byte size of the biggest single channel stream the 'streaming' or
+        'rle' runtime would emit for ``frames`` (0 if the song is empty).
+
+        Streams are bank-packed whole (_pack_direct_streams_into_banks), so a
+        mapper whose switchable window is smaller than this can't hold the
+        song on that runtime even when the total fits its pool -- main.py's
+        `--mapper auto` checks it before committing to a streamed export.
         """
+        return max(self._estimate_direct_stream_sizes(frames, runtime).values(), default=0)
+
+    def _estimate_direct_stream_sizes(self, frames, runtime):
+        """Per-channel byte counts behind estimate_direct_export_size: one
+        channel's interleaved stream for 'streaming'/'rle', or the sum of its
+        field tables for 'indexed' (the same bytes, just not interleaved)."""
         active = [name for name, data in frames.items()
                   if name != 'dpcm_sample_map' and data]
         if not active:
-            return 0
+            return {}
         max_frame = max(int(f) for name in active for f in frames[name].keys())
+        if runtime == 'rle':
+            return {
+                name: len(self._rle_encode_stream(
+                    name, self._direct_channel_columns(name, frames[name], max_frame)))
+                for name in active if name in self.DIRECT_STREAM_FIELDS}
         bytes_per_frame = {'pulse1': 4, 'pulse2': 4, 'triangle': 4, 'noise': 3, 'dpcm': 1}
-        per_frame_total = sum(bytes_per_frame.get(name, 0) for name in active)
-        return per_frame_total * (max_frame + 1)
+        return {name: bytes_per_frame[name] * (max_frame + 1)
+                for name in active if name in bytes_per_frame}
 
     def _pack_direct_tables_into_banks(self, table_names, table_length, bank_size):
         """Assign each direct-export frame table to a bank index (#255/MAP-2026-07-05-1).
@@ -197,6 +268,178 @@ class CA65Exporter(BaseExporter):
             f'{skip_label}:',
         ]
 
+    # ------------------------------------------------------------------
+    # Streaming direct-export runtime (export_direct_frames(runtime=
+    # 'streaming')). The indexed runtime above recomputes `table +
+    # frame_counter` for every table read -- ~25 cycles x up to 16 reads a
+    # frame, each preceded by a full MMC1 bank switch when bank-packed. The
+    # streaming runtime instead interleaves each channel's per-frame bytes
+    # into ONE `<channel>_stream` table (DIRECT_STREAM_FIELDS order) and keeps
+    # a `<channel>_ptr` zero-page cursor on the current frame: a field read
+    # is `ldy #offset / lda (ptr),y` (7 cycles), the cursor advances by the
+    # frame stride once per channel per frame, and a bank switch happens at
+    # most once per channel (none between channels packed into the same
+    # bank). The channel procs are the same _emit_*_proc emitters, handed
+    # _emit_stream_read_lines as their `read` callback.
+
+    DIRECT_RUNTIMES = ('indexed', 'streaming', 'rle')
+
+    DIRECT_STREAM_FIELDS = {
+        'pulse1': ('note', 'control', 'timer_lo', 'timer_hi'),
+        'pulse2': ('note', 'control', 'timer_lo', 'timer_hi'),
+        'triangle': ('note', 'control', 'timer_lo', 'timer_hi'),
+        'noise': ('note', 'ctrl', 'reg'),
+        'dpcm': ('note',),
+    }
+
+    def _emit_stream_read_lines(self, table_name, mapper=None, table_bank=None, header=0):
+        """CA65 lines that load A = the current frame's `table_name` byte from
+        its channel stream, Y left at the field offset. Same signature as
+        _emit_table_read_lines so the channel procs can take either.
+        ``header`` skips that many bytes in front of the fields (the 'rle'
+        runtime's run-length byte)."""
+        channel, field = table_name.split('_', 1)
+        offset = self.DIRECT_STREAM_FIELDS[channel].index(field) + header
+        return [
+            f'    ldy #{offset}',
+            f'    lda ({channel}_ptr),y',
+        ]
+
+    def _emit_stream_advance_lines(self, channel):
+        """CA65 lines that step `<channel>_ptr` to the next frame."""
+        stride = len(self.DIRECT_STREAM_FIELDS[channel])
+        if stride == 1:
+            return [
+                f'    inc {channel}_ptr',
+                f'    bne @{channel}_advanced',
+                f'    inc {channel}_ptr+1',
+                f'@{channel}_advanced:',
+            ]
+        return [
+            f'    lda {channel}_ptr',
+            '    clc',
+            f'    adc #{stride}',
+            f'    sta {channel}_ptr',
+            f'    bcc @{channel}_advanced',
+            f'    inc {channel}_ptr+1',
+            f'@{channel}_advanced:',
+        ]
+
+    # ------------------------------------------------------------------
+    # Run-length direct-export runtime (runtime='rle'). Same cursor scheme
+    # as 'streaming', but a stream holds records of [run, fields...]: the
+    # record's fields play for `run` (1-255) frames, and `<channel>_run`
+    # counts down to the next record. Decoding is constant time per frame
+    # (one DEC, plus a pointer step and one load when a run ends).
+    #
+    # A frame only joins the current run when the channel proc would do
+    # exactly the same thing for it: for pulse/triangle/dpcm that means
+    # the same note as the previous frame -- the procs ignore every other
+    # field while a note is held (`cmp last_<ch>_note / beq @sustain`) --
+    # and for noise, which rewrites its registers every frame, identical
+    # fields. So the APU sees the same writes as with the indexed tables,
+    # and a held note costs 0 bytes per frame instead of 4.
+
+    RLE_MAX_RUN = 255
+
+    def _direct_channel_columns(self, channel_name, channel_data, max_frame):
+        """Per-field byte-string columns for one channel, in
+        DIRECT_STREAM_FIELDS order."""
+        if channel_name == 'noise':
+            return self._noise_columns(channel_data, max_frame)
+        if channel_name == 'dpcm':
+            return (self._dpcm_column(channel_data, max_frame),)
+        return self._pulse_or_triangle_columns(channel_name, channel_data, max_frame)
+
+    def _rle_encode_stream(self, channel_name, columns):
+        """Encode a channel's columns as [run, fields...] records (flat list
+        of byte strings) -- see the comment above."""
+        whole_frame = channel_name == 'noise'
+        encoded = []
+        run_index = None
+        previous = None
+        for frame in zip(*columns):
+            key = frame if whole_frame else frame[0]
+            if (run_index is not None and key == previous
+                    and encoded[run_index] < self.RLE_MAX_RUN):
+                encoded[run_index] += 1
+            else:
+                run_index = len(encoded)
+                encoded.append(1)
+                encoded.extend(frame)
+            previous = key
+        return [f'${value:02X}' if isinstance(value, int) else value for value in encoded]
+
+    def _emit_rle_advance_lines(self, channel):
+        """CA65 lines that count down `<channel>_run` and, when the run ends,
+        step `<channel>_ptr` to the next record and load its run length."""
+        record = len(self.DIRECT_STREAM_FIELDS[channel]) + 1
+        return [
+            f'    dec {channel}_run',
+            f'    bne @{channel}_advanced',
+            f'    lda {channel}_ptr',
+            '    clc',
+            f'    adc #{record}',
+            f'    sta {channel}_ptr',
+            f'    bcc @{channel}_next_run',
+            f'    inc {channel}_ptr+1',
+            f'@{channel}_next_run:',
+            '    ldy #0',
+            f'    lda ({channel}_ptr),y',
+            f'    sta {channel}_run',
+            f'@{channel}_advanced:',
+        ]
+
+    def _pack_direct_streams_into_banks(self, stream_sizes, bank_size):
+        """Assign each channel stream (label -> byte size, in emission order)
+        to a bank index, filling banks in order -- the streaming-runtime
+        counterpart of _pack_direct_tables_into_banks.
+
+        Streams differ in size (stride x frames) and are packed whole, since
+        a channel's cursor walks its stream without re-banking. Raises
+        ExportError if one stream alone exceeds bank_size.
+        """
+        banks = {}
+        bank, used = 0, 0
+        for label, size in stream_sizes.items():
+            if size > bank_size:
+                raise ExportError(
+                    f"Direct-export stream {label} is {size:,} bytes, exceeding "
+                    f"the {bank_size:,}-byte switchable bank window -- shorten the "
+                    f"song, use the indexed direct runtime (one table per field), "
+                    f"or use a mapper with flat PRG addressing (NROM) or pattern "
+                    f"compression (MMC3)."
+                )
+            if used + size > bank_size:
+                bank, used = bank + 1, 0
+            banks[label] = bank
+            used += size
+        return banks
+
+    def _emit_stream_reset_proc(self, lines, channels, rle=False):
+        """Emit reset_stream_ptrs: point every channel cursor at frame 0
+        (and, for 'rle', load the first run length)."""
+        lines.append('.proc reset_stream_ptrs')
+        if rle:
+            lines.append('    ldy #0')
+        for channel in channels:
+            lines.extend([
+                f'    lda #<{channel}_stream',
+                f'    sta {channel}_ptr',
+                f'    lda #>{channel}_stream',
+                f'    sta {channel}_ptr+1',
+            ])
+            if rle:
+                lines.extend([
+                    f'    lda ({channel}_ptr),y',
+                    f'    sta {channel}_run',
+                ])
+        lines.extend([
+            '    rts',
+            '.endproc',
+            ''
+        ])
+
     # ------------------------------------------------------------------
     # Direct-export per-channel emitters (#136/TD-11). Extracted verbatim
     # from export_direct_frames -- same lines, same order, same asymmetric
@@ -213,11 +456,43 @@ class CA65Exporter(BaseExporter):
     def _emit_pulse_or_triangle_table(self, lines, channel_name, channel_data,
                                         max_frame, ensure_segment):
         """Emit the note/control/timer_lo/timer_hi frame tables for a pulse1,
-        pulse2, or triangle channel. Triangle's control byte has no volume/
-        duty (docs/APU_TRIANGLE_REFERENCE.md §1) -- see #364/NH-HW-04."""
+        pulse2, or triangle channel (columns from _pulse_or_triangle_columns)."""
         ensure_segment(f'{channel_name}_note')
         lines.append(f'; {channel_name.upper()} Frame Data Tables')
 
+        note_table, control_table, timer_lo_table, timer_hi_table = \
+            self._pulse_or_triangle_columns(channel_name, channel_data, max_frame)
+
+        # Write tables in chunks of 16 bytes per line
+        ensure_segment(f'{channel_name}_note')
+        lines.append(f'{channel_name}_note:')
+        for i in range(0, len(note_table), 16):
+            chunk = note_table[i:i+16]
+            lines.append(f'    .byte {", ".join(chunk)}')
+
+        ensure_segment(f'{channel_name}_control')
+        lines.append(f'{channel_name}_control:')
+        for i in range(0, len(control_table), 16):
+            chunk = control_table[i:i+16]
+            lines.append(f'    .byte {", ".join(chunk)}')
+
+        ensure_segment(f'{channel_name}_timer_lo')
+        lines.append(f'{channel_name}_timer_lo:')
+        for i in range(0, len(timer_lo_table), 16):
+            chunk = timer_lo_table[i:i+16]
+            lines.append(f'    .byte {", ".join(chunk)}')
+
+        ensure_segment(f'{channel_name}_timer_hi')
+        lines.append(f'{channel_name}_timer_hi:')
+        for i in range(0, len(timer_hi_table), 16):
+            chunk = timer_hi_table[i:i+16]
+            lines.append(f'    .byte {", ".join(chunk)}')
+        lines.append('')
+
+    def _pulse_or_triangle_columns(self, channel_name, channel_data, max_frame):
+        """Per-frame note/control/timer_lo/timer_hi byte strings for a pulse1,
+        pulse2, or triangle channel. Triangle's control byte has no volume/
+        duty (docs/APU_TRIANGLE_REFERENCE.md §1) -- see #364/NH-HW-04."""
         # Create arrays that are indexed by frame number
         # We use $00 for empty frames (silent)
         note_table = []
@@ -274,34 +549,19 @@ class CA65Exporter(BaseExporter):
             timer_lo_table.append(f"${pitch & 0xFF:02X}")
             timer_hi_table.append(f"${((pitch >> 8) & 0x07):02X}")
 
-        # Write tables in chunks of 16 bytes per line
-        ensure_segment(f'{channel_name}_note')
-        lines.append(f'{channel_name}_note:')
-        for i in range(0, len(note_table), 16):
-            chunk = note_table[i:i+16]
-            lines.append(f'    .byte {", ".join(chunk)}')
-
-        ensure_segment(f'{channel_name}_control')
-        lines.append(f'{channel_name}_control:')
-        for i in range(0, len(control_table), 16):
-            chunk = control_table[i:i+16]
-            lines.append(f'    .byte {", ".join(chunk)}')
-
-        ensure_segment(f'{channel_name}_timer_lo')
-        lines.append(f'{channel_name}_timer_lo:')
-        for i in range(0, len(timer_lo_table), 16):
-            chunk = timer_lo_table[i:i+16]
-            lines.append(f'    .byte {", ".join(chunk)}')
+        return note_table, control_table, timer_lo_table, timer_hi_table
 
-        ensure_segment(f'{channel_name}_timer_hi')
-        lines.append(f'{channel_name}_timer_hi:')
-        for i in range(0, len(timer_hi_table), 16):
-            chunk = timer_hi_table[i:i+16]
-            lines.append(f'    .byte {", ".join(chunk)}')
+    def _emit_noise_table(self, lines, channel_data, max_frame, emit_byte_table):
+        """Emit noise frame tables (#9), columns from _noise_columns."""
+        n_note, n_ctrl, n_reg = self._noise_columns(channel_data, max_frame)
+        lines.append('; NOISE Frame Data Tables')
+        emit_byte_table('noise_note', n_note)
+        emit_byte_table('noise_ctrl', n_ctrl)
+        emit_byte_table('noise_reg', n_reg)
         lines.append('')
 
-    def _emit_noise_table(self, lines, channel_data, max_frame, emit_byte_table):
-        """Emit noise frame tables (#9). note = 4-bit period index (0 =
+    def _noise_columns(self, channel_data, max_frame):
+        """Per-frame noise bytes (#9). note = 4-bit period index (0 =
         rest/change sentinel); ctrl = $400C byte ($30 | volume); reg =
         $400E byte (mode bit 7 | period). Drum hits are sparse, so empty
         frames are rests."""
@@ -317,14 +577,16 @@ class CA65Exporter(BaseExporter):
             n_note.append(f'${period:02X}')
             n_ctrl.append(f'${0x30 | vol:02X}')
             n_reg.append(f'${(mode << 7) | period:02X}')
-        lines.append('; NOISE Frame Data Tables')
-        emit_byte_table('noise_note', n_note)
-        emit_byte_table('noise_ctrl', n_ctrl)
-        emit_byte_table('noise_reg', n_reg)
-        lines.append('')
+        return n_note, n_ctrl, n_reg
 
     def _emit_dpcm_table(self, lines, channel_data, max_frame, emit_byte_table):
-        """Emit DPCM frame tables (#9). note = sample_id + 1 (0 = rest/change
+        """Emit DPCM frame tables (#9), column from _dpcm_column."""
+        lines.append('; DPCM Frame Data Tables')
+        emit_byte_table('dpcm_note', self._dpcm_column(channel_data, max_frame))
+        lines.append('')
+
+    def _dpcm_column(self, channel_data, max_frame):
+        """Per-frame DPCM bytes (#9). note = sample_id + 1 (0 = rest/change
         sentinel). The trigger reuses the packer/engine sample tables
         (dpcm_*_table)."""
         d_note = []
@@ -334,17 +596,16 @@ class CA65Exporter(BaseExporter):
                 d_note.append('$00')
                 continue
             d_note.append(f'${fd.get("note", 0) & 0xFF:02X}')
-        lines.append('; DPCM Frame Data Tables')
-        emit_byte_table('dpcm_note', d_note)
-        lines.append('')
+        return d_note
 
-    def _emit_pulse1_proc(self, lines, mapper, table_bank, bank_size):
+    def _emit_pulse1_proc(self, lines, mapper, table_bank, bank_size, read=None):
         """Emit the play_pulse1 playback subroutine."""
+        read = read or self._emit_table_read_lines
         lines.extend([
             '.proc play_pulse1',
             '    ; Get note number for this frame',
         ])
-        lines.extend(self._emit_table_read_lines('pulse1_note', mapper, table_bank))
+        lines.extend(read('pulse1_note', mapper, table_bank))
         lines.extend([
             '    ',
             '    ; Check if note changed',
@@ -365,19 +626,19 @@ class CA65Exporter(BaseExporter):
             '    ; New note - write full channel state',
             '    ; Get and write control byte',
         ])
-        lines.extend(self._emit_table_read_lines('pulse1_control', mapper, table_bank))
+        lines.extend(read('pulse1_control', mapper, table_bank))
         lines.extend([
             '    sta $4000',
             '    ',
             '    ; Get and write timer low',
         ])
-        lines.extend(self._emit_table_read_lines('pulse1_timer_lo', mapper, table_bank))
+        lines.extend(read('pulse1_timer_lo', mapper, table_bank))
         lines.extend([
             '    sta $4002',
             '    ',
             '    ; Get and write timer high with length counter reload',
         ])
-        lines.extend(self._emit_table_read_lines('pulse1_timer_hi', mapper, table_bank))
+        lines.extend(read('pulse1_timer_hi', mapper, table_bank))
         lines.extend([
             '    ora #$08               ; Set length reload for new notes',
             '    sta $4003',
@@ -396,13 +657,14 @@ class CA65Exporter(BaseExporter):
             ''
         ])
 
-    def _emit_pulse2_proc(self, lines, mapper, table_bank, bank_size):
+    def _emit_pulse2_proc(self, lines, mapper, table_bank, bank_size, read=None):
         """Emit the play_pulse2 playback subroutine."""
+        read = read or self._emit_table_read_lines
         lines.extend([
             '.proc play_pulse2',
             '    ; Get note number for this frame',
         ])
-        lines.extend(self._emit_table_read_lines('pulse2_note', mapper, table_bank))
+        lines.extend(read('pulse2_note', mapper, table_bank))
         lines.extend([
             '    ',
             '    ; Check if note changed',
@@ -421,19 +683,19 @@ class CA65Exporter(BaseExporter):
             '    ; New note - write full channel state',
             '    ; Get and write control byte',
         ])
-        lines.extend(self._emit_table_read_lines('pulse2_control', mapper, table_bank))
+        lines.extend(read('pulse2_control', mapper, table_bank))
         lines.extend([
             '    sta $4004',
             '    ',
             '    ; Get and write timer low',
         ])
-        lines.extend(self._emit_table_read_lines('pulse2_timer_lo', mapper, table_bank))
+        lines.extend(read('pulse2_timer_lo', mapper, table_bank))
         lines.extend([
             '    sta $4006',
             '    ',
             '    ; Get and write timer high',
         ])
-        lines.extend(self._emit_table_read_lines('pulse2_timer_hi', mapper, table_bank))
+        lines.extend(read('pulse2_timer_hi', mapper, table_bank))
         lines.extend([
             '    ora #$08',
             '    sta $4007',
@@ -450,13 +712,14 @@ class CA65Exporter(BaseExporter):
             ''
         ])
 
-    def _emit_triangle_proc(self, lines, mapper, table_bank, bank_size):
+    def _emit_triangle_proc(self, lines, mapper, table_bank, bank_size, read=None):
         """Emit the play_triangle playback subroutine."""
+        read = read or self._emit_table_read_lines
         lines.extend([
             '.proc play_triangle',
             '    ; Get note number for this frame',
         ])
-        lines.extend(self._emit_table_read_lines('triangle_note', mapper, table_bank))
+        lines.extend(read('triangle_note', mapper, table_bank))
         lines.extend([
             '    ',
             '    ; Check if note changed',
@@ -475,19 +738,19 @@ class CA65Exporter(BaseExporter):
             '    ; New note - write full channel state',
             '    ; Get and write control byte',
         ])
-        lines.extend(self._emit_table_read_lines('triangle_control', mapper, table_bank))
+        lines.extend(read('triangle_control', mapper, table_bank))
         lines.extend([
             '    sta $4008',
             '    ',
             '    ; Get and write timer low',
         ])
-        lines.extend(self._emit_table_read_lines('triangle_timer_lo', mapper, table_bank))
+        lines.extend(read('triangle_timer_lo', mapper, table_bank))
         lines.extend([
             '    sta $400A',
             '    ',
             '    ; Get and write timer high',
         ])
-        lines.extend(self._emit_table_read_lines('triangle_timer_hi', mapper, table_bank))
+        lines.extend(read('triangle_timer_hi', mapper, table_bank))
         lines.extend([
             '    ora #$08',
             '    sta $400B',
@@ -504,13 +767,14 @@ class CA65Exporter(BaseExporter):
             ''
         ])
 
-    def _emit_noise_proc(self, lines, mapper, table_bank, bank_size):
+    def _emit_noise_proc(self, lines, mapper, table_bank, bank_size, read=None):
         """Emit the play_noise playback subroutine."""
+        read = read or self._emit_table_read_lines
         lines.extend([
             '.proc play_noise',
             '    ; Index noise_note[frame_counter]',
         ])
-        lines.extend(self._emit_table_read_lines('noise_note', mapper, table_bank))
+        lines.extend(read('noise_note', mapper, table_bank))
         lines.extend(self._emit_safe_beq('@silence', 'noise_silence', bank_size,
                                           '; note 0 -> silence'))
         lines.extend([
@@ -523,12 +787,12 @@ class CA65Exporter(BaseExporter):
             '    ; reset the noise phase (docs/APU_NOISE_REFERENCE.md section 6),',
             '    ; so writing unconditionally is both safe and required.',
         ])
-        lines.extend(self._emit_table_read_lines('noise_ctrl', mapper, table_bank))
+        lines.extend(read('noise_ctrl', mapper, table_bank))
         lines.extend([
             '    sta $400C',
             '    ; $400E from noise_reg (mode bit 7 | period)',
         ])
-        lines.extend(self._emit_table_read_lines('noise_reg', mapper, table_bank))
+        lines.extend(read('noise_reg', mapper, table_bank))
         lines.extend([
             '    sta $400E',
             '    lda #$08             ; length counter load (harmless: halted)',
@@ -542,15 +806,16 @@ class CA65Exporter(BaseExporter):
             ''
         ])
 
-    def _emit_dpcm_proc(self, lines, mapper, table_bank, bank_size):
+    def _emit_dpcm_proc(self, lines, mapper, table_bank, bank_size, read=None):
         """Emit the play_dpcm playback subroutine. Mirrors audio_engine.asm
         @write_dpcm: trigger a one-shot sample on a new note
         (sample_id = note-1), reusing the packer sample tables."""
+        read = read or self._emit_table_read_lines
         lines.extend([
             '.proc play_dpcm',
             '    ; Index dpcm_note[frame_counter]',
         ])
-        lines.extend(self._emit_table_read_lines('dpcm_note', mapper, table_bank))
+        lines.extend(read('dpcm_note', mapper, table_bank))
         lines.extend([
             '    cmp last_dpcm_note',
         ])
@@ -600,14 +865,31 @@ class CA65Exporter(BaseExporter):
             ''
         ])
 
-    def export_direct_frames(self, frames, output_path, standalone=True, mapper=None):
+    def export_direct_frames(self, frames, output_path, standalone=True, mapper=None,
+                             runtime='indexed'):
         """Export frames data directly using efficient lookup tables.
 
         ``mapper`` selects the iNES header emitted for a standalone ROM; it
         defaults to the pipeline default (MMC3) so the header matches the
         project's linker config instead of hardcoding MMC1 (#36).
+
+        ``runtime`` picks the playback code: 'indexed' (one table per field,
+        read at `table + frame_counter`), 'streaming' (one interleaved
+        stream per channel behind a zero-page cursor -- see the comment above
+        _emit_stream_read_lines) or 'rle' (the same streams run-length
+        encoded -- see the comment above _direct_channel_columns). All three
+        make identical APU writes.
         """
-        print("🔧 CA65 Exporter: Direct frame export mode (table-based)")
+        if runtime not in self.DIRECT_RUNTIMES:
+            raise ExportError(
+                f"Unknown direct-export runtime {runtime!r}",
+                f"expected one of: {', '.join(self.DIRECT_RUNTIMES)}"
+            )
+        streaming = runtime in ('streaming', 'rle')
+        rle = runtime == 'rle'
+        print("🔧 CA65 Exporter: Direct frame export mode "
+              f"({'stream-based' if streaming else 'table-based'}"
+              f"{', run-length encoded' if rle else ''})")
 
         lines = []
         lines.append("; CA65 Assembly Export (Direct Frame Data)")
@@ -633,6 +915,8 @@ class CA65Exporter(BaseExporter):
         # the bank-pack marker above and the "MMC3 Macro Bytecode" bytecode marker.
         if frames.get('dpcm'):
             lines.append("; Direct export DPCM (MMC3-only)")
+        if streaming:
+            lines.append(f"; Direct export runtime: {runtime}")
         lines.append("")
 
         # Add header segment if standalone, derived from the selected mapper so
@@ -705,9 +989,32 @@ class CA65Exporter(BaseExporter):
         if has_dpcm:
             table_names.append('dpcm_note')
 
+        # Streaming: one interleaved stream per channel replaces that
+        # channel's tables, so bank-pack the streams instead.
+        stream_channels = [name for name in self.DIRECT_STREAM_FIELDS if name in all_channels]
+        streams = {}
+        if streaming:
+            for name in stream_channels:
+                columns = self._direct_channel_columns(name, all_channels[name], max_frame)
+                streams[f'{name}_stream'] = (
+                    self._rle_encode_stream(name, columns) if rle
+                    else [byte for frame in zip(*columns) for byte in frame])
+        stream_sizes = {label: len(data) for label, data in streams.items()}
+
         table_bank = {}
         if bank_size is not None:
-            table_bank = self._pack_direct_tables_into_banks(table_names, max_frame + 1, bank_size)
+            if streaming:
+                table_bank = self._pack_direct_streams_into_banks(stream_sizes, bank_size)
+            else:
+                table_bank = self._pack_direct_tables_into_banks(table_names, max_frame + 1, bank_size)
+
+        if streaming:
+            lines.append('.segment "ZEROPAGE"')
+            for name in stream_channels:
+                lines.append(f'{name}_ptr: .res 2')
+                if rle:
+                    lines.append(f'{name}_run: .res 1')
+            lines.append('')
 
         # Generate ROM data segment(s) with frame tables. When bank-packed,
         # segment switches are interleaved with table emission below instead
@@ -737,17 +1044,25 @@ class CA65Exporter(BaseExporter):
         # extracted to _emit_pulse_or_triangle_table/_emit_noise_table/
         # _emit_dpcm_table -- see the comment above those methods).
         # Format: For each active frame, store (note, control_byte, timer_lo, timer_hi)
-        for channel_name in ['pulse1', 'pulse2', 'triangle']:
-            if channel_name not in all_channels:
-                continue
-            self._emit_pulse_or_triangle_table(
-                lines, channel_name, all_channels[channel_name], max_frame, _ensure_segment)
+        if streaming:
+            for channel_name in stream_channels:
+                fields = ", ".join(self.DIRECT_STREAM_FIELDS[channel_name])
+                lines.append(f'; {channel_name.upper()} Frame Stream '
+                             + (f'(run, {fields} per record)' if rle else f'({fields} per frame)'))
+                _emit_byte_table(f'{channel_name}_stream', streams[f'{channel_name}_stream'])
+                lines.append('')
+        else:
+            for channel_name in ['pulse1', 'pulse2', 'triangle']:
+                if channel_name not in all_channels:
+                    continue
+                self._emit_pulse_or_triangle_table(
+                    lines, channel_name, all_channels[channel_name], max_frame, _ensure_segment)
 
-        if has_noise:
-            self._emit_noise_table(lines, all_channels['noise'], max_frame, _emit_byte_table)
+            if has_noise:
+                self._emit_noise_table(lines, all_channels['noise'], max_frame, _emit_byte_table)
 
-        if has_dpcm:
-            self._emit_dpcm_table(lines, all_channels['dpcm'], max_frame, _emit_byte_table)
+            if has_dpcm:
+                self._emit_dpcm_table(lines, all_channels['dpcm'], max_frame, _emit_byte_table)
 
         # Code segment with efficient playback routine
         lines.append('.segment "CODE"')
@@ -800,6 +1115,7 @@ class CA65Exporter(BaseExporter):
             '    lda #$00',
             '    sta frame_counter',
             '    sta frame_counter+1',
+            *(['    jsr reset_stream_ptrs'] if streaming else []),
             '    ',
             '    ; Enable NMI',
             '    lda #$80',
@@ -838,6 +1154,7 @@ class CA65Exporter(BaseExporter):
             '    lda #$00',
             '    sta frame_counter',
             '    sta frame_counter+1',
+            *(['    jsr reset_stream_ptrs'] if streaming else []),
             '@no_loop:',
             '    ; Restore registers',
             '    pla',
@@ -856,48 +1173,75 @@ class CA65Exporter(BaseExporter):
         lines.append(f'    lda frame_counter+1')
         lines.append(f'    cmp #>{max_frame}')
         lines.append('    bcc @in_range')
-        lines.append('    bne @done')
-        lines.append(f'    lda frame_counter')
-        lines.append(f'    cmp #<{max_frame}')
-        lines.append('    bcs @done')
+        if streaming:
+            # The bank switches and cursor advances below can put @done
+            # beyond a relative branch's reach, so exit right here instead.
+            lines.append('    bne @out_of_range')
+            lines.append(f'    lda frame_counter')
+            lines.append(f'    cmp #<{max_frame}')
+            lines.append('    bcc @in_range')
+            lines.append('@out_of_range:')
+            lines.append('    rts')
+        else:
+            lines.append('    bne @done')
+            lines.append(f'    lda frame_counter')
+            lines.append(f'    cmp #<{max_frame}')
+            lines.append('    bcs @done')
         lines.append('@in_range:')
         lines.append('')
 
         # Generate playback code for each channel with 16-bit indexing
-        if 'pulse1' in all_channels:
-            lines.extend([
-                '    ; === PULSE1 CHANNEL ===',
-                '    jsr play_pulse1',
-                ''
-            ])
-
-        if 'pulse2' in all_channels:
-            lines.extend([
-                '    ; === PULSE2 CHANNEL ===',
-                '    jsr play_pulse2',
-                ''
-            ])
-
-        if 'triangle' in all_channels:
-            lines.extend([
-                '    ; === TRIANGLE CHANNEL ===',
-                '    jsr play_triangle',
-                ''
-            ])
-
-        if has_noise:
-            lines.extend([
-                '    ; === NOISE CHANNEL ===',
-                '    jsr play_noise',
-                ''
-            ])
+        if streaming:
+            # Each channel's cursor advances after its proc returns; the
+            # proc's own branches then never have to. Bank switches only
+            # where the stream's bank differs from the previous channel's.
+            active_bank = None
+            for channel_name in stream_channels:
+                bank = table_bank.get(f'{channel_name}_stream')
+                lines.append(f'    ; === {channel_name.upper()} CHANNEL ===')
+                if bank is not None and bank != active_bank:
+                    lines.append(mapper.generate_bank_switch_code(bank))
+                    active_bank = bank
+                lines.append(f'    jsr play_{channel_name}')
+                lines.extend(self._emit_rle_advance_lines(channel_name) if rle
+                             else self._emit_stream_advance_lines(channel_name))
+                lines.append('')
+        else:
+            if 'pulse1' in all_channels:
+                lines.extend([
+                    '    ; === PULSE1 CHANNEL ===',
+                    '    jsr play_pulse1',
+                    ''
+                ])
+
+            if 'pulse2' in all_channels:
+                lines.extend([
+                    '    ; === PULSE2 CHANNEL ===',
+                    '    jsr play_pulse2',
+                    ''
+                ])
+
+            if 'triangle' in all_channels:
+                lines.extend([
+                    '    ; === TRIANGLE CHANNEL ===',
+                    '    jsr play_triangle',
+                    ''
+                ])
+
+            if has_noise:
+                lines.extend([
+                    '    ; === NOISE CHANNEL ===',
+                    '    jsr play_noise',
+                    ''
+                ])
+
+            if has_dpcm:
+                lines.extend([
+                    '    ; === DPCM CHANNEL ===',
+                    '    jsr play_dpcm',
+                    ''
+                ])
 
-        if has_dpcm:
-            lines.extend([
-                '    ; === DPCM CHANNEL ===',
-                '    jsr play_dpcm',
-                ''
-            ])
 
         lines.extend([
             '@done:',
@@ -911,20 +1255,30 @@ class CA65Exporter(BaseExporter):
         # _emit_noise_proc/_emit_dpcm_proc -- see the comment above those
         # methods; pulse1/pulse2 keep their historical comment asymmetry
         # verbatim so the emitted bytes are unchanged).
+        # The streaming procs never bank-switch (play_music_frame did it
+        # for them), so their branches stay short: bank_size=None.
+        def _rle_read_lines(table_name, mapper=None, table_bank=None):
+            return self._emit_stream_read_lines(table_name, mapper, table_bank, header=1)
+
+        proc_args = ((mapper, {}, None, _rle_read_lines if rle else self._emit_stream_read_lines)
+                     if streaming else (mapper, table_bank, bank_size))
         if 'pulse1' in all_channels:
-            self._emit_pulse1_proc(lines, mapper, table_bank, bank_size)
+            self._emit_pulse1_proc(lines, *proc_args)
 
         if 'pulse2' in all_channels:
-            self._emit_pulse2_proc(lines, mapper, table_bank, bank_size)
+            self._emit_pulse2_proc(lines, *proc_args)
 
         if 'triangle' in all_channels:
-            self._emit_triangle_proc(lines, mapper, table_bank, bank_size)
+            self._emit_triangle_proc(lines, *proc_args)
 
         if has_noise:
-            self._emit_noise_proc(lines, mapper, table_bank, bank_size)
+            self._emit_noise_proc(lines, *proc_args)
 
         if has_dpcm:
-            self._emit_dpcm_proc(lines, mapper, table_bank, bank_size)
+            self._emit_dpcm_proc(lines, *proc_args)
+
+        if streaming:
+            self._emit_stream_reset_proc(lines, stream_channels, rle)
 
         lines.extend([
             '.proc irq',
@@ -956,6 +1310,7 @@ class CA65Exporter(BaseExporter):
                 '    lda #$00',
                 '    sta frame_counter',
                 '    sta frame_counter+1',
+                *(['    jsr reset_stream_ptrs'] if streaming else []),
                 '    rts',
                 '',
                 'update_music:',
@@ -980,6 +1335,7 @@ class CA65Exporter(BaseExporter):
                 '    lda #$00',
                 '    sta frame_counter',
                 '    sta frame_counter+1',
+                *(['    jsr reset_stream_ptrs'] if streaming else []),
                 '@no_loop:',
                 '    rts'
             ])
@@ -1000,6 +1356,8 @@ class CA65Exporter(BaseExporter):
 
         # Calculate total data size (4 tables per channel: note, control, timer_lo, timer_hi)
         total_bytes = (max_frame + 1) * 4 * len(all_channels)
+        if streaming:
+            total_bytes = sum(stream_sizes.values())
         print(f"✅ Table-based export complete: {output_path}")
         print(f"   Data size: {total_bytes:,} bytes ({total_bytes/1024:.1f} KB)")
         print(f"   Channels exported: {', '.join(all_channels.keys())}")
@@ -1040,28 +1398,11 @@ class CA65Exporter(BaseExporter):
         engine can decode, so loop compression is intentionally not
         attempted here (#163/NH-21) rather than emitting a format the
         engine cannot honor.
-        """
-        if not data:
-            return [0xFF]
-
-        n = len(data)
-
-        # Baseline: No compression, just end with $FF (sustain)
-        best_compression = data + [0xFF]
-        best_len = len(best_compression)
-
-        # Try Sustain Compression ($FF)
-        # E.g., [15, 14, 13, 10, 10, 10, 10] -> [15, 14, 13, 10, 0xFF]
-        sustain_idx = n - 1
-        while sustain_idx > 0 and data[sustain_idx - 1] == data[-1]:
-            sustain_idx -= 1
 
-        sustain_comp = data[:sustain_idx + 1] + [0xFF]
-        if len(sustain_comp) < best_len:
-            best_compression = sustain_comp
-            best_len = len(sustain_comp)
-
-        return best_compression
+        Memoized by content (performance.enable_caching): the same
+        envelopes recur on every note of an instrument.
+        """
+        return list(_compress_macro_tuple(tuple(data)))
 
     # Channel order used throughout the bytecode engine -- sequence labels,
     # channel_start_banks/song_table entries, and the engine's stream_*, x
@@ -1099,54 +1440,106 @@ class CA65Exporter(BaseExporter):
         _emit_period_table('triangle_period_low', NES_TRIANGLE_TABLE, lambda p: p & 0xFF)
         _emit_period_table('triangle_period_high', NES_TRIANGLE_TABLE, lambda p: (p >> 8) & 0xFF)
 
-    def _build_song_bytecode(self, frames, label_prefix='', start_bank=0):
-        """Serialize one song's per-channel frames into MMC3 macro-bytecode.
-
-        Walks `frames` into per-channel note/duration events, de-duplicates
-        them into volume/arp/pitch/duty macros and instruments, and emits
-        the instrument table, macro byte streams, and banked sequence
-        bytecode for all 5 channels (`SEQUENCE_CHANNELS`).
-
-        `label_prefix` is prepended to every symbol this song defines
-        (`instrument_table`, `macro_*`, and each channel's `*_sequence` /
-        bank-jump labels) so a multi-song build's N songs can coexist in one
-        music.asm without colliding ca65 symbol names (#30/F-13). The
-        single-song caller (`export_tables_with_patterns`) passes `''` --
-        byte-identical output to before this was extracted.
-
-        `start_bank` is the first `BANK_NN` this song's sequence data may
-        use. Returns `next_bank = <song's last used bank> + 1` -- a
-        multi-song caller always starts the following song in a fresh bank
-        rather than packing two songs' sequence bytes into the same
-        `BANK_NN` segment, since this function's own `bytes_in_current_bank`
-        accounting (and its overflow check against `MAX_SEQUENCE_BANK`) only
-        tracks bytes *within this call*; sharing a bank across calls would
-        silently desync that accounting from ca65's real per-segment size.
+    # Macro kinds in instrument-row order: each instrument_table row lists
+    # its vol/arp/pitch/duty macro pointers in exactly this order.
+    MACRO_KINDS = ('vol', 'arp', 'pitch', 'duty')
+
+    def _new_macro_pool(self):
+        """Empty macro pool: per kind, a (compressed sequence -> id) dict and
+        the id-ordered definition list, both seeded with the sustain-only
+        macro at id 0. One pool per song for a single-song export; one pool
+        for the whole bank in a jukebox export (cross-song dedup)."""
+        return {kind: ({(0xFF,): 0}, [(0xFF,)]) for kind in self.MACRO_KINDS}
+
+    def _channel_frame_arrays(self, channel_frames):
+        """One channel's frames as dense per-frame arrays over 0..max_frame:
+        `(note, vol, duty, pitch, has_pitch)`. A frame with no data is note 0,
+        volume 0, duty from the default $80 control byte; a frame whose
+        volume is 0 is a rest (note 0). `pitch` is only meaningful where
+        `has_pitch`. Returns None for a channel with no frames."""
+        # A frame present under both keys reads its str entry, as a
+        # `frames.get(str(i), frames.get(i))` lookup would.
+        merged = {}
+        str_keyed = []
+        for f, data in channel_frames.items():
+            if isinstance(f, str):
+                str_keyed.append((f, data))
+            else:
+                merged[int(f)] = data
+        merged.update((int(f), data) for f, data in str_keyed)
+        length = max(merged) + 1
+        if length <= 0:
+            return None
+        merged = {f: data for f, data in merged.items() if f >= 0 and data}
+
+        index = np.fromiter(merged.keys(), dtype=np.int64, count=len(merged))
+        data = list(merged.values())
+        note = np.zeros(length, dtype=np.int64)
+        vol = np.zeros(length, dtype=np.int64)
+        control = np.full(length, 0x80, dtype=np.int64)
+        pitch = np.zeros(length, dtype=np.float64)
+        has_pitch = np.zeros(length, dtype=bool)
+        note[index] = [d.get('note', 0) for d in data]
+        vol[index] = [d.get('volume', 0) for d in data]
+        control[index] = [d.get('control', 0x80) for d in data]
+        with_pitch = [i for i, d in enumerate(data) if 'pitch' in d]
+        if with_pitch:
+            pitch[index[with_pitch]] = [data[i]['pitch'] for i in with_pitch]
+            has_pitch[index[with_pitch]] = True
+
+        note[vol == 0] = 0
+        return note, vol, (control >> 6) & 0x03, pitch, has_pitch
+
+    def _encode_macro_offsets(self, values):
+        """_encode_macro_offset over an array of offsets."""
+        encoded = np.clip(np.trunc(values), -128, 127).astype(np.int64) & 0xFF
+        encoded[encoded == self.MACRO_CTRL_END] = 0x00
+        encoded[encoded == self.MACRO_CTRL_LOOP] = 0xFD
+        return encoded
 
-        Returns `(lines, next_bank, channel_start_banks, notes_clamped)`.
-        `channel_start_banks` maps channel name -> the `BANK_NN` index its
-        `{label_prefix}{channel}_sequence` label physically landed in (a
-        later channel's label can spill past the bank the song started in).
-        `notes_clamped` is `{'high': N, 'low': N}`, the tone-range clamp
-        tally for this song (#298/EXP-10).
+    @staticmethod
+    def _sustain_starts(values, starts, ends):
+        """Per segment [start, end) of `values`, where its final run of equal
+        values begins -- what _compress_macro's $FF sustain keeps up to."""
+        new_run = np.ones(len(values), dtype=bool)
+        new_run[1:] = values[1:] != values[:-1]
+        new_run[starts] = True
+        run_start = np.maximum.accumulate(np.where(new_run, np.arange(len(values)), 0))
+        return run_start[ends - 1]
+
+    @traced("macro_dedup", cat="exporter")
+    def _collect_song_events(self, frames, macro_pool):
+        """Walk one song's `frames` into per-channel note/duration events.
+
+        Each note event's vol/duty/pitch/arp envelopes are compressed and
+        interned into `macro_pool` (shared across songs by the jukebox
+        export), and the resulting macro-id tuple into this song's own
+        instrument list.
+
+        Works a channel at a time on arrays (_channel_frame_arrays): notes
+        are clamped, split at every change of note, and pitch offsets taken
+        against the precomputed timer tables for the whole channel at once;
+        only the per-note macro interning is a Python loop.
+
+        Returns `(channel_events, instrument_defs, notes_clamped)`; each note
+        event is `{'note', 'dur', 'inst_id'}` with `inst_id` indexing
+        `instrument_defs`, each rest `{'note': 0, 'dur'}`.
         """
-        lines = []
-
-        def optimize_macro(seq):
-            return tuple(self._compress_macro(seq))
-
-        vol_macros = {(0xFF,): 0}
-        vol_macro_defs = [(0xFF,)]
-        duty_macros = {(0xFF,): 0}
-        duty_macro_defs = [(0xFF,)]
-        arp_macros = {(0xFF,): 0}
-        arp_macro_defs = [(0xFF,)]
-        pitch_macros = {(0xFF,): 0}
-        pitch_macro_defs = [(0xFF,)]
-
         instruments = {(0, 0, 0, 0): 0}
         instrument_defs = [(0, 0, 0, 0)]
 
+        def intern_macro(kind, seq):
+            ids, defs = macro_pool[kind]
+            if seq not in ids:
+                ids[seq] = len(defs)
+                defs.append(seq)
+            return ids[seq]
+
+        # No pipeline stage emits an 'arp' key, so the arp macro is always
+        # the neutral offset -- still emitted so each instrument keeps its 4
+        # macro pointers (vol/arp/pitch/duty) (#166).
+        neutral_arp = (self._encode_macro_offset(0), self.MACRO_CTRL_END)
+
         channel_events = {ch: [] for ch in self.SEQUENCE_CHANNELS}
 
         # Count tone-channel notes re-pitched by the range clamp below so the
@@ -1157,200 +1550,676 @@ class CA65Exporter(BaseExporter):
         for channel in self.SEQUENCE_CHANNELS:
             if channel not in frames or not frames[channel]:
                 continue
-
-            channel_frames = frames[channel]
-            max_frame = max(int(f) for f in channel_frames.keys()) if channel_frames else -1
-
-            current_note = 0
-            current_event = None
-            prev_orig_note = None  # last frame's pre-clamp source note (#298)
-
-            for frame_idx in range(max_frame + 1):
-                frame_data = channel_frames.get(str(frame_idx), channel_frames.get(frame_idx))
-                note = frame_data.get('note', 0) if frame_data else 0
-                vol = frame_data.get('volume', 0) if frame_data else 0
-                control = frame_data.get('control', 0x80) if frame_data else 0x80
-                duty = (control >> 6) & 0x03
-
-                if frame_data and vol == 0:
-                    note = 0
-                    
-                # The DPCM channel's `note` is sample_id + 1, not a MIDI note, so
-                # it is NOT bounded by the 0-95 tone-note range -- clamping it to
-                # 95 collapsed high-id drums to one wrong sample (#67). But it
-                # cannot simply grow up to the single-byte ceiling (255) either:
-                # DPCM events are emitted through the *same* length+note
-                # serializer as tone channels (`.byte $6X, note`, see the
-                # sequence-bytecode loop below), and the engine's @read_next
-                # dispatcher (nes/audio_engine.asm) re-reads every stream byte by
-                # range -- only `< $60` is a note; `$60-$7F` is Length and `>=
-                # $80` is a Command. A DPCM note >= $60 (sample_id >= 95) would
-                # be misdispatched as a Length or Command byte, desyncing the
-                # entire DPCM stream from that point on, not just misplaying one
-                # hit (#369/EXP-2026-07-19-1). Fail loudly instead -- mirroring
-                # the bank-budget ValueError above -- rather than silently
-                # emitting a stream that decodes to garbage; the direct-export
-                # path has no such ceiling (its DPCM notes live in a dedicated
-                # byte table read by index, never re-dispatched), so only the
-                # bytecode path is limited: note must stay <= $5F (95), i.e.
-                # sample_id <= 94, so at most 95 distinct DPCM samples per song
-                # (ids 0-94).
+            arrays = self._channel_frame_arrays(frames[channel])
+            if arrays is None:
+                continue
+            note, vol, duty, pitch, has_pitch = arrays
+
+            # The DPCM channel's `note` is sample_id + 1, not a MIDI note, so
+            # it is NOT bounded by the 0-95 tone-note range -- clamping it to
+            # 95 collapsed high-id drums to one wrong sample (#67). But it
+            # cannot simply grow up to the single-byte ceiling (255) either:
+            # DPCM events are emitted through the *same* length+note
+            # serializer as tone channels (`.byte $6X, note`, see the
+            # sequence-bytecode loop below), and the engine's @read_next
+            # dispatcher (nes/audio_engine.asm) re-reads every stream byte by
+            # range -- only `< $60` is a note; `$60-$7F` is Length and `>=
+            # $80` is a Command. A DPCM note >= $60 (sample_id >= 95) would
+            # be misdispatched as a Length or Command byte, desyncing the
+            # entire DPCM stream from that point on, not just misplaying one
+            # hit (#369/EXP-2026-07-19-1). Fail loudly instead -- mirroring
+            # the bank-budget ValueError above -- rather than silently
+            # emitting a stream that decodes to garbage; the direct-export
+            # path has no such ceiling (its DPCM notes live in a dedicated
+            # byte table read by index, never re-dispatched), so only the
+            # bytecode path is limited: note must stay <= $5F (95), i.e.
+            # sample_id <= 94, so at most 95 distinct DPCM samples per song
+            # (ids 0-94).
+            if channel == 'dpcm':
+                too_high = np.flatnonzero(note >= 0x60)
+                if too_high.size:
+                    bad = int(note[too_high[0]])
+                    raise ValueError(
+                        f"DPCM sample id {bad - 1} (note ${bad:02X}) exceeds the "
+                        f"macro-bytecode engine's $00-$5F note range -- the "
+                        f"sequence-bytecode dispatcher would misread it as a Length "
+                        f"or Command byte, desyncing the DPCM stream. The bytecode "
+                        f"path supports at most 95 distinct DPCM samples per song "
+                        f"(sample ids 0-94); use --no-patterns (direct export) or "
+                        f"reduce the sample count."
+                    )
+            else:
                 orig_note = note
-                if channel == 'dpcm':
-                    if note >= 0x60:
-                        raise ValueError(
-                            f"DPCM sample id {note - 1} (note ${note:02X}) exceeds the "
-                            f"macro-bytecode engine's $00-$5F note range -- the "
-                            f"sequence-bytecode dispatcher would misread it as a Length "
-                            f"or Command byte, desyncing the DPCM stream. The bytecode "
-                            f"path supports at most 95 distinct DPCM samples per song "
-                            f"(sample ids 0-94); use --no-patterns (direct export) or "
-                            f"reduce the sample count."
-                        )
-                elif note > 95:
-                    note = 95
-                elif channel != 'noise' and 0 < note < 24:
+                note = np.minimum(note, 95)
+                if channel != 'noise':
                     # Tone channels only: clamp the note baked into the
-                    # instruction stream (and later fed to
-                    # midi_note_to_timer_value) to the same floor the frame
-                    # `pitch` was already clamped to, so the runtime base-period
-                    # lookup and the pitch offset agree on the same note (#158).
-                    # `noise`'s "note" is a 4-bit period index, not a MIDI note —
-                    # clamping it here would corrupt the drum pitch.
-                    note = 24
-
-                # Report a tone-channel re-pitch once per distinct source note
-                # (keyed on the pre-clamp value, not the collapsed played note)
-                # so a sustained note counts once but two adjacent out-of-range
-                # notes that clamp to the same boundary each count (#298/EXP-10).
-                # dpcm's "note" is a sample id, not a pitch, so it is excluded.
-                if (channel != 'dpcm' and note != orig_note
-                        and orig_note != prev_orig_note):
-                    if orig_note > 95:
-                        notes_clamped_high += 1
-                    else:
-                        notes_clamped_low += 1
-                prev_orig_note = orig_note
-
-                if note != current_note:
-                    if current_event is not None:
-                        if current_event['note'] > 0:
-                            v_seq = optimize_macro(current_event['vol_seq'])
-                            d_seq = optimize_macro(current_event['duty_seq'])
-                            p_seq = optimize_macro(current_event['pitch_seq'])
-                            a_seq = optimize_macro(current_event['arp_seq'])
-                            
-                            if v_seq not in vol_macros:
-                                vol_macros[v_seq] = len(vol_macro_defs)
-                                vol_macro_defs.append(v_seq)
-                            if d_seq not in duty_macros:
-                                duty_macros[d_seq] = len(duty_macro_defs)
-                                duty_macro_defs.append(d_seq)
-                            if p_seq not in pitch_macros:
-                                pitch_macros[p_seq] = len(pitch_macro_defs)
-                                pitch_macro_defs.append(p_seq)
-                            if a_seq not in arp_macros:
-                                arp_macros[a_seq] = len(arp_macro_defs)
-                                arp_macro_defs.append(a_seq)
-                                
-                            inst = (vol_macros[v_seq], arp_macros[a_seq], pitch_macros[p_seq], duty_macros[d_seq])
-                            current_event['inst_id'] = self._register_instrument(
-                                inst, instruments, instrument_defs)
-                        channel_events[channel].append(current_event)
-
-                    current_note = note
-                    if note > 0:
-                        base_timer = self.midi_note_to_timer_value(note, channel)
-                        pitch_val = frame_data.get('pitch', base_timer) if frame_data else base_timer
-                        pitch_offset = self._encode_macro_offset(pitch_val - base_timer)
-                        # No pipeline stage emits an 'arp' key, so the arp macro is
-                        # always the neutral offset — still emitted so each instrument
-                        # keeps its 4 macro pointers (vol/arp/pitch/duty) (#166).
-                        arp_val = self._encode_macro_offset(0)
-                        current_event = {'note': note, 'dur': 1, 'vol_seq': [vol], 'duty_seq': [duty], 'pitch_seq': [pitch_offset], 'arp_seq': [arp_val]}
-                    else:
-                        current_event = {'note': 0, 'dur': 1}
+                    # instruction stream (and the base-timer lookup below) to
+                    # the same floor the frame `pitch` was already clamped
+                    # to, so the runtime base-period lookup and the pitch
+                    # offset agree on the same note (#158). `noise`'s "note"
+                    # is a 4-bit period index, not a MIDI note -- clamping it
+                    # here would corrupt the drum pitch.
+                    note = np.where((note > 0) & (note < 24), 24, note)
+
+                # Report a tone-channel re-pitch once per distinct source
+                # note (keyed on the pre-clamp value, not the collapsed
+                # played note) so a sustained note counts once but two
+                # adjacent out-of-range notes that clamp to the same boundary
+                # each count (#298/EXP-10). dpcm's "note" is a sample id, not
+                # a pitch, so it is excluded.
+                new_source = np.ones(len(note), dtype=bool)
+                new_source[1:] = orig_note[1:] != orig_note[:-1]
+                reported = (note != orig_note) & new_source
+                high = int(np.count_nonzero(reported & (orig_note > 95)))
+                notes_clamped_high += high
+                notes_clamped_low += int(np.count_nonzero(reported)) - high
+
+            # One event per run of equal notes; frames before the first
+            # sounding note start no event.
+            previous = np.zeros(len(note), dtype=np.int64)
+            previous[1:] = note[:-1]
+            starts = np.flatnonzero(note != previous)
+            if not starts.size:
+                continue
+            ends = np.append(starts[1:], len(note))
 
-                else:
-                    if current_event is not None:
-                        current_event['dur'] += 1
-                        if note > 0:
-                            # Continuation frames must use the same per-channel
-                            # table as the first frame (:990) — omitting channel
-                            # here defaults triangle to the pulse table and bends
-                            # every sustained triangle note (#78).
-                            base_timer = self.midi_note_to_timer_value(note, channel)
-                            pitch_val = frame_data.get('pitch', base_timer) if frame_data else base_timer
-                            pitch_offset = self._encode_macro_offset(pitch_val - base_timer)
-                            arp_val = self._encode_macro_offset(0)  # no 'arp' producer (#166)
-                            current_event['vol_seq'].append(vol)
-                            current_event['duty_seq'].append(duty)
-                            current_event['pitch_seq'].append(pitch_offset)
-                            current_event['arp_seq'].append(arp_val)
-
-            if current_event is not None:
-                if current_event['note'] > 0:
-                    v_seq = optimize_macro(current_event['vol_seq'])
-                    d_seq = optimize_macro(current_event['duty_seq'])
-                    p_seq = optimize_macro(current_event['pitch_seq'])
-                    a_seq = optimize_macro(current_event['arp_seq'])
-                    
-                    if v_seq not in vol_macros:
-                        vol_macros[v_seq] = len(vol_macro_defs)
-                        vol_macro_defs.append(v_seq)
-                    if d_seq not in duty_macros:
-                        duty_macros[d_seq] = len(duty_macro_defs)
-                        duty_macro_defs.append(d_seq)
-                    if p_seq not in pitch_macros:
-                        pitch_macros[p_seq] = len(pitch_macro_defs)
-                        pitch_macro_defs.append(p_seq)
-                    if a_seq not in arp_macros:
-                        arp_macros[a_seq] = len(arp_macro_defs)
-                        arp_macro_defs.append(a_seq)
-                        
-                    inst = (vol_macros[v_seq], arp_macros[a_seq], pitch_macros[p_seq], duty_macros[d_seq])
-                    current_event['inst_id'] = self._register_instrument(
-                        inst, instruments, instrument_defs)
-                channel_events[channel].append(current_event)
+            # Pitch offsets against the base timer of each frame's note,
+            # from the same per-channel table the runtime indexes: triangle
+            # uses the /32 table or every sustained note bends (#78).
+            table = TRIANGLE_TIMER_TABLE if channel == 'triangle' else PULSE_TIMER_TABLE
+            base_timer = table[np.clip(note, 0, 127)]
+            pitch_offset = self._encode_macro_offsets(np.where(has_pitch, pitch - base_timer, 0))
 
-        # Explicit re-declaration (#30/F-13, MAP-2026-08-07-1): this method
-        # is called once per song by a multi-song build, and each call's
-        # sequence-bytecode loop below leaves the assembler in whatever
-        # `.segment "BANK_NN"` its last channel used. Without this, the
-        # *next* song's instrument_table/macro tables silently land inside
-        # that leftover dynamically-banked segment instead of the fixed,
-        # always-mapped CODE_8000 region -- the ROM still links and boots
-        # (BANK_NN is a valid segment), but at runtime, with R7 pointed
-        # anywhere other than that exact bank, every macro read for that
-        # song pulls garbage bytes. The single-song caller
-        # (export_tables_with_patterns) already has CODE_8000 active at
-        # this point (from its own header emission), so this is a no-op
-        # there -- redeclaring an already-active ca65 segment costs nothing
-        # and changes no emitted bytes.
-        lines.append('.segment "CODE_8000"')
+            # Macros compress to their values up to the final run, then
+            # $FF (sustain); see _compress_macro.
+            macros = []
+            for kind, values in (('vol', vol), ('duty', duty), ('pitch', pitch_offset)):
+                macros.append((kind, values, self._sustain_starts(values, starts, ends), {}))
+
+            events = channel_events[channel]
+            for event_note, start, dur, i in zip(note[starts].tolist(), starts.tolist(),
+                                                 (ends - starts).tolist(), range(len(starts))):
+                if event_note <= 0:
+                    events.append({'note': 0, 'dur': dur})
+                    continue
+                ids = {}
+                for kind, values, sustain, seen in macros:
+                    key = values[start:sustain[i] + 1].tobytes()
+                    macro_id = seen.get(key)
+                    if macro_id is None:
+                        seq = tuple(values[start:sustain[i] + 1].tolist()) + (self.MACRO_CTRL_END,)
+                        macro_id = seen[key] = intern_macro(kind, seq)
+                    ids[kind] = macro_id
+                ids['arp'] = intern_macro('arp', neutral_arp)
+                inst_id = self._register_instrument(
+                    (ids['vol'], ids['arp'], ids['pitch'], ids['duty']), instruments, instrument_defs)
+                events.append({'note': event_note, 'dur': dur, 'inst_id': inst_id})
+
+        notes_clamped = {'high': notes_clamped_high, 'low': notes_clamped_low}
+        return channel_events, instrument_defs, notes_clamped
+
+    def _emit_instrument_table(self, lines, instrument_defs, table_labels, macro_prefix=''):
+        """Append one instrument table (four macro pointers per row).
+
+        Every label in `table_labels` is placed on the table's first row, so
+        a jukebox export can give each song its usual
+        `song{i}_instrument_table` symbol while all of them share one copy.
+        """
         lines.append('; The Instrument Macro Pointers')
-        lines.append(f'{label_prefix}instrument_table:')
+        for label in table_labels:
+            lines.append(f'{label}:')
         for inst in instrument_defs:
             v_id, a_id, p_id, d_id = inst
-            lines.append(f'    .word {label_prefix}macro_vol_{v_id}, {label_prefix}macro_arp_{a_id}, '
-                          f'{label_prefix}macro_pitch_{p_id}, {label_prefix}macro_duty_{d_id}')
+            lines.append(f'    .word {macro_prefix}macro_vol_{v_id}, {macro_prefix}macro_arp_{a_id}, '
+                          f'{macro_prefix}macro_pitch_{p_id}, {macro_prefix}macro_duty_{d_id}')
         lines.append('')
 
-        for name, defs in [('vol', vol_macro_defs), ('arp', arp_macro_defs), ('pitch', pitch_macro_defs), ('duty', duty_macro_defs)]:
+    def _emit_macro_tables(self, lines, macro_pool, macro_prefix=''):
+        """Append every macro byte stream in `macro_pool`."""
+        for name in self.MACRO_KINDS:
+            defs = macro_pool[name][1]
             lines.append(f'; --- {name.capitalize()} Macros ---')
             for i, seq in enumerate(defs):
-                lines.append(f'{label_prefix}macro_{name}_{i}:')
+                lines.append(f'{macro_prefix}macro_{name}_{i}:')
                 lines.append('    .byte ' + ', '.join(f'${val:02X}' for val in seq))
             lines.append('')
 
-        # Bytecode generation for channels
+    # Worst-case CPU cycles audio_update (nes/audio_engine.asm) spends reading
+    # each kind of sequence bytecode, hand-counted from the engine and the
+    # project builder's fetch_sequence_byte (65 cycles a byte with the
+    # (sequence_ptr),y page cross and the pointer-carry path both taken).
+    # Only the stream-read side varies with the emitted bytes -- macro
+    # evaluation and the hardware writes run every frame regardless -- so
+    # this is all a per-frame cycle budget can move around.
+    SEQUENCE_FETCH_CYCLES = {
+        'fetch': 24,        # @fetch_byte: stream_ptr/stream_bank -> zero page
+        'length': 97,       # $60-$7F byte + @is_length
+        'note': 144,        # note byte + @is_note
+        'instrument': 182,  # CMD_INSTRUMENT ($80 + operand)
+        'bank_jump': 324,   # CMD_BANK_JUMP ($FE + bank + <addr + >addr)
+        'call_pattern': 361,  # CMD_CALL_PATTERN ($82 + bank + <addr + >addr)
+        'return': 144,      # CMD_RETURN ($83)
+        'loop': 432,        # CMD_LOOP ($84 + count + bank + <addr + >addr)
+        'end': 82,          # the $FF a finished channel re-reads every frame
+    }
+    SEQUENCE_BANK_SIZE_LIMIT = 8192 - 256  # 8KB minus a safety margin
+    SEQUENCE_MAX_LENGTH = 32               # longest duration one $60-$7F byte holds
+    SUBPATTERN_MAX_ITEMS = 32              # longest run _compress_subpatterns tries
+
+    def _plan_sequence_items(self, channel_events):
+        """Turn each channel's note events into the bytecode items
+        _emit_sequence_banks writes, one per event:
+        `{'frame', 'note', 'dur', 'inst', 'jump'}`.
+
+        `frame` is the frame the engine reads the item on, `inst` the
+        song-local instrument id of a CMD_INSTRUMENT emitted ahead of it
+        (None when unchanged), and `jump` whether a CMD_BANK_JUMP precedes
+        it (filled in by _layout_sequence_banks). _fold_section_loops later
+        replaces a section's back-to-back repeats with a loop item (`loop`,
+        the extra passes, and `span`) after the `section_start` item that
+        opens it, and _compress_subpatterns folds repeated runs into call
+        items, which carry `call` (the sub-pattern id) and the `items` they
+        stand for. `song_loop_start` marks where a looping song resumes
+        (_apply_song_loop).
+        """
+        plan = {}
+        for channel in self.SEQUENCE_CHANNELS:
+            items = []
+            frame = 0
+            current_inst = -1
+            for event in channel_events[channel]:
+                inst = None
+                if event['note'] > 0 and event['inst_id'] != current_inst:
+                    inst = current_inst = event['inst_id']
+                items.append({'frame': frame, 'note': event['note'], 'dur': event['dur'],
+                              'inst': inst, 'jump': False})
+                frame += event['dur']
+            plan[channel] = items
+        return plan
+
+    def _sequence_item_bytes(self, item):
+        """Bytes an item occupies, excluding any bank jump ahead of it."""
+        if 'call' in item:
+            return 4
+        if 'loop' in item:
+            return 5
+        chunks = -(-item['dur'] // self.SEQUENCE_MAX_LENGTH)
+        return (2 if item['inst'] is not None else 0) + 2 * chunks
+
+    def _apply_song_loop(self, plan, loop_frame):
+        """Make every channel of `plan` resume at `loop_frame` when the song
+        ends, instead of stopping on $FF.
+
+        Shorter channels are padded with a rest to the song's length so all
+        five wrap on the same frame, and the item sounding on `loop_frame`
+        is split there to carry the `song_loop_start` label. That item also
+        reloads the instrument in effect, since on the way back round the
+        engine still holds the one from the end of the song. Returns how
+        many held notes the split retriggers; raises ValueError when
+        `loop_frame` is not inside the song.
+        """
+        song_frames = max((sum(item['dur'] for item in items) for items in plan.values()),
+                          default=0)
+        if not 0 <= loop_frame < song_frames:
+            raise ValueError(
+                f"Loop point frame {loop_frame} is outside the song ({song_frames} frames)")
+        retriggered = 0
+        for items in plan.values():
+            length = sum(item['dur'] for item in items)
+            if length < song_frames:
+                items.append({'frame': length, 'note': 0, 'dur': song_frames - length,
+                              'inst': None, 'jump': False})
+            index = next(i for i, item in enumerate(items)
+                         if item['frame'] + item['dur'] > loop_frame)
+            item = items[index]
+            if item['frame'] < loop_frame:
+                head = loop_frame - item['frame']
+                tail = dict(item, frame=loop_frame, dur=item['dur'] - head, inst=None)
+                item['dur'] = head
+                retriggered += item['note'] > 0
+                index += 1
+                items.insert(index, tail)
+                item = tail
+            if item['inst'] is None:
+                item['inst'] = next((earlier['inst'] for earlier in reversed(items[:index])
+                                     if earlier['inst'] is not None), None)
+            item['song_loop_start'] = True
+        return retriggered
+
+    def _fold_section_loops(self, plan):
+        """Replace back-to-back repeats of a section in `plan` with a single
+        copy and a CMD_LOOP item jumping back to it; returns how many
+        sections were folded.
+
+        Items are compared on what they play -- note, length and the
+        instrument in effect -- so a repeat that differs from the first
+        copy only by a redundant CMD_INSTRUMENT still matches. A section
+        whose opening notes rely on the instrument in effect before it only
+        loops when its own end leaves that same instrument behind. The
+        candidates saving the most bytes win without
+        overlapping: the engine keeps one loop counter per channel. A song
+        loop point inside a later repeat cuts the section short there,
+        since those repeats' bytes go away.
+        """
+        folded = 0
+        for channel, items in plan.items():
+            key_ids = {}
+            keys = []
+            inst_before = []  # instrument in effect entering each item
+            current_inst = None
+            for item in items:
+                inst_before.append(current_inst)
+                if item['inst'] is not None:
+                    current_inst = item['inst']
+                key = (item['note'], item['dur'], current_inst if item['note'] else item['inst'])
+                keys.append(key_ids.setdefault(key, len(key_ids)))
+            inst_before.append(current_inst)
+            keys = np.array(keys)
+
+            # Whether a note at or after each item plays before any
+            # CMD_INSTRUMENT does: such a note inherits whatever instrument
+            # the previous pass of its section left behind.
+            inherits = [False] * (len(items) + 1)
+            for index in range(len(items) - 1, -1, -1):
+                item = items[index]
+                inherits[index] = item['inst'] is None and (item['note'] > 0 or inherits[index + 1])
+
+            offsets = [0]
+            for item in items:
+                offsets.append(offsets[-1] + self._sequence_item_bytes(item))
+            song_loop_at = next((i for i, item in enumerate(items) if item.get('song_loop_start')),
+                                None)
+
+            candidates = []
+            for span in range(1, len(items) // 2 + 1):
+                matches = keys[:-span] == keys[span:]
+                if np.count_nonzero(matches) < span:
+                    continue
+                edges = np.flatnonzero(np.diff(np.concatenate(([0], matches.view(np.int8), [0]))))
+                for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+                    repeats = min((end - start) // span + 1, 256)  # count is one byte
+                    if song_loop_at is not None and start + span <= song_loop_at:
+                        repeats = min(repeats, (song_loop_at - start) // span)
+                    if repeats < 2:
+                        continue
+                    if inherits[start] and inst_before[start] != inst_before[start + span]:
+                        continue  # the later passes would play its opening notes wrong
+                    saved = offsets[start + repeats * span] - offsets[start + span] - 5
+                    if saved > 0:
+                        candidates.append((saved, start, span, repeats))
+
+            taken = [False] * len(items)
+            chosen = []
+            for saved, start, span, repeats in sorted(candidates, key=lambda c: (-c[0], c[1])):
+                if any(taken[start:start + repeats * span]):
+                    continue
+                taken[start:start + repeats * span] = [True] * (repeats * span)
+                chosen.append((start, span, repeats))
+            if not chosen:
+                continue
+
+            loops = {start: (span, repeats) for start, span, repeats in chosen}
+            result = []
+            index = 0
+            while index < len(items):
+                if index not in loops:
+                    result.append(items[index])
+                    index += 1
+                    continue
+                span, repeats = loops[index]
+                items[index]['section_start'] = True
+                result.extend(items[index:index + span])
+                repeated = items[index + span:index + repeats * span]
+                result.append({'frame': repeated[0]['frame'], 'note': None,
+                               'dur': sum(item['dur'] for item in repeated), 'inst': None,
+                               'jump': False, 'loop': repeats - 1})
+                index += repeats * span
+            plan[channel] = result
+            folded += len(chosen)
+        return folded
+
+    def _compress_subpatterns(self, plan):
+        """Fold repeated runs of items in `plan` into CMD_CALL_PATTERN
+        items, returning the shared sub-pattern bodies (lists of items).
+
+        Runs are matched on their exact bytes, longest first, across all
+        channels at once: the engine's length/note/instrument state after a
+        run doesn't depend on where it was read from, so any two identical
+        runs -- even on different channels -- can share one body. A run is
+        only shared when its calls (4 bytes each) plus the body's
+        CMD_RETURN cost fewer bytes than the copies they replace. Runs never
+        take in a CMD_LOOP, and a labelled item (a loop target) can only
+        open one, so the call inherits its label.
+        """
+        keys = {ch: [(item['inst'], item['note'], item['dur']) for item in items]
+                for ch, items in plan.items()}
+        covered = {ch: ['loop' in item for item in items] for ch, items in plan.items()}
+        labelled = {ch: [bool(item.get('section_start') or item.get('song_loop_start'))
+                         for item in items] for ch, items in plan.items()}
+        sites = {ch: {} for ch in plan}  # start index -> (run length, body id)
+        bodies = []
+
+        for span in range(self.SUBPATTERN_MAX_ITEMS, 1, -1):
+            occurrences = {}
+            for channel, seq in keys.items():
+                free = 0  # uncovered items ending at `end`
+                for end, is_covered in enumerate(covered[channel]):
+                    free = 0 if is_covered else 1 if labelled[channel][end] else free + 1
+                    if free >= span:
+                        start = end - span + 1
+                        occurrences.setdefault(tuple(seq[start:end + 1]), []).append((channel, start))
+
+            for run, places in occurrences.items():
+                if len(places) < 2:
+                    continue
+                chosen = []
+                next_free = {}
+                for channel, start in places:
+                    if start < next_free.get(channel, 0) or any(covered[channel][start:start + span]):
+                        continue
+                    chosen.append((channel, start))
+                    next_free[channel] = start + span
+                size = sum(self._sequence_item_bytes({'inst': inst, 'dur': dur})
+                           for inst, _note, dur in run)
+                if len(chosen) * size <= len(chosen) * 4 + size + 1:
+                    continue
+                first_channel, first_start = chosen[0]
+                bodies.append(plan[first_channel][first_start:first_start + span])
+                for channel, start in chosen:
+                    covered[channel][start:start + span] = [True] * span
+                    sites[channel][start] = (span, len(bodies) - 1)
+
+        for channel, items in plan.items():
+            folded = []
+            index = 0
+            while index < len(items):
+                if index not in sites[channel]:
+                    folded.append(items[index])
+                    index += 1
+                    continue
+                span, body = sites[channel][index]
+                run = items[index:index + span]
+                call = {'frame': run[0]['frame'], 'note': None,
+                        'dur': sum(item['dur'] for item in run), 'inst': None,
+                        'jump': False, 'call': body, 'items': run}
+                for label in ('section_start', 'song_loop_start'):
+                    if run[0].get(label):
+                        call[label] = True
+                folded.append(call)
+                index += span
+            plan[channel] = folded
+        return bodies
+
+    def _sequence_frame_cycles(self, plan):
+        """Static worst-case stream-read cycles for every frame of the song
+        `plan` describes (see SEQUENCE_FETCH_CYCLES). A looped section's
+        later passes and a looping song's jump back are read on the frames
+        they replay."""
+        costs = self.SEQUENCE_FETCH_CYCLES
+        read = costs['fetch'] + costs['length'] + costs['note']
+        lengths = {ch: sum(item['dur'] for item in items) for ch, items in plan.items()}
+        song_frames = max(lengths.values(), default=0)
+        cycles = [0] * song_frames
+
+        def add_reads(item, offset):
+            frame = item['frame'] + offset
+            if item['jump']:
+                cycles[frame] += costs['bank_jump']
+            reads = [item]
+            if 'call' in item:
+                reads = item['items']
+                cycles[frame] += costs['call_pattern']
+                if frame + item['dur'] < song_frames:
+                    cycles[frame + item['dur']] += costs['return']
+            for part in reads:
+                start = part['frame'] + offset
+                for read_frame in range(start, start + part['dur'], self.SEQUENCE_MAX_LENGTH):
+                    cycles[read_frame] += read
+                if part['inst'] is not None:
+                    cycles[start] += costs['instrument']
+
+        for channel, items in plan.items():
+            section = 0
+            for index, item in enumerate(items):
+                if item.get('section_start'):
+                    section = index
+                if item.get('song_loop_start'):
+                    cycles[item['frame']] += costs['bank_jump']
+                if 'loop' not in item:
+                    add_reads(item, 0)
+                    continue
+                if item['jump']:
+                    cycles[item['frame']] += costs['bank_jump']
+                section_frames = item['dur'] // item['loop']
+                for repeat in range(item['loop'] + 1):
+                    loop_frame = item['frame'] + repeat * section_frames
+                    if loop_frame < song_frames:
+                        cycles[loop_frame] += costs['loop']
+                for repeat in range(1, item['loop'] + 1):
+                    for part in items[section:index]:
+                        add_reads(part, repeat * section_frames)
+            for frame in range(lengths[channel], song_frames):
+                cycles[frame] += costs['fetch'] + costs['end']
+        return cycles
+
+    def _reschedule_instruments(self, plan, cycles, budget):
+        """Move CMD_INSTRUMENTs out of frames over `budget`.
+
+        The engine only consults current_inst while a note sounds, so an
+        instrument load can be read early on any rest directly preceding
+        its note without changing what plays. The latest such rest whose
+        frame still has room wins; none before a song loop point, which the
+        engine re-enters without reading them. Updates `cycles` in place; returns how
+        many loads moved.
+        """
+        cost = self.SEQUENCE_FETCH_CYCLES['instrument']
+        moved = 0
+        for items in plan.values():
+            for index, item in enumerate(items):
+                if (item['inst'] is None or item.get('song_loop_start')
+                        or cycles[item['frame']] <= budget):
+                    continue
+                target = index - 1
+                while target >= 0 and items[target]['note'] == 0:
+                    if cycles[items[target]['frame']] + cost <= budget:
+                        items[target]['inst'], item['inst'] = item['inst'], None
+                        cycles[items[target]['frame']] += cost
+                        cycles[item['frame']] -= cost
+                        moved += 1
+                        break
+                    if items[target].get('song_loop_start'):
+                        break  # a looping song re-enters here, skipping anything earlier
+                    target -= 1
+        return moved
+
+    def _layout_sequence_banks(self, plan, start_bank=0, cycles=None, budget=None, bodies=()):
+        """Decide where each channel's CMD_BANK_JUMPs go, setting `jump` on
+        the item each one precedes, then place the sub-pattern `bodies`
+        after the last channel.
+
+        A jump is needed before the first item that would overflow the
+        current bank. With a `budget`, it may instead go before any earlier
+        item of that bank whose frame has room for it -- the jump is just a
+        pointer reload, so taking it early only leaves the old bank a few
+        bytes emptier. A body is reached by its calls' own bank operand, so
+        it just starts the next bank when it won't fit in this one. Updates
+        `cycles` in place; returns `(jumps moved, bank of each body)`.
+
+        Raises ValueError when the sequences outgrow the MMC3 bank budget.
+        """
         from mappers.mmc3 import MMC3Mapper
         # Highest swap-bank index the MMC3 linker config defines (BANK_00..N-1).
         # Rolling past it would emit a .segment ld65 has no MEMORY region for (#127).
-        MAX_SEQUENCE_BANK = MMC3Mapper.SWAP_BANK_COUNT - 1
+        max_sequence_bank = MMC3Mapper.SWAP_BANK_COUNT - 1
+        jump_cost = self.SEQUENCE_FETCH_CYCLES['bank_jump']
         current_bank = start_bank
         bytes_in_current_bank = 0
-        BANK_SIZE_LIMIT = 8192 - 256  # 8KB minus a safety margin
+        moved = 0
+
+        def next_bank_for(what):
+            if current_bank + 1 > max_sequence_bank:
+                raise ValueError(
+                    f"Sequence bytecode exceeds the MMC3 "
+                    f"{max_sequence_bank + 1}-bank budget "
+                    f"(~{(max_sequence_bank + 1) * 8} KB): {what} "
+                    f"needs bank {current_bank + 1}, but the linker config defines only "
+                    f"BANK_00..BANK_{max_sequence_bank:02d}. Shorten the song or "
+                    f"split it across songs."
+                )
+            return current_bank + 1
+
+        for channel in self.SEQUENCE_CHANNELS:
+            items = plan[channel]
+            bank_start = 0
+            for index, item in enumerate(items):
+                event_bytes = self._sequence_item_bytes(item)
+                if bytes_in_current_bank + event_bytes + 4 <= self.SEQUENCE_BANK_SIZE_LIMIT:
+                    bytes_in_current_bank += event_bytes
+                    continue
+                next_bank = next_bank_for(f"channel '{channel}'")
+                jump_at = index
+                if budget is not None and cycles[item['frame']] + jump_cost > budget:
+                    for earlier in range(index - 1, bank_start, -1):
+                        if cycles[items[earlier]['frame']] + jump_cost <= budget:
+                            jump_at = earlier
+                            moved += 1
+                            break
+                items[jump_at]['jump'] = True
+                if cycles is not None:
+                    cycles[items[jump_at]['frame']] += jump_cost
+                current_bank = next_bank
+                bank_start = jump_at
+                bytes_in_current_bank = sum(
+                    self._sequence_item_bytes(i) for i in items[jump_at:index + 1])
+            # The channel's closing $FF, or a looping song's jump back
+            loops_back = any(item.get('song_loop_start') for item in items)
+            bytes_in_current_bank += 4 if loops_back else 1
+
+        body_banks = []
+        for body in bodies:
+            body_bytes = sum(self._sequence_item_bytes(item) for item in body) + 1
+            if bytes_in_current_bank + body_bytes > self.SEQUENCE_BANK_SIZE_LIMIT:
+                current_bank = next_bank_for('a sub-pattern')
+                bytes_in_current_bank = 0
+            body_banks.append(current_bank)
+            bytes_in_current_bank += body_bytes
+        return moved, body_banks
+
+    def estimate_bytecode_frame_cycles(self, frames, cycle_budget=None, subpatterns=True,
+                                       loop_frame=None):
+        """Per-frame worst-case stream-read cycles of `frames` exported as
+        macro bytecode, after any `cycle_budget` rescheduling -- what
+        audio_update spends on sequence reads each frame, on top of its
+        fixed macro/hardware-write work."""
+        channel_events, _, _ = self._collect_song_events(frames, self._new_macro_pool())
+        return self._plan_sequence_banks(
+            channel_events, 0, cycle_budget, subpatterns, loop_frame)[3]
+
+    def _plan_sequence_banks(self, channel_events, start_bank, cycle_budget, subpatterns,
+                             loop_frame=None):
+        """Plan, reschedule, compress and lay out one song's sequences.
+
+        Returns `(plan, bodies, body_banks, cycles, summary)`: the laid-out
+        plan, the sub-pattern bodies and the bank each lands in, the
+        per-frame cycle estimate, and the counts _emit_sequence_banks
+        reports.
+        """
+        plan = self._plan_sequence_items(channel_events)
+        retriggered = 0
+        if loop_frame is not None:
+            retriggered = self._apply_song_loop(plan, loop_frame)
+        moved_instruments = 0
+        if cycle_budget is not None:
+            moved_instruments = self._reschedule_instruments(
+                plan, self._sequence_frame_cycles(plan), cycle_budget)
+        section_loops = 0
+        bodies = []
+        if subpatterns:
+            section_loops = self._fold_section_loops(plan)
+            bodies = self._compress_subpatterns(plan)
+        cycles = self._sequence_frame_cycles(plan)
+        moved_jumps, body_banks = self._layout_sequence_banks(
+            plan, start_bank, cycles, cycle_budget, bodies)
+        if section_loops:
+            # Bank jumps inside a looped section replay on every pass, which
+            # the layout's running tally only charged once.
+            cycles = self._sequence_frame_cycles(plan)
+        summary = {'moved_instruments': moved_instruments, 'moved_bank_jumps': moved_jumps,
+                   'section_loops': section_loops, 'retriggered': retriggered}
+        return plan, bodies, body_banks, cycles, summary
+
+    def _emit_sequence_item_lines(self, lines, item, inst_remap):
+        if item['inst'] is not None:
+            emitted_id = inst_remap[item['inst']] if inst_remap is not None else item['inst']
+            lines.append(f'    .byte $80, ${emitted_id:02X} ; CMD_INSTRUMENT')
+
+        note = item['note']
+        rem_dur = item['dur']
+        while rem_dur > 0:
+            write_dur = min(rem_dur, self.SEQUENCE_MAX_LENGTH)
+            lines.append(f'    .byte ${(write_dur - 1) + 0x60:02X}, ${note:02X} ; Length {write_dur}, Note {note}')
+            rem_dur -= write_dur
+
+    @traced("sequence_emit", cat="exporter")
+    def _emit_sequence_banks(self, lines, channel_events, label_prefix='', start_bank=0,
+                             inst_remap=None, cycle_budget=None, subpatterns=True,
+                             loop_frame=None):
+        """Append one song's banked sequence bytecode for all 5 channels.
+
+        `inst_remap`, if given, maps each event's song-local `inst_id` to the
+        id actually written into CMD_INSTRUMENT operands (the jukebox
+        export's shared instrument table).
+
+        `cycle_budget`, if given, caps the stream-read cycles any one frame
+        should cost (see SEQUENCE_FETCH_CYCLES): instrument loads and bank
+        jumps landing in a frame over it are moved to an earlier frame with
+        room, and any frame still over (one whose note reads alone exceed
+        it) is reported. The summary is kept in `self.sequence_cycles`.
+
+        `subpatterns` stores what the song repeats once: a section played
+        several times back to back is kept once behind a
+        `{label_prefix}{channel}_section_N` label with a CMD_LOOP after it
+        (_fold_section_loops), and other repeated runs become
+        `{label_prefix}subpattern_N` bodies (ending in CMD_RETURN) after the
+        last channel, reached with CMD_CALL_PATTERN (_compress_subpatterns).
+
+        `loop_frame`, if given, makes the song loop forever: each channel
+        ends in a CMD_BANK_JUMP back to its `{label_prefix}{channel}_song_loop`
+        label on that frame instead of stopping on $FF (_apply_song_loop).
+
+        Returns `(next_bank, channel_start_banks)`; see _build_song_bytecode.
+        """
+        plan, bodies, body_banks, cycles, summary = self._plan_sequence_banks(
+            channel_events, start_bank, cycle_budget, subpatterns, loop_frame)
+
+        if summary['section_loops']:
+            print(f"   Section loops: {summary['section_loops']} repeated section(s) "
+                  f"stored once behind CMD_LOOP")
+        if loop_frame is not None:
+            print(f"   Song loop: every channel jumps back to frame {loop_frame} at the end")
+            if summary['retriggered']:
+                print(f"⚠ {summary['retriggered']} note(s) held across the loop point "
+                      f"retrigger on frame {loop_frame}")
+        if bodies:
+            calls = sum(1 for ch in self.SEQUENCE_CHANNELS for item in plan[ch] if 'call' in item)
+            print(f"   Sub-patterns: {len(bodies)} shared run(s) behind {calls} call(s)")
+
+        if cycle_budget is not None:
+            frames_over = sum(1 for c in cycles if c > cycle_budget)
+            self.sequence_cycles = {
+                'budget': cycle_budget,
+                'worst': max(cycles, default=0),
+                'frames_over': frames_over,
+                **summary,
+            }
+            print(f"   Sequence cycle budget {cycle_budget}: moved {summary['moved_instruments']} "
+                  f"instrument load(s) and {summary['moved_bank_jumps']} bank jump(s); worst frame "
+                  f"{self.sequence_cycles['worst']} cycles")
+            if frames_over:
+                print(f"⚠ {frames_over} frame(s) still exceed the {cycle_budget}-cycle "
+                      f"sequence budget (their note reads alone cost more)")
+
+        current_bank = start_bank
 
         lines.append('; ---------------------------------------------------------------------------')
         lines.append('; Sequence Data (Dynamically Banked)')
@@ -1369,94 +2238,150 @@ class CA65Exporter(BaseExporter):
         for channel in self.SEQUENCE_CHANNELS:
             channel_start_banks[channel] = current_bank
             lines.append(f'{label_prefix}{channel}_sequence:')
-            events = channel_events[channel]
-            if not events:
+            items = plan[channel]
+            if not items:
                 lines.append('    .byte $FF')
                 lines.append('')
-                bytes_in_current_bank += 1
                 continue
-                
-            current_inst = -1
-            
-            for event in events:
-                # Pre-calculate bytes needed for this event
-                event_bytes = 0
-                note = event['note']
-                dur = event['dur']
-
-                if note > 0:
-                    inst_id = event['inst_id']
-                    if inst_id != current_inst:
-                        event_bytes += 2
-                
-                if dur > 0:
-                    rem_dur = dur
-                    while rem_dur > 0:
-                        write_dur = min(rem_dur, 32)
-                        event_bytes += 2
-                        rem_dur -= write_dur
-                
-                # Check if we need to switch banks
-                if bytes_in_current_bank + event_bytes + 4 > BANK_SIZE_LIMIT:
-                    next_bank = current_bank + 1
-                    if next_bank > MAX_SEQUENCE_BANK:
-                        raise ValueError(
-                            f"Sequence bytecode exceeds the MMC3 "
-                            f"{MAX_SEQUENCE_BANK + 1}-bank budget "
-                            f"(~{(MAX_SEQUENCE_BANK + 1) * 8} KB): channel '{channel}' "
-                            f"needs bank {next_bank}, but the linker config defines only "
-                            f"BANK_00..BANK_{MAX_SEQUENCE_BANK:02d}. Shorten the song or "
-                            f"split it across songs."
-                        )
-                    jump_label = f'{label_prefix}{channel}_seq_bank_{next_bank:02d}'
-                    lines.append(f'    .byte $FE, ${next_bank:02X}, <{jump_label}, >{jump_label} ; CMD_BANK_JUMP')
-
-                    current_bank = next_bank
-                    bytes_in_current_bank = 0
+
+            sections = 0
+            section = song_loop = None  # (label, bank) of the current jump targets
+            for item in items:
+                if item['jump']:
+                    current_bank += 1
+                    jump_label = f'{label_prefix}{channel}_seq_bank_{current_bank:02d}'
+                    lines.append(f'    .byte $FE, ${current_bank:02X}, <{jump_label}, >{jump_label} ; CMD_BANK_JUMP')
                     lines.append('')
                     lines.append(f'.segment "BANK_{current_bank:02d}"')
                     lines.append(f'{jump_label}:')
 
-                # Emit bytes and update size counter
-                if note > 0:
-                    inst_id = event['inst_id']
-                    if inst_id != current_inst:
-                        lines.append(f'    .byte $80, ${inst_id:02X} ; CMD_INSTRUMENT')
-                        current_inst = inst_id
-                        bytes_in_current_bank += 2
-
-                if dur > 0:
-                    rem_dur = dur
-                    while rem_dur > 0:
-                        write_dur = min(rem_dur, 32)
-                        lines.append(f'    .byte ${(write_dur - 1) + 0x60:02X}, ${note:02X} ; Length {write_dur}, Note {note}')
-                        rem_dur -= write_dur
-                        bytes_in_current_bank += 2
-
-            lines.append('    .byte $FF')
+                if item.get('song_loop_start'):
+                    song_loop = (f'{label_prefix}{channel}_song_loop', current_bank)
+                    lines.append(f'{song_loop[0]}:')
+                if item.get('section_start'):
+                    sections += 1
+                    section = (f'{label_prefix}{channel}_section_{sections}', current_bank)
+                    lines.append(f'{section[0]}:')
+
+                if 'call' in item:
+                    body_label = f'{label_prefix}subpattern_{item["call"]}'
+                    lines.append(f'    .byte $82, ${body_banks[item["call"]]:02X}, <{body_label}, '
+                                 f'>{body_label} ; CMD_CALL_PATTERN')
+                elif 'loop' in item:
+                    label, bank = section
+                    lines.append(f'    .byte $84, ${item["loop"]:02X}, ${bank:02X}, <{label}, '
+                                 f'>{label} ; CMD_LOOP')
+                else:
+                    self._emit_sequence_item_lines(lines, item, inst_remap)
+
+            if song_loop is not None:
+                label, bank = song_loop
+                lines.append(f'    .byte $FE, ${bank:02X}, <{label}, >{label} ; CMD_BANK_JUMP (song loop)')
+            else:
+                lines.append('    .byte $FF')
+            lines.append('')
+
+        for body_id, body in enumerate(bodies):
+            if body_banks[body_id] != current_bank:
+                current_bank = body_banks[body_id]
+                lines.append(f'.segment "BANK_{current_bank:02d}"')
+            lines.append(f'{label_prefix}subpattern_{body_id}:')
+            for item in body:
+                self._emit_sequence_item_lines(lines, item, inst_remap)
+            lines.append('    .byte $83 ; CMD_RETURN')
             lines.append('')
-            bytes_in_current_bank += 1
 
-        notes_clamped = {'high': notes_clamped_high, 'low': notes_clamped_low}
         # Multi-song callers always start the next song in a fresh bank
         # rather than continuing to pack into whatever's left of this one --
         # see the docstring above for why sharing a bank across calls isn't
         # safe with this function's per-call byte accounting.
-        return lines, current_bank + 1, channel_start_banks, notes_clamped
+        return current_bank + 1, channel_start_banks
+
+    def _build_song_bytecode(self, frames, label_prefix='', start_bank=0, cycle_budget=None,
+                             subpatterns=True, loop_frame=None):
+        """Serialize one song's per-channel frames into MMC3 macro-bytecode.
+
+        Walks `frames` into per-channel note/duration events, de-duplicates
+        them into volume/arp/pitch/duty macros and instruments, and emits
+        the instrument table, macro byte streams, and banked sequence
+        bytecode for all 5 channels (`SEQUENCE_CHANNELS`).
 
-    def export_tables_with_patterns(self, frames, patterns, references, output_path, standalone=True, mapper=None):
+        `label_prefix` is prepended to every symbol this song defines
+        (`instrument_table`, `macro_*`, and each channel's `*_sequence` /
+        bank-jump labels) so a multi-song build's N songs can coexist in one
+        music.asm without colliding ca65 symbol names (#30/F-13). The
+        single-song caller (`export_tables_with_patterns`) passes `''` --
+        byte-identical output to before this was extracted.
+
+        `start_bank` is the first `BANK_NN` this song's sequence data may
+        use. Returns `next_bank = <song's last used bank> + 1` -- a
+        multi-song caller always starts the following song in a fresh bank
+        rather than packing two songs' sequence bytes into the same
+        `BANK_NN` segment, since this function's own `bytes_in_current_bank`
+        accounting (and its overflow check against `MAX_SEQUENCE_BANK`) only
+        tracks bytes *within this call*; sharing a bank across calls would
+        silently desync that accounting from ca65's real per-segment size.
+
+        Returns `(lines, next_bank, channel_start_banks, notes_clamped)`.
+        `channel_start_banks` maps channel name -> the `BANK_NN` index its
+        `{label_prefix}{channel}_sequence` label physically landed in (a
+        later channel's label can spill past the bank the song started in).
+        `notes_clamped` is `{'high': N, 'low': N}`, the tone-range clamp
+        tally for this song (#298/EXP-10). `cycle_budget`, `subpatterns` and
+        `loop_frame` are passed to _emit_sequence_banks.
+        """
+        lines = []
+        macro_pool = self._new_macro_pool()
+        channel_events, instrument_defs, notes_clamped = self._collect_song_events(
+            frames, macro_pool)
+
+        # Explicit re-declaration (#30/F-13, MAP-2026-08-07-1): this method
+        # is called once per song by a multi-song build, and each call's
+        # sequence-bytecode loop below leaves the assembler in whatever
+        # `.segment "BANK_NN"` its last channel used. Without this, the
+        # *next* song's instrument_table/macro tables silently land inside
+        # that leftover dynamically-banked segment instead of the fixed,
+        # always-mapped CODE_8000 region -- the ROM still links and boots
+        # (BANK_NN is a valid segment), but at runtime, with R7 pointed
+        # anywhere other than that exact bank, every macro read for that
+        # song pulls garbage bytes. The single-song caller
+        # (export_tables_with_patterns) already has CODE_8000 active at
+        # this point (from its own header emission), so this is a no-op
+        # there -- redeclaring an already-active ca65 segment costs nothing
+        # and changes no emitted bytes.
+        lines.append('.segment "CODE_8000"')
+        self._emit_instrument_table(
+            lines, instrument_defs, [f'{label_prefix}instrument_table'], label_prefix)
+        self._emit_macro_tables(lines, macro_pool, label_prefix)
+
+        next_bank, channel_start_banks = self._emit_sequence_banks(
+            lines, channel_events, label_prefix, start_bank, cycle_budget=cycle_budget,
+            subpatterns=subpatterns, loop_frame=loop_frame)
+        return lines, next_bank, channel_start_banks, notes_clamped
+
+    def export_tables_with_patterns(self, frames, patterns, references, output_path, standalone=True, mapper=None,
+                                    direct_runtime='indexed', cycle_budget=None, subpatterns=True,
+                                    loop_frame=None):
         """Export NES audio assembly from per-frame channel data.
 
         All emitted bytes derive from ``frames``. ``patterns`` is used only as a
         boolean switch: when empty, export the direct frame tables; when non-empty,
         emit the MMC3 macro-bytecode serializer (whose compression comes from
-        macro/instrument de-duplication, not from the pattern detector). The
+        macro/instrument de-duplication and its own sub-pattern repeat finder,
+        not from the pattern detector). The
         ``references`` argument is **not consumed** — the detector's pattern
         references are analysis/metrics only and have no effect on output bytes
-        (#4). It is retained for call-site compatibility.
+        (#4). It is retained for call-site compatibility. ``direct_runtime``
+        is passed to export_direct_frames as its ``runtime``; ``cycle_budget``
+        caps the bytecode's per-frame stream-read cycles (see
+        _emit_sequence_banks), ``subpatterns`` stores repeated sections and
+        runs once behind CMD_LOOP / CMD_CALL_PATTERN, and ``loop_frame`` makes
+        the song loop back to that frame instead of stopping. The direct
+        export always loops the whole song and ignores both.
         """
         if not patterns:
-            return self.export_direct_frames(frames, output_path, standalone, mapper)
+            return self.export_direct_frames(frames, output_path, standalone, mapper,
+                                             runtime=direct_runtime)
 
         print("🔧 CA65 Exporter: MMC3 Macro Bytecode mode")
 
@@ -1498,7 +2423,8 @@ class CA65Exporter(BaseExporter):
         self._emit_period_tables(lines)
 
         body_lines, _next_bank, channel_start_banks, notes_clamped = self._build_song_bytecode(
-            frames, label_prefix='', start_bank=0)
+            frames, label_prefix='', start_bank=0, cycle_budget=cycle_budget,
+            subpatterns=subpatterns, loop_frame=loop_frame)
         lines.extend(body_lines)
 
         # Per-channel starting-bank table (#328/EXP-13). Emitted into the fixed
@@ -1545,19 +2471,29 @@ class CA65Exporter(BaseExporter):
         print(f"✅ Macro Bytecode export complete: {output_path}")
         return output_path
 
-    def export_song_bank_bytecode(self, songs, output_path):
+    def export_song_bank_bytecode(self, songs, output_path, cycle_budget=None, subpatterns=True):
         """Export a multi-song 'jukebox' ROM's music.asm (#30/F-13).
 
         `songs` is an ordered list of mappings with a `'frames'` key (one
         entry per song, in playback order -- callers should already have
-        sorted by the song bank's `metadata['order']`). Each song's frames
+        sorted by the song bank's `metadata['order']`) and an optional
+        `'loop_frame'`: a song with one loops there until Start skips it,
+        instead of auto-advancing (see _emit_sequence_banks). Each song's frames
         are serialized exactly like a single-song bytecode export (see
         `_build_song_bytecode`), but with its symbols prefixed `song{i}_`
         and its sequence bytecode continuing the shared MMC3 60-bank pool
-        from a fresh bank after the previous song's tail. Distinct songs
-        keep separate instrument/macro tables (no cross-song dedup) but
-        share one copy of the pulse/triangle period tables (they're pure
-        hardware constants, identical for every song).
+        from a fresh bank after the previous song's tail. All songs share
+        one copy of the pulse/triangle period tables (pure hardware
+        constants) and one macro pool in the fixed CODE_8000 bank.
+
+        Instruments are de-duplicated across songs too: every song's
+        instruments are merged into one shared table and each song's
+        CMD_INSTRUMENT operands are remapped to the shared ids, with each
+        `song{i}_instrument_table` label pointing at that one table. The
+        operand is a single byte, so if the union exceeds 256 instruments
+        each song instead keeps its own (smaller) table over the shared
+        macros. CODE_8000 is the scarcest bank in a jukebox build, so this
+        is what bounds how many songs fit.
 
         A `song_table` (three parallel byte arrays -- low/high address byte
         and bank, indexed `song_index*5 + channel`) plus a `song_count` byte
@@ -1566,7 +2502,8 @@ class CA65Exporter(BaseExporter):
         `.ifdef JUKEBOX_BUILD`) a way to look up any song's channel entry
         points at runtime. `init_music` jumps to `audio_init_song` instead
         of `audio_init` (single-song builds are unaffected -- they never
-        call this method).
+        call this method). `cycle_budget` and `subpatterns` apply to every
+        song's sequence bytecode (see _emit_sequence_banks).
         """
         if not songs:
             raise ValueError("export_song_bank_bytecode requires at least one song")
@@ -1606,15 +2543,60 @@ class CA65Exporter(BaseExporter):
         self._emit_period_tables(lines)
 
         all_notes_clamped = {'high': 0, 'low': 0}
-        next_bank = 0
-        song_channel_labels = []  # per song: {channel: (label, bank)}
-
-        for prefix, song in zip(song_labels, songs):
-            body_lines, next_bank, channel_start_banks, notes_clamped = self._build_song_bytecode(
-                song['frames'], label_prefix=prefix, start_bank=next_bank)
-            lines.extend(body_lines)
+        macro_pool = self._new_macro_pool()
+        collected = []
+        for song in songs:
+            channel_events, instrument_defs, notes_clamped = self._collect_song_events(
+                song['frames'], macro_pool)
+            collected.append((channel_events, instrument_defs))
             all_notes_clamped['high'] += notes_clamped['high']
             all_notes_clamped['low'] += notes_clamped['low']
+
+        # Merge every song's instruments (macro-id tuples, already over the
+        # shared pool) into one table, remembering each song's local -> shared
+        # id mapping for its CMD_INSTRUMENT operands.
+        shared_instruments = {}
+        shared_defs = []
+        inst_remaps = []
+        for _, instrument_defs in collected:
+            remap = []
+            for inst in instrument_defs:
+                if inst not in shared_instruments:
+                    shared_instruments[inst] = len(shared_defs)
+                    shared_defs.append(inst)
+                remap.append(shared_instruments[inst])
+            inst_remaps.append(remap)
+
+        lines.append('.segment "CODE_8000"')
+        if len(shared_defs) <= 0x100:
+            self._emit_instrument_table(
+                lines, shared_defs,
+                ['shared_instrument_table'] + [f'{prefix}instrument_table' for prefix in song_labels])
+        else:
+            # Too many for a one-byte operand once merged: per-song tables
+            # (each within 256, enforced by _register_instrument) over the
+            # still-shared macros.
+            inst_remaps = [None] * len(songs)
+            for prefix, (_, instrument_defs) in zip(song_labels, collected):
+                self._emit_instrument_table(lines, instrument_defs, [f'{prefix}instrument_table'])
+        self._emit_macro_tables(lines, macro_pool)
+
+        per_song_instruments = sum(len(defs) for _, defs in collected)
+        per_song_macros = sum(
+            len({inst[k] for inst in defs} | {0})
+            for _, defs in collected for k in range(len(self.MACRO_KINDS)))
+        shared_macros = sum(len(macro_pool[kind][1]) for kind in self.MACRO_KINDS)
+        print(f"   Shared instrument pool: {len(shared_defs)} instruments, {shared_macros} macros "
+              f"(per-song tables would hold {per_song_instruments} / {per_song_macros})")
+
+        next_bank = 0
+        song_channel_labels = []  # per song: {channel: (label, bank)}
+        for song, prefix, (channel_events, _), remap in zip(
+                songs, song_labels, collected, inst_remaps):
+            next_bank, channel_start_banks = self._emit_sequence_banks(
+                lines, channel_events, prefix, next_bank, inst_remap=remap,
+                cycle_budget=cycle_budget, subpatterns=subpatterns,
+                loop_frame=song.get('loop_frame'))
             song_channel_labels.append({
                 ch: (f'{prefix}{ch}_sequence', channel_start_banks[ch])
                 for ch in self.SEQUENCE_CHANNELS
@@ -1,33 +1,27 @@
 # New file: exporter/exporter_famistudio.py
 
-from exporter.base_exporter import BaseExporter, atomic_write_text
+import numpy as np
 
-def generate_famistudio_txt(frames_data, project_name="MIDI2NES", author="", copyright=""):
-    """
-    Generate FamiStudio text format export
-    
-    Args:
-        frames_data: Dictionary of frame data per channel
-        project_name: Name of the project
-        author: Author name
-        copyright: Copyright information
-        
-    Returns:
-        String containing the FamiStudio text format data
-    """
-    lines = []
-    
-    # Header
-    lines.extend([
+from exporter.base_exporter import BaseExporter, atomic_write_chunks
+
+PATTERN_LENGTH = 64  # Standard pattern length
+
+# Every pattern row starts out empty; only rows whose cell changed are
+# formatted (see _channel_cells).
+EMPTY_ROWS = tuple(f"    {row:02X} | ... .." for row in range(PATTERN_LENGTH))
+EMPTY_PATTERN = "\n".join(EMPTY_ROWS) + "\n"
+
+SONG_CHANNELS = ('pulse1', 'pulse2', 'triangle', 'noise', 'dpcm')
+
+
+def _header_text(project_name, author, copyright):
+    lines = [
         "# FamiStudio Text Export",
         f"# Project: {project_name}",
         f"# Author: {author}",
         f"# Copyright: {copyright}",
-        ""
-    ])
-    
-    # Project settings
-    lines.extend([
+        "",
+        # Project settings
         "PROJECT",
         f"  NAME {project_name}",
         f"  AUTHOR {author}",
@@ -36,11 +30,8 @@ def generate_famistudio_txt(frames_data, project_name="MIDI2NES", author="", cop
         "  CHANNELS 5",
         "  SPEED 1",
         "END",
-        ""
-    ])
-    
-    # Instruments
-    lines.extend([
+        "",
+        # Instruments
         "INSTRUMENTS",
         "  INSTRUMENT \"Pulse 1\"",
         "    TYPE Pulse",
@@ -69,110 +60,147 @@ def generate_famistudio_txt(frames_data, project_name="MIDI2NES", author="", cop
         "    VOLUME 15",
         "  END",
         "END",
-        ""
-    ])
-    
-    # Calculate patterns
-    patterns = {}
-    pattern_length = 64  # Standard pattern length
-    
-    # Handle empty frames_data case
-    if not frames_data:
-        max_frame = 0
-    else:
-        # Find maximum frame across all channels. dpcm_sample_map's keys are
-        # dense sample ids, not frame numbers (#313/EXP-11) -- exclude it.
-        all_frames = []
-        for channel_name, channel_data in frames_data.items():
-            if channel_name == 'dpcm_sample_map':
-                continue
-            all_frames.extend(int(f) for f in channel_data.keys())
-        max_frame = max(all_frames) if all_frames else 0
-    
+        "",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _cell_key(channel, event):
+    """The raw values a channel's cell is printed from, or None for a
+    channel with no cell format."""
+    if channel in ('pulse1', 'pulse2', 'triangle'):
+        # .get() with the same defaults exporter_ca65.py uses
+        # (#370/EXP-2026-07-19-2) -- a frame dict missing 'note' or 'volume'
+        # used to raise KeyError here while the CA65 path tolerated it, so
+        # the two exporters disagreed on what counts as a valid frames input.
+        return (event.get('note', 0), event.get('volume', 0))
+    if channel == 'noise':
+        return event.get('volume', 0)
+    if channel == 'dpcm':
+        # The frames dict the rest of the pipeline produces encodes the DPCM
+        # trigger as `note = sample_id + 1`, not a raw `sample_id` key, so
+        # reading event['sample_id'] raised KeyError on real frames (#82).
+        # Prefer an explicit sample_id if present, else recover it from note.
+        sample_id = event.get('sample_id')
+        if sample_id is None:
+            sample_id = max(0, event.get('note', 1) - 1)
+        return sample_id
+    return None
+
+
+def _cell_text(channel, key):
+    if channel == 'noise':
+        return f"F#4 {min(15, key)}"
+    if channel == 'dpcm':
+        return f"C-4 {key}"
+    note, volume = key
+    return f"{midi_note_to_famistudio(note)} {min(15, volume)}"
+
+
+def _channel_cells(channel, events, length):
+    """Cell ids per frame for one channel, and the changed frames.
+
+    Returns (ids, texts, changed): `ids` is an int array over frames
+    0..length-1 (-1 where the channel has no event), `texts[id]` is the cell
+    text, and `changed` is the sorted frame numbers whose cell differs from
+    the frame before -- a held note is one cell, not one per frame. Each
+    distinct cell is formatted once, however many frames carry it.
+    """
+    ids = np.full(length, -1, dtype=np.int32)
+    texts = []
+    text_ids = {}
+    key_ids = {}
+    for frame, event in events.items():
+        key = _cell_key(channel, event)
+        if key is None:
+            continue
+        cell = key_ids.get(key)
+        if cell is None:
+            text = _cell_text(channel, key)
+            cell = key_ids[key] = text_ids.setdefault(text, len(text_ids))
+            if cell == len(texts):
+                texts.append(text)
+        ids[int(frame)] = cell
+    previous = np.concatenate(([-1], ids[:-1]))
+    changed = np.flatnonzero((ids >= 0) & (ids != previous))
+    return ids, texts, changed
+
+
+def iter_famistudio_txt(frames_data, project_name="MIDI2NES", author="", copyright=""):
+    """Yield the FamiStudio text export in pieces: the header, then one
+    chunk per pattern, then the song. Peak memory is one pattern's rows
+    plus the per-frame cell-id arrays, not the whole document; see
+    generate_famistudio_txt for the format."""
+    yield _header_text(project_name, author, copyright)
+
+    # Find maximum frame across all channels. dpcm_sample_map's keys are
+    # dense sample ids, not frame numbers (#313/EXP-11) -- exclude it.
+    max_frame = 0
+    for channel_name, channel_data in frames_data.items():
+        if channel_name == 'dpcm_sample_map' or not channel_data:
+            continue
+        max_frame = max(max_frame, max(int(f) for f in channel_data.keys()))
+    length = max_frame + 1
+
+    pattern_counts = {}
+    yield "PATTERNS\n"
     for channel, events in frames_data.items():
         if channel == 'dpcm_sample_map':
             # dense_id -> catalog_id side table (#200/D-14), not a playable
             # channel; iterating it like one produces a malformed
-            # "dpcm_sample_map_N" pattern key that crashes the split('_')
-            # below (#313/EXP-11).
+            # "dpcm_sample_map_N" pattern (#313/EXP-11).
             continue
-        current_pattern = []
-        for frame in range(max_frame + 1):
-            if str(frame) in events:
-                event = events[str(frame)]
-                if channel in ['pulse1', 'pulse2', 'triangle']:
-                    # .get() with the same defaults exporter_ca65.py uses
-                    # (#370/EXP-2026-07-19-2) -- a frame dict missing 'note'
-                    # or 'volume' used to raise KeyError here while the CA65
-                    # path tolerated it, so the two exporters disagreed on
-                    # what counts as a valid frames input.
-                    note = midi_note_to_famistudio(event.get('note', 0))
-                    volume = min(15, event.get('volume', 0))
-                    current_pattern.append(f"{note} {volume}")
-                elif channel == 'noise':
-                    volume = min(15, event.get('volume', 0))
-                    current_pattern.append(f"F#4 {volume}")
-                elif channel == 'dpcm':
-                    # The frames dict the rest of the pipeline produces encodes
-                    # the DPCM trigger as `note = sample_id + 1`, not a raw
-                    # `sample_id` key, so reading event['sample_id'] raised
-                    # KeyError on real frames (#82). Prefer an explicit sample_id
-                    # if present, else recover it from note.
-                    sample_id = event.get('sample_id')
-                    if sample_id is None:
-                        sample_id = max(0, event.get('note', 1) - 1)
-                    current_pattern.append(f"C-4 {sample_id}")
+        ids, texts, changed = _channel_cells(channel, events, length)
+        bounds = np.searchsorted(changed, np.arange(0, length + PATTERN_LENGTH, PATTERN_LENGTH))
+        for index, start in enumerate(range(0, length, PATTERN_LENGTH)):
+            rows_in_pattern = min(PATTERN_LENGTH, length - start)
+            head = (f"  PATTERN \"{channel}_{index}\"\n"
+                    f"    CHANNEL {channel.upper()}\n"
+                    f"    LENGTH {PATTERN_LENGTH}\n")
+            frames = changed[bounds[index]:bounds[index + 1]]
+            if not len(frames) and rows_in_pattern == PATTERN_LENGTH:
+                body = EMPTY_PATTERN
             else:
-                current_pattern.append("... ..")
-                
-            if len(current_pattern) == pattern_length:
-                pattern_key = f"{channel}_{len(patterns)}"
-                patterns[pattern_key] = current_pattern
-                current_pattern = []
-        
-        # Add any remaining pattern data
-        if current_pattern:
-            pattern_key = f"{channel}_{len([k for k in patterns.keys() if k.startswith(channel)])}"
-            patterns[pattern_key] = current_pattern
-    
-    # Write patterns
-    lines.append("PATTERNS")
-    for pattern_key, pattern_data in patterns.items():
-        channel, index = pattern_key.split('_')
-        lines.extend([
-            f"  PATTERN \"{channel}_{index}\"",
-            f"    CHANNEL {channel.upper()}",
-            "    LENGTH 64"
-        ])
-        for i, note in enumerate(pattern_data):
-            lines.append(f"    {i:02X} | {note}")
-        lines.extend([
-            "  END",
-            ""
-        ])
-    lines.append("END")
-    
+                rows = list(EMPTY_ROWS[:rows_in_pattern])
+                for frame in frames.tolist():
+                    row = frame - start
+                    rows[row] = f"    {row:02X} | {texts[ids[frame]]}"
+                body = "\n".join(rows) + "\n"
+            yield head + body + "  END\n\n"
+        pattern_counts[channel] = index + 1
+    yield "END\n"
+
     # Write song
-    lines.extend([
-        "SONG \"Main Song\"",
-        "  SPEED 6",
-        "  TEMPO 150"
-    ])
-    
+    song = ["SONG \"Main Song\"", "  SPEED 6", "  TEMPO 150"]
     # Add pattern order for each channel
-    for channel in ['pulse1', 'pulse2', 'triangle', 'noise', 'dpcm']:
-        pattern_count = sum(1 for k in patterns.keys() if k.startswith(channel))
+    for channel in SONG_CHANNELS:
+        pattern_count = pattern_counts.get(channel, 0)
         if pattern_count > 0:
-            lines.append(f"  CHANNEL {channel.upper()}")
-            lines.append("    SEQUENCE " + " ".join(f"\"{channel}_{i}\"" for i in range(pattern_count)))
-            lines.append("  END")
-    
-    lines.extend([
-        "END",
-        ""
-    ])
-    
-    return "\n".join(lines)
+            song.append(f"  CHANNEL {channel.upper()}")
+            song.append("    SEQUENCE " + " ".join(f"\"{channel}_{i}\"" for i in range(pattern_count)))
+            song.append("  END")
+    song.append("END")
+    yield "\n".join(song) + "\n"
+
+
+def generate_famistudio_txt(frames_data, project_name="MIDI2NES", author="", copyright=""):
+    """
+    Generate FamiStudio text format export
+
+    One row per frame (SPEED 1), in 64-row patterns per channel. A cell is
+    written only on the frame it changes -- a note held over many frames
+    is a single cell followed by empty rows.
+
+    Args:
+        frames_data: Dictionary of frame data per channel
+        project_name: Name of the project
+        author: Author name
+        copyright: Copyright information
+
+    Returns:
+        String containing the FamiStudio text format data
+    """
+    return "".join(iter_famistudio_txt(frames_data, project_name, author, copyright))
 
 def midi_note_to_famistudio(note):
     """Convert MIDI note to FamiStudio note format"""
@@ -194,10 +222,10 @@ class FamiStudioExporter(BaseExporter):
     
     def export(self, frames_data, output_path, project_name="MIDI2NES", author="", copyright=""):
         """Export frame data to FamiStudio text format"""
-        output = generate_famistudio_txt(frames_data, project_name, author, copyright)
-        atomic_write_text(output_path, output)  # #385/SAFE-2026-07-19-3
+        export_famistudio(frames_data, output_path, project_name, author, copyright)
 
 def export_famistudio(frames_data, output_path, project_name="MIDI2NES", author="", copyright=""):
-    """Export frame data to FamiStudio text format"""
-    output = generate_famistudio_txt(frames_data, project_name, author, copyright)
-    atomic_write_text(output_path, output)  # #385/SAFE-2026-07-19-3
+    """Export frame data to FamiStudio text format, streamed to disk one
+    pattern at a time"""
+    atomic_write_chunks(  # #385/SAFE-2026-07-19-3
+        output_path, iter_famistudio_txt(frames_data, project_name, author, copyright))
@@ -2,7 +2,12 @@
 
 import struct
 from typing import Dict, Any, List
-from exporter.base_exporter import BaseExporter
+from exporter.base_exporter import BaseExporter, atomic_write_bytes
+from exporter.exporter_ca65 import CA65Exporter
+from nes.nsf_player import (
+    NSF_INIT_ADDRESS, NSF_LOAD_ADDRESS, NSF_PLAY_ADDRESS, NSF_SONG_HEADER_ADDRESS,
+    NSF_SONG_HEADER_SIZE, load_nsf_player, pack_song_header,
+)
 
 class NSFHeader:
     """NSF File Format Header"""
@@ -18,12 +23,18 @@ class NSFHeader:
         self.artist_name = ""         # Artist name
         self.copyright = ""           # Copyright info
         self.ntsc_speed = 16639      # ~60Hz for NTSC
-        self.bankswitch_init = [0, 1, 2, 3, 4, 5, 6, 7]  # Bank switching initialization values
+        self.bankswitch_init = [0] * 8  # All zero: not bank switched
         self.pal_speed = 19997       # ~50Hz for PAL
         self.pal_ntsc_bits = 0       # 0 = NTSC, 1 = PAL, 2 = Dual
         self.extra_sound_chips = 0   # No extra sound chips
         self.reserved = bytes([0] * 4)  # Reserved bytes
 
+    @staticmethod
+    def _text_field(text: str) -> bytes:
+        """A 32-byte NUL-terminated ASCII field (longer text is cut to 31
+        characters, anything non-ASCII becomes '?')."""
+        return text.encode('ascii', 'replace')[:31].ljust(32, b'\0')
+
     def pack(self) -> bytes:
         """Pack header into bytes"""
         header = (
@@ -34,9 +45,9 @@ class NSFHeader:
             struct.pack('<H', self.load_address) +
             struct.pack('<H', self.init_address) +
             struct.pack('<H', self.play_address) +
-            self.song_name.ljust(32, '\0').encode('ascii') +
-            self.artist_name.ljust(32, '\0').encode('ascii') +
-            self.copyright.ljust(32, '\0').encode('ascii') +
+            self._text_field(self.song_name) +
+            self._text_field(self.artist_name) +
+            self._text_field(self.copyright) +
             struct.pack('<H', self.ntsc_speed) +
             bytes(self.bankswitch_init) +
             struct.pack('<H', self.pal_speed) +
@@ -47,43 +58,149 @@ class NSFHeader:
         return header
 
 class NSFExporter(BaseExporter):
-    """NSF Binary Format Exporter"""
-    
+    """NSF Binary Format Exporter
+
+    Builds the same macro bytecode as the CA65 bytecode export
+    (CA65Exporter._build_song_bytecode), links its data lines to absolute
+    addresses, packs them with NSFMacroPacker and appends them to the
+    prebuilt player in nes/nsf_player.bin -- no ca65 run per song. The
+    player is the stock audio engine (see nes/nsf_player.py), so an NSF
+    plays exactly what the ROM build of the same song plays, except for
+    DPCM: samples are not packed, so the DMC channel is left silent.
+
+    (The first draft of this class wrote channel data as a JSON string and
+    a hand-assembled play routine with wrong branch offsets, #81.)
+    """
+
     def __init__(self):
         super().__init__()
         self.header = NSFHeader()
-        self.data_segment = bytearray()
-        self.current_address = 0x8000
-
-    # NSF export is NOT implemented. The previous draft serialized channel
-    # "data" as a UTF-8 JSON string embedded in the NSF binary (not 6502- or
-    # APU-loadable) and a hand-assembled play routine whose branch offsets were
-    # wrong (BEQ landed past the RTS, BNE landed mid-instruction), so any file it
-    # produced was not a playable NSF (#81). Rather than emit garbage, the public
-    # API raises; NSF was already removed from the CLI (#79). NSFHeader and the
-    # binary NSFMacroPacker (below) are retained as scaffolding for a real
-    # implementation. Use the CA65 / ROM export path for working audio output.
-    _UNSUPPORTED_MSG = (
-        "NSF export is not implemented: a playable NSF needs a real 6502 play "
-        "routine and a binary APU data stream (the old path emitted JSON-as-data "
-        "and a play routine with wrong branch offsets, #81). Use the CA65/ROM "
-        "export path instead."
-    )
+        self.notes_clamped = {'high': 0, 'low': 0}
 
     def export(self, frames_data: Dict[str, Any], output_path: str,
-               song_name: str = "", artist: str = "", copyright: str = ""):
-        """NSF export is not implemented - see #81. Raises NotImplementedError."""
-        raise NotImplementedError(self._UNSUPPORTED_MSG)
+               song_name: str = "", artist: str = "", copyright: str = "",
+               loop_frame=None, cycle_budget=None):
+        """Write `frames_data` (per-channel frames, as for the CA65 export)
+        as a single-song NSF.
+
+        `loop_frame` loops the song back to that frame at its end; without
+        it the player restarts the song from the top. `cycle_budget` is
+        passed through to the bytecode builder. Raises ValueError when the
+        song does not fit the player's 32KB address space.
+        """
+        frames = dict(frames_data)
+        dpcm_events = len(frames.pop('dpcm', None) or {})
+        if dpcm_events:
+            print(f"⚠ NSF export skips the DPCM channel ({dpcm_events} frame(s)): "
+                  "drum samples are only packed into ROM builds")
+
+        lines, _next_bank, _banks, self.notes_clamped = CA65Exporter()._build_song_bytecode(
+            frames, cycle_budget=cycle_budget, loop_frame=loop_frame)
+
+        player = bytearray(load_nsf_player())
+        base = NSF_LOAD_ADDRESS + len(player)
+        macros, instruments, sequences = self._link_bytecode(lines, base)
+
+        packer = NSFMacroPacker(base_address=base)
+        payload = packer.pack(macros, instruments, sequences)
+        size = len(player) + len(payload)
+        if size > 0x10000 - NSF_LOAD_ADDRESS:
+            raise ValueError(
+                f"Song data needs {len(payload)} bytes but the NSF player leaves "
+                f"{0x10000 - base} free ($8000-$FFFF, not bank switched). Shorten the "
+                f"song or use the ROM export."
+            )
+
+        offset = NSF_SONG_HEADER_ADDRESS - NSF_LOAD_ADDRESS
+        player[offset:offset + NSF_SONG_HEADER_SIZE] = pack_song_header(
+            packer.get_channel_pointers(), base + len(packer.macro_pool))
+
+        self.header.song_name = song_name or self.header.song_name
+        self.header.artist_name = artist
+        self.header.copyright = copyright
+        self.header.load_address = NSF_LOAD_ADDRESS
+        self.header.init_address = NSF_INIT_ADDRESS
+        self.header.play_address = NSF_PLAY_ADDRESS
+
+        atomic_write_bytes(output_path, self.header.pack() + bytes(player) + payload)
+
+        total_clamped = self.notes_clamped['high'] + self.notes_clamped['low']
+        if total_clamped:
+            print(f"⚠ {total_clamped} note(s) clamped to the NES tone range (24-95)")
+        print(f"✅ NSF export complete: {output_path} ({size} bytes of PRG)")
+        return output_path
+
+    @staticmethod
+    def _link_bytecode(lines, base_address):
+        """Resolve _build_song_bytecode's data lines for NSFMacroPacker.
+
+        Only the subset that method emits is understood: `.segment` (ignored:
+        the NSF image is flat, so a bank jump just lands on the next byte),
+        labels, `.byte` values in `$XX` / `<label` / `>label` form, and the
+        instrument table's `.word` rows. Returns `(macros, instruments,
+        sequences)` in NSFMacroPacker.pack's argument form, with every label
+        operand in `sequences` already resolved to where pack() will place
+        it: macros first, then 8 bytes per instrument, then the sequence
+        blocks in order.
+        """
+        macros, instruments, blocks = {}, {}, {}
+        labels = {}   # label -> (block name, offset in block)
+        current = None
+
+        for raw in lines:
+            line = raw.split(';', 1)[0].strip()
+            if not line or line.startswith('.segment'):
+                continue
+            if line.endswith(':'):
+                label = line[:-1]
+                if label.startswith('macro_'):
+                    current = macros.setdefault(label, [])
+                elif label.endswith('instrument_table'):
+                    current = None
+                elif label.endswith('_sequence') or label.startswith('subpattern_'):
+                    current = blocks.setdefault(label, [])
+                    labels[label] = (label, 0)
+                else:
+                    # A jump target inside the running sequence block
+                    block = next(reversed(blocks))
+                    labels[label] = (block, len(blocks[block]))
+                continue
+
+            directive, _, operands = line.partition(' ')
+            values = [v.strip() for v in operands.split(',')]
+            if directive == '.word':
+                instruments[f'inst_{len(instruments)}'] = dict(zip(CA65Exporter.MACRO_KINDS, values))
+            elif directive == '.byte' and current is not None:
+                current.extend(int(v[1:], 16) if v.startswith('$') else v for v in values)
+            else:
+                raise ValueError(f"NSF export cannot link bytecode line: {raw.strip()!r}")
+
+        address = base_address + sum(len(m) for m in macros.values()) + 8 * len(instruments)
+        block_addresses = {}
+        for name, data in blocks.items():
+            block_addresses[name] = address
+            address += len(data)
+
+        def resolve(value):
+            if isinstance(value, int):
+                return value
+            block, offset = labels[value[1:]]
+            target = block_addresses[block] + offset
+            return target & 0xFF if value[0] == '<' else target >> 8
 
-    def export_nsf(self, data: Dict[str, Any], output_path):
-        """NSF export is not implemented - see #81. Raises NotImplementedError."""
-        raise NotImplementedError(self._UNSUPPORTED_MSG)
+        sequences = {}
+        for name, data in blocks.items():
+            key = name[:-len('_sequence')] if name.endswith('_sequence') else name
+            sequences[key] = [resolve(v) for v in data]
+        return macros, instruments, sequences
 
 
 class NSFMacroPacker:
     """
-    Draft logic for packing MMC3 Macro Bytecode into binary arrays for NSF.
-    This will eventually replace the JSON-based serialization in NSFExporter.
+    Packs macro bytecode into the binary data area of an NSF: macros, then
+    the instrument table, then the channel sequences, from `base_address`
+    up. NSFExporter passes sequences whose label operands it has already
+    resolved to those addresses. One packer per song: pack() appends.
     """
     def __init__(self, base_address: int = 0x8000):
         self.base_address = base_address
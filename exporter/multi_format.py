@@ -0,0 +1,167 @@
+"""
+Side exports from one frames pass (`--export-formats`).
+
+The default pipeline parses and maps a MIDI file into frames once for its
+ROM. `--export-formats ca65,nsf,famistudio` writes those same frames out in
+other formats next to the ROM, instead of re-running parse -> frames per
+format:
+
+- `ca65` is the music.asm the ROM was built from (bytecode or direct
+  tables, DPCM packed), copied out -- no second export.
+- `nsf` and `famistudio` are independent of each other and pure-Python, so
+  they run across the shared process pool (utils/executor.py; threads would
+  serialize on the GIL). The frames are published once with
+  `publish_payload`; tasks carry only the token.
+
+Every format reports its own wall time. An exporter's failure is recorded
+on its result rather than raised, so one bad format can't hide the others'
+outcome.
+"""
+
+import contextlib
+import io
+import shutil
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from utils.executor import (
+    get_shared_executor, load_payload, publish_payload, release_payload,
+    reset_shared_executor, submit_bounded,
+)
+
+EXPORT_FORMATS = ('ca65', 'nsf', 'famistudio')
+
+# Written next to the ROM as <rom stem><suffix>.
+FORMAT_SUFFIXES = {
+    'ca65': '.s',
+    'nsf': '.nsf',
+    'famistudio': '.txt',
+}
+
+
+@dataclass
+class FormatExportResult:
+    """Outcome of one side export."""
+    format: str
+    output_path: str
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+    # What the exporter printed (warnings, size summaries), replayed by the
+    # caller so output from pool workers doesn't interleave.
+    log: str = ""
+
+
+def parse_export_formats(value: str) -> List[str]:
+    """Split a comma-separated `--export-formats` value, dropping
+    duplicates. Raises ValueError on an unknown or empty format."""
+    formats = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        if name not in EXPORT_FORMATS:
+            raise ValueError(f"unknown export format {name!r} "
+                             f"(choose from: {', '.join(EXPORT_FORMATS)})")
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+
+def export_format(fmt, frames, output_path, song_name="",
+                  loop_frame=None, cycle_budget=None) -> FormatExportResult:
+    """Run one exporter over `frames`. Never raises: a failure is returned
+    on the result. Top-level so it can be pickled into a worker process."""
+    start = time.perf_counter()
+    log = io.StringIO()
+    error = None
+    try:
+        with contextlib.redirect_stdout(log):
+            if fmt == 'nsf':
+                from exporter.exporter_nsf import NSFExporter
+                NSFExporter().export(frames, output_path, song_name=song_name,
+                                     loop_frame=loop_frame, cycle_budget=cycle_budget)
+            elif fmt == 'famistudio':
+                from exporter.exporter_famistudio import FamiStudioExporter
+                FamiStudioExporter().export(frames, output_path, project_name=song_name)
+            else:
+                raise ValueError(f"format {fmt!r} is not exported from frames")
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return FormatExportResult(
+        format=fmt, output_path=str(output_path),
+        duration_ms=(time.perf_counter() - start) * 1000,
+        error=error, log=log.getvalue())
+
+
+def _export_format_task(task: tuple) -> FormatExportResult:
+    """`submit_bounded` adapter: `task` is (fmt, frames token, output_path,
+    song_name, loop_frame, cycle_budget)."""
+    fmt, token, *rest = task
+    return export_format(fmt, load_payload(token), *rest)
+
+
+def export_side_formats(frames, formats: Sequence[str], output_rom, music_asm,
+                        export_ms: float = 0.0, loop_frame=None, cycle_budget=None,
+                        max_workers: int = 1) -> List[FormatExportResult]:
+    """Write every format in `formats` next to `output_rom`.
+
+    Args:
+        frames: The pipeline's frames, as exported to the ROM.
+        formats: Names from EXPORT_FORMATS.
+        output_rom: The ROM path; outputs take its stem.
+        music_asm: The ROM's exported music.asm, copied out for `ca65`.
+        export_ms: Wall time of the export that produced `music_asm`,
+            reported as the `ca65` timing.
+        loop_frame, cycle_budget: Passed to the NSF exporter, matching
+            the ROM's playback.
+        max_workers: Process-pool size; 1 runs every exporter in-process.
+
+    Returns:
+        One result per format, in `formats` order.
+    """
+    output_rom = Path(output_rom)
+    song_name = output_rom.stem
+    results: Dict[str, FormatExportResult] = {}
+    pending = []
+    for fmt in formats:
+        output_path = str(output_rom.with_suffix(FORMAT_SUFFIXES[fmt]))
+        if fmt == 'ca65':
+            start = time.perf_counter()
+            error = None
+            try:
+                shutil.copyfile(music_asm, output_path)
+            except OSError as e:
+                error = f"{type(e).__name__}: {e}"
+            results[fmt] = FormatExportResult(
+                format=fmt, output_path=output_path,
+                duration_ms=export_ms + (time.perf_counter() - start) * 1000,
+                error=error)
+        else:
+            pending.append((fmt, output_path))
+
+    if len(pending) < 2 or max_workers <= 1:
+        for fmt, output_path in pending:
+            results[fmt] = export_format(fmt, frames, output_path, song_name,
+                                         loop_frame, cycle_budget)
+        return [results[fmt] for fmt in formats]
+
+    workers = min(max_workers, len(pending))
+    token = publish_payload(frames)
+    try:
+        tasks = [(fmt, token, output_path, song_name, loop_frame, cycle_budget)
+                 for fmt, output_path in pending]
+        try:
+            executor = get_shared_executor(min_workers=workers)
+            for (fmt, *_), future in submit_bounded(executor, _export_format_task, tasks, workers):
+                results[fmt] = future.result()
+        except BrokenProcessPool as e:
+            print(f"  ❌ Parallel export failed, falling back to serial: {e}")
+            reset_shared_executor()
+            for fmt, output_path in pending:
+                if fmt not in results:
+                    results[fmt] = export_format(fmt, frames, output_path, song_name,
+                                                 loop_frame, cycle_budget)
+    finally:
+        release_payload(token)
+    return [results[fmt] for fmt in formats]
@@ -3,6 +3,8 @@ import sys
 import json
 import tempfile
 import shutil
+import time
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from typing import Optional, Dict
 from pathlib import Path
@@ -18,17 +20,28 @@ from tracker.track_mapper import assign_tracks_to_nes_channels
 from nes.emulator_core import NESEmulatorCore, frames_to_events
 from arranger import arrange_for_nes
 from nes.project_builder import NESProjectBuilder, NES_CFG_MAPPER_MARKER
-from nes.song_bank import SongBank
+from nes.song_bank import SongBank, frames_cache_key
 from exporter.exporter_ca65 import CA65Exporter
+from exporter.exporter_nsf import NSFExporter
+from exporter.multi_format import export_side_formats, parse_export_formats
 from tracker.pattern_detector import (
     EnhancedPatternDetector, sample_events_for_detection, DETECTOR_MAX_EVENTS, MAX_PATTERN_EVENTS
 )
 from tracker.tempo_map import EnhancedTempoMap
+from tracker.repetition_estimate import RepetitionEstimate
 from dpcm_sampler.enhanced_drum_mapper import DrumMapperConfig
-from config.config_manager import ConfigManager
-from core.exceptions import ConfigurationError, MIDI2NESError
+from config.config_manager import ConfigManager, PerformanceConfig
+from core.exceptions import ConfigurationError, ExportError, MIDI2NESError
 from benchmarks.performance_suite import PerformanceBenchmark
 from utils.profiling import get_memory_usage, log_memory_usage
+from utils.memory_budget import MemoryBudget, load_spilled_frames, spill_frames
+from utils.memo import cache_stats, is_caching_enabled, set_caching_enabled
+from utils.executor import (
+    default_workers, get_shared_executor, reset_shared_executor, set_worker_limit, submit_bounded,
+)
+from utils.tracing import span, traced, start_tracing, stop_tracing, write_chrome_trace
+from utils.stage_profiler import (
+    is_profiling_stages, profile_stage, start_stage_profiling, stop_stage_profiling)
 from compiler import compile_rom
 
 # Shared pattern-detection bounds. Both entry points (the `detect-patterns`
@@ -73,6 +86,46 @@ def get_pattern_detection_caps(config_path: Optional[str] = None):
             "processing.pattern_detection.large_file_threshold", LARGE_FILE_THRESHOLD_DEFAULT)
     return max_events, max_pattern_events, large_file_threshold
 
+def get_performance_config(config_path: Optional[str] = None) -> PerformanceConfig:
+    """The `performance:` settings: defaults, or those in `config_path`."""
+    if not config_path:
+        return PerformanceConfig()
+    try:
+        config_manager = ConfigManager(config_path)
+    except ConfigurationError as e:
+        # Same clean exit as get_pattern_detection_caps (#267/PL-07).
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    return config_manager.get_performance_config()
+
+def get_memory_budget(config_path: Optional[str] = None) -> MemoryBudget:
+    """MemoryBudget for `performance.max_memory_mb`: the default config's
+    value, or the one in `config_path` when given."""
+    max_memory_mb = get_performance_config(config_path).max_memory_mb
+    try:
+        return MemoryBudget(max_memory_mb)
+    except (TypeError, ValueError):
+        print(f"[ERROR] performance.max_memory_mb must be a positive integer, "
+              f"got {max_memory_mb!r}")
+        sys.exit(1)
+
+def apply_worker_limit(args) -> int:
+    """Size every parallel stage for this run: `--jobs`, else
+    `performance.max_workers` from --config, else (0/unset) the CPUs this
+    process may really use -- its affinity mask and cgroup CPU quota, minus
+    one core (utils/executor.py). Returns the resulting worker count."""
+    jobs = getattr(args, 'jobs', None)
+    source = '--jobs'
+    if not isinstance(jobs, int):
+        jobs = get_performance_config(getattr(args, 'config', None)).max_workers or None
+        source = 'performance.max_workers'
+    try:
+        set_worker_limit(jobs)
+    except ValueError:
+        print(f"[ERROR] {source} must be a positive integer, got {jobs!r}")
+        sys.exit(1)
+    return default_workers()
+
 def load_json_stage(path, required_keys, stage_name):
     """Load an inter-stage JSON artifact with an existence/parse/key guard.
 
@@ -123,6 +176,7 @@ class DpcmPackResult:
     traceback_text: Optional[str] = None
 
 
+@traced("dpcm_pack")
 def pack_dpcm_into_asm(frames, asm_path, *, verbose=False) -> DpcmPackResult:
     """Pack this song's referenced DPCM samples and append the generated
     lookup tables + binary includes to `asm_path`.
@@ -456,6 +510,40 @@ def enforce_direct_export_dpcm_mapper(mapper, mapper_choice, frames):
     )
 
 
+def resolve_direct_export_mapper(exporter, frames, mapper_choice, runtime):
+    """Resolve the mapper (and runtime) for a direct (--no-patterns) export
+    before anything is written. Returns (mapper, runtime).
+
+    'auto' ranks mappers by the estimated total size, but the streaming and
+    rle runtimes bank-pack each channel stream whole, so a song whose total
+    fits MMC1's pool can still have one stream larger than its 16KB window
+    (a ~68 s song at 4 bytes/frame). Rather than pick a mapper the export
+    then rejects, fall back to the indexed runtime -- whose per-field
+    tables are a quarter of a stream's size -- with a warning. An explicit
+    --mapper is kept as-is; the exporter reports the oversized stream.
+    Raises ValueError on an unknown or unusable mapper.
+    """
+    from mappers.factory import MapperFactory
+    if mapper_choice != 'auto':
+        mapper = MapperFactory.get_mapper(mapper_choice)
+        return enforce_direct_export_dpcm_mapper(mapper, mapper_choice, frames), runtime
+    estimated_size = exporter.estimate_direct_export_size(frames, runtime)
+    mapper = MapperFactory.auto_select(estimated_size, direct=True)
+    # Direct-export DPCM is MMC3-only: force MMC3 for 'auto' (#281/#282).
+    mapper = enforce_direct_export_dpcm_mapper(mapper, mapper_choice, frames)
+    bank_size = mapper.direct_export_bank_size()
+    if runtime != 'indexed' and bank_size is not None:
+        largest = exporter.largest_direct_stream_size(frames, runtime)
+        if largest > bank_size:
+            print(f"  ⚠️ Warning: a {runtime} channel stream would be {largest:,} bytes, "
+                  f"exceeding {mapper.name}'s {bank_size:,}-byte bank window; "
+                  f"using the indexed direct runtime instead.")
+            runtime = 'indexed'
+            estimated_size = exporter.estimate_direct_export_size(frames, runtime)
+            mapper = MapperFactory.auto_select(estimated_size, direct=True)
+    return mapper, runtime
+
+
 def get_mapper_choice(args):
     """Read args.mapper defensively, defaulting to 'mmc3' (#217/MAP-6).
 
@@ -472,6 +560,40 @@ def get_mapper_choice(args):
     return value if isinstance(value, str) else 'mmc3'
 
 
+def get_direct_runtime(args):
+    """Read args.direct_runtime defensively, defaulting to 'indexed' -- same
+    MagicMock-fixture caveat as get_mapper_choice. Only direct (no patterns)
+    exports consult it."""
+    value = getattr(args, 'direct_runtime', 'indexed')
+    return value if isinstance(value, str) else 'indexed'
+
+
+def get_cycle_budget(args):
+    """Read args.cycle_budget defensively (same MagicMock-fixture caveat as
+    get_mapper_choice): the per-frame stream-read cycle cap for bytecode
+    exports, or None for no cap. Exits on a non-positive budget."""
+    value = getattr(args, 'cycle_budget', None)
+    if not isinstance(value, int) or isinstance(value, bool):
+        return None
+    if value < 1:
+        print(f"[ERROR] --cycle-budget must be a positive integer, got {value!r}")
+        sys.exit(1)
+    return value
+
+
+def get_loop_point(args):
+    """Read args.loop_point defensively (same MagicMock-fixture caveat as
+    get_mapper_choice): the frame a bytecode export loops back to at the
+    end of the song, or None to stop there. Exits on a negative frame."""
+    value = getattr(args, 'loop_point', None)
+    if not isinstance(value, int) or isinstance(value, bool):
+        return None
+    if value < 0:
+        print(f"[ERROR] --loop-point must be a frame number (0 or more), got {value!r}")
+        sys.exit(1)
+    return value
+
+
 def _backup_existing_rom(output_rom):
     """Back up a pre-existing ROM at output_rom before it gets overwritten
     (#178/PL-05), shared by the full pipeline and the `compile` subcommand so
@@ -517,17 +639,15 @@ def validate_rom(output_rom):
     just under --verbose, so a skipped validation is never silent.
     """
     try:
-        from debug.rom_diagnostics import ROMDiagnostics
+        from debug.rom_diagnostics import ROMDiagnostics, boot_fatal_defects
         rom_result = ROMDiagnostics(verbose=False).diagnose_rom(str(output_rom))
     except Exception as e:
         print(f"  ⚠️  Warning: ROM validation could not run: {e} — ROM NOT validated")
         return False
 
-    fatal_defects = []
-    if not rom_result.reset_vectors_valid:
-        fatal_defects.append("invalid reset/NMI/IRQ vectors ($FFFA-$FFFF)")
-    if rom_result.apu_pattern_count == 0:
-        fatal_defects.append("no APU initialization code found")
+    # Shared with the batch validator (debug/batch_validator.py) so a
+    # `validate-batch` run grades ROMs by the same boot-fatal rule.
+    fatal_defects = boot_fatal_defects(rom_result)
     if fatal_defects:
         print("[ERROR] ROM validation failed - unbootable ROM:")
         for defect in fatal_defects:
@@ -549,6 +669,61 @@ def validate_rom(output_rom):
     return True
 
 
+def run_validate_batch(args):
+    """Validate every ROM in a directory across a process pool and write a
+    combined report (the batch counterpart of `validate_rom`).
+
+    Verdicts are cached by ROM content hash (default: a cache file inside the
+    ROM directory), so a nightly re-run only pays for ROMs that changed.
+    Exits 1 if any ROM fails, so a batch run gates CI the same way the
+    single-ROM `compile` validation does.
+    """
+    from debug.batch_validator import (
+        DEFAULT_CACHE_NAME, find_rom_files, summarize_batch,
+        validate_roms_batch, write_csv_report, write_json_report,
+    )
+    try:
+        rom_files = find_rom_files(args.directory, getattr(args, 'pattern', '*.nes'),
+                                   recursive=getattr(args, 'recursive', False))
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    if not rom_files:
+        print(f"[ERROR] No ROMs matching '{args.pattern}' found in {args.directory}")
+        sys.exit(1)
+
+    cache_path = None
+    if not getattr(args, 'no_cache', False):
+        cache_path = getattr(args, 'cache', None) or str(Path(args.directory) / DEFAULT_CACHE_NAME)
+
+    print(f"Validating {len(rom_files)} ROM(s) in {args.directory} ...")
+    entries = validate_roms_batch(rom_files, max_workers=getattr(args, 'jobs', None),
+                                  cache_path=cache_path)
+
+    for entry in entries:
+        status = "✓" if entry.passed else "✗"
+        source = "cached" if entry.cached else f"{entry.duration_ms:.0f}ms"
+        print(f"  {status} {entry.rom_path}: {entry.overall_health} ({source})")
+        for defect in entry.fatal_defects:
+            print(f"      - {defect}")
+        if entry.error:
+            print(f"      - {entry.error}")
+
+    if getattr(args, 'json', None):
+        write_json_report(entries, args.json)
+        print(f"  JSON report -> {args.json}")
+    if getattr(args, 'csv', None):
+        write_csv_report(entries, args.csv)
+        print(f"  CSV report -> {args.csv}")
+
+    summary = summarize_batch(entries)
+    print(f"[{'OK' if not summary['failed'] else 'ERROR'}] {summary['passed']}/{summary['total']} "
+          f"ROM(s) passed ({summary['cached']} cached, {summary['validated']} validated; "
+          f"{summary['validation_time_ms'] / 1000:.2f}s summed per-ROM diagnose time)")
+    if summary['failed']:
+        sys.exit(1)
+
+
 def run_compile(args):
     """Compile a prepared NES project to a ROM and validate it (#15).
 
@@ -653,12 +828,22 @@ def run_export(args):
         # message (#120).
         pattern_data = load_json_stage(args.patterns, ['patterns', 'references'], 'detect-patterns')
 
-    # NOTE: `nsf` was removed from --format until the NSF exporter produces a
-    # playable file (#81/EXP-05). The old `if args.format == "nsftxt"` branch
-    # dispatched on a string argparse never allowed, so `--format nsf` silently
-    # wrote nothing (#79). With `ca65` the only choice, argparse now rejects an
-    # nsf request up front instead of no-oping; re-add the branch here when NSF
-    # is real.
+    # `nsf` packs the macro bytecode behind the prebuilt player in
+    # nes/nsf_player.bin, so it always takes the bytecode path: the pattern
+    # data and the direct-export --mapper/--direct-runtime do not apply, and
+    # nothing is assembled. (The first NSF exporter wrote JSON-as-data and
+    # was pulled from --format, #79/#81.)
+    if args.format == "nsf":
+        try:
+            NSFExporter().export(frames, args.output, song_name=Path(args.output).stem,
+                                 loop_frame=get_loop_point(args),
+                                 cycle_budget=get_cycle_budget(args))
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        print(f" Exported NSF -> {args.output}")
+        return
+
     if args.format == "ca65":
         # Always use CA65Exporter, with empty patterns if none provided
         if pattern_data:
@@ -678,30 +863,34 @@ def run_export(args):
         # export_tables_with_patterns itself dispatches on it, even if
         # --patterns was passed but yielded no patterns.
         mapper = None
+        direct_runtime = get_direct_runtime(args)
         if not patterns:
-            from mappers.factory import MapperFactory
-            mapper_choice = get_mapper_choice(args)
+            # Direct-export DPCM is MMC3-only: 'auto' forces MMC3, an explicit
+            # non-MMC3 mapper is rejected (#281/#282).
             try:
-                if mapper_choice == 'auto':
-                    estimated_size = exporter.estimate_direct_export_size(frames)
-                    mapper = MapperFactory.auto_select(estimated_size, direct=True)
-                else:
-                    mapper = MapperFactory.get_mapper(mapper_choice)
-                # Direct-export DPCM is MMC3-only: force MMC3 for 'auto', reject
-                # an explicit non-MMC3 mapper (#281/#282).
-                mapper = enforce_direct_export_dpcm_mapper(mapper, mapper_choice, frames)
+                mapper, direct_runtime = resolve_direct_export_mapper(
+                    exporter, frames, get_mapper_choice(args), direct_runtime)
             except ValueError as e:
                 print(f"[ERROR] {e}")
                 sys.exit(1)
 
-        exporter.export_tables_with_patterns(
-            frames,
-            patterns,
-            references,
-            args.output,
-            standalone=False,  # Don't include header and vectors for project builder
-            mapper=mapper
-        )
+        try:
+            exporter.export_tables_with_patterns(
+                frames,
+                patterns,
+                references,
+                args.output,
+                standalone=False,  # Don't include header and vectors for project builder
+                mapper=mapper,
+                direct_runtime=direct_runtime,
+                cycle_budget=get_cycle_budget(args),
+                loop_frame=get_loop_point(args)
+            )
+        except ValueError as e:
+            # A loop point past the song's end, or sequences outgrowing the
+            # MMC3 bank budget.
+            print(f"[ERROR] {e}")
+            sys.exit(1)
             
         # Pack DPCM samples for exported ASM (#380/TD-28: extracted helper
         # shared with run_full_pipeline, so a fix to one path can't
@@ -924,6 +1113,54 @@ def _song_has_dpcm_events(frames):
     )
 
 
+def _song_frames_worker(midi_path, use_arranger, dpcm_index_path):
+    """Process-pool entry point for `song build`: one song's frames.
+    Top-level so it pickles into a worker process."""
+    return midi_to_frames_for_song(midi_path, use_arranger, dpcm_index_path=dpcm_index_path)
+
+
+def _song_frames_task(task):
+    """`submit_bounded` adapter: `task` is (name, midi_path, use_arranger,
+    dpcm_index_path)."""
+    _, midi_path, use_arranger, dpcm_index_path = task
+    return _song_frames_worker(midi_path, use_arranger, dpcm_index_path)
+
+
+def _generate_song_frames(pending, use_arranger, dpcm_index_path, verbose, max_workers):
+    """Parse/map every (name, midi_path) in `pending`, returning frames keyed
+    by song name.
+
+    Songs are independent, so they run across the shared process pool
+    (utils/executor.py; parse and arrange are pure-Python and CPU-bound);
+    one song, or max_workers <= 1, stays in-process. A broken pool falls
+    back to serial like the pattern detector does; an error raised by a
+    song itself propagates unchanged.
+    """
+    results = {}
+    if len(pending) < 2 or max_workers <= 1:
+        for name, midi_path in pending:
+            print(f"  Parsing '{name}' ({midi_path})...")
+            results[name] = midi_to_frames_for_song(
+                midi_path, use_arranger, dpcm_index_path=dpcm_index_path, verbose=verbose)
+        return results
+
+    workers = min(max_workers, len(pending))
+    print(f"  Parsing {len(pending)} songs across {workers} worker processes...")
+    tasks = [(name, midi_path, use_arranger, dpcm_index_path) for name, midi_path in pending]
+    try:
+        executor = get_shared_executor(min_workers=workers)
+        for (name, *_), future in submit_bounded(executor, _song_frames_task, tasks, workers):
+            results[name] = future.result()
+    except BrokenProcessPool as e:
+        print(f"  ❌ Parallel song parsing failed, falling back to serial: {e}")
+        reset_shared_executor()
+        for name, midi_path in pending:
+            if name not in results:
+                results[name] = midi_to_frames_for_song(
+                    midi_path, use_arranger, dpcm_index_path=dpcm_index_path, verbose=verbose)
+    return results
+
+
 def run_song_build(args):
     """Build a multi-song 'jukebox' ROM from a song bank (#30/F-13).
 
@@ -957,10 +1194,13 @@ def run_song_build(args):
     dpcm_index_path = getattr(args, 'dpcm_index', None) or 'dpcm_index.json'
     verbose = getattr(args, 'verbose', False)
 
-    songs = []
+    use_cache = not getattr(args, 'no_cache', False)
+    max_workers = getattr(args, 'jobs', None) or default_workers()
+
+    # Validate every song's source up front so a missing MIDI fails the
+    # build before any parsing work is spent.
     for name in ordered_names:
-        song_data = bank.songs[name]
-        midi_path = song_data.get('midi_path')
+        midi_path = bank.songs[name].get('midi_path')
         if not midi_path:
             print(f"[ERROR] Song '{name}' has no recorded source MIDI -- "
                   f"re-add it with 'song add' to build it.")
@@ -969,22 +1209,51 @@ def run_song_build(args):
             print(f"[ERROR] Song '{name}' source MIDI not found: {midi_path}")
             sys.exit(1)
 
-        print(f"  Parsing '{name}' ({midi_path})...")
-        try:
-            frames = midi_to_frames_for_song(
-                midi_path, use_arranger, dpcm_index_path=dpcm_index_path, verbose=verbose)
-        except FileNotFoundError as e:
-            print(f"[ERROR] {e}")
-            sys.exit(1)
+    # Reuse compiled frames for songs whose MIDI content (and mapping mode)
+    # is unchanged since the last build; only the rest are re-parsed.
+    frames_by_name = {}
+    cache_keys = {}
+    pending = []
+    for name in ordered_names:
+        midi_path = bank.songs[name]['midi_path']
+        if use_cache:
+            cache_keys[name] = frames_cache_key(midi_path, use_arranger, dpcm_index_path)
+            cached = bank.get_cached_frames(name, cache_keys[name])
+            if cached is not None:
+                print(f"  Reusing cached frames for '{name}'")
+                frames_by_name[name] = cached
+                continue
+        pending.append((name, midi_path))
+
+    try:
+        fresh = _generate_song_frames(
+            pending, use_arranger, dpcm_index_path, verbose, max_workers)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    frames_by_name.update(fresh)
 
+    songs = []
+    for name in ordered_names:
+        frames = frames_by_name[name]
         if _song_has_dpcm_events(frames):
             print(f"[ERROR] Song '{name}' contains DPCM drum samples -- "
                   f"'song build' does not support DPCM in multi-song ROMs yet "
                   f"(see docs/ROADMAP.md). Remove drums or build this song "
                   f"individually with the normal pipeline.")
             sys.exit(1)
+        songs.append({'frames': frames,
+                      'loop_frame': bank.songs[name]['metadata'].get('loop_point')})
 
-        songs.append({'frames': frames})
+    if use_cache and fresh:
+        for name, frames in fresh.items():
+            bank.store_frames(name, cache_keys[name], frames)
+        try:
+            bank.export_bank(str(bank_path))
+        except OSError as e:
+            # The cache is an optimization; a read-only bank only costs a
+            # full re-parse next time.
+            print(f"  Warning: could not save compiled frames to {bank_path}: {e}")
 
     output_rom = Path(args.output)
     skip_validation = getattr(args, 'skip_validation', False)
@@ -995,7 +1264,8 @@ def run_song_build(args):
 
         exporter = CA65Exporter()
         try:
-            exporter.export_song_bank_bytecode(songs, str(music_asm))
+            exporter.export_song_bank_bytecode(songs, str(music_asm),
+                                               cycle_budget=get_cycle_budget(args))
         except ValueError as e:
             print(f"[ERROR] {e}")
             sys.exit(1)
@@ -1057,10 +1327,15 @@ def load_config(config_path: Optional[str] = None) -> DrumMapperConfig:
 # place that decides how to report an error and whether to restore a backup
 # (#26) -- these helpers don't need to know that policy exists.
 
-def detect_patterns_or_direct_export(frames, use_patterns, args):
+def detect_patterns_or_direct_export(frames, use_patterns, args, budget=None, events=None):
     """Step 4: run pattern detection for compression, or build the
     unpatterned direct-export stats stub.
 
+    `budget` (a MemoryBudget) may lower the parallel detector's sampling cap
+    and worker count when memory is tight. `events` are the precomputed
+    `frames_to_events(frames)` for callers that spilled `frames` to disk
+    first (frames is then None; patterned path only).
+
     Returns (pattern_result, pattern_loss_warning, coverage_lossy_note).
     pattern_loss_warning is set when the sequential fallback had to sample
     events down for compression analysis only (#176/PL-03) --  every
@@ -1116,7 +1391,8 @@ def detect_patterns_or_direct_export(frames, use_patterns, args):
 
     # Convert frames to events for pattern detection (shared extractor skips
     # the dpcm_sample_map side table -- #261).
-    events = frames_to_events(frames)
+    if events is None:
+        events = frames_to_events(frames)
 
     # Sampling caps + advisory large-file threshold, optionally overridden in
     # lockstep by --config (#219, #334/PERF-14).
@@ -1134,6 +1410,12 @@ def detect_patterns_or_direct_export(frames, use_patterns, args):
     try:
         from tracker.pattern_detector_parallel import ParallelPatternDetector
         detector = ParallelPatternDetector(tempo_map, min_pattern_length=PATTERN_MIN_LENGTH, max_pattern_length=PATTERN_MAX_LENGTH, max_pattern_events=max_pattern_events)
+        if budget is not None:
+            planned = budget.plan_pattern_detection(max_pattern_events, detector.max_workers)
+            if planned != (detector.max_pattern_events, detector.max_workers):
+                detector.max_pattern_events, detector.max_workers = planned
+                print(f"  🧠 Memory budget: {detector.max_workers} worker(s), "
+                      f"sampling cap {detector.max_pattern_events:,} events")
         print(f"  Using parallel pattern detection with {len(events):,} events")
         pattern_result = detector.detect_patterns(events)
     except Exception as e:
@@ -1165,6 +1447,12 @@ def detect_patterns_or_direct_export(frames, use_patterns, args):
         # the "(lossy...)" coverage suffix even though coverage genuinely was
         # computed over this sampled subset (#378/PIPE-2026-07-19-2).
 
+    # The parallel detector's repetition precheck (tracker/
+    # repetition_estimate.py), surfaced in the pipeline summary.
+    repetition_estimate = getattr(detector, 'repetition_estimate', None)
+    if isinstance(repetition_estimate, RepetitionEstimate):
+        pattern_result['stats']['repetition_estimate'] = repetition_estimate.as_dict()
+
     if detector.was_sampled or fallback_sampled:
         # Uniform sampling can put retained samples out of phase with the
         # song's period, collapsing coverage_ratio well below what the full
@@ -1199,17 +1487,12 @@ def export_frames_and_resolve_mapper(frames, pattern_result, music_asm, use_patt
     exporter = CA65Exporter()
 
     mapper = None
+    direct_runtime = get_direct_runtime(args)
     if not use_patterns:
-        from mappers.factory import MapperFactory
-        mapper_choice = get_mapper_choice(args)
-        if mapper_choice == 'auto':
-            estimated_size = exporter.estimate_direct_export_size(frames)
-            mapper = MapperFactory.auto_select(estimated_size, direct=True)
-        else:
-            mapper = MapperFactory.get_mapper(mapper_choice)
-        # Direct-export DPCM is MMC3-only: force MMC3 for 'auto', reject an
-        # explicit non-MMC3 mapper (#281/#282).
-        mapper = enforce_direct_export_dpcm_mapper(mapper, mapper_choice, frames)
+        # Direct-export DPCM is MMC3-only: 'auto' forces MMC3, an explicit
+        # non-MMC3 mapper is rejected (#281/#282).
+        mapper, direct_runtime = resolve_direct_export_mapper(
+            exporter, frames, get_mapper_choice(args), direct_runtime)
 
     # The CA65 exporter emits every byte from `frames`; the detector's
     # pattern `references` are analysis/metrics only and are never read by
@@ -1225,7 +1508,10 @@ def export_frames_and_resolve_mapper(frames, pattern_result, music_asm, use_patt
         pattern_result['references'],
         str(music_asm),
         standalone=False,  # We'll create our own project structure
-        mapper=mapper
+        mapper=mapper,
+        direct_runtime=direct_runtime,
+        cycle_budget=get_cycle_budget(args),
+        loop_frame=get_loop_point(args)
     )
 
     # Pack DPCM samples (#380/TD-28: extracted helper shared with run_export,
@@ -1277,21 +1563,54 @@ def build_and_validate_rom(mapper, music_asm, project_path, output_rom,
 
     print("[6/7] Preparing NES project...")
     builder = NESProjectBuilder(str(project_path), debug_mode=debug_mode, mapper=mapper)
-    if not builder.prepare_project(str(music_asm)):
+    with span("prepare"), profile_stage("prepare"):
+        prepared = builder.prepare_project(str(music_asm))
+    if not prepared:
         raise RuntimeError("Failed to prepare NES project")
 
     print("[7/7] Compiling NES ROM...")
-    if not compile_rom(project_path, output_rom, verbose=args.verbose, mapper=mapper):
+    with span("compile", mapper=mapper.name), profile_stage("compile"):
+        compiled = compile_rom(project_path, output_rom, verbose=args.verbose, mapper=mapper)
+    if not compiled:
         raise RuntimeError("ROM compilation failed")
 
     if not skip_validation:
         print("[8/8] Validating ROM...")
-        if not validate_rom(output_rom):
+        with span("validate"), profile_stage("validate"):
+            valid = validate_rom(output_rom)
+        if not valid:
             raise RuntimeError("ROM validation failed")
 
     return data_size
 
 
+def write_side_exports(frames, music_asm, output_rom, export_ms, args):
+    """`--export-formats`: write the requested formats next to the ROM from
+    the frames this run already computed (exporter/multi_format.py), each
+    with its own timing.
+
+    Raises ExportError if any format failed, after reporting all of them.
+    """
+    formats = getattr(args, 'export_formats', None)
+    if not formats:
+        return []
+    print(f"  📤 Exporting {', '.join(formats)} from the same frames...")
+    results = export_side_formats(
+        frames, formats, output_rom, music_asm, export_ms=export_ms,
+        loop_frame=get_loop_point(args), cycle_budget=get_cycle_budget(args),
+        max_workers=default_workers())
+    for result in results:
+        for line in result.log.splitlines():
+            print(f"     {line}")
+        status = f"FAILED: {result.error}" if result.error else Path(result.output_path).name
+        print(f"     {result.format:<10} {result.duration_ms:8.1f} ms  {status}")
+    failed = [r.format for r in results if r.error]
+    if failed:
+        raise ExportError(f"--export-formats failed for {', '.join(failed)}",
+                          "; ".join(f"{r.format}: {r.error}" for r in results if r.error))
+    return results
+
+
 def run_full_pipeline(args):
     """Run the complete MIDI to NES ROM pipeline"""
     input_midi = Path(args.input)
@@ -1316,16 +1635,27 @@ def run_full_pipeline(args):
         print("   🔄 Direct export mode (no pattern compression)")
     print("=" * 60)
     
+    # performance.max_memory_mb, watched for the whole build, and
+    # performance.enable_caching for the per-note lookup memos.
+    budget = get_memory_budget(getattr(args, 'config', None))
+    set_caching_enabled(get_performance_config(getattr(args, 'config', None)).enable_caching)
+    workers = apply_worker_limit(args)
+    if getattr(args, 'verbose', False):
+        print(f"   Worker processes: {workers}")
+
     # Create temporary directory for intermediate files
     build_succeeded = False
     with tempfile.TemporaryDirectory(prefix="midi2nes_") as temp_dir:
         temp_path = Path(temp_dir)
 
         try:
+            budget.start()
+            budget.checkpoint("parse")
             # Step 1: Parse MIDI to frames (using fast parser)
             print("[1/7] Parsing MIDI file...")
             from tracker.parser_fast import parse_midi_to_frames as parse_fast
-            midi_data = parse_fast(str(input_midi))
+            with span("parse", file=input_midi.name), profile_stage("parse"):
+                midi_data = parse_fast(str(input_midi))
 
             # Check for arranger mode
             use_arranger = hasattr(args, 'arranger') and args.arranger
@@ -1334,11 +1664,13 @@ def run_full_pipeline(args):
                 # Step 2+3: Use intelligent arranger with arpeggiation
                 print("[2/7] Analyzing musical structure...")
                 print("[3/7] Arranging for NES with arpeggiation...")
-                frames = arrange_for_nes(
-                    midi_data["events"],
-                    arp_speed=3,  # 20Hz arpeggiation (classic NES)
-                    verbose=args.verbose
-                )
+                budget.checkpoint("arrange")
+                with span("arrange"), profile_stage("arrange"):
+                    frames = arrange_for_nes(
+                        midi_data["events"],
+                        arp_speed=3,  # 20Hz arpeggiation (classic NES)
+                        verbose=args.verbose
+                    )
                 # midi_data is not referenced again downstream -- release it
                 # instead of holding both it and frames simultaneously
                 # (#371/PERF-A-01; run_detect_patterns already dels frames
@@ -1359,7 +1691,9 @@ def run_full_pipeline(args):
                     print(f"[ERROR] DPCM index not found: {dpcm_index_path} "
                           f"(pass --dpcm-index <path>, or restore dpcm_index.json)")
                     sys.exit(1)
-                mapped = assign_tracks_to_nes_channels(midi_data["events"], dpcm_index_path)
+                budget.checkpoint("map")
+                with span("map"), profile_stage("map"):
+                    mapped = assign_tracks_to_nes_channels(midi_data["events"], dpcm_index_path)
                 # midi_data's data is now fully captured in mapped; step 3
                 # below never reads midi_data again (#371/PERF-A-01).
                 del midi_data
@@ -1367,7 +1701,9 @@ def run_full_pipeline(args):
                 # Step 3: Generate frame data
                 print("[3/7] Generating NES frame data...")
                 emulator = NESEmulatorCore()
-                frames = emulator.process_all_tracks(mapped)
+                budget.checkpoint("frames")
+                with span("frames"), profile_stage("frames"):
+                    frames = emulator.process_all_tracks(mapped)
                 # mapped is not referenced again downstream -- the frames
                 # stage's peak used to hold both mapped (its input) and
                 # frames (its output) simultaneously (#371/PERF-A-01).
@@ -1380,21 +1716,47 @@ def run_full_pipeline(args):
             # so there is no further #371-style del-ordering to preserve
             # here; each helper raises on failure straight into this
             # function's single try/except/finally.
-            pattern_result, pattern_loss_warning, coverage_lossy_note = (
-                detect_patterns_or_direct_export(frames, use_patterns, args)
-            )
 
+            # Enforce performance.max_memory_mb: near the budget, frames go to
+            # disk while detection (the pipeline's memory peak) runs, and the
+            # budget may shrink the detector's sampling cap / worker count.
+            events = None
+            spilled_frames = None
+            current_mb = budget.checkpoint("pattern_detection")
+            if use_patterns and budget.should_spill_frames(current_mb):
+                events = frames_to_events(frames)
+                spilled_frames = spill_frames(frames, temp_path / "frames.pickle")
+                frames = None
+                print(f"  🧠 Memory budget: {current_mb:.0f}/{budget.max_memory_mb} MB in use, "
+                      f"frames spilled to disk during pattern detection")
+            with span("pattern_detection"), profile_stage("pattern_detection"):
+                pattern_result, pattern_loss_warning, coverage_lossy_note = (
+                    detect_patterns_or_direct_export(
+                        frames, use_patterns, args, budget=budget, events=events)
+                )
+            del events
+            if spilled_frames is not None:
+                frames = load_spilled_frames(spilled_frames)
+
+            budget.checkpoint("export")
             music_asm = temp_path / "music.asm"
-            mapper, pack_result = export_frames_and_resolve_mapper(
-                frames, pattern_result, music_asm, use_patterns, args)
+            export_start = time.perf_counter()
+            with span("export"), profile_stage("export"):
+                mapper, pack_result = export_frames_and_resolve_mapper(
+                    frames, pattern_result, music_asm, use_patterns, args)
             dpcm_pack_warning = pack_result.warning
+            with span("side_exports"):
+                write_side_exports(frames, music_asm, output_rom,
+                                   (time.perf_counter() - export_start) * 1000, args)
 
             project_path = temp_path / "nes_project"
             debug_mode = hasattr(args, 'debug') and args.debug
             skip_validation = hasattr(args, 'skip_validation') and args.skip_validation
-            build_and_validate_rom(
-                mapper, music_asm, project_path, output_rom,
-                debug_mode, skip_validation, args)
+            budget.checkpoint("build")
+            with span("build"):
+                build_and_validate_rom(
+                    mapper, music_asm, project_path, output_rom,
+                    debug_mode, skip_validation, args)
 
             # Success!
             rom_size = output_rom.stat().st_size
@@ -1412,8 +1774,26 @@ def run_full_pipeline(args):
                   f"{pattern_result['stats']['total_events']:,} events matched a detected pattern"
                   f"{coverage_lossy_note}")
             print(f"   Total patterns detected: {len(pattern_result['patterns'])}")
+            estimate = pattern_result['stats'].get('repetition_estimate')
+            if estimate:
+                print(f"   Repetition precheck: ≤{estimate['coverage_estimate']:.1f}% coverage "
+                      f"possible, longest repeat {estimate['max_repeat_length']} events "
+                      f"({estimate['elapsed_ms']:.1f}ms)")
             if pattern_loss_warning:
                 print(f"\n   ⚠️  {pattern_loss_warning}")
+            budget_summary = budget.summary()
+            print(f"   Peak memory: {budget_summary['peak_mb']:.0f} MB of "
+                  f"{budget.max_memory_mb} MB budget ({budget_summary['peak_stage']})")
+            if budget_summary['degradations']:
+                print(f"   Memory budget degradations: {'; '.join(budget_summary['degradations'])}")
+            if budget_summary['overruns']:
+                print(f"\n   ⚠️  Memory budget exceeded during: "
+                      f"{', '.join(budget_summary['overruns'])}")
+            if args.verbose and is_caching_enabled():
+                print("   Lookup caches (hits/misses):")
+                for cache_name, stats in cache_stats().items():
+                    print(f"     {cache_name:24} {stats['hits']:>9,} / {stats['misses']:<7,} "
+                          f"({stats['hit_rate']:.0%} hit)")
             if dpcm_pack_warning:
                 # See run_export's identical labeling: "NO DRUMS" only
                 # actually describes the all-missing case (#367/DP-DPCM-05).
@@ -1454,6 +1834,7 @@ def run_full_pipeline(args):
             sys.exit(1)
 
         finally:
+            budget.stop()
             # Single restore point that covers every failure path after backup
             # creation: compile failure, prepare failure, top-level exception (#26).
             if not build_succeeded:
@@ -1469,6 +1850,9 @@ def main():
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose output')
     parser.add_argument('--debug', '-d', action='store_true', help='Enable debug overlay in ROM (shows APU status, frame counter, errors on screen)')
     parser.add_argument('--arranger', '-a', action='store_true', help='Use intelligent arranger with arpeggiation for polyphonic content (default pipeline only; no subcommand equivalent yet)')
+    parser.add_argument('--trace', metavar='OUT.json', help='Write a Chrome trace-event timeline of this run (open in chrome://tracing or ui.perfetto.dev)')
+    parser.add_argument('--profile-stages', metavar='DIR', dest='profile_stages_dir',
+                        help='cProfile each pipeline stage; writes DIR/<stage>.pstats and flamegraph-ready DIR/<stage>.collapsed')
     
     subparsers = parser.add_subparsers(dest='command', help='Advanced commands (optional - default is MIDI to ROM conversion)')
 
@@ -1520,17 +1904,31 @@ def main():
     p_patterns.add_argument('--config', help='Path to YAML config overriding pattern-detection sampling caps')
     p_patterns.set_defaults(func=run_detect_patterns)
 
-    p_export = subparsers.add_parser('export', help='Export NES-ready files (ca65/FamiTracker)')
+    p_export = subparsers.add_parser('export', help='Export NES-ready files (ca65/NSF)')
     p_export.add_argument('input')
     p_export.add_argument('output')
-    # `nsf` is intentionally absent until the NSF exporter is playable (#79/#81);
-    # offering it made `--format nsf` a silent no-op rather than a real export.
-    p_export.add_argument('--format', choices=['ca65'], default='ca65')
+    p_export.add_argument('--format', choices=['ca65', 'nsf'], default='ca65',
+                           help="'ca65': music.asm for `prepare`; 'nsf': a playable NSF "
+                                "built on the prebuilt engine, no cc65 needed. Default: ca65")
     p_export.add_argument('--patterns', help='Path to pattern data JSON (optional)')
     p_export.add_argument('--mapper', choices=['auto', 'nrom', 'mmc1', 'mmc3'], default='mmc3',
                            help="NES mapper this export targets (must match the mapper "
                                 "later passed to `prepare`); only affects direct (no "
                                 "patterns) exports. Default: mmc3")
+    p_export.add_argument('--direct-runtime', choices=['indexed', 'streaming', 'rle'], default='indexed',
+                           help="Playback code for direct (no patterns) exports: 'indexed' "
+                                "reads each table at frame_counter; 'streaming' walks one "
+                                "interleaved stream per channel with zero-page pointers "
+                                "(fewer NMI cycles); 'rle' run-length encodes those streams "
+                                "(several times smaller). Default: indexed")
+    p_export.add_argument('--cycle-budget', type=int, metavar='CYCLES',
+                           help="Cap the CPU cycles audio_update spends reading pattern "
+                                "(macro bytecode) sequences in any one frame by moving "
+                                "instrument loads and bank jumps to earlier frames")
+    p_export.add_argument('--loop-point', type=int, metavar='FRAME',
+                           help="Loop pattern (macro bytecode) exports back to this frame "
+                                "when the song ends instead of stopping; direct exports "
+                                "always loop the whole song")
     p_export.set_defaults(func=run_export)
 
     # Keep other existing commands...
@@ -1554,6 +1952,18 @@ def main():
     p_compile.add_argument('--verbose', '-v', action='store_true', help='Verbose validation output')
     p_compile.set_defaults(func=run_compile)
 
+    p_validate_batch = subparsers.add_parser(
+        'validate-batch', help='Validate every ROM in a directory in parallel (cached by ROM hash)')
+    p_validate_batch.add_argument('directory', help='Directory containing .nes ROMs')
+    p_validate_batch.add_argument('--pattern', default='*.nes', help="ROM filename glob (default: *.nes)")
+    p_validate_batch.add_argument('--recursive', '-r', action='store_true', help='Search subdirectories too')
+    p_validate_batch.add_argument('--jobs', '-j', type=int, help='Worker processes (default: usable cores - 1)')
+    p_validate_batch.add_argument('--cache', help='Verdict cache file (default: <directory>/.midi2nes_validation_cache.json)')
+    p_validate_batch.add_argument('--no-cache', action='store_true', help='Re-validate every ROM and do not write a cache')
+    p_validate_batch.add_argument('--json', help='Write a combined JSON report to this path')
+    p_validate_batch.add_argument('--csv', help='Write a combined CSV report to this path')
+    p_validate_batch.set_defaults(func=run_validate_batch)
+
     # Song bank management commands
     p_song = subparsers.add_parser(
         'song',
@@ -1566,7 +1976,9 @@ def main():
     p_song_add.add_argument('--bank', help='Song bank file (creates new if not exists)')
     p_song_add.add_argument('--name', help='Song name (defaults to filename)')
     p_song_add.add_argument('--composer', help='Song composer')
-    p_song_add.add_argument('--loop-point', type=int, help='Loop point in frames')
+    p_song_add.add_argument('--loop-point', type=int,
+                            help="Loop point in frames: 'song build' loops the song there "
+                                 "until Start skips it, instead of moving on")
     p_song_add.add_argument('--tags', help='Comma-separated tags')
     p_song_add.add_argument('--tempo', type=int, default=120, help='Base tempo (default: 120)')
     # NOTE: song-add --config was not consumed by run_song_add, so it was dropped
@@ -1593,6 +2005,12 @@ def main():
                                help='Use arranger mode (voice allocation + arpeggiation) for every song in the bank')
     p_song_build.add_argument('--dpcm-index', help='Path to DPCM sample index (legacy/non-arranger mode only)')
     p_song_build.add_argument('--skip-validation', action='store_true', help='Skip post-compile ROM validation')
+    p_song_build.add_argument('--jobs', '-j', type=int,
+                               help='Worker processes for per-song parsing (default: cores - 1)')
+    p_song_build.add_argument('--cycle-budget', type=int, metavar='CYCLES',
+                               help='Per-frame sequence-read cycle cap (see `export --cycle-budget`)')
+    p_song_build.add_argument('--no-cache', action='store_true',
+                               help='Re-parse every song, ignoring and not updating the compiled frames stored in the bank')
     p_song_build.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     p_song_build.set_defaults(func=run_song_build)
 
@@ -1604,9 +2022,36 @@ def main():
     p_benchmark_run = benchmark_subparsers.add_parser('run', help='Run performance benchmark')
     p_benchmark_run.add_argument('files', nargs='*', help='MIDI files to benchmark (optional)')
     p_benchmark_run.add_argument('--output', default='benchmark_results', help='Output directory')
-    p_benchmark_run.add_argument('--memory', action='store_true', help='Enable detailed memory profiling')
+    p_benchmark_run.add_argument('--memory', action='store_true',
+                                 help='Snapshot the heap around each stage and report its top allocation sites and object-type counts')
+    p_benchmark_run.add_argument('--profile-stages', action='store_true',
+                                 help='cProfile each stage; writes <stage>.pstats and <stage>.collapsed to OUTPUT/profiles/')
     p_benchmark_run.set_defaults(func=run_benchmark)
     
+    # Scaling sweep over synthetic songs
+    p_benchmark_scale = benchmark_subparsers.add_parser(
+        'scale', help='Fit per-stage time/memory complexity over a synthetic song size sweep')
+    p_benchmark_scale.add_argument('--min-events', type=int, default=1000,
+                                   help='Smallest song in the sweep, in note events (default: 1000)')
+    p_benchmark_scale.add_argument('--max-events', type=int, default=16000,
+                                   help='Largest song in the sweep, in note events (max 1,000,000; default: 16000)')
+    p_benchmark_scale.add_argument('--factor', type=float, default=2.0,
+                                   help='Size ratio between sweep points (default: 2.0)')
+    p_benchmark_scale.add_argument('--tracks', type=int, default=4, help='Melodic tracks (default: 4)')
+    p_benchmark_scale.add_argument('--notes-per-beat', type=float, default=2.0,
+                                   help='Note onsets per beat per track (default: 2.0)')
+    p_benchmark_scale.add_argument('--polyphony', type=int, default=1,
+                                   help='Simultaneous notes per onset (default: 1)')
+    p_benchmark_scale.add_argument('--tempo-changes', type=int, default=0,
+                                   help='set_tempo events per song (default: 0)')
+    p_benchmark_scale.add_argument('--drum-density', type=float, default=0.0,
+                                   help='Fraction of 16th-note slots with a drum hit (default: 0)')
+    p_benchmark_scale.add_argument('--seed', type=int, default=0, help='Generator seed (default: 0)')
+    p_benchmark_scale.add_argument('--time-budget', type=float,
+                                   help='Stop the sweep once one size takes longer than this many seconds')
+    p_benchmark_scale.add_argument('--output', default='benchmark_results', help='Output directory')
+    p_benchmark_scale.set_defaults(func=run_benchmark_scale)
+
     # Memory usage command
     p_benchmark_memory = benchmark_subparsers.add_parser('memory', help='Show current memory usage')
     p_benchmark_memory.set_defaults(func=run_benchmark_memory)
@@ -1615,7 +2060,8 @@ def main():
     import sys
     
     # Check if first argument (if any) is a subcommand
-    subcommands = ['parse', 'map', 'config', 'frames', 'detect-patterns', 'export', 'prepare', 'compile', 'song', 'benchmark']
+    subcommands = ['parse', 'map', 'config', 'frames', 'detect-patterns', 'export', 'prepare', 'compile',
+                   'validate-batch', 'song', 'benchmark']
     
     # Handle special cases first
     if len(sys.argv) == 1:
@@ -1630,10 +2076,17 @@ def main():
         parser.parse_args(sys.argv[1:])
         return
     
-    # Check if first non-option argument is a subcommand
+    # Check if first non-option argument is a subcommand. Skip the values of
+    # options that take one, so `--trace out.json benchmark run ...` isn't
+    # mistaken for a pipeline run on "out.json".
     first_arg = None
-    for arg in sys.argv[1:]:
-        if not arg.startswith('-'):
+    options_with_values = {'--trace', '--profile-stages', '--config', '--mapper', '--jobs', '-j',
+                           '--direct-runtime', '--cycle-budget', '--loop-point', '--export-formats'}
+    args_iter = iter(sys.argv[1:])
+    for arg in args_iter:
+        if arg in options_with_values:
+            next(args_iter, None)
+        elif not arg.startswith('-'):
             first_arg = arg
             break
     
@@ -1652,7 +2105,7 @@ def main():
         # It's a subcommand, parse normally
         args = parser.parse_args()
         if hasattr(args, 'func'):
-            args.func(args)
+            _run_command(args.func, args)
         else:
             parser.print_help()
     else:
@@ -1692,12 +2145,66 @@ def main():
                     sys.exit(2)
                 global_args.extend([arg, sys.argv[i + 1]])
                 i += 2
+            elif arg in ('--jobs', '-j'):
+                if i + 1 >= len(sys.argv) or not sys.argv[i + 1].isdigit() or int(sys.argv[i + 1]) < 1:
+                    print("Error: --jobs requires a positive integer", file=sys.stderr)
+                    sys.exit(2)
+                global_args.extend(['--jobs', sys.argv[i + 1]])
+                i += 2
             elif arg == '--mapper':
                 if i + 1 >= len(sys.argv) or sys.argv[i + 1] not in ('auto', 'nrom', 'mmc1', 'mmc3'):
                     print("Error: --mapper requires one of: auto, nrom, mmc1, mmc3", file=sys.stderr)
                     sys.exit(2)
                 global_args.extend([arg, sys.argv[i + 1]])
                 i += 2
+            elif arg == '--direct-runtime':
+                if i + 1 >= len(sys.argv) or sys.argv[i + 1] not in ('indexed', 'streaming', 'rle'):
+                    print("Error: --direct-runtime requires one of: indexed, streaming, rle", file=sys.stderr)
+                    sys.exit(2)
+                global_args.extend([arg, sys.argv[i + 1]])
+                i += 2
+            elif arg == '--cycle-budget':
+                if i + 1 >= len(sys.argv) or not sys.argv[i + 1].isdigit() or int(sys.argv[i + 1]) < 1:
+                    print("Error: --cycle-budget requires a positive integer", file=sys.stderr)
+                    sys.exit(2)
+                global_args.extend([arg, sys.argv[i + 1]])
+                i += 2
+            elif arg == '--loop-point':
+                if i + 1 >= len(sys.argv) or not sys.argv[i + 1].isdigit():
+                    print("Error: --loop-point requires a frame number", file=sys.stderr)
+                    sys.exit(2)
+                global_args.extend([arg, sys.argv[i + 1]])
+                i += 2
+            elif arg == '--export-formats':
+                try:
+                    parse_export_formats(sys.argv[i + 1] if i + 1 < len(sys.argv) else '')
+                except ValueError as e:
+                    print(f"Error: --export-formats: {e}", file=sys.stderr)
+                    sys.exit(2)
+                global_args.extend([arg, sys.argv[i + 1]])
+                i += 2
+            elif arg == '--trace' or arg.startswith('--trace='):
+                if arg == '--trace':
+                    if i + 1 >= len(sys.argv):
+                        print("Error: --trace requires an output path", file=sys.stderr)
+                        sys.exit(2)
+                    trace_path = sys.argv[i + 1]
+                    i += 2
+                else:
+                    trace_path = arg.split('=', 1)[1]
+                    i += 1
+                global_args.extend(['--trace', trace_path])
+            elif arg == '--profile-stages' or arg.startswith('--profile-stages='):
+                if arg == '--profile-stages':
+                    if i + 1 >= len(sys.argv):
+                        print("Error: --profile-stages requires an output directory", file=sys.stderr)
+                        sys.exit(2)
+                    profile_dir = sys.argv[i + 1]
+                    i += 2
+                else:
+                    profile_dir = arg.split('=', 1)[1]
+                    i += 1
+                global_args.extend(['--profile-stages', profile_dir])
             elif arg.startswith('-'):
                 # Reject unknown/typo flags instead of silently dropping them —
                 # a swallowed --no-patterns/--arranger produces a different ROM (#8).
@@ -1715,10 +2222,16 @@ def main():
             print("  midi2nes song.mid output.nes       # Creates output.nes")
             print("  midi2nes --arranger song.mid       # Smart voice allocation + arpeggiation")
             print("  midi2nes --no-patterns song.mid    # Direct export (no compression)")
+            print("  midi2nes --no-patterns --direct-runtime streaming song.mid  # Cheaper direct-export playback")
+            print("  midi2nes --no-patterns --direct-runtime rle song.mid        # Run-length encoded direct export")
+            print("  midi2nes --cycle-budget 1500 song.mid # Even out per-frame sequence-read cost")
+            print("  midi2nes --loop-point 480 song.mid  # Loop back to frame 480 instead of stopping")
+            print("  midi2nes --export-formats nsf,famistudio song.mid  # Also write song.nsf/song.txt from the same frames")
             print("  midi2nes --debug song.mid          # Debug ROM (shows APU status on screen)")
             print("  midi2nes --skip-validation song.mid # Skip ROM validation after compilation")
             print("  midi2nes --config cfg.yaml song.mid # Override pattern-detection sampling caps")
             print("  midi2nes --mapper auto song.mid    # Auto-select the smallest mapper that fits")
+            print("  midi2nes --jobs 4 song.mid         # Cap parallel worker processes")
             print("  midi2nes --help                    # Show full help")
             sys.exit(1)
 
@@ -1736,10 +2249,84 @@ def main():
                               if '--config' in global_args else None)
                 self.mapper = (global_args[global_args.index('--mapper') + 1]
                               if '--mapper' in global_args else 'mmc3')
+                self.trace = (global_args[global_args.index('--trace') + 1]
+                              if '--trace' in global_args else None)
+                self.profile_stages_dir = (global_args[global_args.index('--profile-stages') + 1]
+                                           if '--profile-stages' in global_args else None)
+                self.jobs = (int(global_args[global_args.index('--jobs') + 1])
+                             if '--jobs' in global_args else None)
+                self.direct_runtime = (global_args[global_args.index('--direct-runtime') + 1]
+                                       if '--direct-runtime' in global_args else 'indexed')
+                self.cycle_budget = (int(global_args[global_args.index('--cycle-budget') + 1])
+                                     if '--cycle-budget' in global_args else None)
+                self.loop_point = (int(global_args[global_args.index('--loop-point') + 1])
+                                   if '--loop-point' in global_args else None)
+                self.export_formats = (parse_export_formats(global_args[global_args.index('--export-formats') + 1])
+                                       if '--export-formats' in global_args else [])
                 self.command = None
 
         args = SimpleArgs()
-        run_full_pipeline(args)
+        _run_command(run_full_pipeline, args)
+
+
+def _run_command(func, args):
+    """Run a command under the --trace / --profile-stages instrumentation
+    it asked for."""
+    profile_dir = getattr(args, 'profile_stages_dir', None)
+    if profile_dir:
+        return _run_with_trace(
+            lambda a: _run_with_stage_profiles(func, a, profile_dir), args, args.trace)
+    return _run_with_trace(func, args, args.trace)
+
+
+def _run_with_stage_profiles(func, args, profile_dir):
+    """Run a command with per-stage cProfile output written to `profile_dir`.
+
+    The pipeline and `benchmark` profile each stage separately; any other
+    subcommand is recorded as a single stage named after the command.
+    Profiles are written even when the command fails or exits.
+    """
+    start_stage_profiling(profile_dir)
+    try:
+        command = getattr(args, 'command', None)
+        if command and command != 'benchmark':
+            with profile_stage(command):
+                return func(args)
+        return func(args)
+    finally:
+        _write_stage_profiles(stop_stage_profiling())
+
+
+def _write_stage_profiles(profiler):
+    try:
+        written = profiler.write()
+    except OSError as e:
+        print(f"[WARNING] Could not write stage profiles to {profiler.output_dir}: {e}")
+        return
+    for warning in profiler.warnings:
+        print(f"[WARNING] {warning}")
+    print(f"[OK] Stage profiles ({len(written) // 2} stages) -> {profiler.output_dir}")
+
+
+def _run_with_trace(func, args, trace_path):
+    """Run a command, recording tracing spans to `trace_path` if given.
+
+    The trace is written even when the command fails or exits -- a failed
+    slow build is exactly the run whose timeline is wanted.
+    """
+    if not trace_path:
+        return func(args)
+    start_tracing()
+    try:
+        with span(getattr(args, 'command', None) or 'pipeline', cat="command"):
+            return func(args)
+    finally:
+        events = stop_tracing()
+        try:
+            write_chrome_trace(trace_path, events)
+            print(f"[OK] Trace ({len(events)} events) -> {trace_path}")
+        except OSError as e:
+            print(f"[WARNING] Could not write trace to {trace_path}: {e}")
 
 def run_config_init(args):
     """Generate default configuration file"""
@@ -1770,9 +2357,22 @@ def run_config_validate(args):
         print(f"[ERROR] Configuration validation failed: {str(e)}")
         sys.exit(1)
 
+def _benchmark_stage_entry(stage):
+    """benchmark_results.json entry for one BenchmarkResult stage; carries
+    the --memory allocation diff and memo-cache counters when recorded."""
+    entry = {'duration_ms': stage.duration_ms, 'success': stage.success}
+    metadata = getattr(stage, 'metadata', None)
+    if isinstance(metadata, dict):
+        for key in ('allocations', 'caches'):
+            if key in metadata:
+                entry[key] = metadata[key]
+    return entry
+
 def run_benchmark(args):
     """Run performance benchmarks"""
-    benchmark = PerformanceBenchmark()
+    # --memory brackets every stage with heap snapshots so the results say
+    # which allocation sites and object types each stage left behind.
+    benchmark = PerformanceBenchmark(snapshot_allocations=args.memory)
     
     # Set up test files
     test_files = []
@@ -1792,16 +2392,24 @@ def run_benchmark(args):
         print("No test files specified. Using built-in test data.")
         # Generate some test data
         test_files = None
-    
+
+    stage_profiler = None
     try:
         # Create output directory
         output_dir = Path(args.output)
         output_dir.mkdir(exist_ok=True)
+
+        # --profile-stages here writes next to benchmark_results.json; a
+        # global `--profile-stages DIR` already active takes precedence.
+        if getattr(args, 'profile_stages', False) and not is_profiling_stages():
+            stage_profiler = start_stage_profiling(output_dir / "profiles")
         
         # Run the benchmarks
         print(f"Running performance benchmarks...")
         if args.memory:
-            print("Memory profiling enabled")
+            print("Memory profiling enabled (per-stage allocation snapshots)")
+        if stage_profiler is not None:
+            print("Stage profiling enabled (cProfile overhead inflates the timings)")
             
         if test_files:
             # Run benchmarks on provided files
@@ -1815,7 +2423,7 @@ def run_benchmark(args):
                         'file_size_kb': result.file_size_kb,
                         'execution_time': result.total_duration_ms / 1000,  # Convert to seconds
                         'memory_peak': result.total_memory_mb,
-                        'stages': [{stage.stage: {'duration_ms': stage.duration_ms, 'success': stage.success}} for stage in result.stages],
+                        'stages': [{stage.stage: _benchmark_stage_entry(stage)} for stage in result.stages],
                         'midi_info': result.midi_info
                     }
                     if result.midi_info.get('total_events', 0) > 0:
@@ -1834,6 +2442,10 @@ def run_benchmark(args):
                 }
             }
         
+        if stage_profiler is not None:
+            stop_stage_profiling()
+            _write_stage_profiles(stage_profiler)
+
         # Save results to JSON
         results_file = output_dir / "benchmark_results.json"
         with open(results_file, 'w') as f:
@@ -1851,11 +2463,61 @@ def run_benchmark(args):
                     print(f"  Peak memory: {result['memory_peak']:.2f} MB")
                 if 'throughput' in result:
                     print(f"  Throughput: {result['throughput']:.1f} events/sec")
+                for stage_entry in result.get('stages', []):
+                    for stage_name, stage_data in stage_entry.items():
+                        allocations = stage_data.get('allocations')
+                        if not allocations:
+                            continue
+                        site = allocations['top_sites'][0] if allocations['top_sites'] else None
+                        obj = allocations['object_types'][0] if allocations['object_types'] else None
+                        print(f"  {stage_name:18} "
+                              f"{site['site'] + ' +' + format(site['size_kb'], '.0f') + 'KB' if site else '-'}"
+                              f"{'  (' + obj['type'] + ' +' + format(obj['count'], ',') + ')' if obj else ''}")
         
     except Exception as e:
+        if stage_profiler is not None and is_profiling_stages():
+            stop_stage_profiling()
         print(f"[ERROR] Benchmark failed: {str(e)}")
         sys.exit(1)
 
+def run_benchmark_scale(args):
+    """Run the pipeline over a geometric sweep of synthetic song sizes and
+    report each stage's fitted time/memory complexity."""
+    from dataclasses import replace
+    from benchmarks.scaling import (
+        geometric_sizes, run_scaling_benchmark, print_scaling_summary, write_scaling_report)
+    from benchmarks.synthetic_midi import SyntheticMidiConfig
+
+    try:
+        sizes = geometric_sizes(args.min_events, args.max_events, args.factor)
+        config = SyntheticMidiConfig(
+            events=sizes[0],
+            tracks=args.tracks,
+            notes_per_beat=args.notes_per_beat,
+            polyphony=args.polyphony,
+            tempo_changes=args.tempo_changes,
+            drum_density=args.drum_density,
+            seed=args.seed,
+        )
+        for size in sizes:
+            replace(config, events=size).validate()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Running scaling benchmark over {len(sizes)} sizes "
+          f"({sizes[0]:,} -> {sizes[-1]:,} events)...")
+    report = run_scaling_benchmark(
+        sizes, config, output_dir=str(output_dir), time_budget_s=args.time_budget)
+
+    report_path = output_dir / "scaling_report.json"
+    write_scaling_report(report, report_path)
+    print_scaling_summary(report)
+    print(f"\n[OK] Scaling report -> {report_path}")
+
+
 def run_benchmark_memory(args):
     """Show current memory usage"""
     try:
@@ -60,6 +60,13 @@ macro_steps_duty:   .res 5
 ; whether the value changes, so we gate the write on value equality and force
 ; a rewrite ($FF sentinel) whenever a new note is triggered (#161/NH-18).
 last_written_hi:    .res 5
+; Return address of each channel's active CMD_CALL_PATTERN (one level deep:
+; the exporter never emits a call inside a sub-pattern).
+return_ptr_lo:  .res 5
+return_ptr_hi:  .res 5
+return_bank:    .res 5
+; Passes of the active CMD_LOOP still to play (0 = none armed).
+loop_count:     .res 5
 
 .segment "ZEROPAGE"
 
@@ -85,8 +92,10 @@ temp_inst_base: .res 1
     
     ldy temp_inst_base
 .ifdef JUKEBOX_BUILD
-    ; A jukebox build has one instrument_table per song (song0_instrument_table,
-    ; song1_instrument_table, ...), not the single fixed `instrument_table`
+    ; A jukebox build has one instrument_table label per song (song0_instrument_table,
+    ; song1_instrument_table, ...; normally all on one cross-song shared table,
+    ; but separate tables when the merged set exceeds 256 instruments), not the
+    ; single fixed `instrument_table`
     ; label the .else branch addresses directly -- there's no compile-time
     ; constant to reference, so go through instrument_table_ptr (set by
     ; load_song_streams_indexed whenever the active song changes) instead.
@@ -237,6 +246,7 @@ audio_init_hw_and_state:
     lda #0
     sta frame_wait, x
     sta current_note, x
+    sta loop_count, x
     lda #$FF
     sta last_written_hi, x
     dex
@@ -325,6 +335,7 @@ audio_advance_song:
     sta frame_wait, x
     sta current_note, x
     sta channel_ended, x
+    sta loop_count, x
     lda #$FF
     sta last_written_hi, x
     dex
@@ -376,7 +387,18 @@ audio_update:
     beq @cmd_bank_jump
     cmp #$85
     beq @cmd_dpcm_play
-    cmp #$80
+    ; The call/return handlers sit past @unknown_command, out of beq's
+    ; +/-127 range -- same trampoline idiom as @chk_length above.
+    cmp #$82
+    bne :+
+    jmp @cmd_call_pattern
+:   cmp #$83
+    bne :+
+    jmp @cmd_return
+:   cmp #$84
+    bne :+
+    jmp @cmd_loop
+:   cmp #$80
     bne @unknown_command
 
     ; CMD_INSTRUMENT ($80 followed by 1 parameter byte)
@@ -413,10 +435,12 @@ audio_update:
     jmp @read_next
 
 @cmd_bank_jump:
-    ; CMD_BANK_JUMP ($FE followed by bank, addr_low, addr_high)
+    ; CMD_BANK_JUMP ($FE followed by bank, addr_low, addr_high). Hold the new
+    ; bank until both address bytes are read: fetch_sequence_byte maps
+    ; sequence_bank on every call, so switching it first read the address
+    ; operands out of the target bank instead of this one.
     jsr fetch_sequence_byte
-    sta sequence_bank
-    sta stream_bank, x
+    pha                     ; Save bank
     
     jsr fetch_sequence_byte
     pha                     ; Save low byte
@@ -429,10 +453,75 @@ audio_update:
     sta sequence_ptr        ; Write low byte
     sta stream_ptr_lo, x
     
+    pla
+    sta sequence_bank
+    sta stream_bank, x
+    
     jmp @read_next
 
 @unknown_command:
     jmp @end_of_stream ; Safely skip to end if command is unknown to avoid crashing
+
+@cmd_call_pattern:
+    ; CMD_CALL_PATTERN ($82 followed by bank, addr_low, addr_high): play a
+    ; shared sub-pattern, then resume after these operands on its CMD_RETURN.
+    jsr fetch_sequence_byte
+    pha                     ; Save target bank
+    jsr fetch_sequence_byte
+    pha                     ; Save target low byte
+    jsr fetch_sequence_byte
+    tay                     ; Save target high byte
+
+    ; sequence_ptr/bank now sit just past the operands -- the return address
+    lda sequence_ptr
+    sta return_ptr_lo, x
+    lda sequence_ptr+1
+    sta return_ptr_hi, x
+    lda sequence_bank
+    sta return_bank, x
+
+    tya
+    sta sequence_ptr+1
+    sta stream_ptr_hi, x
+    pla
+    sta sequence_ptr
+    sta stream_ptr_lo, x
+    pla
+    sta sequence_bank
+    sta stream_bank, x
+    jmp @read_next
+
+@cmd_return:
+    ; CMD_RETURN ($83): back to the byte after this channel's last call
+    lda return_ptr_lo, x
+    sta sequence_ptr
+    sta stream_ptr_lo, x
+    lda return_ptr_hi, x
+    sta sequence_ptr+1
+    sta stream_ptr_hi, x
+    lda return_bank, x
+    sta sequence_bank
+    sta stream_bank, x
+    jmp @read_next
+
+@cmd_loop:
+    ; CMD_LOOP ($84 followed by count, bank, addr_low, addr_high): jump back
+    ; to a section start `count` times, then fall through. The first pass
+    ; arms loop_count; one level per channel, like the call return slot.
+    jsr fetch_sequence_byte
+    ldy loop_count, x
+    bne @loop_armed
+    sta loop_count, x
+    jmp @cmd_bank_jump      ; Reads the target operands and jumps
+@loop_armed:
+    dec loop_count, x
+    beq @loop_done
+    jmp @cmd_bank_jump
+@loop_done:
+    jsr fetch_sequence_byte ; Skip the target: bank, addr_low, addr_high
+    jsr fetch_sequence_byte
+    jsr fetch_sequence_byte
+    jmp @read_next
     
 @is_length:
     sec
@@ -0,0 +1,188 @@
+"""
+Prebuilt NSF player for MIDI2NES.
+
+The NSF export (exporter/exporter_nsf.py) runs no assembler per song: it
+appends the song's macro bytecode to `nsf_player.bin`, which is
+nes/audio_engine.asm assembled once in its jukebox configuration. A jukebox
+engine reads its stream pointers and instrument table through the
+`song_table_*` / `song_instrument_ptr_*` tables instead of link-time
+labels, so the exporter only has to fill those in (the song header below)
+for the prebuilt code to play any song.
+
+Layout (load address $8000, no bank switching):
+
+    $8000  jmp audio_init       NSF INIT
+    $8003  jmp audio_update     NSF PLAY
+    $8006  song header          NSF_SONG_HEADER_SIZE bytes, zero in the blob
+           fetch_sequence_byte, DPCM stubs, period tables, audio engine
+    end    song data            NSFMacroPacker: macros, instruments, sequences
+
+Regenerate the blob with cc65 after changing the engine or the period
+tables:
+
+    python -m nes.nsf_player
+"""
+
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+from core.exceptions import ExportError
+
+
+NSF_PLAYER_PATH = Path(__file__).parent / "nsf_player.bin"
+ENGINE_PATH = Path(__file__).parent / "audio_engine.asm"
+
+NSF_LOAD_ADDRESS = 0x8000
+NSF_INIT_ADDRESS = 0x8000
+NSF_PLAY_ADDRESS = 0x8003
+NSF_SONG_HEADER_ADDRESS = 0x8006
+# song_count, then per channel ptr_lo x5, ptr_hi x5, bank x5, then the
+# instrument table pointer (lo, hi).
+NSF_SONG_HEADER_SIZE = 18
+
+NSF_CHANNELS = ('pulse1', 'pulse2', 'triangle', 'noise', 'dpcm')
+
+# The runtime module the engine imports from: NSF entry points, the song
+# header, a flat fetch_sequence_byte (NSF data is not bank switched, so the
+# MMC3 window translation in NESProjectBuilder's copy is dropped), and DPCM
+# table stubs -- the NSF export carries no samples and leaves the DMC
+# channel's sequence empty, so they are never indexed.
+PLAYER_ASM = """\
+; midi2nes NSF player runtime (generated by nes/nsf_player.py)
+.export fetch_sequence_byte
+.export song_count, song_table_ptr_lo, song_table_ptr_hi, song_table_bank
+.export song_instrument_ptr_lo, song_instrument_ptr_hi
+.export ntsc_period_low, ntsc_period_high
+.export triangle_period_low, triangle_period_high
+.export dpcm_bank_table, dpcm_pitch_table, dpcm_addr_table, dpcm_len_table
+.import audio_init, audio_update
+
+.segment "ZEROPAGE"
+sequence_ptr:   .res 2
+sequence_bank:  .res 1
+
+.segment "CODE"
+    jmp audio_init          ; $8000: NSF INIT
+    jmp audio_update        ; $8003: NSF PLAY
+
+; Song header ($8006), filled in for each song by NSFExporter
+song_count:             .byte 1
+song_table_ptr_lo:      .res 5
+song_table_ptr_hi:      .res 5
+song_table_bank:        .res 5
+song_instrument_ptr_lo: .res 1
+song_instrument_ptr_hi: .res 1
+
+; ------------------------------------------------------------------
+; fetch_sequence_byte
+; Reads 1 byte at sequence_ptr and increments it (flat: no bank switch)
+; ------------------------------------------------------------------
+fetch_sequence_byte:
+    ldy #$00
+    lda (sequence_ptr), y
+    inc sequence_ptr
+    bne @no_carry
+    inc sequence_ptr+1
+@no_carry:
+    rts
+
+; Stub DPCM lookup tables (no samples in an NSF export)
+dpcm_bank_table:
+    .byte $00
+dpcm_pitch_table:
+    .byte $00
+dpcm_addr_table:
+    .byte $00
+dpcm_len_table:
+    .byte $00
+
+"""
+
+# The engine module: the stock engine with its jukebox code paths enabled.
+ENGINE_ASM = """\
+JUKEBOX_BUILD = 1
+.include "audio_engine.asm"
+"""
+
+PLAYER_CFG = """\
+MEMORY {
+    ZP:  start = $00,   size = $100,  type = rw, file = "";
+    RAM: start = $0200, size = $0600, type = rw, file = "";
+    PRG: start = $8000, size = $8000, type = ro, file = %O;
+}
+SEGMENTS {
+    ZEROPAGE: load = ZP,  type = zp;
+    BSS:      load = RAM, type = bss;
+    CODE:     load = PRG, type = ro;
+}
+"""
+
+
+def generate_player_asm():
+    """The runtime module's source: PLAYER_ASM plus the period tables,
+    emitted by the same code as a ROM export's music.asm."""
+    from exporter.exporter_ca65 import CA65Exporter
+
+    lines = []
+    CA65Exporter()._emit_period_tables(lines)
+    return PLAYER_ASM + '\n'.join(lines) + '\n'
+
+
+def load_nsf_player():
+    """Return the prebuilt player blob's bytes."""
+    if not NSF_PLAYER_PATH.exists():
+        raise ExportError(
+            "nsf_player.bin is required for NSF export but is missing",
+            f"expected at {NSF_PLAYER_PATH}; rebuild it with `python -m nes.nsf_player`"
+        )
+    return NSF_PLAYER_PATH.read_bytes()
+
+
+def pack_song_header(channel_pointers, instrument_table_address):
+    """Pack the song header patched in at NSF_SONG_HEADER_ADDRESS.
+
+    `channel_pointers` holds the 5 sequence addresses in NSF_CHANNELS
+    order; every stream starts in bank 0 since nothing is bank switched.
+    """
+    header = bytes([1])
+    header += bytes(p & 0xFF for p in channel_pointers)
+    header += bytes(p >> 8 for p in channel_pointers)
+    header += bytes(len(channel_pointers))        # song_table_bank
+    header += struct.pack('<H', instrument_table_address)
+    return header
+
+
+def build_nsf_player(output_path=NSF_PLAYER_PATH, verbose=False):
+    """Assemble and link the player with cc65 and write the blob to
+    `output_path`. Raises ToolchainError when cc65 is not installed."""
+    from compiler.cc65_wrapper import CC65Wrapper
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        (work / "audio_engine.asm").write_text(ENGINE_PATH.read_text())
+        (work / "nsf_player.asm").write_text(generate_player_asm())
+        (work / "nsf_engine.asm").write_text(ENGINE_ASM)
+        (work / "nsf_player.cfg").write_text(PLAYER_CFG)
+        blob_path = work / "nsf_player.bin"
+        # Module order matters: the runtime's CODE (entry points and song
+        # header) must link first, at $8000.
+        CC65Wrapper(verbose=verbose).build(
+            [work / "nsf_player.asm", work / "nsf_engine.asm"],
+            blob_path, work / "nsf_player.cfg", work)
+        blob = blob_path.read_bytes()
+
+    Path(output_path).write_bytes(blob)
+    return blob
+
+
+if __name__ == "__main__":
+    from core.exceptions import MIDI2NESError
+
+    try:
+        blob = build_nsf_player(sys.argv[1] if len(sys.argv) > 1 else NSF_PLAYER_PATH)
+    except MIDI2NESError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ NSF player: {len(blob)} bytes")
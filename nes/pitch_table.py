@@ -15,6 +15,8 @@ Where:
 - frequency is the desired note frequency in Hz
 """
 
+from utils.memo import memoized
+
 # NES CPU Clock Rate (NTSC)
 CPU_CLOCK_RATE = 1789773
 
@@ -75,6 +77,30 @@ def get_noise_period(midi_note):
     return 15 - max(0, min(15, scaled))
 
 
+@memoized("channel_pitch", maxsize=1024)
+def channel_pitch(midi_note, channel_type):
+    """NES pitch value for a MIDI note on `channel_type`: the timer from the
+    channel's table (pulse /16, triangle /32) or the noise period index,
+    after clamping the note to CHANNEL_RANGES. 0 for an unknown channel.
+
+    Memoized (performance.enable_caching): the frames stage calls this once
+    per note-frame. PitchProcessor.get_channel_pitch delegates here.
+    """
+    if channel_type not in CHANNEL_RANGES:
+        return 0
+
+    min_note, max_note = CHANNEL_RANGES[channel_type]
+    midi_note = max(min_note, min(midi_note, max_note))
+
+    if channel_type == "noise":
+        return get_noise_period(midi_note)
+
+    if channel_type == "triangle":
+        return NES_TRIANGLE_TABLE[midi_note]
+
+    return NES_NOTE_TABLE[midi_note]
+
+
 class PitchProcessor:
     def __init__(self):
         # Channel pitch ranges (MIDI note numbers)
@@ -92,20 +118,12 @@ class PitchProcessor:
         self.triangle_table = NES_TRIANGLE_TABLE
 
     def get_channel_pitch(self, midi_note, channel_type):
-        """Convert MIDI note to NES pitch value with channel-specific limitations."""
-        if channel_type not in self.channel_ranges:
-            return 0
+        """Convert MIDI note to NES pitch value with channel-specific limitations.
 
-        min_note, max_note = self.channel_ranges[channel_type]
-        midi_note = max(min_note, min(midi_note, max_note))
-
-        if channel_type == "noise":
-            return self._get_noise_period(midi_note)
-
-        if channel_type == "triangle":
-            return self.triangle_table[midi_note]
-
-        return self.note_table[midi_note]
+        Delegates to the memoized module-level channel_pitch; this instance's
+        ranges and tables are the same module constants it reads.
+        """
+        return channel_pitch(midi_note, channel_type)
         
     def _get_noise_period(self, midi_note):
         """Convert MIDI note to a 4-bit noise period index (0-15).
@@ -1,5 +1,6 @@
 # nes/song_bank.py
 
+import hashlib
 import json
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Any
@@ -10,6 +11,35 @@ from pathlib import Path
 # between the two (#33 / F-14).
 from tracker.parser_fast import parse_midi_to_frames
 
+# Bump whenever parse/map/arrange output changes meaning (a parser, arranger
+# or emulator-core fix): compiled frames cached under an older version must
+# be regenerated, not replayed into a new build.
+FRAME_CACHE_VERSION = 1
+
+
+def file_sha256(path) -> str:
+    """SHA-256 of a file's bytes. Used to key cached compiled frames by
+    content, so touching a MIDI (new mtime, same bytes) is still a hit."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frames_cache_key(midi_path, use_arranger: bool, dpcm_index_path=None) -> str:
+    """Cache key for a song's compiled frames.
+
+    Covers everything the frames depend on: the MIDI's content, the mapping
+    mode, the DPCM index content in legacy mode (assign_tracks_to_nes_channels
+    reads it), and FRAME_CACHE_VERSION.
+    """
+    parts = [f"v{FRAME_CACHE_VERSION}", file_sha256(midi_path),
+             'arranger' if use_arranger else 'legacy']
+    if not use_arranger and dpcm_index_path and Path(dpcm_index_path).exists():
+        parts.append(file_sha256(dpcm_index_path))
+    return hashlib.sha256(':'.join(parts).encode()).hexdigest()
+
 @dataclass
 class SongMetadata:
     title: str
@@ -36,7 +66,9 @@ class SongBank:
     each song from its recorded ``midi_path`` (not the ``segments`` stored
     here, which are raw parsed events only -- no NES channel mapping,
     frames, or patterns) and compiles through
-    ``CA65Exporter.export_song_bank_bytecode``.
+    ``CA65Exporter.export_song_bank_bytecode``. That build stores each
+    song's compiled frames back here under ``compiled`` (keyed by
+    ``frames_cache_key``), so a rebuild only re-parses songs that changed.
 
     Note this class's own bank/size model below (16KB virtual banks, 8 of
     them, sized off raw MIDI event counts) is independent of -- and not
@@ -226,6 +258,21 @@ class SongBank:
         self.max_bank_size = bank_info['bank_size']
         self.songs = data['songs']
     
+    def get_cached_frames(self, name: str, cache_key: str) -> Optional[Dict]:
+        """Compiled frames stored for `name` under `cache_key`, or None if the
+        song has none or they were built from different input (the MIDI,
+        mapping mode or FRAME_CACHE_VERSION changed since)."""
+        compiled = self.songs.get(name, {}).get('compiled')
+        if not isinstance(compiled, dict) or compiled.get('key') != cache_key:
+            return None
+        frames = compiled.get('frames')
+        return frames if isinstance(frames, dict) else None
+
+    def store_frames(self, name: str, cache_key: str, frames: Dict) -> None:
+        """Persist a song's compiled frames (written out by export_bank) so a
+        later `song build` can skip re-parsing/re-mapping an unchanged song."""
+        self.songs[name]['compiled'] = {'key': cache_key, 'frames': frames}
+
     def get_bank_data(self) -> Dict:
         """Get all bank data for compression"""
         return self.songs
@@ -5,7 +5,7 @@ import unittest
 from pathlib import Path
 from unittest.mock import patch
 
-from exporter.base_exporter import atomic_write_text
+from exporter.base_exporter import atomic_write_chunks, atomic_write_text
 
 
 class TestAtomicWriteText(unittest.TestCase):
@@ -59,6 +59,25 @@ class TestAtomicWriteText(unittest.TestCase):
         atomic_write_text(str(output_path), "via str path")
         self.assertEqual(output_path.read_text(), "via str path")
 
+    def test_chunks_written_in_order(self):
+        output_path = self.temp_dir / "song.txt"
+        atomic_write_chunks(output_path, (f"row {i}\n" for i in range(3)))
+        self.assertEqual(output_path.read_text(), "row 0\nrow 1\nrow 2\n")
+
+    def test_failing_chunk_generator_leaves_prior_good_file_intact(self):
+        output_path = self.temp_dir / "song.txt"
+        output_path.write_text("original good content")
+
+        def chunks():
+            yield "partial"
+            raise ValueError("bad frame")
+
+        with self.assertRaises(ValueError):
+            atomic_write_chunks(output_path, chunks())
+
+        self.assertEqual(output_path.read_text(), "original good content")
+        self.assertEqual(list(self.temp_dir.iterdir()), [output_path])
+
 
 if __name__ == "__main__":
     unittest.main()
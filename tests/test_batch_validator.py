@@ -0,0 +1,180 @@
+"""Tests for debug/batch_validator.py and the `validate-batch` subcommand."""
+
+import csv
+import json
+import shutil
+import sys
+from argparse import Namespace
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from debug import batch_validator
+from debug.batch_validator import (
+    CACHE_VERSION,
+    find_rom_files,
+    hash_rom,
+    load_validation_cache,
+    validate_rom_file,
+    validate_roms_batch,
+    write_csv_report,
+    write_json_report,
+)
+from debug.rom_diagnostics import boot_fatal_defects, ROMDiagnostics
+from main import run_validate_batch
+
+
+@pytest.fixture
+def rom_dir(temp_dir, valid_rom_file, bad_vectors_rom, no_apu_rom):
+    """A directory holding one bootable ROM and two boot-fatal ones."""
+    return temp_dir
+
+
+class TestValidateRomFile:
+    def test_valid_rom_passes(self, valid_rom_file):
+        entry = validate_rom_file(str(valid_rom_file), "abc")
+        assert entry.passed
+        assert entry.fatal_defects == []
+        assert entry.sha256 == "abc"
+        assert entry.duration_ms >= 0
+
+    def test_bad_vectors_fail_with_same_rule_as_pipeline(self, bad_vectors_rom):
+        entry = validate_rom_file(str(bad_vectors_rom))
+        expected = boot_fatal_defects(ROMDiagnostics().diagnose_rom(str(bad_vectors_rom)))
+        assert not entry.passed
+        assert entry.fatal_defects == expected
+
+    def test_invalid_header_fails(self, invalid_header_rom):
+        entry = validate_rom_file(str(invalid_header_rom))
+        assert not entry.passed
+        assert entry.overall_health == "ERROR"
+
+    def test_diagnostics_crash_is_a_failed_verdict_not_an_exception(self, valid_rom_file):
+        with patch.object(batch_validator, 'ROMDiagnostics', side_effect=RuntimeError("boom")):
+            entry = validate_rom_file(str(valid_rom_file))
+        assert not entry.passed
+        assert "boom" in entry.error
+
+
+class TestValidateRomsBatch:
+    def test_returns_entries_in_input_order(self, rom_dir):
+        roms = find_rom_files(rom_dir)
+        entries = validate_roms_batch(roms, max_workers=1)
+        assert [e.rom_path for e in entries] == roms
+        assert {Path(e.rom_path).name: e.passed for e in entries} == {
+            'bad_vectors.nes': False, 'no_apu.nes': False, 'valid.nes': True}
+
+    def test_pool_and_serial_paths_agree(self, rom_dir):
+        roms = find_rom_files(rom_dir)
+        serial = validate_roms_batch(roms, max_workers=1)
+        pooled = validate_roms_batch(roms, max_workers=2)
+        assert [(e.passed, e.fatal_defects) for e in serial] == \
+            [(e.passed, e.fatal_defects) for e in pooled]
+
+    def test_unchanged_roms_are_served_from_cache(self, rom_dir):
+        roms = find_rom_files(rom_dir)
+        cache_path = rom_dir / "cache.json"
+        first = validate_roms_batch(roms, max_workers=1, cache_path=str(cache_path))
+        assert not any(e.cached for e in first)
+
+        with patch.object(batch_validator, 'validate_rom_file') as mock_validate:
+            second = validate_roms_batch(roms, max_workers=1, cache_path=str(cache_path))
+        mock_validate.assert_not_called()
+        assert all(e.cached for e in second)
+        assert [e.passed for e in second] == [e.passed for e in first]
+
+    def test_changed_rom_is_revalidated(self, rom_dir, valid_rom_file):
+        cache_path = rom_dir / "cache.json"
+        validate_roms_batch([str(valid_rom_file)], max_workers=1, cache_path=str(cache_path))
+        data = bytearray(valid_rom_file.read_bytes())
+        data[20] ^= 0xFF
+        valid_rom_file.write_bytes(bytes(data))
+
+        entries = validate_roms_batch([str(valid_rom_file)], max_workers=1, cache_path=str(cache_path))
+        assert not entries[0].cached
+        assert len(load_validation_cache(cache_path)) == 2
+
+    def test_renamed_copy_hits_cache_under_its_own_path(self, rom_dir, valid_rom_file):
+        cache_path = rom_dir / "cache.json"
+        validate_roms_batch([str(valid_rom_file)], max_workers=1, cache_path=str(cache_path))
+        copy_path = rom_dir / "copy.nes"
+        shutil.copy(valid_rom_file, copy_path)
+
+        entries = validate_roms_batch([str(copy_path)], max_workers=1, cache_path=str(cache_path))
+        assert entries[0].cached
+        assert entries[0].rom_path == str(copy_path)
+
+    def test_stale_cache_version_is_ignored(self, rom_dir, valid_rom_file):
+        cache_path = rom_dir / "cache.json"
+        cache_path.write_text(json.dumps({
+            'version': CACHE_VERSION + 1,
+            'entries': {hash_rom(valid_rom_file): {'passed': False, 'overall_health': 'POOR'}},
+        }))
+        entries = validate_roms_batch([str(valid_rom_file)], max_workers=1, cache_path=str(cache_path))
+        assert not entries[0].cached
+        assert entries[0].passed
+
+    def test_corrupt_cache_is_ignored(self, rom_dir, valid_rom_file):
+        cache_path = rom_dir / "cache.json"
+        cache_path.write_text("{not json")
+        entries = validate_roms_batch([str(valid_rom_file)], max_workers=1, cache_path=str(cache_path))
+        assert entries[0].passed
+        assert load_validation_cache(cache_path)  # rewritten cleanly
+
+    def test_unreadable_rom_is_a_failed_entry(self, rom_dir):
+        entries = validate_roms_batch([str(rom_dir / "missing.nes")], max_workers=1)
+        assert not entries[0].passed
+        assert entries[0].error
+
+
+class TestReports:
+    def test_json_and_csv_reports(self, rom_dir):
+        entries = validate_roms_batch(find_rom_files(rom_dir), max_workers=1)
+        json_path = rom_dir / "out" / "report.json"
+        csv_path = rom_dir / "out" / "report.csv"
+        write_json_report(entries, json_path)
+        write_csv_report(entries, csv_path)
+
+        report = json.loads(json_path.read_text())
+        assert report['summary']['total'] == 3
+        assert report['summary']['passed'] == 1
+        assert all('duration_ms' in rom for rom in report['roms'])
+
+        with open(csv_path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 3
+        assert {row['passed'] for row in rows} == {'True', 'False'}
+
+
+class TestRunValidateBatch:
+    def _args(self, directory, **overrides):
+        defaults = dict(directory=str(directory), pattern='*.nes', recursive=False,
+                        jobs=1, cache=None, no_cache=False, json=None, csv=None)
+        defaults.update(overrides)
+        return Namespace(**defaults)
+
+    def test_exits_nonzero_when_any_rom_fails(self, rom_dir):
+        with pytest.raises(SystemExit) as exc:
+            run_validate_batch(self._args(rom_dir))
+        assert exc.value.code == 1
+        assert (rom_dir / batch_validator.DEFAULT_CACHE_NAME).exists()
+
+    def test_all_passing_exits_cleanly_and_writes_reports(self, temp_dir, valid_rom_file, capsys):
+        report = temp_dir / "report.json"
+        run_validate_batch(self._args(temp_dir, json=str(report), no_cache=True))
+        assert json.loads(report.read_text())['summary']['passed'] == 1
+        assert not (temp_dir / batch_validator.DEFAULT_CACHE_NAME).exists()
+        assert "[OK] 1/1" in capsys.readouterr().out
+
+    def test_missing_directory_is_a_clean_error(self, temp_dir):
+        with pytest.raises(SystemExit) as exc:
+            run_validate_batch(self._args(temp_dir / "nope"))
+        assert exc.value.code == 1
+
+    def test_empty_directory_is_a_clean_error(self, temp_dir):
+        with pytest.raises(SystemExit) as exc:
+            run_validate_batch(self._args(temp_dir))
+        assert exc.value.code == 1
@@ -1,9 +1,11 @@
 import unittest
+import random
 import re
 import subprocess
 import tempfile
 import pytest
 from pathlib import Path
+from unittest.mock import patch
 from exporter.exporter_ca65 import CA65Exporter, TRIANGLE_CONTROL_ON
 from nes.project_builder import NESProjectBuilder
 from mappers.mmc3 import MMC3Mapper
@@ -339,9 +341,11 @@ class TestCA65Export(unittest.TestCase):
         # hardcoding 0, so that table MUST match where each label physically lands
         # — otherwise the engine reads the channel's stream from the wrong bank.
         # A big pulse1 forces the spill; give the other channels a couple of hits
-        # each so their start labels land past bank 0.
+        # each so their start labels land past bank 0. Random notes, so
+        # sub-pattern calls can't fold pulse1 back into one bank.
+        rng = random.Random(328)
         frames = {
-            'pulse1': {str(i): {'note': 60 + (i % 24), 'volume': 8 + (i % 7)}
+            'pulse1': {str(i): {'note': rng.randint(60, 83), 'volume': rng.randint(8, 14)}
                        for i in range(5000)},
             'pulse2': {'0': {'note': 60, 'volume': 10}, '8': {'note': 62, 'volume': 10}},
             'triangle': {'0': {'note': 48, 'volume': 15}},
@@ -396,7 +400,8 @@ class TestCA65Export(unittest.TestCase):
         # modest song overflows, and assert a clear exporter error.
         from unittest.mock import patch
         from mappers.mmc3 import MMC3Mapper
-        frames = {'pulse1': {str(i): {'note': 60 + (i % 24), 'volume': 8 + (i % 7)}
+        rng = random.Random(127)  # no repeats for sub-pattern calls to fold
+        frames = {'pulse1': {str(i): {'note': rng.randint(60, 83), 'volume': rng.randint(8, 14)}
                              for i in range(6000)}}
         patterns = {'p0': {'events': [{'note': 60, 'volume': 15}]}}
         out = Path("test_bankcap.asm")
@@ -763,6 +768,60 @@ class TestExportSongBankBytecode(unittest.TestCase):
                 out.unlink()
         self.assertEqual(self.exporter.notes_clamped, {'high': 1, 'low': 1})
 
+    def _export(self, songs, name):
+        out = Path(name)
+        try:
+            self.exporter.export_song_bank_bytecode(songs, str(out))
+            return out.read_text()
+        finally:
+            if out.exists():
+                out.unlink()
+
+    @staticmethod
+    def _sequence_instruments(asm, label):
+        """CMD_INSTRUMENT operands in one channel sequence, in order."""
+        body = asm.split(f'{label}:', 1)[1].split('.byte $FF', 1)[0]
+        return [int(m, 16) for m in re.findall(r'\.byte \$80, \$([0-9A-F]{2}) ; CMD_INSTRUMENT', body)]
+
+    def test_identical_songs_share_one_instrument_and_macro_pool(self):
+        asm = self._export([self._song(60), self._song(60), self._song(60)],
+                           "test_jukebox_shared_pool.asm")
+        # One table, every song's label on its first row.
+        self.assertEqual(asm.count('; The Instrument Macro Pointers'), 1)
+        self.assertRegex(asm, r'shared_instrument_table:\nsong0_instrument_table:\n'
+                              r'song1_instrument_table:\nsong2_instrument_table:\n')
+        self.assertEqual(asm.count('macro_vol_0:'), 1)
+        self.assertNotIn('song0_macro_', asm)
+
+    def test_instrument_ids_are_remapped_to_the_shared_table(self):
+        loud = {'frames': {'pulse1': {'0': {'note': 60, 'volume': 12}}}}
+        quiet_then_loud = {'frames': {'pulse1': {
+            '0': {'note': 62, 'volume': 5}, '1': {'note': 60, 'volume': 12}}}}
+        asm = self._export([loud, quiet_then_loud], "test_jukebox_remap.asm")
+        self.assertEqual(self._sequence_instruments(asm, 'song0_pulse1_sequence'), [1])
+        # song1's local ids are 1 (quiet) and 2 (loud); loud is already
+        # shared id 1 from song0, so quiet becomes shared id 2.
+        self.assertEqual(self._sequence_instruments(asm, 'song1_pulse1_sequence'), [2, 1])
+
+    def test_instrument_union_over_256_falls_back_to_per_song_tables(self):
+        def varied_song(control):
+            frames, frame = {}, 0
+            for a in range(1, 16):
+                for b in range(1, 16):
+                    frames[str(frame)] = {'note': 60, 'volume': a, 'control': control}
+                    frames[str(frame + 1)] = {'note': 60, 'volume': b, 'control': control}
+                    frames[str(frame + 2)] = {'note': 0, 'volume': 0}
+                    frame += 3
+            return {'frames': {'pulse1': frames}}
+
+        # 225 instruments per song, disjoint duty: 451 once merged.
+        asm = self._export([varied_song(0x80), varied_song(0x40)],
+                           "test_jukebox_inst_overflow.asm")
+        self.assertNotIn('shared_instrument_table:', asm)
+        self.assertEqual(asm.count('; The Instrument Macro Pointers'), 2)
+        self.assertEqual(max(self._sequence_instruments(asm, 'song1_pulse1_sequence')), 225)
+        self.assertEqual(asm.count('macro_vol_0:'), 1)
+
 
 def _patch_music_asm(music_asm_path):
     """Fix missing entry points in the generated music.asm to ensure compilation."""
@@ -1518,6 +1577,71 @@ class TestDpcmNoteRangeGuard(unittest.TestCase):
             self._export(254)
 
 
+class TestCollectSongEvents(unittest.TestCase):
+    """The array-based bytecode serializer (_collect_song_events): note
+    boundaries, macro compression and key handling over whole channels."""
+
+    def setUp(self):
+        self.exporter = CA65Exporter()
+
+    def _collect(self, frames):
+        pool = self.exporter._new_macro_pool()
+        events, instrument_defs, clamped = self.exporter._collect_song_events(frames, pool)
+        return events, instrument_defs, pool
+
+    def _macros(self, pool, instrument_defs, inst_id):
+        v, a, p, d = instrument_defs[inst_id]
+        return {kind: pool[kind][1][i] for kind, i in
+                (('vol', v), ('arp', a), ('pitch', p), ('duty', d))}
+
+    def test_timer_tables_match_per_note_lookup(self):
+        from exporter.exporter_ca65 import PULSE_TIMER_TABLE, TRIANGLE_TIMER_TABLE
+        for note in range(128):
+            self.assertEqual(PULSE_TIMER_TABLE[note], self.exporter.midi_note_to_timer_value(note))
+            self.assertEqual(TRIANGLE_TIMER_TABLE[note],
+                             self.exporter.midi_note_to_timer_value(note, 'triangle'))
+
+    def test_held_note_is_one_event_with_compressed_macros(self):
+        from nes.pitch_table import NES_NOTE_TABLE
+        base = NES_NOTE_TABLE[60]
+        volumes = [15, 14, 12, 12, 12]
+        frames = {'pulse1': {str(f): {'note': 60, 'volume': v, 'control': 0xB0, 'pitch': base - 1}
+                             for f, v in enumerate(volumes)}}
+        events, instrument_defs, pool = self._collect(frames)
+
+        self.assertEqual(len(events['pulse1']), 1)
+        event = events['pulse1'][0]
+        self.assertEqual((event['note'], event['dur']), (60, 5))
+        self.assertEqual(self._macros(pool, instrument_defs, event['inst_id']), {
+            'vol': (15, 14, 12, 0xFF),
+            'arp': (0, 0xFF),
+            'pitch': (0, 0xFF),        # -1 snapped off the $FF control byte (#77)
+            'duty': (2, 0xFF),
+        })
+
+    def test_rests_split_events_and_leading_silence_is_skipped(self):
+        frames = {'pulse1': {
+            '2': {'note': 60, 'volume': 15},
+            '3': {'note': 60, 'volume': 0},     # volume 0 is a rest
+            '4': {'note': 60, 'volume': 15},
+            '6': {'note': 62, 'volume': 15},
+        }}
+        events, _, _ = self._collect(frames)
+        self.assertEqual([(e['note'], e['dur']) for e in events['pulse1']],
+                         [(60, 1), (0, 1), (60, 1), (0, 1), (62, 1)])
+        self.assertEqual(events['pulse1'][0]['inst_id'], events['pulse1'][2]['inst_id'])
+
+    def test_int_and_str_frame_keys(self):
+        frames = {'triangle': {str(f): {'note': 45 + f // 4, 'volume': 15} for f in range(12)}}
+        as_int = {'triangle': {int(f): d for f, d in frames['triangle'].items()}}
+        self.assertEqual(self._collect(as_int)[:2], self._collect(frames)[:2])
+
+        # A frame under both keys reads its str entry.
+        both = {'pulse1': {0: {'note': 60, 'volume': 15}, '0': {'note': 64, 'volume': 15}}}
+        events, _, _ = self._collect(both)
+        self.assertEqual(events['pulse1'][0]['note'], 64)
+
+
 class TestDirectExportPerChannelEmittersIsolated(unittest.TestCase):
     """Regression (#136/TD-11): export_direct_frames's per-channel table and
     playback-subroutine emission used to only be reachable through the full
@@ -1648,5 +1772,455 @@ class TestDirectExportPerChannelEmittersIsolated(unittest.TestCase):
         self.assertNotIn('; Silence the channel', p2_text)
 
 
+class TestDirectStreamingRuntime(unittest.TestCase):
+    """export_direct_frames(runtime='streaming'): one interleaved stream per
+    channel behind a zero-page cursor instead of per-field indexed tables."""
+
+    def setUp(self):
+        self.exporter = CA65Exporter()
+        self.tmp = tempfile.mkdtemp()
+        self.frames = {
+            'pulse1': {str(i): {'note': 60 + i % 3, 'pitch': 400 + i, 'control': 0xBF, 'volume': 15}
+                       for i in range(0, 40, 2)},
+            'triangle': {str(i): {'note': 40, 'pitch': 700, 'volume': 1} for i in range(5, 30)},
+            'noise': {str(i): {'note': 3, 'control': 0x40, 'volume': 9} for i in range(0, 40, 8)},
+        }
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _export(self, runtime, frames=None, mapper=None):
+        out = Path(self.tmp) / f"{runtime}.asm"
+        self.exporter.export_direct_frames(frames or self.frames, str(out), standalone=False,
+                                           mapper=mapper, runtime=runtime)
+        return out.read_text()
+
+    @staticmethod
+    def _table(content, label):
+        rows = content.split(f'\n{label}:\n', 1)[1].split('\n')
+        values = []
+        for row in rows:
+            if not row.startswith('    .byte '):
+                break
+            values.extend(row[len('    .byte '):].split(', '))
+        return values
+
+    def test_streams_interleave_the_indexed_tables(self):
+        indexed, streaming = self._export('indexed'), self._export('streaming')
+        for channel, fields in CA65Exporter.DIRECT_STREAM_FIELDS.items():
+            if channel not in self.frames:
+                self.assertNotIn(f'{channel}_stream:', streaming)
+                continue
+            columns = [self._table(indexed, f'{channel}_{field}') for field in fields]
+            expected = [byte for frame in zip(*columns) for byte in frame]
+            self.assertEqual(self._table(streaming, f'{channel}_stream'), expected)
+
+    def test_reads_use_zero_page_cursors(self):
+        content = self._export('streaming')
+        self.assertIn('; Direct export runtime: streaming', content)
+        self.assertNotIn('adc frame_counter', content)
+        self.assertIn('pulse1_ptr: .res 2', content)
+        self.assertIn('    ldy #3\n    lda (pulse1_ptr),y', content)
+        self.assertIn('    adc #3\n    sta noise_ptr', content)
+        # Cursors rewind on init and on every song loop.
+        self.assertEqual(content.count('jsr reset_stream_ptrs'), 2)
+        self.assertIn('lda #<triangle_stream', content)
+
+    def test_mmc1_switches_banks_once_per_bank_run(self):
+        frames = {ch: {str(i): {'note': 60, 'pitch': 400, 'control': 0x80, 'volume': 10}
+                       for i in range(3000)} for ch in ('pulse1', 'pulse2', 'triangle')}
+        content = self._export('streaming', frames, MMC1Mapper())
+        # 12,000-byte streams: one per 16KB bank.
+        self.assertEqual(set(re.findall(r'RODATA_BANK_(\d+)', content)), {'00', '01', '02'})
+        self.assertEqual(content.count('; Switch to bank'), 3)
+        self.assertNotIn('Bank-switch for', content)
+
+        small = self._export('streaming', self.frames, MMC1Mapper())
+        self.assertEqual(small.count('; Switch to bank'), 1)
+
+    def test_pack_streams_in_order(self):
+        banks = self.exporter._pack_direct_streams_into_banks(
+            {'a_stream': 6000, 'b_stream': 6000, 'c_stream': 6000, 'd_stream': 100}, 16384)
+        self.assertEqual(banks, {'a_stream': 0, 'b_stream': 0, 'c_stream': 1, 'd_stream': 1})
+        with self.assertRaises(ExportError):
+            self.exporter._pack_direct_streams_into_banks({'a_stream': 20000}, 16384)
+
+    def test_largest_stream_size(self):
+        # Streams span frames 0..38: pulse1/triangle at 4 bytes/frame, noise at 3.
+        self.assertEqual(self.exporter.largest_direct_stream_size(self.frames, 'streaming'), 156)
+        self.assertEqual(self.exporter.largest_direct_stream_size({}, 'streaming'), 0)
+
+    def test_unknown_runtime_raises(self):
+        with self.assertRaises(ExportError):
+            self._export('turbo')
+
+
+class TestDirectRunLengthRuntime(unittest.TestCase):
+    """export_direct_frames(runtime='rle'): [run, fields...] records that
+    only break where the channel proc would act differently."""
+
+    def setUp(self):
+        self.exporter = CA65Exporter()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_held_note_ignores_envelope_bytes(self):
+        # A held note's control/timer changes are never read by play_pulse1
+        # (it sustains while the note is unchanged), so they join the run.
+        columns = (['$3C', '$3C', '$3C', '$00', '$00'],
+                   ['$BF', '$BE', '$BD', '$00', '$00'],
+                   ['$90', '$91', '$92', '$00', '$00'],
+                   ['$01', '$01', '$01', '$00', '$00'])
+        self.assertEqual(self.exporter._rle_encode_stream('pulse1', columns),
+                         ['$03', '$3C', '$BF', '$90', '$01',
+                          '$02', '$00', '$00', '$00', '$00'])
+
+    def test_noise_runs_need_identical_fields(self):
+        columns = (['$03', '$03', '$03'], ['$39', '$38', '$38'], ['$83', '$83', '$83'])
+        self.assertEqual(self.exporter._rle_encode_stream('noise', columns),
+                         ['$01', '$03', '$39', '$83', '$02', '$03', '$38', '$83'])
+
+    def test_runs_are_capped_at_one_byte(self):
+        encoded = self.exporter._rle_encode_stream('dpcm', (['$00'] * 600,))
+        self.assertEqual(encoded, ['$FF', '$00', '$FF', '$00', '$5A', '$00'])
+
+    def test_estimate_matches_export_and_long_song_fits_mmc1(self):
+        # 20,000 frames: an indexed pulse table overflows one MMC1 bank.
+        frames = {'pulse1': {str(i): {'note': 60 + (i // 120) % 12, 'pitch': 400,
+                                      'control': 0x80 | (i % 16), 'volume': 10}
+                             for i in range(20000)}}
+        out = Path(self.tmp) / "rle.asm"
+        self.exporter.export_direct_frames(frames, str(out), standalone=False,
+                                           mapper=MMC1Mapper(), runtime='rle')
+        content = out.read_text()
+        emitted = sum(len(row.split(',')) for row in content.splitlines()
+                      if row.startswith('    .byte '))
+        estimate = self.exporter.estimate_direct_export_size(frames, runtime='rle')
+        self.assertEqual(estimate, emitted)
+        self.assertLess(estimate * 50, self.exporter.estimate_direct_export_size(frames))
+        self.assertIn('pulse1_run: .res 1', content)
+        self.assertIn('    dec pulse1_run', content)
+        self.assertIn('    ldy #1\n    lda (pulse1_ptr),y', content)
+        with self.assertRaises(ExportError):
+            self.exporter.export_direct_frames(frames, str(out), standalone=False, mapper=MMC1Mapper())
+
+
+class TestSequenceCycleBudget(unittest.TestCase):
+    """_emit_sequence_banks(cycle_budget=...): per-frame stream-read cycle
+    estimates, and instrument loads / bank jumps moved out of busy frames."""
+
+    EMPTY_CHANNELS = 3 * (24 + 82)  # triangle/noise/dpcm re-read their $FF
+
+    def setUp(self):
+        self.exporter = CA65Exporter()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    @staticmethod
+    def _notes(spans, volume=10):
+        """{frame: note} from (start, end, note) spans, with no pitch bend."""
+        return {i: {'note': note, 'volume': volume, 'control': 0xBF}
+                for start, end, note in spans for i in range(start, end)}
+
+    def _export(self, frames, **kwargs):
+        out = Path(self.tmp) / "music.asm"
+        self.exporter.export_tables_with_patterns(frames, {'p': 1}, {}, str(out),
+                                                  subpatterns=False, **kwargs)
+        return out.read_text()
+
+    def test_estimate_counts_reads_per_frame(self):
+        frames = {'pulse1': self._notes([(0, 40, 60)]), 'pulse2': {}}
+        cycles = self.exporter.estimate_bytecode_frame_cycles(frames)
+        self.assertEqual(len(cycles), 40)
+        idle = self.EMPTY_CHANNELS + 24 + 82   # pulse2 has no events either
+        self.assertEqual(cycles[0], idle + 24 + 97 + 144 + 182)
+        self.assertEqual(cycles[1], idle)
+        self.assertEqual(cycles[32], idle + 24 + 97 + 144)   # 32-frame length split
+
+    def _two_voice_song(self):
+        # Both pulses: a note, a 4-frame rest, then a quieter note (a new
+        # instrument), so frame 8 reads two instrument loads.
+        return {ch: {**self._notes([(0, 4, note)]), **self._notes([(8, 12, note)], volume=5)}
+                for ch, note in (('pulse1', 60), ('pulse2', 64))}
+
+    def test_instrument_load_moves_onto_preceding_rest(self):
+        frames = self._two_voice_song()
+        before = self.exporter.estimate_bytecode_frame_cycles(frames)
+        self.assertEqual(before[8], 2 * (24 + 97 + 144 + 182) + self.EMPTY_CHANNELS)
+
+        content = self._export(frames, cycle_budget=1100)
+        pulse1 = content.split('pulse1_sequence:')[1].split('pulse2_sequence:')[0]
+        pulse2 = content.split('pulse2_sequence:')[1].split('triangle_sequence:')[0]
+        self.assertIn('$80, $02 ; CMD_INSTRUMENT\n    .byte $63, $00', pulse1)
+        self.assertIn('$63, $00 ; Length 4, Note 0\n    .byte $80, $02', pulse2)
+        self.assertEqual(self.exporter.sequence_cycles['moved_instruments'], 1)
+        # Frame 0 reads both first notes and instruments with nothing
+        # before it, so it stays over and is reported.
+        self.assertEqual(self.exporter.sequence_cycles['frames_over'], 1)
+        after = self.exporter.estimate_bytecode_frame_cycles(frames, 1100)
+        self.assertEqual((after[4], after[8]), (before[4] + 182, before[8] - 182))
+
+    def test_bank_jump_moves_to_an_earlier_quiet_frame(self):
+        # pulse1 changes note every 2 frames; a 40-byte bank forces its jump
+        # ahead of frame 34, where pulse2 also starts a note.
+        pulse1 = self._notes([(i, i + 2, 60 if i % 4 == 0 else 62) for i in range(0, 40, 2)])
+        frames = {'pulse1': pulse1, 'pulse2': self._notes([(0, 20, 64), (20, 34, 65), (34, 40, 64)])}
+        self.exporter.SEQUENCE_BANK_SIZE_LIMIT = 40
+
+        content = self._export(frames)
+        self.assertIn('pulse1_seq_bank_01:\n    .byte $61, $3E', content)  # frame 34
+
+        content = self._export(frames, cycle_budget=1000)
+        self.assertIn('pulse1_seq_bank_01:\n    .byte $61, $3C', content)  # frame 32
+        self.assertEqual(content.count('CMD_BANK_JUMP'), 1)
+        self.assertEqual(self.exporter.sequence_cycles['moved_bank_jumps'], 1)
+
+    def test_generous_budget_output_is_unchanged(self):
+        frames = self._two_voice_song()
+        plain = self._export(frames)
+        self.assertEqual(self._export(frames, cycle_budget=100000), plain)
+        self.assertEqual(self.exporter.sequence_cycles['moved_instruments'], 0)
+
+
+class TestSubpatternCalls(unittest.TestCase):
+    """_compress_subpatterns: repeated runs stored once behind
+    CMD_CALL_PATTERN ($82) / CMD_RETURN ($83)."""
+
+    PHRASE = [60, 64, 67, 72, 67, 64]
+
+    def setUp(self):
+        self.exporter = CA65Exporter()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    @classmethod
+    def _phrase(cls, repeats, start=0):
+        """The phrase `repeats` times, 3 frames a note, from frame `start`.
+        Each copy ends on a different note, so the copies aren't back to
+        back (those become a CMD_LOOP instead, see TestSectionLoops)."""
+        notes = [note for copy in range(repeats) for note in cls.PHRASE + [40 + copy]]
+        return {start + i: {'note': notes[i // 3], 'volume': 10, 'control': 0xBF}
+                for i in range(3 * len(notes))}
+
+    def _export(self, frames, **kwargs):
+        out = Path(self.tmp) / "music.asm"
+        self.exporter.export_tables_with_patterns(frames, {'p': 1}, {}, str(out), **kwargs)
+        return out.read_text()
+
+    @staticmethod
+    def _expand(content, channel):
+        """A channel's sequence lines with every call replaced by its body."""
+        bodies = {}
+        for block in content.split('\nsubpattern_')[1:]:
+            label, body = block.split(':\n', 1)
+            bodies[f'subpattern_{label}'] = body.split('    .byte $83 ; CMD_RETURN')[0].splitlines()
+        sequence = content.split(f'{channel}_sequence:\n', 1)[1].split('    .byte $FF', 1)[0]
+        lines = []
+        for line in sequence.splitlines():
+            call = re.search(r'<(\w+), >\1 ; CMD_CALL_PATTERN', line)
+            lines.extend(bodies[call.group(1)] if call else [line])
+        return lines
+
+    def test_repeated_phrase_is_stored_once(self):
+        frames = {'pulse1': self._phrase(4)}
+        plain = self._export(frames, subpatterns=False)
+        content = self._export(frames)
+
+        self.assertIn('subpattern_0:', content)
+        self.assertIn('    .byte $83 ; CMD_RETURN', content)
+        self.assertGreaterEqual(content.count('; CMD_CALL_PATTERN'), 2)
+        self.assertEqual(self._expand(content, 'pulse1'), self._expand(plain, 'pulse1'))
+
+        def sequence_bytes(text):
+            tail = text.split('pulse1_sequence:', 1)[1].split('.segment "CODE_8000"', 1)[0]
+            return sum(len(line.split(';')[0].split(',')) for line in tail.splitlines()
+                       if line.startswith('    .byte'))
+        self.assertLess(sequence_bytes(content), sequence_bytes(plain))
+
+    def test_channels_share_one_body(self):
+        frames = {'pulse1': self._phrase(2), 'pulse2': self._phrase(2)}
+        content = self._export(frames)
+        for channel in ('pulse1', 'pulse2'):
+            block = content.split(f'{channel}_sequence:', 1)[1].split('    .byte $FF', 1)[0]
+            self.assertIn('<subpattern_0, >subpattern_0 ; CMD_CALL_PATTERN', block)
+        self.assertNotIn('subpattern_1:', content)
+
+    def test_short_repeat_is_not_worth_a_call(self):
+        # Two 2-note repeats: 4 bytes each, less than two calls plus a return.
+        frames = {'pulse1': {i: {'note': (60, 62, 65, 60, 62)[i // 3], 'volume': 10}
+                             for i in range(15)}}
+        self.assertNotIn('CMD_CALL_PATTERN', self._export(frames))
+
+    def test_bodies_spill_into_the_next_bank(self):
+        self.exporter.SEQUENCE_BANK_SIZE_LIMIT = 45  # sequences take 39, the body 13
+        content = self._export({'pulse1': self._phrase(4)})
+        body_bank = re.search(r'\$82, \$(\w\w), <subpattern_0', content).group(1)
+        self.assertIn(f'.segment "BANK_{body_bank}"\nsubpattern_0:', content)
+        self.assertNotEqual(body_bank, '00')
+
+    def test_cycle_estimate_counts_call_and_return(self):
+        frames = {'pulse1': self._phrase(4)}
+        costs = CA65Exporter.SEQUENCE_FETCH_CYCLES
+        plain = self.exporter.estimate_bytecode_frame_cycles(frames, subpatterns=False)
+        folded = self.exporter.estimate_bytecode_frame_cycles(frames)
+        extra = [f - p for f, p in zip(folded, plain) if f != p]
+        self.assertTrue(extra)
+        self.assertTrue(set(extra) <= {costs['call_pattern'], costs['return'],
+                                       costs['call_pattern'] + costs['return']})
+
+    def test_engine_call_and_bank_jump_read_operands_before_switching(self):
+        # fetch_sequence_byte maps sequence_bank on every call, so the new
+        # bank may only be stored once all of a command's operands are read.
+        text = (Path(__file__).parent.parent / "nes" / "audio_engine.asm").read_text()
+        for handler in ('@cmd_bank_jump:', '@cmd_call_pattern:'):
+            body = text.split(handler, 1)[1].split('jmp @read_next', 1)[0]
+            self.assertLess(body.rindex('jsr fetch_sequence_byte'), body.index('sta sequence_bank'))
+        call = text.split('@cmd_call_pattern:', 1)[1].split('jmp @read_next', 1)[0]
+        self.assertIn('sta return_bank, x', call)
+        ret = text.split('@cmd_return:', 1)[1].split('jmp @read_next', 1)[0]
+        self.assertIn('lda return_bank, x', ret)
+        self.assertIn('sta stream_bank, x', ret)
+
+
+class TestSectionLoops(unittest.TestCase):
+    """_fold_section_loops / _apply_song_loop: back-to-back repeats behind
+    CMD_LOOP ($84), and songs looping to a frame instead of stopping."""
+
+    PHRASE = [60, 64, 67, 72, 67, 64]
+
+    def setUp(self):
+        self.exporter = CA65Exporter()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    @classmethod
+    def _notes(cls, notes, start=0):
+        """`notes` 3 frames each from frame `start`; 0 is a rest."""
+        return {start + i: {'note': notes[i // 3], 'volume': 10, 'control': 0xBF}
+                for i in range(3 * len(notes)) if notes[i // 3]}
+
+    def _export(self, frames, **kwargs):
+        out = Path(self.tmp) / "music.asm"
+        self.exporter.export_tables_with_patterns(frames, {'p': 1}, {}, str(out), **kwargs)
+        return out.read_text()
+
+    @staticmethod
+    def _block(content, channel):
+        return content.split(f'{channel}_sequence:\n', 1)[1].split('\n\n', 1)[0]
+
+    @staticmethod
+    def _item(note, inst=None):
+        return {'frame': 0, 'note': note, 'dur': 4, 'inst': inst, 'jump': False}
+
+    def test_back_to_back_section_is_stored_once(self):
+        frames = {'pulse1': self._notes([50] + self.PHRASE * 4 + [52])}
+        block = self._block(self._export(frames), 'pulse1')
+        self.assertTrue(block.startswith('    .byte $80, $01 ; CMD_INSTRUMENT\n'
+                                         '    .byte $62, $32 ; Length 3, Note 50\n'
+                                         'pulse1_section_1:\n'))
+        self.assertEqual(block.count('Note 64'), 2)
+        self.assertIn('    .byte $84, $03, $00, <pulse1_section_1, >pulse1_section_1 ; CMD_LOOP\n'
+                      '    .byte $62, $34 ; Length 3, Note 52\n'
+                      '    .byte $FF', block)
+
+        plain = self._block(self._export(frames, subpatterns=False), 'pulse1')
+        self.assertEqual(plain.count('Note 64'), 8)
+        self.assertNotIn('CMD_LOOP', plain)
+
+    def test_section_relying_on_the_previous_instrument_is_not_looped(self):
+        # The first copy's opening note inherits instrument 1 from before
+        # the section, but a second pass would inherit 2 from its end.
+        inherited = [self._item(50, 1), self._item(60), self._item(64, 2),
+                     self._item(60, 1), self._item(64, 2), self._item(70)]
+        loaded = [self._item(50, 1), self._item(60, 1), self._item(64, 2),
+                  self._item(60, 1), self._item(64, 2), self._item(70)]
+        for items, folded in ((inherited, 0), (loaded, 1)):
+            plan = {'pulse1': [dict(item, frame=4 * i) for i, item in enumerate(items)]}
+            self.assertEqual(self.exporter._fold_section_loops(plan), folded)
+
+    def test_cycle_estimate_counts_loop_reads(self):
+        frames = {'pulse1': self._notes(self.PHRASE * 4 + [52])}
+        costs = CA65Exporter.SEQUENCE_FETCH_CYCLES
+        loop = costs['loop']
+        plain = self.exporter.estimate_bytecode_frame_cycles(frames, subpatterns=False)
+        folded = self.exporter.estimate_bytecode_frame_cycles(frames)
+        extra = {frame: f - p for frame, (f, p) in enumerate(zip(folded, plain)) if f != p}
+        # Read where each later pass starts -- which replays the section's
+        # opening CMD_INSTRUMENT too -- and once more to fall through.
+        again = loop + costs['instrument']
+        self.assertEqual(extra, {18: again, 36: again, 54: again, 72: loop})
+
+    def test_song_loop_jumps_back_on_every_channel(self):
+        frames = {'pulse1': self._notes([60, 62, 0, 64, 65, 67]),
+                  'pulse2': self._notes([48, 50])}
+        content = self._export(frames, loop_frame=9)
+
+        pulse1 = self._block(content, 'pulse1')
+        self.assertIn('pulse1_song_loop:\n    .byte $80, $01 ; CMD_INSTRUMENT\n'
+                      '    .byte $62, $40 ; Length 3, Note 64', pulse1)
+        self.assertTrue(pulse1.endswith(
+            '    .byte $FE, $00, <pulse1_song_loop, >pulse1_song_loop ; CMD_BANK_JUMP (song loop)'))
+        self.assertNotIn('$FF', pulse1)
+        # pulse2 rests out to the song's 18 frames so every channel wraps
+        # together; the rest is split at the loop point.
+        self.assertEqual(self._block(content, 'pulse2'), (
+            '    .byte $80, $01 ; CMD_INSTRUMENT\n'
+            '    .byte $62, $30 ; Length 3, Note 48\n'
+            '    .byte $62, $32 ; Length 3, Note 50\n'
+            '    .byte $62, $00 ; Length 3, Note 0\n'
+            'pulse2_song_loop:\n'
+            '    .byte $80, $01 ; CMD_INSTRUMENT\n'
+            '    .byte $68, $00 ; Length 9, Note 0\n'
+            '    .byte $FE, $00, <pulse2_song_loop, >pulse2_song_loop ; CMD_BANK_JUMP (song loop)'))
+        self.assertIn('dpcm_song_loop:', content)
+
+        with self.assertRaisesRegex(ValueError, "Loop point frame 18 is outside the song"):
+            self._export(frames, loop_frame=18)
+
+    def test_song_loop_splits_a_held_note(self):
+        frames = {'pulse1': self._notes([60, 60, 60, 62])}
+        with patch('builtins.print') as mock_print:
+            pulse1 = self._block(self._export(frames, loop_frame=4), 'pulse1')
+        self.assertIn('    .byte $63, $3C ; Length 4, Note 60\n'
+                      'pulse1_song_loop:\n'
+                      '    .byte $80, $01 ; CMD_INSTRUMENT\n'
+                      '    .byte $64, $3C ; Length 5, Note 60', pulse1)
+        mock_print.assert_any_call('⚠ 1 note(s) held across the loop point retrigger on frame 4')
+
+    def test_jukebox_song_with_loop_frame_loops(self):
+        songs = [{'frames': {'pulse1': self._notes(self.PHRASE)}, 'loop_frame': 3},
+                 {'frames': {'pulse1': self._notes(self.PHRASE)}}]
+        out = Path(self.tmp) / "bank.asm"
+        self.exporter.export_song_bank_bytecode(songs, str(out))
+        asm = out.read_text()
+        self.assertIn('<song0_pulse1_song_loop, >song0_pulse1_song_loop ; CMD_BANK_JUMP (song loop)', asm)
+        self.assertNotIn('song1_pulse1_song_loop', asm)
+
+    def test_engine_loop_counter(self):
+        text = (Path(__file__).parent.parent / "nes" / "audio_engine.asm").read_text()
+        handler = text.split('@cmd_loop:', 1)[1].split('@is_length:', 1)[0]
+        self.assertIn('sta loop_count, x', handler)     # first pass arms it
+        self.assertIn('dec loop_count, x', handler)     # later passes count down
+        self.assertEqual(handler.count('jmp @cmd_bank_jump'), 2)
+        # the last pass skips the 3 target operands
+        self.assertEqual(handler.split('@loop_done:', 1)[1].count('jsr fetch_sequence_byte'), 3)
+        # cleared on init (and on a jukebox song change) so a loop never
+        # starts half-armed
+        self.assertEqual(text.count('sta loop_count, x'), 3)
+
+
 if __name__ == '__main__':
     unittest.main()
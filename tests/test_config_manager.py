@@ -111,6 +111,17 @@ class TestConfigManager(unittest.TestCase):
         config.set("processing.pattern_detection.max_events", 2500)
         self.assertTrue(config.validate())
 
+    def test_performance_max_workers(self):
+        """performance.max_workers defaults to 0 (auto) and rejects negatives."""
+        config = ConfigManager()
+        self.assertEqual(config.get_performance_config().max_workers, 0)
+        config.set("performance.max_workers", -2)
+        with self.assertRaises(ValidationError):
+            config.validate()
+        config.set("performance.max_workers", 4)
+        self.assertTrue(config.validate())
+        self.assertEqual(config.get_performance_config().max_workers, 4)
+
     def test_validate_raises_typed_error_with_checks_failed(self):
         """Regression (#222/SAFE-11): validate() used to raise a bare
         ValueError, indistinguishable from an unrelated bug elsewhere. It
@@ -0,0 +1,213 @@
+"""Tests for debug/cpu6502.py and debug/cycle_harness.py."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from debug.cpu6502 import CPU6502, CPUError, FLAG_C, FLAG_N, FLAG_V, FLAG_Z
+from debug.cycle_harness import (
+    CycleHarness,
+    DMCTracker,
+    HarnessError,
+    MMC1Cartridge,
+    MMC3Cartridge,
+    NTSC_FRAME_CYCLES,
+    NTSC_VBLANK_CYCLES,
+    load_ines,
+    measure_rom_cycles,
+)
+
+
+class FlatBus:
+    """64KB of RAM, for running CPU snippets."""
+    def __init__(self):
+        self.mem = bytearray(0x10000)
+
+    def read(self, addr):
+        return self.mem[addr]
+
+    def write(self, addr, value):
+        self.mem[addr] = value
+
+
+def _cpu(code, origin=0x0200):
+    bus = FlatBus()
+    bus.mem[origin:origin + len(code)] = bytes(code)
+    cpu = CPU6502(bus)
+    cpu.pc = origin
+    return cpu
+
+
+def _ines(prg, mapper=0):
+    header = bytes([0x4E, 0x45, 0x53, 0x1A, len(prg) // 0x4000, 0,
+                    (mapper & 0x0F) << 4, mapper & 0xF0]) + bytes(8)
+    return header + bytes(prg)
+
+
+# A 16KB NROM image. reset enables NMI and idles; the NMI calls `music`,
+# whose DEX/BNE loop runs one more time every frame, so frame k costs
+# JSR 6 + INC 5 + LDX 3 + (5n - 1) + LDA 2 + STA 4 + RTS 6 = 25 + 5n
+# cycles with n = k + 1, i.e. 30 + 5k.
+TEST_PROGRAM = {
+    0xC000: [0x78, 0xD8, 0xA2, 0xFF, 0x9A,          # sei; cld; ldx #$ff; txs
+             0xA9, 0x80, 0x8D, 0x00, 0x20],         # lda #$80; sta $2000
+    0xC00A: [0x4C, 0x0A, 0xC0],                     # idle: jmp idle
+    0xC00D: [0x48, 0x20, 0x14, 0xC0, 0x68, 0x40],   # nmi: pha; jsr music; pla; rti
+    0xC014: [0xE6, 0x00, 0xA6, 0x00,                # music: inc $00; ldx $00
+             0xCA, 0xD0, 0xFD,                      # loop: dex; bne loop
+             0xA9, 0x3F, 0x8D, 0x00, 0x40,          # lda #$3f; sta $4000
+             0x60],                                 # rts
+}
+
+
+def _test_rom(program=TEST_PROGRAM):
+    prg = bytearray([0xFF] * 0x4000)
+    for addr, code in program.items():
+        prg[addr - 0xC000:addr - 0xC000 + len(code)] = bytes(code)
+    prg[0x3FFA:0x4000] = bytes([0x0D, 0xC0, 0x00, 0xC0, 0x0D, 0xC0])
+    return _ines(prg)
+
+
+class TestCPU:
+    def test_adc_sets_overflow_and_negative(self):
+        cpu = _cpu([0x18, 0xA9, 0x50, 0x69, 0x50])   # clc; lda #$50; adc #$50
+        for _ in range(3):
+            cpu.step()
+        assert cpu.a == 0xA0
+        assert cpu.p & FLAG_V and cpu.p & FLAG_N and not cpu.p & FLAG_C
+
+    def test_sbc_borrows(self):
+        cpu = _cpu([0x38, 0xA9, 0x50, 0xE9, 0xF0])   # sec; lda #$50; sbc #$f0
+        for _ in range(3):
+            cpu.step()
+        assert cpu.a == 0x60
+        assert not cpu.p & FLAG_C and not cpu.p & FLAG_V
+
+    @pytest.mark.parametrize("x, cycles", [(0, 4), (1, 5)])
+    def test_indexed_read_page_cross_penalty(self, x, cycles):
+        cpu = _cpu([0xBD, 0xFF, 0x10])                # lda $10ff,x
+        cpu.x = x
+        assert cpu.step() == cycles
+
+    def test_indexed_store_has_no_penalty(self):
+        cpu = _cpu([0x9D, 0xFF, 0x10])                # sta $10ff,x
+        cpu.x = 1
+        assert cpu.step() == 5
+
+    @pytest.mark.parametrize("z, origin, cycles", [
+        (False, 0x0200, 2),   # not taken
+        (True, 0x0200, 3),    # taken, same page
+        (True, 0x02F0, 4),    # taken, crosses into the next page
+    ])
+    def test_branch_cycles(self, z, origin, cycles):
+        cpu = _cpu([0xF0, 0x7F], origin)              # beq +127
+        cpu.p = (cpu.p | FLAG_Z) if z else (cpu.p & ~FLAG_Z)
+        assert cpu.step() == cycles
+
+    def test_jmp_indirect_page_wrap_quirk(self):
+        cpu = _cpu([0x6C, 0xFF, 0x03])                # jmp ($03ff)
+        cpu.bus.mem[0x03FF] = 0x34
+        cpu.bus.mem[0x0300] = 0x12                    # high byte from $0300, not $0400
+        cpu.step()
+        assert cpu.pc == 0x1234
+
+    def test_jsr_rts_round_trip(self):
+        cpu = _cpu([0x20, 0x10, 0x02, 0xEA] + [0xEA] * 12 + [0x60])
+        assert cpu.step() == 6
+        assert (cpu.pc, cpu.sp) == (0x0210, 0xFB)
+        assert cpu.step() == 6
+        assert (cpu.pc, cpu.sp) == (0x0203, 0xFD)
+
+    def test_unofficial_opcode_raises(self):
+        with pytest.raises(CPUError):
+            _cpu([0x02]).step()
+
+
+class TestCartridges:
+    def test_ines_rejects_bad_header_and_unknown_mapper(self):
+        with pytest.raises(HarnessError):
+            load_ines(b"not a rom")
+        with pytest.raises(HarnessError):
+            load_ines(_ines(bytes(0x4000), mapper=7))
+
+    def test_mmc1_serial_bank_switch(self):
+        prg = bytearray(8 * 0x4000)
+        for bank in range(8):
+            prg[bank * 0x4000] = bank
+        cart = load_ines(_ines(prg, mapper=1))
+        assert isinstance(cart, MMC1Cartridge)
+        assert cart.read(0xC000) == 7          # last bank fixed at power-on
+        for bit in range(5):
+            cart.write(0xE000, (3 >> bit) & 1)
+        assert cart.read(0x8000) == 3
+        assert cart.read(0xC000) == 7
+
+    def test_mmc3_prg_mode_swaps_r6_window(self):
+        prg = bytearray(4 * 0x4000)               # 8 x 8KB banks
+        for bank in range(8):
+            prg[bank * 0x2000] = bank
+        cart = load_ines(_ines(prg, mapper=4))
+        assert isinstance(cart, MMC3Cartridge)
+        cart.write(0x8000, 0x46)                  # mode 1, select R6
+        cart.write(0x8001, 2)
+        cart.write(0x8000, 0x47)                  # select R7
+        cart.write(0x8001, 3)
+        assert [cart.read(a) for a in (0x8000, 0xA000, 0xC000, 0xE000)] == [6, 3, 2, 7]
+        cart.write(0x8000, 0x06)                  # mode 0
+        assert [cart.read(a) for a in (0x8000, 0xC000)] == [2, 6]
+
+
+class TestHarness:
+    def test_routine_and_nmi_cycles_per_frame(self):
+        report = CycleHarness(_test_rom()).run(20)
+        assert report.routine_cycles == [30 + 5 * k for k in range(20)]
+        # NMI entry 7 + PHA 3 + routine + PLA 4 + RTI 6
+        assert report.nmi_cycles == [c + 20 for c in report.routine_cycles]
+        assert report.apu_writes == [1] * 20
+        assert report.mapper == 0
+
+    def test_stats_histogram_and_budget(self):
+        report = CycleHarness(_test_rom()).run(100)
+        stats = report.stats()
+        assert stats['worst'] == 30 + 5 * 99
+        assert stats['p99'] == 30 + 5 * 99     # 'higher': rank 98.01 rounds up
+        assert stats['mean'] == pytest.approx(30 + 5 * 49.5)
+        counts, edges = report.histogram(bins=5)
+        assert counts.tolist() == [20] * 5
+        assert report.frames_over(30 + 5 * 97) == [98, 99]
+        assert report.stats()['worst'] < NTSC_VBLANK_CYCLES
+
+    def test_routine_address_selects_the_measured_call(self):
+        assert CycleHarness(_test_rom(), routine_address=0xC014).run(3).routine_cycles == [30, 35, 40]
+        assert CycleHarness(_test_rom(), routine_address=0xD000).run(3).routine_cycles == [0, 0, 0]
+
+    def test_rom_that_never_enables_nmi(self):
+        program = dict(TEST_PROGRAM)
+        program[0xC005] = [0xEA] * 5                # drop the $2000 write
+        with pytest.raises(HarnessError, match="never enabled NMI"):
+            CycleHarness(_test_rom(program)).boot()
+
+    def test_measure_rom_cycles_from_file(self, tmp_path):
+        rom_path = tmp_path / "song.nes"
+        rom_path.write_bytes(_test_rom())
+        summary = measure_rom_cycles(str(rom_path), frames=10).summary()
+        assert summary['frames'] == 10
+        assert summary['routine_cycles']['worst'] == 75
+
+
+class TestDMC:
+    def test_dma_stalls_and_loop(self):
+        dmc = DMCTracker()
+        dmc.write(0x4010, 0x0F)     # fastest rate: 54 cycles/bit
+        dmc.write(0x4013, 1)        # 17-byte sample
+        dmc.write(0x4015, 0x10)
+        assert dmc.advance(NTSC_FRAME_CYCLES) == 17 * 4
+        assert dmc.advance(NTSC_FRAME_CYCLES) == 0
+
+        dmc.write(0x4010, 0x4F)     # same rate, looping
+        dmc.write(0x4015, 0x10)
+        fetches = int(NTSC_FRAME_CYCLES // (54 * 8))
+        assert dmc.advance(NTSC_FRAME_CYCLES) == fetches * 4
@@ -0,0 +1,174 @@
+"""Tests for utils/executor.py, the process-wide shared worker pool."""
+
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import executor as shared
+from utils.executor import (
+    default_workers,
+    get_shared_executor,
+    load_payload,
+    publish_payload,
+    release_payload,
+    reset_shared_executor,
+    shared_executor_workers,
+    submit_bounded,
+)
+
+
+def _square(x):
+    return x * x
+
+
+def _payload_length(token):
+    return len(load_payload(token))
+
+
+class _InlineExecutor:
+    """Runs each task at submit time."""
+    def submit(self, fn, item):
+        future = Future()
+        try:
+            future.set_result(fn(item))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class TestSharedExecutor:
+    def test_is_created_once_and_reused(self):
+        first = get_shared_executor()
+        assert get_shared_executor() is first
+        assert shared_executor_workers() >= default_workers()
+        assert first.submit(_square, 7).result(timeout=30) == 49
+
+    def test_grows_for_larger_request_but_never_shrinks(self):
+        base = get_shared_executor()
+        wider = get_shared_executor(min_workers=shared_executor_workers() + 1)
+        assert wider is not base
+        assert get_shared_executor(min_workers=1) is wider
+        assert wider.submit(_square, 3).result(timeout=30) == 9
+
+    def test_reset_builds_a_fresh_pool(self):
+        before = get_shared_executor()
+        reset_shared_executor()
+        assert shared_executor_workers() == 0
+        assert get_shared_executor() is not before
+
+    def test_payload_round_trips_through_workers(self):
+        token = publish_payload(list(range(1000)))
+        try:
+            futures = [get_shared_executor().submit(_payload_length, token) for _ in range(3)]
+            assert [f.result(timeout=30) for f in futures] == [1000] * 3
+        finally:
+            release_payload(token)
+        assert not Path(token).exists()
+
+
+class TestSubmitBounded:
+    def test_yields_every_item_with_its_result(self):
+        results = {item: future.result()
+                   for item, future in submit_bounded(_InlineExecutor(), _square, range(10), 3)}
+        assert results == {i: i * i for i in range(10)}
+
+    def test_respects_max_in_flight(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def slow(x):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            return x
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            items = sorted(item for item, _ in submit_bounded(executor, slow, range(20), 3))
+        assert items == list(range(20))
+        assert state['peak'] <= 3
+
+    def test_failed_future_does_not_stop_the_rest(self):
+        outcomes = [future.exception() is None
+                    for _, future in submit_bounded(_InlineExecutor(), lambda x: 1 // x, [0, 1, 2], 2)]
+        assert sorted(outcomes) == [False, True, True]
+
+    def test_submit_error_propagates(self):
+        class Broken:
+            def submit(self, fn, item):
+                raise RuntimeError("pool is broken")
+
+        with pytest.raises(RuntimeError):
+            list(submit_bounded(Broken(), _square, [1], 1))
+
+
+def test_load_payload_reads_each_token_once(tmp_path, monkeypatch):
+    token = publish_payload({'a': 1})
+    try:
+        assert load_payload(token) == {'a': 1}
+        monkeypatch.setattr(shared.pickle, 'load', lambda f: pytest.fail("reloaded"))
+        assert load_payload(token) == {'a': 1}
+    finally:
+        release_payload(token)
+
+
+class TestWorkerSizing:
+    @staticmethod
+    def _cgroup(tmp_path, proc_lines, files):
+        for rel, text in files.items():
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        proc = tmp_path / "proc_cgroup"
+        proc.write_text("\n".join(proc_lines) + "\n")
+        return shared.cgroup_cpu_limit(tmp_path, str(proc))
+
+    def test_cgroup_v2_quota_rounds_up(self, tmp_path):
+        assert self._cgroup(tmp_path, ["0::/ci/job"],
+                            {"ci/job/cpu.max": "350000 100000\n"}) == 4
+
+    def test_cgroup_v2_tightest_ancestor_wins(self, tmp_path):
+        assert self._cgroup(tmp_path, ["0::/ci/job"],
+                            {"ci/job/cpu.max": "max 100000\n",
+                             "ci/cpu.max": "200000 100000\n"}) == 2
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        assert self._cgroup(tmp_path, ["0::/"], {"cpu.max": "max 100000\n"}) is None
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        assert self._cgroup(tmp_path, ["4:cpu,cpuacct:/docker/abc"],
+                            {"cpu/docker/abc/cpu.cfs_quota_us": "300000\n",
+                             "cpu/docker/abc/cpu.cfs_period_us": "100000\n"}) == 3
+
+    def test_malformed_cgroup_lines_are_skipped(self, tmp_path):
+        assert self._cgroup(tmp_path, ["", "garbage", "1:name", "0::/ci/job"],
+                            {"ci/job/cpu.max": "200000 100000\n"}) == 2
+
+    def test_no_cgroup_info(self, tmp_path):
+        assert shared.cgroup_cpu_limit(tmp_path, str(tmp_path / "missing")) is None
+
+    def test_usable_cpus_capped_by_quota(self, monkeypatch):
+        monkeypatch.setattr(shared.os, "sched_getaffinity", lambda pid: set(range(64)),
+                            raising=False)
+        monkeypatch.setattr(shared, "cgroup_cpu_limit", lambda: 4)
+        assert shared.usable_cpus() == 4
+        assert default_workers() == 3
+
+    def test_explicit_limit_overrides_and_resets(self, monkeypatch):
+        monkeypatch.setattr(shared, "usable_cpus", lambda: 8)
+        shared.set_worker_limit(2)
+        try:
+            assert default_workers() == 2
+        finally:
+            shared.set_worker_limit(None)
+        assert default_workers() == 7
+        with pytest.raises(ValueError):
+            shared.set_worker_limit(0)
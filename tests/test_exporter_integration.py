@@ -61,17 +61,17 @@ class TestExporterIntegration(unittest.TestCase):
             self.assertIn("instrument_table:", content)
             self.assertIn("pulse1_sequence:", content)
     
-    def test_nsf_export_unsupported(self):
-        """Regression (EXP-05 / #81): NSF export is not a playable NSF and is now
-        explicitly unsupported, so the exporter must raise rather than write a
-        garbage file."""
+    def test_nsf_export(self):
+        """NSF export writes an NSF (the first exporter raised instead of
+        writing JSON-as-data, #81; tests/test_nsf_export.py plays one)."""
         output_path = os.path.join(self.temp_dir, "test.nsf")
-        exporter = NSFExporter()
+        NSFExporter().export(self.test_frames, output_path, "Test Song")
+
+        with open(output_path, 'rb') as f:
+            data = f.read()
+        self.assertEqual(data[:5], b'NESM\x1a')
+        self.assertEqual(data[14:46].rstrip(b'\0'), b'Test Song')
 
-        with self.assertRaises(NotImplementedError):
-            exporter.export(self.test_frames, output_path, "Test Song")
-        self.assertFalse(os.path.exists(output_path))
-    
     def test_famistudio_export(self):
         """Test FamiStudio export produces the expected pattern data.
         (Renamed from test_famistudio_export_with_compression, #302/EXP-09:
@@ -134,8 +134,11 @@ class TestCA65GoldenBytes(unittest.TestCase):
         end = content.index("pulse2_sequence:")
         sequence_block = content[start:end].strip()
 
+        # The phrase plays three times back to back: stored once, with a
+        # CMD_LOOP jumping back to it twice.
         expected = (
             "pulse1_sequence:\n"
+            "pulse1_section_1:\n"
             "    .byte $80, $01 ; CMD_INSTRUMENT\n"
             "    .byte $7D, $3C ; Length 30, Note 60\n"
             "    .byte $7D, $00 ; Length 30, Note 0\n"
@@ -143,18 +146,7 @@ class TestCA65GoldenBytes(unittest.TestCase):
             "    .byte $7D, $00 ; Length 30, Note 0\n"
             "    .byte $7D, $43 ; Length 30, Note 67\n"
             "    .byte $7D, $00 ; Length 30, Note 0\n"
-            "    .byte $7D, $3C ; Length 30, Note 60\n"
-            "    .byte $7D, $00 ; Length 30, Note 0\n"
-            "    .byte $7D, $40 ; Length 30, Note 64\n"
-            "    .byte $7D, $00 ; Length 30, Note 0\n"
-            "    .byte $7D, $43 ; Length 30, Note 67\n"
-            "    .byte $7D, $00 ; Length 30, Note 0\n"
-            "    .byte $7D, $3C ; Length 30, Note 60\n"
-            "    .byte $7D, $00 ; Length 30, Note 0\n"
-            "    .byte $7D, $40 ; Length 30, Note 64\n"
-            "    .byte $7D, $00 ; Length 30, Note 0\n"
-            "    .byte $7D, $43 ; Length 30, Note 67\n"
-            "    .byte $7D, $00 ; Length 30, Note 0\n"
+            "    .byte $84, $02, $00, <pulse1_section_1, >pulse1_section_1 ; CMD_LOOP\n"
             "    .byte $7D, $3C ; Length 30, Note 60\n"
             "    .byte $7D, $00 ; Length 30, Note 0\n"
             "    .byte $7D, $40 ; Length 30, Note 64\n"
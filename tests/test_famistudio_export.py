@@ -1,9 +1,13 @@
 # New file: tests/test_famistudio_export.py
 
+import re
+import tempfile
 import unittest
 import json
 from pathlib import Path
-from exporter.exporter_famistudio import generate_famistudio_txt, midi_note_to_famistudio
+from exporter.exporter_famistudio import (
+    export_famistudio, generate_famistudio_txt, midi_note_to_famistudio,
+)
 
 class TestFamiStudioExport(unittest.TestCase):
     def setUp(self):
@@ -123,6 +127,47 @@ class TestFamiStudioExport(unittest.TestCase):
         self.assertNotIn("dpcm_sample_map", output)
         self.assertNotIn('PATTERN "dpcm_sample_map', output)
 
+    def test_held_note_is_one_cell(self):
+        # A note held over many frames (the pipeline writes one frame dict
+        # per frame) is written once, on the frame it starts; a change of
+        # volume, or the note returning after a gap, is a new cell.
+        frames = {'pulse1': {str(f): {'note': 60, 'volume': 15} for f in range(10)}}
+        frames['pulse1']['4'] = {'note': 60, 'volume': 8}
+        del frames['pulse1']['7']
+        output = generate_famistudio_txt(frames)
+        rows = re.findall(r"    ([0-9A-F]{2}) \| (.+)", output)
+        self.assertEqual([r for r in rows if r[1] != '... ..'],
+                         [('00', 'C-4 15'), ('04', 'C-4 8'), ('05', 'C-4 15'), ('08', 'C-4 15')])
+        self.assertEqual(len(rows), 10)
+
+    def test_int_frame_keys_match_str_keys(self):
+        # In-memory frames (emulator_core, the arranger) key frames by int;
+        # frames loaded from JSON by str. Both must export the same song.
+        as_int = {ch: {int(f): e for f, e in events.items()} for ch, events in self.test_frames.items()}
+        self.assertEqual(generate_famistudio_txt(as_int), generate_famistudio_txt(self.test_frames))
+
+    def test_sequences_name_each_channels_own_patterns(self):
+        # Pattern names are numbered per channel, so every SEQUENCE entry
+        # names a pattern that exists -- including for the channels after
+        # the first when each spans several patterns.
+        frames = {
+            'pulse1': {'0': {'note': 60, 'volume': 15}, '130': {'note': 62, 'volume': 15}},
+            'pulse2': {'70': {'note': 64, 'volume': 10}},
+        }
+        output = generate_famistudio_txt(frames)
+        patterns = set(re.findall(r'  PATTERN "(\w+)"', output))
+        self.assertEqual(patterns, {'pulse1_0', 'pulse1_1', 'pulse1_2',
+                                    'pulse2_0', 'pulse2_1', 'pulse2_2'})
+        sequenced = set(re.findall(r'"(\w+)"', ' '.join(re.findall(r'SEQUENCE (.+)', output))))
+        self.assertEqual(sequenced, patterns)
+
+    def test_export_streams_the_same_document(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "song.txt"
+            export_famistudio(self.test_frames, path, project_name="Test Project")
+            self.assertEqual(path.read_text(),
+                             generate_famistudio_txt(self.test_frames, project_name="Test Project"))
+
 
 class TestFamiStudioGoldenBytes(unittest.TestCase):
     """Exact-output regression for the FamiStudio pattern rows (#232 / REG-14).
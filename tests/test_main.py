@@ -31,7 +31,7 @@ from main import (
     load_config, run_config_init, run_config_validate,
     run_benchmark, run_benchmark_memory, run_full_pipeline, main,
     DETECTOR_MAX_EVENTS, resolve_mapper, get_mapper_choice,
-    enforce_direct_export_dpcm_mapper,
+    enforce_direct_export_dpcm_mapper, resolve_direct_export_mapper,
 )
 from core.exceptions import ConfigurationError
 
@@ -171,6 +171,70 @@ class TestMainArgumentParsing:
                 main()
             assert exc.value.code == 2
 
+    def test_default_path_jobs_flag_is_threaded(self):
+        """--jobs on the default pipeline reaches run_full_pipeline as an int."""
+        with patch('main.run_full_pipeline') as mock_run:
+            with patch('sys.argv', ['main.py', '-j', '3', 'song.mid', 'out.nes']):
+                main()
+        assert mock_run.call_args[0][0].jobs == 3
+
+    def test_default_path_jobs_flag_rejects_non_positive(self):
+        for value in ('0', 'many'):
+            with patch('sys.argv', ['main.py', '--jobs', value, 'song.mid']):
+                with pytest.raises(SystemExit) as exc:
+                    main()
+                assert exc.value.code == 2
+
+    def test_default_path_direct_runtime_flag(self):
+        """--direct-runtime reaches run_full_pipeline; an unknown value exits 2."""
+        with patch('main.run_full_pipeline') as mock_run:
+            with patch('sys.argv', ['main.py', '--direct-runtime', 'streaming', 'song.mid']):
+                main()
+        assert mock_run.call_args[0][0].direct_runtime == 'streaming'
+        with patch('sys.argv', ['main.py', '--direct-runtime', 'fast', 'song.mid']):
+            with pytest.raises(SystemExit) as exc:
+                main()
+            assert exc.value.code == 2
+
+    def test_default_path_cycle_budget_flag(self):
+        """--cycle-budget reaches run_full_pipeline as an int; a non-number exits 2."""
+        with patch('main.run_full_pipeline') as mock_run:
+            with patch('sys.argv', ['main.py', '--cycle-budget', '1500', 'song.mid']):
+                main()
+        assert mock_run.call_args[0][0].cycle_budget == 1500
+        with patch('sys.argv', ['main.py', '--cycle-budget', 'lots', 'song.mid']):
+            with pytest.raises(SystemExit) as exc:
+                main()
+            assert exc.value.code == 2
+
+    def test_default_path_loop_point_flag(self):
+        """--loop-point reaches run_full_pipeline as a frame; a non-number exits 2."""
+        with patch('main.run_full_pipeline') as mock_run:
+            with patch('sys.argv', ['main.py', '--loop-point', '480', 'song.mid']):
+                main()
+        assert mock_run.call_args[0][0].loop_point == 480
+        assert mock_run.call_args[0][0].input == 'song.mid'
+        with patch('sys.argv', ['main.py', '--loop-point', 'end', 'song.mid']):
+            with pytest.raises(SystemExit) as exc:
+                main()
+            assert exc.value.code == 2
+
+    def test_apply_worker_limit_prefers_jobs_then_config(self, tmp_path):
+        from argparse import Namespace
+        from main import apply_worker_limit
+        from utils.executor import set_worker_limit
+
+        config_path = tmp_path / "cfg.yaml"
+        config_path.write_text("performance:\n  max_workers: 5\n")
+        try:
+            assert apply_worker_limit(Namespace(jobs=2, config=str(config_path))) == 2
+            assert apply_worker_limit(Namespace(jobs=None, config=str(config_path))) == 5
+            config_path.write_text("performance:\n  max_workers: -1\n")
+            with pytest.raises(SystemExit):
+                apply_worker_limit(Namespace(jobs=None, config=str(config_path)))
+        finally:
+            set_worker_limit(None)
+
     def test_prepare_subcommand_accepts_mapper_choices(self):
         """The `prepare` subcommand must expose --mapper with the auto/nrom/
         mmc1/mmc3 choices (#217/MAP-6)."""
@@ -782,6 +846,48 @@ class TestEnforceDirectExportDpcmMapper:
         assert isinstance(result, MMC1Mapper)
 
 
+class TestResolveDirectExportMapper:
+    """'auto' must not pick a mapper whose bank window can't hold the
+    streaming runtime's largest channel stream."""
+
+    def _frames(self, length):
+        return {ch: {str(i): {'note': 60 + i % 5, 'pitch': 400 + i % 7, 'control': 0x80, 'volume': 10}
+                     for i in range(length)} for ch in ('pulse1', 'pulse2', 'triangle')}
+
+    def test_long_streaming_song_falls_back_to_indexed(self, tmp_path, capsys):
+        from exporter.exporter_ca65 import CA65Exporter
+        from mappers.mmc1 import MMC1Mapper
+        exporter = CA65Exporter()
+        frames = self._frames(6000)  # 24,000-byte streams; 72,000 bytes total
+
+        mapper, runtime = resolve_direct_export_mapper(exporter, frames, 'auto', 'streaming')
+
+        assert isinstance(mapper, MMC1Mapper)
+        assert runtime == 'indexed'
+        assert 'using the indexed direct runtime' in capsys.readouterr().out
+        out = tmp_path / "music.asm"
+        exporter.export_direct_frames(frames, str(out), standalone=False,
+                                      mapper=mapper, runtime=runtime)
+        content = out.read_text()
+        assert 'pulse1_note:' in content
+        assert 'pulse1_stream:' not in content
+
+    def test_streams_that_fit_keep_the_runtime(self, capsys):
+        from exporter.exporter_ca65 import CA65Exporter
+        mapper, runtime = resolve_direct_export_mapper(
+            CA65Exporter(), self._frames(3000), 'auto', 'streaming')
+        assert (mapper.name, runtime) == ('MMC1', 'streaming')
+        assert 'Warning' not in capsys.readouterr().out
+
+    def test_explicit_mapper_is_not_second_guessed(self):
+        from exporter.exporter_ca65 import CA65Exporter
+        from mappers.mmc1 import MMC1Mapper
+        mapper, runtime = resolve_direct_export_mapper(
+            CA65Exporter(), self._frames(6000), 'mmc1', 'streaming')
+        assert isinstance(mapper, MMC1Mapper)
+        assert runtime == 'streaming'
+
+
 class TestRunCompile:
     """Test run_compile's --mapper wiring (#217/MAP-6)."""
 
@@ -974,6 +1080,30 @@ class TestRunExport:
         call_kwargs = mock_exporter.export_tables_with_patterns.call_args.kwargs
         assert call_kwargs['mapper'] is None
 
+    @patch('main.CA65Exporter')
+    @patch('builtins.print')
+    def test_run_export_loop_point(self, mock_print, mock_exporter_class):
+        """--loop-point is passed to the bytecode export as loop_frame, and
+        the exporter's ValueError for a frame past the song's end exits 1."""
+        mock_exporter = Mock()
+        mock_exporter_class.return_value = mock_exporter
+        args = Namespace(
+            input=str(self.test_input),
+            output=str(self.test_output),
+            format="ca65",
+            patterns=str(self.test_patterns),
+            loop_point=96
+        )
+        run_export(args)
+        assert mock_exporter.export_tables_with_patterns.call_args.kwargs['loop_frame'] == 96
+
+        mock_exporter.export_tables_with_patterns.side_effect = ValueError(
+            "Loop point frame 96 is outside the song (40 frames)")
+        with pytest.raises(SystemExit) as exc:
+            run_export(args)
+        assert exc.value.code == 1
+        mock_print.assert_any_call("[ERROR] Loop point frame 96 is outside the song (40 frames)")
+
     def test_run_export_missing_frames_file(self):
         """Regression (#120): a missing frames file must fail with a clear
         [ERROR] message and exit 1, not a bare FileNotFoundError traceback."""
@@ -1134,16 +1264,33 @@ class TestRunExport:
             call_args = mock_pack.call_args
             assert call_args.args[1] == str(self.test_output) or call_args.kwargs.get('asm_path') == str(self.test_output)
 
-    def test_export_rejects_nsf_format(self):
-        """Regression (#79): `--format nsf` used to be accepted by argparse but
-        dispatched on the impossible string "nsftxt", so it silently wrote
-        nothing. NSF is dropped from the choices until the exporter is real
-        (#81), so the parser must now reject it up front instead of no-oping."""
+    def test_export_nsf_format(self):
+        """`--format nsf` writes a playable NSF straight from the frames
+        (#79 rejected the flag while the NSF exporter wrote JSON-as-data,
+        #81). It never packs DPCM or touches a mapper."""
         from main import main as main_entry
-        with patch('sys.argv', ['main.py', 'export', 'i.json', 'o.asm',
-                                 '--format', 'nsf']):
-            with pytest.raises(SystemExit):
-                main_entry()
+        self.test_input.write_text(json.dumps(
+            {"pulse1": {str(f): {"note": 60, "volume": 15} for f in range(8)}}))
+        nsf_path = self.temp_dir / "song.nsf"
+        with patch('sys.argv', ['main.py', 'export', str(self.test_input), str(nsf_path),
+                                 '--format', 'nsf', '--loop-point', '4']), \
+                patch('main.pack_dpcm_into_asm') as mock_pack:
+            main_entry()
+        mock_pack.assert_not_called()
+        data = nsf_path.read_bytes()
+        assert data[:5] == b'NESM\x1a'
+        assert data[14:46].rstrip(b'\0') == b'song'
+
+    @patch('main.NSFExporter')
+    @patch('builtins.print')
+    def test_run_export_nsf_error_exits(self, mock_print, mock_exporter_class):
+        mock_exporter_class.return_value.export.side_effect = ValueError("too long")
+        args = Namespace(input=str(self.test_input), output=str(self.temp_dir / "o.nsf"),
+                         format="nsf", patterns=None)
+        with pytest.raises(SystemExit) as exc:
+            run_export(args)
+        assert exc.value.code == 1
+        mock_print.assert_any_call("[ERROR] too long")
 
 
 class TestPackDpcmIntoAsm:
@@ -1767,6 +1914,59 @@ class TestRunSongBuild:
             run_song_build(self._args(arranger=False, dpcm_index=missing_index))
         mock_builder_class.assert_not_called()
 
+    def _build_capturing_asm(self, **overrides):
+        """Run a build with the CC65 tail mocked; return the emitted music.asm."""
+        captured = {}
+
+        def _capture_asm(music_asm_path, **kwargs):
+            captured['text'] = Path(music_asm_path).read_text()
+            return True
+
+        with patch('main.NESProjectBuilder') as mock_builder_class, \
+                patch('main.compile_rom', return_value=True), \
+                patch('main.validate_rom', return_value=True):
+            mock_builder_class.return_value.prepare_project.side_effect = _capture_asm
+            run_song_build(self._args(**overrides))
+        return captured['text']
+
+    def test_rebuild_reuses_cached_frames_for_unchanged_songs(self):
+        self._write_bank([('song_a', self.midi_a, 0), ('song_b', self.midi_b, 1)])
+        first = self._build_capturing_asm(jobs=1)
+        stored = json.loads(self.bank_path.read_text())['songs']
+        assert all('compiled' in song for song in stored.values())
+
+        with patch('main.midi_to_frames_for_song') as mock_parse:
+            second = self._build_capturing_asm(jobs=1)
+        mock_parse.assert_not_called()
+        assert second == first
+
+    def test_rebuild_reparses_only_the_changed_song(self):
+        self._write_bank([('song_a', self.midi_a, 0), ('song_b', self.midi_b, 1)])
+        self._build_capturing_asm(jobs=1)
+
+        import mido
+        mid = mido.MidiFile(str(self.midi_b))
+        mid.tracks[0].insert(0, mido.Message('note_on', note=72, velocity=90, channel=0, time=0))
+        mid.save(str(self.midi_b))
+
+        with patch('main.midi_to_frames_for_song', wraps=midi_to_frames_for_song) as mock_parse:
+            self._build_capturing_asm(jobs=1)
+        assert [call.args[0] for call in mock_parse.call_args_list] == [str(self.midi_b)]
+
+    def test_no_cache_reparses_and_leaves_bank_untouched(self):
+        self._write_bank([('song_a', self.midi_a, 0)])
+        before = self.bank_path.read_text()
+        with patch('main.midi_to_frames_for_song', wraps=midi_to_frames_for_song) as mock_parse:
+            self._build_capturing_asm(no_cache=True)
+        mock_parse.assert_called_once()
+        assert self.bank_path.read_text() == before
+
+    def test_pool_and_serial_builds_agree(self):
+        self._write_bank([('song_a', self.midi_a, 0), ('song_b', self.midi_b, 1)])
+        serial = self._build_capturing_asm(jobs=1, no_cache=True)
+        pooled = self._build_capturing_asm(jobs=2, no_cache=True)
+        assert pooled == serial
+
 
 class TestConfigCommands:
     """Test configuration management commands."""
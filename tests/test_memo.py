@@ -0,0 +1,144 @@
+"""Tests for utils/memo.py and the lookups it memoizes."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.memo import (
+    BoundedMemo,
+    cache_stats,
+    clear_caches,
+    diff_cache_stats,
+    is_caching_enabled,
+    memoized,
+    set_caching_enabled,
+)
+
+
+@pytest.fixture(autouse=True)
+def _caching_on():
+    set_caching_enabled(True)
+    yield
+    set_caching_enabled(True)
+
+
+class TestMemoized:
+    def test_hits_and_misses_are_counted(self):
+        calls = []
+
+        @memoized("test_square", maxsize=8)
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        square.memo.clear()
+        assert [square(3), square(3), square(4)] == [9, 9, 16]
+        assert calls == [3, 4]
+        stats = cache_stats("test_square")["test_square"]
+        assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 2)
+        assert stats['hit_rate'] == pytest.approx(1 / 3)
+
+    def test_bounded_evicts_oldest(self):
+        @memoized("test_bounded", maxsize=2)
+        def ident(x):
+            return x
+
+        ident.memo.clear()
+        for x in (1, 2, 3):
+            ident(x)
+        assert list(ident.memo.data) == [(2,), (3,)]
+        assert ident.memo.evictions == 1
+
+    def test_kwargs_and_unhashable_bypass_cache(self):
+        @memoized("test_bypass")
+        def total(values, scale=1):
+            return sum(values) * scale
+
+        total.memo.clear()
+        assert total([1, 2]) == 3
+        assert total((1, 2), scale=2) == 6
+        assert total.memo.stats()['size'] == 0
+
+    def test_disabling_bypasses_and_clears(self):
+        @memoized("test_disable")
+        def ident(x):
+            return x
+
+        ident(1)
+        set_caching_enabled(False)
+        assert not is_caching_enabled()
+        assert ident.memo.stats()['size'] == 0
+        ident(1)
+        assert ident.memo.stats()['misses'] == 0
+
+    def test_diff_cache_stats_only_reports_active_caches(self):
+        before = {'a': {'hits': 1, 'misses': 1}, 'b': {'hits': 5, 'misses': 0}}
+        after = {'a': {'hits': 4, 'misses': 2}, 'b': {'hits': 5, 'misses': 0},
+                 'c': {'hits': 0, 'misses': 3}}
+        assert diff_cache_stats(before, after) == {
+            'a': {'hits': 3, 'misses': 1}, 'c': {'hits': 0, 'misses': 3}}
+
+    def test_rejects_non_positive_size(self):
+        with pytest.raises(ValueError):
+            BoundedMemo("bad", 0)
+
+
+class TestMemoizedLookups:
+    def test_channel_pitch_matches_tables(self):
+        from nes.pitch_table import NES_NOTE_TABLE, NES_TRIANGLE_TABLE, PitchProcessor
+
+        processor = PitchProcessor()
+        clear_caches()
+        assert processor.get_channel_pitch(60, "pulse1") == NES_NOTE_TABLE[60]
+        assert processor.get_channel_pitch(60, "triangle") == NES_TRIANGLE_TABLE[60]
+        assert processor.get_channel_pitch(200, "triangle") == NES_TRIANGLE_TABLE[96]
+        assert processor.get_channel_pitch(60, "unknown") == 0
+        processor.get_channel_pitch(60, "pulse1")
+        assert cache_stats("channel_pitch")["channel_pitch"]['hits'] == 1
+
+    def test_compress_macro_returns_fresh_lists(self):
+        from exporter.exporter_ca65 import CA65Exporter
+
+        exporter = CA65Exporter()
+        first = exporter._compress_macro([15, 14, 10, 10, 10])
+        first.append(99)
+        assert exporter._compress_macro([15, 14, 10, 10, 10]) == [15, 14, 10, 0xFF]
+        assert exporter._compress_macro([]) == [0xFF]
+
+    def test_unknown_gm_program_shares_fallback(self):
+        from arranger.gm_instruments import get_drum_mapping, get_instrument_mapping
+
+        assert get_instrument_mapping(200) is get_instrument_mapping(200)
+        assert get_instrument_mapping(200).name == "Unknown (200)"
+        assert get_drum_mapping(5).name == "Unknown Drum (5)"
+
+    def test_dpcm_resolution_is_per_index(self):
+        from dpcm_sampler.enhanced_drum_mapper import EnhancedDrumMapper
+
+        with_kick = EnhancedDrumMapper.__new__(EnhancedDrumMapper)
+        with_kick.sample_index = {"kick": {}}
+        without = EnhancedDrumMapper.__new__(EnhancedDrumMapper)
+        without.sample_index = {}
+        assert with_kick._resolve_dpcm_sample_name(36, 100) == "kick"
+        assert without._resolve_dpcm_sample_name(36, 100) is None
+
+
+class TestProfilerCacheCounters:
+    def test_stage_metadata_and_report_carry_cache_deltas(self):
+        from benchmarks.performance_suite import (
+            PerformanceProfiler, PipelineBenchmark, summarize_caches)
+        from nes.pitch_table import channel_pitch
+
+        profiler = PerformanceProfiler()
+        with profiler.profile("frames") as handle:
+            for _ in range(3):
+                channel_pitch(61, "pulse2")
+        counts = handle.result.metadata['caches']['channel_pitch']
+        assert counts['hits'] + counts['misses'] == 3
+        assert counts['hits'] >= 2
+
+        summary = summarize_caches([PipelineBenchmark("song.mid", 0, 0, 0, [handle.result])])
+        assert summary['channel_pitch']['hit_rate'] >= 2 / 3
@@ -0,0 +1,160 @@
+"""Tests for utils/memory_budget.py and its use in run_full_pipeline."""
+
+import sys
+from argparse import Namespace
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main
+from utils.memory_budget import (
+    MIN_PATTERN_EVENTS,
+    MemoryBudget,
+    load_spilled_frames,
+    process_tree_rss_mb,
+    spill_frames,
+)
+
+
+class TestPolicy:
+    def test_rejects_non_positive_budget(self):
+        with pytest.raises(ValueError):
+            MemoryBudget(0)
+
+    @pytest.mark.parametrize("mb,level", [(100, 'ok'), (256, 'elevated'), (400, 'critical')])
+    def test_levels(self, mb, level):
+        assert MemoryBudget(512).level(mb) == level
+
+    def test_ok_leaves_detection_alone(self):
+        budget = MemoryBudget(512)
+        assert budget.plan_pattern_detection(15000, 8, current_mb=100) == (15000, 8)
+        assert not budget.should_spill_frames(100)
+        assert budget.degradations == []
+
+    def test_elevated_halves_workers_and_spills(self):
+        budget = MemoryBudget(512)
+        assert budget.plan_pattern_detection(15000, 8, current_mb=300) == (15000, 4)
+        assert budget.should_spill_frames(300)
+        assert len(budget.degradations) == 2
+
+    def test_critical_single_worker_and_halved_cap(self):
+        budget = MemoryBudget(512)
+        assert budget.plan_pattern_detection(15000, 8, current_mb=400) == (7500, 1)
+
+    def test_over_budget_drops_cap_to_floor(self):
+        budget = MemoryBudget(512)
+        assert budget.plan_pattern_detection(15000, 8, current_mb=600) == (MIN_PATTERN_EVENTS, 1)
+        # A configured cap already below the floor is never raised.
+        assert budget.plan_pattern_detection(500, 1, current_mb=600) == (500, 1)
+
+    def test_checkpoints_track_peak_stage_and_overruns(self):
+        budget = MemoryBudget(100)
+        with patch('utils.memory_budget.process_tree_rss_mb', side_effect=[50, 150, 80]):
+            budget.checkpoint("parse")
+            budget.checkpoint("pattern_detection")
+            budget.checkpoint("export")
+        summary = budget.summary()
+        assert summary['peak_mb'] == 150
+        assert summary['peak_stage'] == "pattern_detection"
+        assert summary['overruns'] == ["pattern_detection"]
+
+    def test_watcher_samples_between_checkpoints(self):
+        budget = MemoryBudget(512, interval_ms=1)
+        budget.start()
+        try:
+            budget.checkpoint("parse")
+            [0] * 1_000_000
+        finally:
+            budget.stop()
+        assert budget._thread is None
+        assert budget.peak_mb > 0
+        assert budget.peak_stage == "parse"
+
+    def test_process_tree_rss_is_positive(self):
+        assert process_tree_rss_mb() > 0
+
+
+class TestSpill:
+    def test_round_trip_keeps_int_keys_and_removes_file(self, tmp_path):
+        frames = {'pulse1': {0: {'note': 60, 'volume': 15}}, 'dpcm_sample_map': {'1': 3}}
+        path = spill_frames(frames, tmp_path / "frames.pickle")
+        assert path.exists()
+        assert load_spilled_frames(path) == frames
+        assert not path.exists()
+
+
+class TestGetMemoryBudget:
+    def test_default_config_budget(self):
+        assert main.get_memory_budget().max_memory_mb == 512
+
+    def test_config_file_budget(self, tmp_path):
+        config = tmp_path / "cfg.yaml"
+        config.write_text("performance:\n  max_memory_mb: 128\n")
+        assert main.get_memory_budget(str(config)).max_memory_mb == 128
+
+    def test_invalid_config_exits_cleanly(self, tmp_path):
+        config = tmp_path / "cfg.yaml"
+        config.write_text("performance:\n  max_memory_mb: 0\n")
+        with pytest.raises(SystemExit) as exc:
+            main.get_memory_budget(str(config))
+        assert exc.value.code == 1
+
+
+class TestPipelineDegradation:
+    FRAMES = {'pulse1': {i: {'note': 60 + i % 4, 'volume': 15} for i in range(64)}}
+
+    def test_critical_budget_caps_parallel_detector(self):
+        budget = MemoryBudget(512)
+        args = Namespace(config=None)
+        with patch('utils.memory_budget.process_tree_rss_mb', return_value=400), \
+                patch('tracker.pattern_detector_parallel.ParallelPatternDetector.detect_patterns',
+                      autospec=True) as mock_detect:
+            def fake_detect(detector, events):
+                detector.was_sampled = False
+                return {'patterns': {}, 'references': {}, 'stats': {}, 'variations': {}}
+            mock_detect.side_effect = fake_detect
+            main.detect_patterns_or_direct_export(self.FRAMES, True, args, budget=budget)
+        detector = mock_detect.call_args[0][0]
+        assert detector.max_workers == 1
+        assert detector.max_pattern_events == main.MAX_PATTERN_EVENTS // 2
+
+    def test_pipeline_spills_frames_during_detection(self, tmp_path):
+        input_midi = tmp_path / "song.mid"
+        input_midi.write_bytes(b"MThd")
+        output_rom = tmp_path / "song.nes"
+        args = Namespace(input=str(input_midi), output=str(output_rom), no_patterns=False,
+                         arranger=True, verbose=False, debug=False, skip_validation=True,
+                         config=None)
+        pattern_result = {'patterns': {}, 'references': {}, 'variations': {},
+                          'stats': {'compression_ratio': 0, 'coverage_ratio': 0, 'total_events': 64}}
+        seen = {}
+
+        def fake_detect(frames, use_patterns, args, budget=None, events=None):
+            seen['frames'], seen['events'] = frames, events
+            return pattern_result, None, ""
+
+        def fake_export(frames, pattern_result, music_asm, use_patterns, args):
+            seen['exported'] = frames
+            return Mock(), Mock(warning=None)
+
+        def fake_build(mapper, music_asm, project_path, rom, *rest):
+            Path(rom).write_bytes(b"\x00" * 16)
+
+        budget = MemoryBudget(512)
+        with patch('utils.memory_budget.process_tree_rss_mb', return_value=300), \
+                patch('main.get_memory_budget', return_value=budget), \
+                patch('tracker.parser_fast.parse_midi_to_frames', return_value={'events': {}}), \
+                patch('main.arrange_for_nes', return_value=self.FRAMES), \
+                patch('main.detect_patterns_or_direct_export', side_effect=fake_detect), \
+                patch('main.export_frames_and_resolve_mapper', side_effect=fake_export), \
+                patch('main.build_and_validate_rom', side_effect=fake_build):
+            main.run_full_pipeline(args)
+
+        assert seen['frames'] is None
+        assert len(seen['events']) == 64
+        assert seen['exported'] == self.FRAMES
+        assert "frames spilled to disk during pattern detection" in budget.degradations
+        assert budget._thread is None
@@ -146,15 +146,14 @@ class TestMIDIParserIntegration(unittest.TestCase):
         self.assertIn('patterns', pattern_data, "No patterns detected")
         self.assertIn('references', pattern_data, "No pattern references found")
         
-        # 6. Export to the CA65 path. NSF export is explicitly unsupported
-        # (#81) — it must raise rather than write a non-playable file.
+        # 6. Export to NSF and the CA65 path.
         ca65_exporter = CA65Exporter()
         nsf_output = os.path.join(self.test_dir, "test_output.nsf")
         ca65_output = os.path.join(self.test_dir, "test_output.asm")
 
-        with self.assertRaises(NotImplementedError):
-            NSFExporter().export(frame_data, nsf_output)
-        self.assertFalse(os.path.exists(nsf_output), "NSF must not be written")
+        NSFExporter().export(frame_data, nsf_output)
+        with open(nsf_output, 'rb') as f:
+            self.assertEqual(f.read(5), b'NESM\x1a', "NSF file not created")
 
         ca65_result = ca65_exporter.export_tables_with_patterns(
             frame_data,
@@ -0,0 +1,129 @@
+"""Tests for exporter/multi_format.py and the default path's --export-formats."""
+
+import sys
+from argparse import Namespace
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.exceptions import ExportError
+from exporter.multi_format import (
+    FORMAT_SUFFIXES,
+    export_format,
+    export_side_formats,
+    parse_export_formats,
+)
+from main import main, write_side_exports
+
+
+def _frames(length=64):
+    return {
+        'pulse1': {str(f): {'note': 60 + (f // 8) % 12, 'volume': 12} for f in range(length)},
+        'triangle': {str(f): {'note': 48, 'volume': 15} for f in range(0, length, 2)},
+    }
+
+
+@pytest.fixture
+def music_asm(tmp_path):
+    path = tmp_path / "music.asm"
+    path.write_text("; exported music\n")
+    return path
+
+
+class TestParseExportFormats:
+    def test_splits_and_dedups(self):
+        assert parse_export_formats('nsf, FamiStudio,nsf,ca65') == ['nsf', 'famistudio', 'ca65']
+
+    @pytest.mark.parametrize('value', ['', 'nsf,', 'midi'])
+    def test_rejects_unknown(self, value):
+        with pytest.raises(ValueError, match='unknown export format'):
+            parse_export_formats(value)
+
+
+class TestExportSideFormats:
+    def test_serial_writes_every_format_with_timings(self, tmp_path, music_asm):
+        rom = tmp_path / "song.nes"
+        results = export_side_formats(_frames(), ['famistudio', 'ca65', 'nsf'], rom, music_asm,
+                                      export_ms=5.0, max_workers=1)
+
+        assert [r.format for r in results] == ['famistudio', 'ca65', 'nsf']
+        for result in results:
+            assert result.error is None
+            assert result.output_path == str(rom.with_suffix(FORMAT_SUFFIXES[result.format]))
+        assert (tmp_path / "song.s").read_text() == "; exported music\n"
+        assert results[1].duration_ms >= 5.0
+        assert (tmp_path / "song.nsf").read_bytes()[:5] == b'NESM\x1a'
+        assert '# Project: song' in (tmp_path / "song.txt").read_text()
+        # The NSF exporter's own summary comes back on the result, not stdout.
+        assert results[2].log
+
+    def test_pool_matches_serial(self, tmp_path, music_asm):
+        serial_dir = tmp_path / "serial"
+        pooled_dir = tmp_path / "pooled"
+        serial_dir.mkdir()
+        pooled_dir.mkdir()
+        export_side_formats(_frames(), ['nsf', 'famistudio'], serial_dir / "song.nes",
+                            music_asm, max_workers=1)
+        results = export_side_formats(_frames(), ['nsf', 'famistudio'], pooled_dir / "song.nes",
+                                      music_asm, max_workers=2)
+
+        assert all(r.error is None for r in results)
+        for suffix in ('.nsf', '.txt'):
+            assert ((pooled_dir / "song").with_suffix(suffix).read_bytes()
+                    == (serial_dir / "song").with_suffix(suffix).read_bytes())
+
+    def test_failure_is_recorded_not_raised(self, tmp_path, music_asm):
+        with patch('exporter.exporter_nsf.load_nsf_player', return_value=bytes(0x7FF0)):
+            results = export_side_formats(_frames(), ['nsf', 'famistudio'], tmp_path / "song.nes",
+                                          music_asm, max_workers=1)
+
+        assert 'ValueError' in results[0].error
+        assert results[1].error is None
+
+    def test_ca65_is_not_exported_from_frames(self, tmp_path):
+        result = export_format('ca65', _frames(), tmp_path / "song.s")
+        assert 'not exported from frames' in result.error
+
+
+class TestWriteSideExports:
+    def _args(self, formats):
+        return Namespace(export_formats=formats, loop_point=None, cycle_budget=None)
+
+    def test_no_formats_is_a_no_op(self, tmp_path, music_asm):
+        assert write_side_exports(_frames(), music_asm, tmp_path / "song.nes", 0.0,
+                                  Namespace()) == []
+
+    def test_failure_raises_export_error(self, tmp_path, music_asm, capsys):
+        with patch('main.default_workers', return_value=1), \
+             patch('exporter.exporter_nsf.load_nsf_player', return_value=bytes(0x7FF0)):
+            with pytest.raises(ExportError, match='nsf'):
+                write_side_exports(_frames(), music_asm, tmp_path / "song.nes", 0.0,
+                                   self._args(['ca65', 'nsf']))
+        out = capsys.readouterr().out
+        assert 'song.s' in out
+        assert 'FAILED' in out
+
+
+class TestDefaultPathFlag:
+    def test_flag_reaches_run_full_pipeline(self):
+        with patch('main.run_full_pipeline') as mock_run:
+            with patch('sys.argv', ['main.py', '--export-formats', 'nsf,famistudio', 'song.mid']):
+                main()
+        assert mock_run.call_args[0][0].export_formats == ['nsf', 'famistudio']
+        assert mock_run.call_args[0][0].input == 'song.mid'
+
+    def test_flag_defaults_to_none_requested(self):
+        with patch('main.run_full_pipeline') as mock_run:
+            with patch('sys.argv', ['main.py', 'song.mid']):
+                main()
+        assert mock_run.call_args[0][0].export_formats == []
+
+    @pytest.mark.parametrize('argv', [['--export-formats', 'wav', 'song.mid'], ['song.mid', '--export-formats']])
+    def test_bad_value_exits_2(self, argv):
+        with patch('sys.argv', ['main.py'] + argv):
+            with pytest.raises(SystemExit) as exc:
+                main()
+        assert exc.value.code == 2
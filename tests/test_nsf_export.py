@@ -4,7 +4,64 @@ import unittest
 import os
 import struct
 from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from debug.cpu6502 import CPU6502
 from exporter.exporter_nsf import NSFExporter, NSFHeader, NSFMacroPacker
+from nes.nsf_player import (
+    NSF_INIT_ADDRESS, NSF_LOAD_ADDRESS, NSF_PLAY_ADDRESS, NSF_PLAYER_PATH,
+    NSF_SONG_HEADER_ADDRESS, NSF_SONG_HEADER_SIZE, build_nsf_player, load_nsf_player,
+)
+from nes.pitch_table import NES_NOTE_TABLE, NES_TRIANGLE_TABLE
+
+
+class NSFBus:
+    """2KB RAM, the NSF's PRG at its load address, and an APU write log."""
+    def __init__(self, nsf):
+        self.ram = bytearray(0x800)
+        self.prg = bytearray(0x8000)
+        load = struct.unpack('<H', nsf[8:10])[0]
+        self.prg[load - 0x8000:load - 0x8000 + len(nsf) - 128] = nsf[128:]
+        self.apu_writes = []
+
+    def read(self, addr):
+        if addr < 0x2000:
+            return self.ram[addr & 0x7FF]
+        return self.prg[addr - 0x8000] if addr >= 0x8000 else 0
+
+    def write(self, addr, value):
+        if addr < 0x2000:
+            self.ram[addr & 0x7FF] = value
+        elif 0x4000 <= addr <= 0x4017:
+            self.apu_writes.append((addr, value))
+
+
+def _play_nsf(nsf, frames):
+    """Call INIT, then PLAY `frames` times; the APU writes of each PLAY."""
+    bus = NSFBus(nsf)
+    cpu = CPU6502(bus)
+    init, play = struct.unpack('<HH', nsf[10:14])
+
+    def call(addr):
+        # Return to $5000 (nothing mapped there) on the routine's RTS
+        bus.ram[0x1FD], bus.ram[0x1FC] = 0x4F, 0xFF
+        cpu.sp, cpu.pc = 0xFB, addr
+        for _ in range(100000):
+            if cpu.pc == 0x5000:
+                return
+            cpu.step()
+        raise AssertionError(f"routine at ${addr:04X} did not return")
+
+    call(init)
+    writes = []
+    for _ in range(frames):
+        bus.apu_writes = []
+        call(play)
+        writes.append(bus.apu_writes)
+    return writes
+
 
 class TestNSFExport(unittest.TestCase):
     def setUp(self):
@@ -52,21 +109,86 @@ class TestNSFExport(unittest.TestCase):
         self.assertIn(b'Test Artist', packed)
         self.assertIn(b'Test Copyright', packed)
 
-    def test_nsf_export_unsupported(self):
-        # Regression (EXP-05 / #81): the NSF exporter emitted channel data as a
-        # JSON string and a play routine with wrong branch offsets - not a
-        # playable NSF. NSF export is now explicitly unsupported, so the public
-        # API must raise instead of writing a garbage file.
+    def test_nsf_header_text_fields_are_cut_to_fit(self):
+        header = NSFHeader()
+        header.song_name = "A" * 40
+        header.artist_name = "Beyonc\u00e9"
+        packed = header.pack()
+        self.assertEqual(len(packed), 128)
+        self.assertEqual(packed[14:46], b'A' * 31 + b'\0')
+        self.assertEqual(packed[46:78].rstrip(b'\0'), b'Beyonc?')
+
+    def test_export_writes_header_and_song_pointers(self):
         exporter = NSFExporter()
-        with self.assertRaises(NotImplementedError):
-            exporter.export(self.test_frames, self.test_output, song_name="Test Song")
-        with self.assertRaises(NotImplementedError):
-            exporter.export({}, self.test_output)
-        with self.assertRaises(NotImplementedError):
-            exporter.export_nsf({'title': 'X'}, self.test_output)
-        # Nothing was written.
+        exporter.export(self.test_frames, self.test_output, song_name="Test Song")
+        data = Path(self.test_output).read_bytes()
+
+        self.assertEqual(data[:5], b'NESM\x1a')
+        load, init, play = struct.unpack('<HHH', data[8:14])
+        self.assertEqual((load, init, play),
+                         (NSF_LOAD_ADDRESS, NSF_INIT_ADDRESS, NSF_PLAY_ADDRESS))
+        self.assertEqual(data[112:120], bytes(8))   # not bank switched
+
+        # The song header patched into the player points past the player,
+        # at sequences that exist in the file.
+        player = load_nsf_player()
+        prg = data[128:]
+        self.assertEqual(prg[:6], player[:6])
+        offset = NSF_SONG_HEADER_ADDRESS - NSF_LOAD_ADDRESS
+        song = prg[offset:offset + NSF_SONG_HEADER_SIZE]
+        self.assertEqual(song[0], 1)
+        for ch in range(5):
+            address = song[1 + ch] | song[6 + ch] << 8
+            self.assertGreaterEqual(address, NSF_LOAD_ADDRESS + len(player))
+            self.assertLess(address, NSF_LOAD_ADDRESS + len(prg))
+        # DPCM is not carried: its sequence is just the end marker.
+        dpcm = song[5] | song[10] << 8
+        self.assertEqual(prg[dpcm - NSF_LOAD_ADDRESS], 0xFF)
+
+    def test_export_plays_the_song(self):
+        """The NSF runs on the 6502 core: INIT once, PLAY per frame."""
+        frames = {'pulse1': {str(f): {'note': 60 if f < 8 else 64, 'volume': 12}
+                             for f in range(16)}}
+        NSFExporter().export(frames, self.test_output)
+        writes = _play_nsf(Path(self.test_output).read_bytes(), 40)
+
+        def pulse1(frame):
+            # $4003 is only rewritten when it changes: replay the writes so far
+            regs = {}
+            for frame_writes in writes[:frame + 1]:
+                regs.update(frame_writes)
+            return regs[0x4000] & 0x0F, regs[0x4002] | (regs[0x4003] & 0x07) << 8
+
+        self.assertEqual(pulse1(0), (12, NES_NOTE_TABLE[60]))
+        self.assertEqual(pulse1(7), (12, NES_NOTE_TABLE[60]))
+        self.assertEqual(pulse1(8), (12, NES_NOTE_TABLE[64]))
+        # Without a loop point the player starts the song over once every
+        # channel has ended.
+        restart = next(f for f in range(16, 40) if 0x4003 in dict(writes[f]))
+        self.assertEqual(pulse1(restart), (12, NES_NOTE_TABLE[60]))
+
+    def test_export_loop_frame(self):
+        frames = {'pulse1': {str(f): {'note': 60 + f // 4, 'volume': 15} for f in range(16)}}
+        NSFExporter().export(frames, self.test_output, loop_frame=8)
+        writes = _play_nsf(Path(self.test_output).read_bytes(), 24)
+        periods = [dict(w).get(0x4002) for w in writes]
+        # Frames 16-23 replay frames 8-15.
+        self.assertEqual(periods[16:24], periods[8:16])
+        self.assertNotEqual(periods[16], periods[0])
+
+    def test_song_too_long_for_the_player_raises(self):
+        with patch('exporter.exporter_nsf.load_nsf_player', return_value=bytes(0x7FF0)):
+            with self.assertRaises(ValueError):
+                NSFExporter().export(self.test_frames, self.test_output)
         self.assertFalse(os.path.exists(self.test_output))
 
+    def test_player_blob_carries_the_period_tables(self):
+        """The blob is prebuilt, so a pitch-table change needs a rebuild
+        (`python -m nes.nsf_player`); catch a stale blob without cc65."""
+        player = load_nsf_player()
+        self.assertIn(bytes(NES_NOTE_TABLE[n] & 0xFF for n in range(128)), player)
+        self.assertIn(bytes(NES_TRIANGLE_TABLE[n] & 0xFF for n in range(128)), player)
+
     def test_nsf_macro_packer_pointer_resolution(self):
         """Verify that NSFMacroPacker properly calculates absolute memory pointers"""
         packer = NSFMacroPacker(base_address=0x8000)
@@ -116,3 +238,10 @@ class TestNSFExport(unittest.TestCase):
         self.assertEqual(p2, 0x0000)  # Pulse2 wasn't provided, should be null
         self.assertEqual(tri, 0x8013)
         self.assertEqual(header[10], 150)
+
+
+@pytest.mark.requires_cc65
+def test_player_blob_matches_a_cc65_build(tmp_path):
+    """nes/nsf_player.bin is what `python -m nes.nsf_player` builds from
+    the current engine; rebuild and commit it after an engine change."""
+    assert build_nsf_player(tmp_path / "nsf_player.bin") == NSF_PLAYER_PATH.read_bytes()
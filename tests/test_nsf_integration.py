@@ -2,31 +2,36 @@
 import unittest
 import tempfile
 from pathlib import Path
+
 from exporter.exporter_nsf import NSFExporter
-from nes.project_builder import NESProjectBuilder
+from main import midi_to_frames_for_song
+from tests.test_nsf_export import _play_nsf
+
+FIXTURES = Path(__file__).parent.parent / "benchmarks" / "fixtures"
+
 
 class TestNSFIntegration(unittest.TestCase):
     def setUp(self):
         self.exporter = NSFExporter()
         self.temp_dir = tempfile.mkdtemp()
         self.project_path = Path(self.temp_dir)
-        
+
     def tearDown(self):
         import shutil
         shutil.rmtree(self.temp_dir)
-        
-    def test_nsf_export_unsupported(self):
-        """Regression (EXP-05 / #81): NSF export is not a playable NSF and is now
-        explicitly unsupported, so export_nsf must raise rather than write a file
-        whose header looks valid but whose body is JSON-as-data."""
-        nsf_file = self.project_path / "test.nsf"
-        with self.assertRaises(NotImplementedError):
-            self.exporter.export_nsf({'title': 'Test Song', 'artist': 'A'}, nsf_file)
-        with self.assertRaises(NotImplementedError):
-            self.exporter.export_nsf({'patterns': {f'p{i}': {'data': [0]} for i in range(16)}}, nsf_file)
-        with self.assertRaises(NotImplementedError):
-            self.exporter.export_nsf({'load_address': 0x8000}, nsf_file)
-        self.assertFalse(nsf_file.exists())
+
+    def test_midi_to_nsf_plays(self):
+        """MIDI -> frames -> NSF, then run the NSF: every channel the song
+        uses gets its registers written, with no cc65 involved."""
+        frames = midi_to_frames_for_song(str(FIXTURES / "multiple_tracks.mid"), False)
+        nsf_file = self.project_path / "song.nsf"
+        self.exporter.export(frames, nsf_file, song_name="multiple_tracks", loop_frame=0)
+
+        written = {addr for frame in _play_nsf(nsf_file.read_bytes(), 300) for addr, _ in frame}
+        self.assertTrue({0x4000, 0x4002, 0x4003}.issubset(written))
+        for channel, period_reg in (('pulse2', 0x4006), ('triangle', 0x400A)):
+            if any(f.get('note') for f in frames.get(channel, {}).values()):
+                self.assertIn(period_reg, written, channel)
 
 
 if __name__ == '__main__':
@@ -17,6 +17,7 @@ import os
 import sys
 import json
 import mido
+import numpy as np
 from pathlib import Path
 from unittest.mock import patch, MagicMock, mock_open
 
@@ -27,7 +28,6 @@ from tracker.parser_fast import (
     parse_midi_to_frames_with_analysis,
     _open_midi_file
 )
-from tracker.tempo_map import TempoValidationError
 from core.exceptions import InvalidMIDIError
 
 
@@ -243,12 +243,14 @@ class TestParseMidiToFrames:
             ]]
             mock_midi.return_value = mock_track
             
-            # Mock tempo map to raise TempoValidationError
+            # Mock tempo map that rejects the invalid tempo
             with patch('tracker.parser_fast.EnhancedTempoMap') as mock_tempo_map:
                 mock_tempo_instance = MagicMock()
-                mock_tempo_instance.add_tempo_change.side_effect = TempoValidationError("Invalid tempo")
-                mock_tempo_instance.get_frame_for_tick.return_value = 0
-                mock_tempo_instance.get_tempo_at_tick.return_value = 500000
+                # The parser adds tempo changes in one batch and skips
+                # invalid ones, reporting how many it dropped.
+                mock_tempo_instance.add_tempo_changes.return_value = 1
+                mock_tempo_instance.get_frames_for_ticks.return_value = np.array([0, 0])
+                mock_tempo_instance.get_tempos_for_ticks.return_value = np.array([500000, 500000])
                 mock_tempo_map.return_value = mock_tempo_instance
                 
                 # Should not raise exception
@@ -354,6 +356,31 @@ class TestParseMidiToFrames:
                 assert "dropped 1 note event" in output
                 assert "Frame calculation error" in output
     
+    def test_batch_frames_match_per_tick_conversion(self):
+        """The vectorized tick->frame pass must give every event exactly the
+        frame and tempo the per-event get_frame_for_tick path would."""
+        from tracker.parser_fast import _parse_frames_and_tempo_map
+        tempo_track = [mido.MetaMessage('set_tempo', tempo=400000 + (i * 7919) % 300000,
+                                        time=0 if i == 0 else 173)
+                       for i in range(60)]
+        note_track = []
+        for i in range(400):
+            note_track.append(mido.Message('note_on', channel=0, note=60 + i % 12,
+                                           velocity=90, time=0 if i == 0 else 13))
+            note_track.append(mido.Message('note_off', channel=0, note=60 + i % 12,
+                                           velocity=0, time=11))
+        midi_path = self.create_test_midi("tempo_dense.mid", [tempo_track, note_track])
+
+        events, tempo_map = _parse_frames_and_tempo_map(midi_path)
+        notes = events['track_1']
+        assert len(notes) == 800
+        tick = 0
+        for msg, event in zip(note_track, notes):
+            tick += msg.time
+            assert event['frame'] == tempo_map.get_frame_for_tick(tick)
+            assert event['tempo'] == tempo_map.get_tempo_at_tick(tick)
+            assert type(event['frame']) is int
+
     def test_empty_midi_file(self):
         """Test parsing of empty MIDI file"""
         tracks = [
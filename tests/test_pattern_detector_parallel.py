@@ -12,6 +12,7 @@ These cover the parts the pipeline smoke tests and TestParallelPatternEquivalenc
 import unittest
 from unittest.mock import patch
 
+import tracker.pattern_detector_parallel as pdp
 from tracker.pattern_detector_parallel import (
     ParallelPatternDetector, _collect_window_groups, SERIAL_EVENT_THRESHOLD
 )
@@ -62,9 +63,9 @@ class TestParallelFallback(unittest.TestCase):
         detector = ParallelPatternDetector(EnhancedTempoMap(initial_tempo=500000),
                                            min_pattern_length=3, max_pattern_length=12)
 
-        # Force the ProcessPoolExecutor construction to blow up so the outer
+        # Force the shared-executor lookup to blow up so the outer
         # except-path in _detect_patterns_parallel takes the serial fallback.
-        with patch("tracker.pattern_detector_parallel.ProcessPoolExecutor",
+        with patch("tracker.pattern_detector_parallel.get_shared_executor",
                    side_effect=RuntimeError("pool unavailable")):
             result = detector.detect_patterns(events)
 
@@ -80,7 +81,7 @@ class TestParallelFallback(unittest.TestCase):
                                            min_pattern_length=3, max_pattern_length=12)
 
         normal = detector.detect_patterns(events)
-        with patch("tracker.pattern_detector_parallel.ProcessPoolExecutor",
+        with patch("tracker.pattern_detector_parallel.get_shared_executor",
                    side_effect=RuntimeError("pool unavailable")):
             fell_back = detector.detect_patterns(events)
 
@@ -128,6 +129,13 @@ class TestSubChunkedScaling(unittest.TestCase):
     """#332/PERF-12: task count must scale past the flat pattern-length-range
     ceiling for large inputs, while staying unchanged for small ones."""
 
+    def setUp(self):
+        # Chunk counts below assume the uncalibrated MIN_STARTS_PER_CHUNK
+        # floor, not whatever an earlier parallel run measured.
+        patcher = patch.object(pdp, "_measured_window_cost", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_large_input_scales_past_the_length_range_ceiling(self):
         detector = ParallelPatternDetector(EnhancedTempoMap(initial_tempo=500000),
                                            min_pattern_length=3, max_pattern_length=12)
@@ -178,6 +186,13 @@ class TestSubChunkedEndToEnd(unittest.TestCase):
     sub-chunking-triggering input must select the identical pattern set the
     serial baseline does."""
 
+    def setUp(self):
+        # Chunk counts below assume the uncalibrated MIN_STARTS_PER_CHUNK
+        # floor, not whatever an earlier parallel run measured.
+        patcher = patch.object(pdp, "_measured_window_cost", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_subchunked_parallel_run_matches_serial_baseline(self):
         events = _repeating_events(6000)
         sequence = [(e["note"], e["volume"]) for e in events]
@@ -196,6 +211,50 @@ class TestSubChunkedEndToEnd(unittest.TestCase):
         self.assertEqual(parallel_patterns, serial_patterns)
 
 
+class TestAdaptiveChunkSizing(unittest.TestCase):
+    """Sub-chunk size follows the per-window cost the workers measure."""
+
+    def setUp(self):
+        patcher = patch.object(pdp, "_measured_window_cost", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.detector = ParallelPatternDetector(EnhancedTempoMap(initial_tempo=500000),
+                                                min_pattern_length=3, max_pattern_length=12,
+                                                max_workers=16)
+
+    def test_explicit_max_workers(self):
+        self.assertEqual(self.detector.max_workers, 16)
+
+    def test_uncalibrated_uses_static_floor(self):
+        self.assertEqual(self.detector._min_starts_per_chunk(8), pdp.MIN_STARTS_PER_CHUNK)
+
+    def test_cheap_windows_make_fewer_larger_chunks(self):
+        uncalibrated = len(self.detector._build_work_chunks(200_000))
+        # 10ns per window-item: a 2000-start chunk would be pure dispatch overhead.
+        pdp._record_chunk_timing(5, (0, 100_000), 100_000 * 5 * 1e-8)
+        self.assertLess(len(self.detector._build_work_chunks(200_000)), uncalibrated)
+
+    def test_expensive_windows_split_finer_but_keep_a_floor(self):
+        pdp._record_chunk_timing(5, (0, 1000), 1.0)
+        self.assertEqual(self.detector._min_starts_per_chunk(5), pdp.ADAPTIVE_MIN_STARTS)
+        # 1000 starts per length: one chunk each uncalibrated, split now.
+        self.assertGreater(len(self.detector._build_work_chunks(1000)), 10)
+        self.assertEqual(len(self.detector._build_work_chunks(400)), 10)
+
+    def test_timings_are_smoothed(self):
+        pdp._record_chunk_timing(1, (0, 100), 1.0)
+        pdp._record_chunk_timing(1, (0, 100), 0.0)  # ignored: nothing measured
+        pdp._record_chunk_timing(1, (0, 100), 2.0)
+        self.assertAlmostEqual(pdp._measured_window_cost,
+                               0.01 + pdp.WINDOW_COST_SMOOTHING * 0.01)
+
+    def test_parallel_run_records_worker_timings(self):
+        events = _repeating_events(SERIAL_EVENT_THRESHOLD + 200)
+        sequence = [(e["note"], e["volume"]) for e in events]
+        self.detector._detect_patterns_parallel(sequence, events)
+        self.assertIsNotNone(pdp._measured_window_cost)
+
+
 class TestSerialGuard(unittest.TestCase):
     """#333/PERF-13: a small input must never construct a process pool."""
 
@@ -205,7 +264,7 @@ class TestSerialGuard(unittest.TestCase):
         detector = ParallelPatternDetector(EnhancedTempoMap(initial_tempo=500000),
                                            min_pattern_length=3, max_pattern_length=12)
 
-        with patch("tracker.pattern_detector_parallel.ProcessPoolExecutor") as mock_pool:
+        with patch("tracker.pattern_detector_parallel.get_shared_executor") as mock_pool:
             result = detector.detect_patterns(events)
 
         mock_pool.assert_not_called()
@@ -220,7 +279,7 @@ class TestSerialGuard(unittest.TestCase):
         events = _repeating_events(SERIAL_EVENT_THRESHOLD + 50)
         detector = ParallelPatternDetector(EnhancedTempoMap(initial_tempo=500000),
                                            min_pattern_length=3, max_pattern_length=12)
-        with patch("tracker.pattern_detector_parallel.ProcessPoolExecutor",
+        with patch("tracker.pattern_detector_parallel.get_shared_executor",
                    side_effect=RuntimeError("pool unavailable")) as mock_pool:
             result = detector.detect_patterns(events)
         mock_pool.assert_called()
@@ -979,25 +979,26 @@ class TestParallelPatternEquivalence(unittest.TestCase):
 
     def test_work_chunks_do_not_embed_sequence(self):
         """IPC-bloat guard: per-length chunks must carry only the length, never
-        the full sequence/events (those travel once via the pool initializer)."""
+        the full sequence/events (those travel once via a published payload)."""
         import inspect
         from tracker import pattern_detector_parallel as pdp
         src = inspect.getsource(pdp.ParallelPatternDetector._detect_patterns_parallel)
         self.assertNotIn("'sequence': sequence", src)
         self.assertNotIn("'events': valid_events", src)
-        self.assertIn('initializer=_init_pattern_worker', src)
-        self.assertIn('initargs=', src)
+        self.assertIn('publish_payload((sequence, valid_events', src)
+        self.assertIn('tasks = [(token, chunk)', src)
 
 
 class TestParallelWorkerPoolSizing(unittest.TestCase):
-    """Regression tests for #218: the process pool must never spawn more
-    workers than there are work chunks, and must be skipped entirely when
-    there is only one chunk (no parallelism to gain, but full spawn cost)."""
+    """Regression tests for #218: the detector must never keep more chunks in
+    flight than there are work chunks, and must skip the pool entirely when
+    there is only one chunk (no parallelism to gain, but full dispatch cost)."""
 
     def test_pool_workers_capped_to_chunk_count(self):
         from unittest.mock import patch
-        from concurrent.futures import ProcessPoolExecutor
         from tracker.pattern_detector_parallel import ParallelPatternDetector
+        from utils import executor as shared
+        import tracker.pattern_detector_parallel as pdp
 
         tempo_map = EnhancedTempoMap(initial_tempo=500000)
         # min=3, max=12 over a long-enough sequence yields exactly 10 chunks.
@@ -1009,16 +1010,15 @@ class TestParallelWorkerPoolSizing(unittest.TestCase):
 
         captured = {}
 
-        class RecordingExecutor(ProcessPoolExecutor):
-            def __init__(self, *args, **kwargs):
-                captured['max_workers'] = kwargs.get('max_workers')
-                super().__init__(*args, **kwargs)
+        def recording_submit_bounded(executor, fn, items, max_in_flight):
+            captured['max_in_flight'] = max_in_flight
+            return shared.submit_bounded(executor, fn, items, max_in_flight)
 
-        with patch('tracker.pattern_detector_parallel.ProcessPoolExecutor', RecordingExecutor):
+        with patch.object(pdp, 'submit_bounded', recording_submit_bounded):
             detector._detect_patterns_parallel(sequence, valid)
 
-        self.assertEqual(captured['max_workers'], 10)
-        self.assertLess(captured['max_workers'], detector.max_workers)
+        self.assertEqual(captured['max_in_flight'], 10)
+        self.assertLess(captured['max_in_flight'], detector.max_workers)
 
     def test_single_chunk_skips_process_pool_entirely(self):
         from unittest.mock import patch
@@ -1031,7 +1031,7 @@ class TestParallelWorkerPoolSizing(unittest.TestCase):
         sequence = [(e['note'], e['volume']) for e in events]
         valid = detector._filter_valid_events(events)
 
-        with patch('tracker.pattern_detector_parallel.ProcessPoolExecutor') as mock_pool:
+        with patch('tracker.pattern_detector_parallel.get_shared_executor') as mock_pool:
             result = detector._detect_patterns_parallel(sequence, valid)
 
         mock_pool.assert_not_called()
@@ -1420,18 +1420,9 @@ class TestCompressionStatsCoverage(unittest.TestCase):
 
 
 class _AllChunksFailExecutor:
-    """Fake ProcessPoolExecutor whose every submitted future raises on result(),
+    """Fake shared executor whose every submitted future raises on result(),
     simulating a per-chunk worker failure/timeout without spawning processes."""
-    def __init__(self, *args, **kwargs):
-        pass
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, *exc):
-        return False
-
-    def submit(self, fn, chunk):
+    def submit(self, fn, task):
         fut = Future()
         fut.set_exception(RuntimeError("injected chunk failure"))
         return fut
@@ -1465,7 +1456,7 @@ class TestParallelChunkFailureRecovery(unittest.TestCase):
         pdp = self._detector()
         seq, events = self._input()
         expected = pdp._detect_patterns_serial(seq, events)
-        with patch('tracker.pattern_detector_parallel.ProcessPoolExecutor',
+        with patch('tracker.pattern_detector_parallel.get_shared_executor',
                    _AllChunksFailExecutor), redirect_stdout(io.StringIO()):
             got = pdp._detect_patterns_parallel(seq, events)
         # Every failed chunk was recovered with the same helper the serial path
@@ -1486,7 +1477,7 @@ class TestParallelChunkFailureRecovery(unittest.TestCase):
         # _collect_length_candidates into a grouping half + a scoring half so
         # grouping can run sub-chunked) -- patch that, not the now-unrelated
         # _collect_length_candidates, to simulate the retry also failing.
-        with patch('tracker.pattern_detector_parallel.ProcessPoolExecutor',
+        with patch('tracker.pattern_detector_parallel.get_shared_executor',
                    _AllChunksFailExecutor), \
              patch('tracker.pattern_detector_parallel._collect_window_groups',
                    _boom), \
@@ -510,6 +510,192 @@ class TestBenchmarkDrumFramesRegression:
         assert profile_result.success
 
 
+class TestBuildStages:
+    """The arranger, prepare, compile and validate stages: what real builds
+    spend their time on, so they need baseline coverage like the rest."""
+
+    FIXTURE = str(Path(__file__).parent.parent / "benchmarks" / "fixtures" / "multiple_tracks.mid")
+
+    def _stage_names(self, result):
+        return [s.stage for s in result.stages]
+
+    def test_compile_and_validate_skipped_without_toolchain(self, tmp_path):
+        benchmark = PerformanceBenchmark(str(tmp_path))
+        with patch.object(benchmark, 'toolchain_unavailable_reason', return_value="no cc65"):
+            result = benchmark.run_full_pipeline(self.FIXTURE)
+
+        assert self._stage_names(result) == [
+            "parse", "arranger", "map", "frames", "pattern_detection", "export", "prepare"]
+        assert all(s.success for s in result.stages)
+        assert result.skipped_stages == {"compile": "no cc65", "validate": "no cc65"}
+
+    def test_compile_and_validate_run_with_toolchain(self, tmp_path):
+        from debug.batch_validator import BatchValidationEntry
+        benchmark = PerformanceBenchmark(str(tmp_path))
+
+        def fake_compile(project_dir, rom_path, mapper=None):
+            assert (project_dir / "main.asm").exists()
+            assert mapper.name == "MMC3"
+            rom_path.write_bytes(b"NES\x1a")
+            return True
+
+        entry = BatchValidationEntry(rom_path="", sha256="", passed=True, overall_health="GOOD")
+        with patch.object(benchmark, 'toolchain_unavailable_reason', return_value=None), \
+                patch('benchmarks.performance_suite.compile_rom', side_effect=fake_compile), \
+                patch('benchmarks.performance_suite.validate_rom_file', return_value=entry) as mock_validate:
+            result = benchmark.run_full_pipeline(self.FIXTURE)
+
+        assert self._stage_names(result)[-3:] == ["prepare", "compile", "validate"]
+        assert all(s.success for s in result.stages)
+        assert result.skipped_stages == {}
+        assert mock_validate.call_args[0][0].endswith("benchmark.nes")
+
+    def test_failed_validation_is_reported(self, tmp_path):
+        from debug.batch_validator import BatchValidationEntry
+        benchmark = PerformanceBenchmark(str(tmp_path))
+        entry = BatchValidationEntry(rom_path="", sha256="", passed=False, overall_health="POOR",
+                                     fatal_defects=["bad vectors"])
+        with patch.object(benchmark, 'toolchain_unavailable_reason', return_value=None), \
+                patch('benchmarks.performance_suite.compile_rom', return_value=True), \
+                patch('benchmarks.performance_suite.validate_rom_file', return_value=entry):
+            result = benchmark.run_full_pipeline(self.FIXTURE)
+
+        assert result.stages[-1].stage == "pipeline_error"
+        assert "bad vectors" in result.stages[-1].error_message
+
+    def test_arranger_failure_does_not_abort_pipeline(self, tmp_path):
+        benchmark = PerformanceBenchmark(str(tmp_path))
+        with patch.object(benchmark, 'toolchain_unavailable_reason', return_value="no cc65"), \
+                patch('benchmarks.performance_suite.arrange_for_nes', side_effect=ValueError("boom")):
+            result = benchmark.run_full_pipeline(self.FIXTURE)
+
+        arranger = result.stages[1]
+        assert arranger.stage == "arranger" and not arranger.success
+        assert arranger.error_message == "boom"
+        assert self._stage_names(result)[-1] == "prepare"
+
+    def test_toolchain_probe_runs_once(self, tmp_path):
+        from core.exceptions import ToolchainError
+        benchmark = PerformanceBenchmark(str(tmp_path))
+        with patch('benchmarks.performance_suite.CC65Wrapper') as mock_wrapper:
+            mock_wrapper.return_value.check_toolchain.side_effect = ToolchainError("ca65")
+            assert "ca65" in benchmark.toolchain_unavailable_reason()
+            assert "ca65" in benchmark.toolchain_unavailable_reason()
+        assert mock_wrapper.call_count == 1
+
+    def test_report_lists_skipped_stages(self, tmp_path):
+        benchmark = PerformanceBenchmark(str(tmp_path))
+        with patch.object(benchmark, 'toolchain_unavailable_reason', return_value="no cc65"):
+            benchmark.run_full_pipeline(self.FIXTURE)
+        report = benchmark.generate_report(str(tmp_path / "report.json"))
+        assert "compile" not in report['summary_statistics']
+        assert "prepare" in report['summary_statistics']
+        assert report['detailed_results'][0]['skipped_stages']['validate'] == "no cc65"
+
+
+def _stage(name, ms, success=True, rss=50.0, blocks=100):
+    return BenchmarkResult(name, ms, 0, 0, 0, success, peak_rss_mb=rss, allocated_blocks=blocks)
+
+
+class TestRepeatedRuns:
+    """Warm repetitions and the per-stage distributions built from them."""
+
+    def test_warmup_runs_are_discarded(self, tmp_path):
+        benchmark = PerformanceBenchmark(str(tmp_path))
+        calls = []
+
+        def fake_run(path):
+            calls.append(path)
+            result = PipelineBenchmark(path, 0, 0, 0, [_stage("parse", len(calls))])
+            benchmark.results.append(result)
+            return result
+
+        with patch.object(benchmark, 'run_full_pipeline', side_effect=fake_run):
+            runs = benchmark.run_repeated_benchmarks(["a.mid", "b.mid"], repetitions=3, warmup=2)
+
+        assert len(calls) == 10
+        assert len(runs) == 3 and all(len(batch) == 2 for batch in runs)
+        assert benchmark.results == [r for batch in runs for r in batch]
+        assert runs[0][0].stages[0].duration_ms == 5  # first call after warm-up
+
+    def test_invalid_repetitions_raise(self, tmp_path):
+        benchmark = PerformanceBenchmark(str(tmp_path))
+        with pytest.raises(ValueError):
+            benchmark.run_repeated_benchmarks(["a.mid"], repetitions=0)
+        with pytest.raises(ValueError):
+            benchmark.run_repeated_benchmarks(["a.mid"], warmup=-1)
+
+    def test_stage_distributions_sum_files_per_repetition(self):
+        from benchmarks.performance_suite import stage_distributions
+        runs = []
+        for rep in range(3):
+            runs.append([
+                PipelineBenchmark("a.mid", 0, 0, 0, [_stage("parse", 1.0 + rep, rss=40.0),
+                                                    _stage("map", 2.0, blocks=10)]),
+                PipelineBenchmark("b.mid", 0, 0, 0, [_stage("parse", 3.0, rss=60.0),
+                                                    _stage("map", 4.0, success=rep != 1)]),
+            ])
+        dist = stage_distributions(runs)
+
+        assert dist['parse']['samples_ms'] == [4.0, 5.0, 6.0]
+        assert dist['parse']['median_duration_ms'] == 5.0
+        assert dist['parse']['mad_duration_ms'] == 1.0
+        assert dist['parse']['median_peak_rss_mb'] == 60.0
+        assert dist['parse']['median_allocated_blocks'] == 200
+        # The repetition where b.mid's map failed contributes no sample.
+        assert dist['map']['samples_ms'] == [6.0, 6.0]
+        assert dist['map']['success_rate'] == pytest.approx(2 / 3)
+        assert dist['map']['median_allocated_blocks'] == 110
+
+    def test_profiler_records_peak_rss_and_allocations(self):
+        profiler = PerformanceProfiler()
+        with profiler.profile("alloc") as handle:
+            kept = [[i] for i in range(20000)]
+        assert handle.result.allocated_blocks >= 20000
+        assert handle.result.peak_rss_mb > 0
+        assert profiler._rss_sampler is None
+        del kept
+
+
+class TestAllocationSnapshots:
+    """--memory mode: per-stage top allocation sites and object-type counts."""
+
+    FIXTURE = str(Path(__file__).parent.parent / "benchmarks" / "fixtures" / "multiple_tracks.mid")
+
+    def test_profiler_records_allocations_only_when_enabled(self):
+        with PerformanceProfiler().profile("plain") as handle:
+            pass
+        assert 'allocations' not in handle.result.metadata
+
+        profiler = PerformanceProfiler(snapshot_allocations=True)
+        with profiler.profile("build") as handle:
+            kept = [{'frame': i} for i in range(3000)]
+        allocations = handle.result.metadata['allocations']
+        assert "test_performance_suite.py:" in allocations['top_sites'][0]['site']
+        assert any(t['type'] == 'dict' and t['count'] >= 3000 for t in allocations['object_types'])
+        assert profiler._start_snapshot is None
+        del kept
+
+    def test_report_summarizes_allocations_per_stage(self, tmp_path):
+        benchmark = PerformanceBenchmark(str(tmp_path), snapshot_allocations=True)
+        with patch.object(benchmark, 'toolchain_unavailable_reason', return_value="no cc65"):
+            benchmark.run_full_pipeline(self.FIXTURE)
+        report = benchmark.generate_report(str(tmp_path / "report.json"))
+
+        summary = report['allocation_summary']
+        assert {"parse", "frames", "export"} <= set(summary)
+        frames = summary['frames']
+        assert frames['top_sites'][0]['site'].startswith("nes/emulator_core.py:")
+        assert any(t['type'] == 'dict' for t in frames['object_types'])
+        stage = report['detailed_results'][0]['stages'][0]
+        assert 'allocations' in stage['metadata']
+
+    def test_summary_empty_without_snapshots(self):
+        from benchmarks.performance_suite import summarize_allocations
+        result = PipelineBenchmark("a.mid", 0, 0, 0, [_stage("parse", 1.0)])
+        assert summarize_allocations([result]) == {}
+
+
 class TestBaselineRegressionGate:
     """Regression tests for #372/PERF-A-02: the benchmark harness used to
     only emit a JSON report with nothing to compare against -- a benchmark
@@ -557,6 +743,67 @@ class TestBaselineRegressionGate:
         }
         assert compare_to_baseline(current, baseline) == []
 
+    def test_compare_to_baseline_covers_build_stages(self):
+        from benchmarks.performance_suite import compare_to_baseline
+        baseline = {"compile": {"median_duration_ms": 400.0}, "arranger": {"median_duration_ms": 10.0}}
+        current = {"compile": {"median_duration_ms": 900.0}, "arranger": {"median_duration_ms": 11.0}}
+        regressions = compare_to_baseline(current, baseline)
+        assert len(regressions) == 1 and regressions[0].startswith("compile:")
+
+    def test_checked_in_baseline_has_build_stages(self):
+        from benchmarks.performance_suite import load_baseline
+        from benchmarks.run_benchmarks import BASELINE_PATH
+        baseline = load_baseline(BASELINE_PATH)
+        assert {"arranger", "prepare"} <= set(baseline)
+
+    def test_merge_baseline_keeps_unmeasured_stages(self):
+        from benchmarks.performance_suite import merge_baseline
+        baseline = {"parse": {"median_duration_ms": 1.0}, "compile": {"median_duration_ms": 400.0}}
+        merged = merge_baseline(baseline, {"parse": {"median_duration_ms": 2.0}})
+        assert merged == {"parse": {"median_duration_ms": 2.0}, "compile": {"median_duration_ms": 400.0}}
+
+    def test_compare_to_baseline_uses_samples_when_available(self):
+        """A consistent 30% slowdown slips under the 1.5x margin but is
+        caught by the statistical test once both sides carry samples."""
+        from benchmarks.performance_suite import compare_to_baseline
+        base = [10.0, 10.2, 9.9, 10.1, 10.3, 9.8, 10.0]
+        slow = [s * 1.3 for s in base]
+        baseline = {"map": {"median_duration_ms": 10.0, "samples_ms": base}}
+        current = {"map": {"median_duration_ms": 13.0, "samples_ms": slow}}
+        regressions = compare_to_baseline(current, baseline)
+        assert len(regressions) == 1 and "Mann-Whitney" in regressions[0]
+
+        noisy = [9.0, 11.5, 10.4, 8.8, 12.0, 10.1, 9.5]
+        current = {"map": {"median_duration_ms": 10.1, "samples_ms": noisy}}
+        assert compare_to_baseline(current, baseline) == []
+
+    def test_compare_to_baseline_falls_back_to_margin_without_samples(self):
+        from benchmarks.performance_suite import compare_to_baseline
+        baseline = {"map": {"median_duration_ms": 10.0, "samples_ms": [10.0] * 7}}
+        current = {"map": {"median_duration_ms": 13.0, "samples_ms": [13.0]}}
+        assert compare_to_baseline(current, baseline) == []
+        current = {"map": {"median_duration_ms": 16.0, "samples_ms": [16.0]}}
+        assert "margin" in compare_to_baseline(current, baseline)[0]
+
+    def test_compare_to_baseline_flags_allocation_and_rss_growth(self):
+        from benchmarks.performance_suite import compare_to_baseline
+        baseline = {"frames": {"median_allocated_blocks": 4000, "median_peak_rss_mb": 50.0},
+                    "export": {"median_allocated_blocks": 5}}
+        current = {"frames": {"median_allocated_blocks": 6000, "median_peak_rss_mb": 90.0},
+                   "export": {"median_allocated_blocks": 50}}
+        regressions = compare_to_baseline(current, baseline)
+        assert len(regressions) == 2
+        assert "allocated blocks" in regressions[0]
+        assert "peak RSS" in regressions[1]
+
+    def test_checked_in_baseline_has_distributions(self):
+        from benchmarks.performance_suite import load_baseline, MIN_SAMPLES_FOR_TEST
+        from benchmarks.run_benchmarks import BASELINE_PATH
+        for stage, stats in load_baseline(BASELINE_PATH).items():
+            assert len(stats['samples_ms']) >= MIN_SAMPLES_FOR_TEST, stage
+            assert {'mad_duration_ms', 'p95_duration_ms', 'median_peak_rss_mb',
+                    'median_allocated_blocks'} <= set(stats), stage
+
     def test_compare_to_baseline_empty_baseline_flags_nothing(self):
         from benchmarks.performance_suite import compare_to_baseline
         current = {"parse": {"median_duration_ms": 99999.0}}
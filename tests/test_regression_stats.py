@@ -0,0 +1,88 @@
+"""Tests for benchmarks/regression_stats.py (the statistical baseline gate)."""
+
+import random
+import sys
+from math import comb
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.regression_stats import (
+    bootstrap_ratio_ci,
+    describe_samples,
+    detect_shift,
+    mann_whitney_greater,
+    median_abs_deviation,
+    percentile,
+)
+
+
+def _noisy(center, n=7, spread=0.05, seed=0):
+    rng = random.Random(seed)
+    return [center * (1 + rng.uniform(-spread, spread)) for _ in range(n)]
+
+
+class TestDescriptiveStats:
+    def test_percentile_interpolates(self):
+        assert percentile([1, 2, 3, 4], 50) == pytest.approx(2.5)
+        assert percentile([10], 95) == 10
+        assert percentile([1, 2, 3, 4, 5], 100) == 5
+
+    def test_mad_ignores_outlier(self):
+        assert median_abs_deviation([10, 10, 11, 9, 1000]) == 1
+
+    def test_describe_samples(self):
+        stats = describe_samples([3.0, 1.0, 2.0])
+        assert stats['median'] == 2.0
+        assert stats['min'] == 1.0 and stats['max'] == 3.0
+
+    def test_empty_sample_raises(self):
+        with pytest.raises(ValueError):
+            percentile([], 50)
+
+
+class TestMannWhitney:
+    def test_exact_p_for_complete_separation(self):
+        assert mann_whitney_greater([6, 7, 8, 9, 10], [1, 2, 3, 4, 5]) == pytest.approx(1 / comb(10, 5))
+        assert mann_whitney_greater([1, 2, 3, 4, 5], [6, 7, 8, 9, 10]) == 1.0
+
+    def test_interleaved_samples_are_not_significant(self):
+        assert mann_whitney_greater([1, 3, 5, 7, 9], [2, 4, 6, 8, 10]) > 0.5
+
+    def test_ties_use_normal_approximation(self):
+        assert mann_whitney_greater([1, 1, 2, 2], [1, 1, 2, 2]) > 0.4
+        assert mann_whitney_greater([5, 5, 5], [5, 5, 5]) == 1.0
+        assert mann_whitney_greater([2] * 8 + [3] * 8, [1] * 8 + [2] * 8) < 0.01
+
+    def test_large_samples_use_normal_approximation(self):
+        current = [x + 0.5 for x in range(30)]
+        assert mann_whitney_greater(current, list(range(30))) == pytest.approx(0.45, abs=0.05)
+
+
+class TestBootstrap:
+    def test_ratio_ci_brackets_true_ratio(self):
+        low, high = bootstrap_ratio_ci(_noisy(13.0, seed=1), _noisy(10.0, seed=2))
+        assert low < 1.3 < high
+        assert low > 1.15
+
+    def test_ci_is_deterministic(self):
+        a, b = _noisy(12.0, seed=3), _noisy(10.0, seed=4)
+        assert bootstrap_ratio_ci(a, b) == bootstrap_ratio_ci(a, b)
+
+
+class TestDetectShift:
+    def test_flags_consistent_30_percent_slowdown(self):
+        shift = detect_shift(_noisy(13.0, seed=5), _noisy(10.0, seed=6), alpha=0.01, min_effect=1.15)
+        assert shift is not None
+        assert shift['ratio'] == pytest.approx(1.3, rel=0.1)
+
+    def test_ignores_noise(self):
+        assert detect_shift(_noisy(10.0, spread=0.3, seed=7), _noisy(10.0, spread=0.3, seed=8),
+                            alpha=0.01, min_effect=1.15) is None
+
+    def test_ignores_significant_but_small_shift(self):
+        # 5% slower with almost no noise: significant, but under min_effect.
+        assert detect_shift(_noisy(10.5, spread=0.005, seed=9), _noisy(10.0, spread=0.005, seed=10),
+                            alpha=0.01, min_effect=1.15) is None
@@ -0,0 +1,108 @@
+"""Tests for tracker/repetition_estimate.py and the detector precheck."""
+
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tracker.pattern_detector_parallel import ParallelPatternDetector
+from tracker.repetition_estimate import MIN_OCCURRENCES, estimate_repetition
+from tracker.tempo_map import EnhancedTempoMap
+
+
+def _through_composed(n):
+    """Every (note, volume) item distinct: nothing can repeat."""
+    return [(i % 128, (i // 128) % 128) for i in range(n)]
+
+
+def _longest_repeat_brute_force(sequence, min_length, max_length):
+    best = 0
+    for length in range(min_length, max_length + 1):
+        windows = Counter(tuple(sequence[i:i + length])
+                          for i in range(len(sequence) - length + 1))
+        if windows and max(windows.values()) >= MIN_OCCURRENCES:
+            best = length
+    return best
+
+
+def _events(sequence):
+    return [{'frame': i, 'note': note, 'volume': volume}
+            for i, (note, volume) in enumerate(sequence)]
+
+
+class TestEstimateRepetition:
+    def test_non_repetitive_sequence_has_no_repeat(self):
+        estimate = estimate_repetition(_through_composed(2000), 3, 32)
+        assert estimate.max_repeat_length == 0
+        assert estimate.coverage_estimate == 0.0
+        assert estimate.events == 2000
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_longest_repeat_matches_brute_force(self, seed):
+        rng = random.Random(seed)
+        motif = [(rng.randrange(60, 64), 100) for _ in range(rng.randrange(4, 12))]
+        sequence = []
+        for _ in range(40):
+            sequence.extend(motif if rng.random() < 0.3 else
+                            [(rng.randrange(40, 80), rng.randrange(1, 127))
+                             for _ in range(rng.randrange(1, 6))])
+        estimate = estimate_repetition(sequence, 3, 32)
+        assert estimate.max_repeat_length == _longest_repeat_brute_force(sequence, 3, 32)
+
+    def test_fully_periodic_song_is_fully_covered(self):
+        sequence = [(60 + i % 6, 100) for i in range(600)]
+        estimate = estimate_repetition(sequence, 3, 32)
+        assert estimate.max_repeat_length == 32
+        assert estimate.coverage_estimate == pytest.approx(100.0)
+
+    def test_shorter_than_min_length(self):
+        assert estimate_repetition([(60, 100)] * 2, 3, 32).max_repeat_length == 0
+
+
+class TestDetectorPrecheck:
+    def _detector(self):
+        return ParallelPatternDetector(EnhancedTempoMap(initial_tempo=500000),
+                                       min_pattern_length=3, max_pattern_length=32)
+
+    def test_non_repetitive_song_skips_the_pool(self):
+        detector = self._detector()
+        with patch("tracker.pattern_detector_parallel.get_shared_executor") as mock_pool:
+            result = detector.detect_patterns(_events(_through_composed(3000)))
+        mock_pool.assert_not_called()
+        assert result['patterns'] == {}
+        assert result['stats']['total_events'] == 3000
+        assert detector.repetition_estimate.max_repeat_length == 0
+
+    def test_capped_search_matches_full_search(self):
+        rng = random.Random(7)
+        motif = [(62, 90), (64, 90), (65, 90), (67, 90), (69, 90)]
+        sequence = []
+        while len(sequence) < 180:
+            sequence.extend(motif if rng.random() < 0.4 else [(rng.randrange(30, 90), 80)])
+        events = _events(sequence)
+
+        with_precheck = self._detector()
+        without = self._detector()
+        without.repetition_precheck = False
+        capped = with_precheck.detect_patterns(events)
+        full = without.detect_patterns(events)
+
+        assert with_precheck.repetition_estimate.max_repeat_length < 32
+        assert without.repetition_estimate is None
+        assert capped['patterns'] == full['patterns']
+        assert capped['stats'] == full['stats']
+
+    def test_pipeline_reports_estimate_in_stats(self):
+        from argparse import Namespace
+        import main
+
+        frames = {'pulse1': {i: {'note': 60 + i % 4, 'volume': 15} for i in range(64)}}
+        result, _, _ = main.detect_patterns_or_direct_export(frames, True, Namespace(config=None))
+        estimate = result['stats']['repetition_estimate']
+        assert estimate['max_repeat_length'] == main.PATTERN_MAX_LENGTH
+        assert estimate['coverage_estimate'] == pytest.approx(100.0)
@@ -0,0 +1,187 @@
+"""Tests for the synthetic MIDI generator and the `benchmark scale` sweep."""
+
+import json
+import math
+import sys
+from argparse import Namespace
+from pathlib import Path
+from unittest.mock import patch
+
+import mido
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.performance_suite import BenchmarkResult, PipelineBenchmark
+from benchmarks.scaling import (
+    describe_exponent,
+    fit_power_law,
+    geometric_sizes,
+    run_scaling_benchmark,
+    write_scaling_report,
+)
+from benchmarks.synthetic_midi import (
+    DRUM_CHANNEL,
+    SyntheticMidiConfig,
+    generate_synthetic_midi,
+    write_synthetic_midi,
+)
+from main import run_benchmark_scale
+from tracker.parser_fast import parse_midi_to_frames
+
+
+def _count_note_messages(path):
+    mid = mido.MidiFile(path)
+    return sum(1 for track in mid.tracks for msg in track
+               if msg.type in ('note_on', 'note_off'))
+
+
+class TestSyntheticMidi:
+    def test_same_config_produces_identical_bytes(self):
+        config = SyntheticMidiConfig(events=2000, tempo_changes=5, drum_density=0.3, seed=7)
+        assert generate_synthetic_midi(config)[0] == generate_synthetic_midi(config)[0]
+
+    def test_seed_changes_output(self):
+        a, _ = generate_synthetic_midi(SyntheticMidiConfig(events=500, seed=1))
+        b, _ = generate_synthetic_midi(SyntheticMidiConfig(events=500, seed=2))
+        assert a != b
+
+    def test_event_count_matches_request(self, tmp_path):
+        path = tmp_path / "song.mid"
+        stats = write_synthetic_midi(path, SyntheticMidiConfig(events=3000, polyphony=3))
+        assert stats['note_events'] == 3000
+        assert _count_note_messages(path) == 3000
+
+    def test_tempo_changes_and_drums_are_written(self, tmp_path):
+        path = tmp_path / "song.mid"
+        stats = write_synthetic_midi(path, SyntheticMidiConfig(
+            events=4000, tempo_changes=12, drum_density=0.5))
+        mid = mido.MidiFile(path)
+        tempos = [m for t in mid.tracks for m in t if m.type == 'set_tempo']
+        drum_notes = [m for t in mid.tracks for m in t
+                      if m.type == 'note_on' and m.channel == DRUM_CHANNEL]
+        assert len(tempos) == 13  # initial tempo + 12 changes
+        assert stats['drum_events'] > 0
+        assert len(drum_notes) * 2 == stats['drum_events']
+
+    def test_melodic_tracks_skip_drum_channel(self, tmp_path):
+        path = tmp_path / "song.mid"
+        write_synthetic_midi(path, SyntheticMidiConfig(events=2000, tracks=12))
+        channels = {m.channel for t in mido.MidiFile(path).tracks for m in t
+                    if m.type == 'note_on'}
+        assert DRUM_CHANNEL not in channels
+        assert len(channels) == 12
+
+    def test_output_parses_through_pipeline_parser(self, tmp_path):
+        path = tmp_path / "song.mid"
+        stats = write_synthetic_midi(path, SyntheticMidiConfig(events=1000, tempo_changes=3))
+        parsed = parse_midi_to_frames(str(path))
+        assert sum(len(e) for e in parsed['events'].values()) == stats['note_events']
+
+    @pytest.mark.parametrize("overrides", [
+        dict(events=0), dict(events=1_000_001), dict(tracks=0), dict(tracks=16),
+        dict(notes_per_beat=0), dict(polyphony=9), dict(tempo_changes=-1),
+        dict(drum_density=1.5), dict(ticks_per_beat=8),
+    ])
+    def test_invalid_config_raises(self, overrides):
+        with pytest.raises(ValueError):
+            generate_synthetic_midi(SyntheticMidiConfig(**overrides))
+
+
+class TestFitting:
+    def test_geometric_sizes_always_ends_at_max(self):
+        assert geometric_sizes(1000, 8000) == [1000, 2000, 4000, 8000]
+        assert geometric_sizes(1000, 5000) == [1000, 2000, 4000, 5000]
+        assert geometric_sizes(1000, 1000) == [1000]
+
+    @pytest.mark.parametrize("args", [(0, 10, 2.0), (10, 5, 2.0), (10, 100, 1.0)])
+    def test_geometric_sizes_rejects_bad_ranges(self, args):
+        with pytest.raises(ValueError):
+            geometric_sizes(*args)
+
+    @pytest.mark.parametrize("exponent", [1.0, 2.0])
+    def test_power_law_recovers_exact_exponent(self, exponent):
+        xs = [1000, 2000, 4000, 8000]
+        fit = fit_power_law(xs, [3.0 * x ** exponent for x in xs])
+        assert fit['exponent'] == pytest.approx(exponent)
+        assert fit['coefficient'] == pytest.approx(3.0)
+        assert fit['r2'] == pytest.approx(1.0)
+
+    def test_n_log_n_is_classified_between_linear_and_quadratic(self):
+        xs = [1000, 2000, 4000, 8000, 16000]
+        fit = fit_power_law(xs, [x * math.log(x) for x in xs])
+        assert describe_exponent(fit['exponent']) == "~O(n log n)"
+
+    def test_too_few_points_returns_none(self):
+        assert fit_power_law([100], [1.0]) is None
+        assert fit_power_law([100, 200], [0.0, 0.0]) is None
+        assert fit_power_law([100, 100], [1.0, 2.0]) is None
+
+
+def _fake_pipeline(midi_path):
+    """run_full_pipeline stand-in: `map` scales quadratically, `parse`
+    linearly, and `export` fails on the largest song."""
+    n = _count_note_messages(midi_path)
+    stages = [
+        BenchmarkResult("parse", n * 0.01, 0, 0, 0, True, traced_peak_mb=n * 0.001),
+        BenchmarkResult("map", n * n * 1e-5, 0, 0, 0, True, traced_peak_mb=n * 0.002),
+        BenchmarkResult("export", 1.0, 0, 0, 0, n < 2000, traced_peak_mb=0.5),
+    ]
+    return PipelineBenchmark(midi_path, 0, sum(s.duration_ms for s in stages), 0, stages)
+
+
+class TestRunScalingBenchmark:
+    def test_report_fits_each_stage(self, tmp_path):
+        with patch('benchmarks.scaling.PerformanceBenchmark') as mock_benchmark:
+            mock_benchmark.return_value.run_full_pipeline.side_effect = _fake_pipeline
+            report = run_scaling_benchmark([500, 1000, 2000], output_dir=str(tmp_path))
+
+        assert report['sizes'] == [500, 1000, 2000]
+        assert report['stages']['parse']['time']['exponent'] == pytest.approx(1.0)
+        assert report['stages']['map']['time']['exponent'] == pytest.approx(2.0)
+        assert report['stages']['map']['memory']['complexity'] == "~O(n)"
+        assert report['stages']['export']['failed_at_events'] == [2000]
+        assert report['steepest_stage'] == 'map'
+
+        path = tmp_path / "out" / "scaling_report.json"
+        write_scaling_report(report, path)
+        assert json.loads(path.read_text())['steepest_stage'] == 'map'
+
+    def test_time_budget_stops_sweep(self, tmp_path):
+        with patch('benchmarks.scaling.PerformanceBenchmark') as mock_benchmark, \
+                patch('benchmarks.scaling.time.perf_counter', side_effect=[0.0, 10.0] * 3):
+            mock_benchmark.return_value.run_full_pipeline.side_effect = _fake_pipeline
+            report = run_scaling_benchmark([500, 1000, 2000], output_dir=str(tmp_path),
+                                           time_budget_s=5.0)
+        assert report['stopped_early']
+        assert report['sizes'] == [500]
+
+    def test_real_pipeline_smoke(self, tmp_path):
+        report = run_scaling_benchmark(
+            [200, 400], SyntheticMidiConfig(tracks=2), output_dir=str(tmp_path))
+        assert report['sizes'] == [200, 400]
+        assert 'parse' in report['stages']
+
+
+class TestRunBenchmarkScale:
+    def _args(self, tmp_path, **overrides):
+        defaults = dict(min_events=1000, max_events=4000, factor=2.0, tracks=4,
+                        notes_per_beat=2.0, polyphony=1, tempo_changes=0,
+                        drum_density=0.0, seed=0, time_budget=None, output=str(tmp_path))
+        defaults.update(overrides)
+        return Namespace(**defaults)
+
+    @pytest.mark.parametrize("overrides", [
+        dict(max_events=2_000_000), dict(min_events=5000), dict(polyphony=0), dict(factor=1.0),
+    ])
+    def test_invalid_arguments_exit_cleanly(self, tmp_path, overrides):
+        with pytest.raises(SystemExit) as exc:
+            run_benchmark_scale(self._args(tmp_path, **overrides))
+        assert exc.value.code == 1
+
+    def test_writes_report(self, tmp_path):
+        with patch('benchmarks.scaling.PerformanceBenchmark') as mock_benchmark:
+            mock_benchmark.return_value.run_full_pipeline.side_effect = _fake_pipeline
+            run_benchmark_scale(self._args(tmp_path))
+        report = json.loads((tmp_path / "scaling_report.json").read_text())
+        assert report['sizes'] == [1000, 2000, 4000]
@@ -3,7 +3,7 @@ import unittest
 from pathlib import Path
 import json
 import tempfile
-from nes.song_bank import SongBank, SongMetadata
+from nes.song_bank import SongBank, SongMetadata, frames_cache_key
 
 class TestSongBank(unittest.TestCase):
     def setUp(self):
@@ -247,6 +247,30 @@ class TestSongBank(unittest.TestCase):
         self.assertIn('test_song', reloaded.songs)
         self.assertEqual(reloaded.total_banks, self.bank.total_banks)
         self.assertEqual(reloaded.max_bank_size, self.bank.max_bank_size)
+    def test_compiled_frames_roundtrip_through_export(self):
+        """Frames stored by `song build` survive export/import and are only
+        returned for the cache key they were stored under."""
+        self.bank.add_song('test_song', self.test_song_data, {'tempo_base': 120})
+        frames = {'pulse1': {'0': {'note': 60, 'volume': 15}}}
+        self.bank.store_frames('test_song', 'key-1', frames)
+        self.bank.export_bank(str(self.test_bank_path))
+
+        reloaded = SongBank()
+        reloaded.import_bank(str(self.test_bank_path))
+        self.assertEqual(reloaded.get_cached_frames('test_song', 'key-1'), frames)
+        self.assertIsNone(reloaded.get_cached_frames('test_song', 'key-2'))
+        self.assertIsNone(reloaded.get_cached_frames('other_song', 'key-1'))
+
+    def test_frames_cache_key_tracks_content_and_mode(self):
+        midi_path = Path(self.temp_dir) / "song.mid"
+        midi_path.write_bytes(b"MThd-one")
+        arranger_key = frames_cache_key(midi_path, use_arranger=True)
+        self.assertEqual(arranger_key, frames_cache_key(midi_path, use_arranger=True))
+        self.assertNotEqual(arranger_key, frames_cache_key(midi_path, use_arranger=False))
+
+        midi_path.write_bytes(b"MThd-two")
+        self.assertNotEqual(arranger_key, frames_cache_key(midi_path, use_arranger=True))
+
 
 if __name__ == '__main__':
     unittest.main()
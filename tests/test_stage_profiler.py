@@ -0,0 +1,163 @@
+"""Tests for utils/stage_profiler.py and the `--profile-stages` CLI flag."""
+
+import pstats
+import sys
+from argparse import Namespace
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.stage_profiler import (
+    fold_stats,
+    is_profiling_stages,
+    profile_stage,
+    start_stage_profiling,
+    stop_stage_profiling,
+)
+
+
+@pytest.fixture(autouse=True)
+def _profiling_off():
+    stop_stage_profiling()
+    yield
+    stop_stage_profiling()
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+def _hot_path():
+    return _busy(300_000)
+
+
+def _folded(path):
+    return {line.rsplit(' ', 1)[0]: int(line.rsplit(' ', 1)[1])
+            for line in path.read_text().splitlines()}
+
+
+class TestStageProfiler:
+    def test_disabled_stage_is_shared_noop(self):
+        assert not is_profiling_stages()
+        assert profile_stage("a") is profile_stage("b")
+        with profile_stage("a"):
+            pass
+        assert stop_stage_profiling() is None
+
+    def test_writes_pstats_and_collapsed_per_stage(self, tmp_path):
+        profiler = start_stage_profiling(tmp_path / "profiles")
+        with profile_stage("export"):
+            _hot_path()
+        with profile_stage("parse"):
+            _busy(10)
+        stop_stage_profiling()
+        written = profiler.write()
+
+        assert sorted(p.name for p in written) == [
+            "export.collapsed", "export.pstats", "parse.collapsed", "parse.pstats"]
+        stats = pstats.Stats(str(tmp_path / "profiles" / "export.pstats"))
+        assert any(func[2] == "_hot_path" for func in stats.stats)
+
+        folded = _folded(tmp_path / "profiles" / "export.collapsed")
+        hot = [stack for stack in folded if "_busy" in stack]
+        assert hot and all(stack.startswith("export;_hot_path (") for stack in hot)
+
+    def test_nested_stage_folds_into_outer(self):
+        profiler = start_stage_profiling("unused")
+        with profile_stage("build"):
+            with profile_stage("compile"):
+                _busy(10)
+        assert list(profiler.profiles) == ["build"]
+
+    def test_repeated_stage_accumulates(self):
+        profiler = start_stage_profiling("unused")
+        for _ in range(3):
+            with profile_stage("parse"):
+                _busy(10)
+        calls = [v[1] for f, v in pstats.Stats(profiler.profiles["parse"]).stats.items()
+                 if f[2] == "_busy"]
+        assert calls == [3]
+
+
+class TestFoldStats:
+    def _stats(self, entries):
+        # entries: name -> (tt, ct, {caller_name: (nc, edge_ct)})
+        key = {name: ("mod.py", i, name) for i, name in enumerate(entries)}
+        return {
+            key[name]: (1, 1, tt, ct, {key[c]: (n, n, 0.0, e) for c, (n, e) in callers.items()})
+            for name, (tt, ct, callers) in entries.items()
+        }
+
+    def test_shared_callee_is_split_by_edge_time(self):
+        stats = self._stats({
+            "main": (0.0, 4.0, {}),
+            "a": (0.0, 3.0, {"main": (1, 3.0)}),
+            "b": (0.0, 1.0, {"main": (1, 1.0)}),
+            "helper": (4.0, 4.0, {"a": (1, 3.0), "b": (1, 1.0)}),
+        })
+        folded = fold_stats(stats, "stage")
+        assert folded["stage;main (mod.py:0);a (mod.py:1);helper (mod.py:3)"] == 3_000_000
+        assert folded["stage;main (mod.py:0);b (mod.py:2);helper (mod.py:3)"] == 1_000_000
+
+    def test_zero_edge_times_fall_back_to_call_counts(self):
+        stats = self._stats({
+            "a": (0.0, 2.0, {}),
+            "b": (0.0, 2.0, {}),
+            "helper": (4.0, 4.0, {"a": (3, 0.0), "b": (1, 0.0)}),
+        })
+        folded = fold_stats(stats, "s")
+        assert folded["s;a (mod.py:0);helper (mod.py:2)"] == 3_000_000
+        assert folded["s;b (mod.py:1);helper (mod.py:2)"] == 1_000_000
+
+    def test_recursion_terminates(self):
+        stats = self._stats({
+            "main": (0.5, 2.0, {}),
+            "rec": (1.5, 1.5, {"main": (1, 1.5), "rec": (5, 1.2)}),
+        })
+        folded = fold_stats(stats, "s")
+        assert sum(folded.values()) <= 2_000_000
+        assert all(stack.count("rec (") <= 1 for stack in folded)
+
+
+class TestProfileStagesFlag:
+    def test_subcommand_profile_written_on_failure(self, tmp_path):
+        from main import main
+
+        out = tmp_path / "profiles"
+        argv = ['main.py', '--profile-stages', str(out), 'parse',
+                str(tmp_path / "missing.mid"), str(tmp_path / "out.json")]
+        with patch('sys.argv', argv):
+            with pytest.raises(FileNotFoundError):
+                main()
+        assert (out / "parse.pstats").exists()
+        assert (out / "parse.collapsed").exists()
+        assert not is_profiling_stages()
+
+    def test_default_pipeline_accepts_profile_stages(self, tmp_path):
+        from main import main
+
+        out = tmp_path / "profiles"
+        with patch('sys.argv', ['main.py', f'--profile-stages={out}', 'song.mid']), \
+                patch('main.run_full_pipeline') as mock_pipeline:
+            main()
+        args = mock_pipeline.call_args[0][0]
+        assert args.profile_stages_dir == str(out)
+        assert args.input == 'song.mid'
+
+    def test_benchmark_run_writes_profiles_next_to_json(self, tmp_path):
+        from main import run_benchmark
+
+        fixture = sorted((Path(__file__).parent.parent / "benchmarks" / "fixtures").glob("*.mid"))[0]
+        args = Namespace(files=[str(fixture)], output=str(tmp_path), memory=False,
+                         profile_stages=True)
+        with patch('benchmarks.performance_suite.PerformanceBenchmark.toolchain_unavailable_reason',
+                   return_value="no cc65"):
+            run_benchmark(args)
+
+        assert (tmp_path / "benchmark_results.json").exists()
+        assert (tmp_path / "profiles" / "parse.pstats").exists()
+        assert (tmp_path / "profiles" / "export.collapsed").exists()
+        assert not is_profiling_stages()
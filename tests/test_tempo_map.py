@@ -994,6 +994,88 @@ class TestTempoChange(unittest.TestCase):
         self.assertEqual(change.end_tick, 720)
 
 
+
+class TestBulkTempoMap(unittest.TestCase):
+    """Bulk construction and batch tick->frame conversion must be exact
+    drop-in replacements for the per-change / per-tick paths."""
+
+    # Includes duplicate ticks (last event wins, #210), an out-of-order tick
+    # and a tick-0 change that replaces the initial tempo.
+    TICKS = [0, 960, 480, 480, 2000, 1500, 7777, 960]
+    TEMPOS = [600000, 400000, 300000, 350000, 700000, 450000, 250000, 520000]
+
+    def _sequential(self, cls, **kwargs):
+        tm = cls(initial_tempo=500000, ticks_per_beat=480, **kwargs)
+        for tick, tempo in zip(self.TICKS, self.TEMPOS):
+            tm.add_tempo_change(tick, tempo)
+        return tm
+
+    def test_from_changes_matches_sequential_inserts(self):
+        bulk = TempoMap.from_changes(self.TICKS, self.TEMPOS)
+        self.assertEqual(bulk.tempo_changes, self._sequential(TempoMap).tempo_changes)
+
+    def test_enhanced_bulk_matches_sequential_inserts(self):
+        config = TempoValidationConfig(max_tempo_change_ratio=float('inf'))
+        kwargs = dict(validation_config=config, optimization_strategy=None)
+        bulk = EnhancedTempoMap.from_changes(self.TICKS, self.TEMPOS, **kwargs)
+        seq = self._sequential(EnhancedTempoMap, **kwargs)
+        self.assertEqual(bulk.tempo_changes, seq.tempo_changes)
+        self.assertEqual([(c.tick, c.tempo) for c in bulk.enhanced_changes],
+                         [(c.tick, c.tempo) for c in seq.enhanced_changes])
+
+    def test_enhanced_bulk_skips_and_counts_invalid(self):
+        config = TempoValidationConfig(min_tempo_bpm=40.0, max_tempo_bpm=250.0,
+                                       max_tempo_change_ratio=float('inf'))
+        tm = EnhancedTempoMap(validation_config=config, optimization_strategy=None)
+        dropped = tm.add_tempo_changes([0, 100, 200, 300], [0, 400000, 5000000, 450000],
+                                       skip_invalid=True)
+        self.assertEqual(dropped, 2)
+        self.assertEqual(tm.tempo_changes, [(0, 500000), (100, 400000), (300, 450000)])
+
+    def test_enhanced_bulk_raises_without_skip_invalid(self):
+        tm = EnhancedTempoMap(optimization_strategy=None,
+                              validation_config=TempoValidationConfig(
+                                  max_tempo_change_ratio=float('inf')))
+        with self.assertRaises(TempoValidationError):
+            tm.add_tempo_changes([100], [-1])
+
+    def test_enhanced_bulk_order_dependent_config_uses_sequential_semantics(self):
+        """A finite ratio gate judges each change against the map as it was
+        when the change arrived, so the bulk path must not reorder that."""
+        config = TempoValidationConfig(max_tempo_change_ratio=3.0)
+        ticks, tempos = [1000, 500], [200000, 1000000]
+        bulk = EnhancedTempoMap(validation_config=config, optimization_strategy=None)
+        bulk_dropped = bulk.add_tempo_changes(ticks, tempos, skip_invalid=True)
+        seq = EnhancedTempoMap(validation_config=config, optimization_strategy=None)
+        seq_dropped = 0
+        for tick, tempo in zip(ticks, tempos):
+            try:
+                seq.add_tempo_change(tick, tempo)
+            except TempoValidationError:
+                seq_dropped += 1
+        self.assertEqual(bulk.tempo_changes, seq.tempo_changes)
+        self.assertEqual(bulk_dropped, seq_dropped)
+
+    def test_mismatched_lengths_rejected(self):
+        with self.assertRaises(ValueError):
+            TempoMap.from_changes([0, 10], [500000])
+
+    def test_batch_frames_and_tempos_match_scalar_path(self):
+        tm = TempoMap.from_changes(self.TICKS, self.TEMPOS)
+        ticks = np.arange(-5, 12000, 7)
+        frames = tm.get_frames_for_ticks(ticks)
+        tempos = tm.get_tempos_for_ticks(ticks)
+        self.assertEqual(frames.tolist(), [tm.get_frame_for_tick(int(t)) for t in ticks])
+        self.assertEqual(tempos.tolist(), [tm.get_tempo_at_tick(int(t)) for t in ticks])
+
+    def test_batch_index_rebuilt_after_mutation(self):
+        tm = TempoMap()
+        self.assertEqual(tm.get_tempos_for_ticks([1000]).tolist(), [500000])
+        tm.add_tempo_change(500, 300000)
+        self.assertEqual(tm.get_tempos_for_ticks([100, 1000]).tolist(), [500000, 300000])
+        self.assertEqual(tm.get_frames_for_ticks([1000]).tolist(), [tm.get_frame_for_tick(1000)])
+
+
 if __name__ == '__main__':
     # Create test suite
     suite = unittest.TestSuite()
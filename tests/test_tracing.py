@@ -0,0 +1,182 @@
+"""Tests for utils/tracing.py and the `--trace` CLI flag."""
+
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.tracing import (
+    add_events,
+    drain_events,
+    init_worker_tracing,
+    is_tracing,
+    span,
+    start_tracing,
+    stop_tracing,
+    traced,
+    write_chrome_trace,
+)
+
+
+@pytest.fixture(autouse=True)
+def _tracing_off():
+    stop_tracing()
+    yield
+    stop_tracing()
+
+
+def _spans(events, name=None):
+    return [e for e in events if e['ph'] == 'X' and (name is None or e['name'] == name)]
+
+
+class TestSpans:
+    def test_disabled_span_is_shared_noop(self):
+        assert not is_tracing()
+        assert span("a") is span("b", x=1)
+        with span("a") as s:
+            s.set(ignored=True)
+        assert stop_tracing() == []
+
+    def test_nested_spans_are_contained(self):
+        start_tracing()
+        with span("outer", cat="test", size=3):
+            with span("inner") as inner:
+                inner.set(result=7)
+        events = stop_tracing()
+
+        outer, = _spans(events, "outer")
+        inner, = _spans(events, "inner")
+        assert outer['args'] == {'size': 3}
+        assert outer['cat'] == "test"
+        assert inner['args'] == {'result': 7}
+        assert outer['ts'] <= inner['ts']
+        assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+        assert outer['pid'] == inner['pid'] == os.getpid()
+        assert any(e['ph'] == 'M' and e['name'] == 'process_name' for e in events)
+
+    def test_exception_is_recorded_and_propagates(self):
+        start_tracing()
+        with pytest.raises(KeyError):
+            with span("boom"):
+                raise KeyError("x")
+        failed, = _spans(stop_tracing(), "boom")
+        assert failed['args']['error'] == "KeyError"
+
+    def test_traced_decorator(self):
+        @traced("work", cat="test")
+        def work(x):
+            return x * 2
+
+        assert work(2) == 4  # no tracer: plain call
+        start_tracing()
+        assert work(3) == 6
+        assert len(_spans(stop_tracing(), "work")) == 1
+
+    def test_worker_tracing_resets_inherited_tracer(self):
+        start_tracing()
+        with span("parent"):
+            pass
+        # A forked worker starts with the parent's tracer; the initializer
+        # must replace it so parent events are not shipped back twice.
+        init_worker_tracing(True, "worker")
+        with span("child"):
+            pass
+        drained = drain_events()
+        assert [e['name'] for e in _spans(drained)] == ["child"]
+        assert drain_events() == []
+
+        init_worker_tracing(False)
+        assert not is_tracing()
+        assert drain_events() == []
+
+    def test_add_events_merges_into_active_trace(self):
+        add_events([{'name': 'dropped', 'ph': 'X'}])  # not tracing: ignored
+        start_tracing()
+        add_events([{'name': 'remote', 'ph': 'X', 'ts': 0, 'dur': 1, 'pid': 1, 'tid': 1}])
+        assert [e['name'] for e in _spans(stop_tracing())] == ["remote"]
+
+    def test_write_chrome_trace(self, tmp_path):
+        start_tracing()
+        with span("a"):
+            pass
+        path = tmp_path / "out" / "trace.json"
+        write_chrome_trace(path, stop_tracing())
+        data = json.loads(path.read_text())
+        assert data['displayTimeUnit'] == 'ms'
+        assert _spans(data['traceEvents'], "a")
+
+
+class TestPipelineSpans:
+    def test_pattern_pool_worker_spans_are_merged(self):
+        from tracker.pattern_detector_parallel import ParallelPatternDetector
+        from tracker.tempo_map import EnhancedTempoMap
+
+        detector = ParallelPatternDetector(EnhancedTempoMap(), min_pattern_length=3,
+                                           max_pattern_length=6)
+        detector.max_workers = 2
+        events = [{'frame': i, 'note': 60 + (i % 6), 'volume': 100} for i in range(300)]
+
+        start_tracing()
+        detector.detect_patterns(events)
+        events = stop_tracing()
+
+        grouping = _spans(events, "window_grouping")
+        assert len(grouping) >= 4  # one per (length, start-range) chunk
+        assert all(e['pid'] != os.getpid() for e in grouping)
+        assert _spans(events, "pattern_search")[0]['pid'] == os.getpid()
+
+    def test_parse_records_tempo_map_span(self):
+        from tracker.parser_fast import parse_midi_to_frames
+
+        fixture = Path(__file__).parent.parent / "benchmarks" / "fixtures"
+        midi = sorted(fixture.glob("*.mid"))[0]
+        start_tracing()
+        parse_midi_to_frames(str(midi))
+        events = stop_tracing()
+        assert _spans(events, "tempo_map_build")
+        assert _spans(events, "tick_to_frame")
+
+
+class TestTraceFlag:
+    def test_subcommand_trace_written_even_on_failure(self, tmp_path):
+        from main import main
+
+        trace_path = tmp_path / "trace.json"
+        argv = ['main.py', '--trace', str(trace_path), 'parse',
+                str(tmp_path / "missing.mid"), str(tmp_path / "out.json")]
+        with patch('sys.argv', argv):
+            with pytest.raises(FileNotFoundError):
+                main()
+
+        events = json.loads(trace_path.read_text())['traceEvents']
+        command, = _spans(events, "parse")
+        assert command['cat'] == "command"
+        assert not is_tracing()
+
+    def test_default_pipeline_accepts_trace(self, tmp_path):
+        from main import main
+
+        trace_path = tmp_path / "trace.json"
+        with patch('sys.argv', ['main.py', f'--trace={trace_path}', 'song.mid']), \
+                patch('main.run_full_pipeline') as mock_pipeline:
+            main()
+
+        args = mock_pipeline.call_args[0][0]
+        assert args.trace == str(trace_path)
+        assert args.input == 'song.mid'
+        assert _spans(json.loads(trace_path.read_text())['traceEvents'], "pipeline")
+
+    def test_trace_value_is_not_taken_for_a_pipeline_input(self, tmp_path):
+        from main import main
+
+        trace_path = tmp_path / "trace.json"
+        with patch('sys.argv', ['main.py', '--trace', str(trace_path), 'benchmark', 'memory']), \
+                patch('main.run_full_pipeline') as mock_pipeline:
+            main()
+        mock_pipeline.assert_not_called()
+        assert trace_path.exists()
@@ -2,8 +2,9 @@ import mido
 import json
 from collections import defaultdict
 from constants import FRAME_RATE_HZ
-from tracker.tempo_map import EnhancedTempoMap, TempoValidationConfig, TempoChangeType, TempoValidationError
+from tracker.tempo_map import EnhancedTempoMap, TempoValidationConfig
 from core.exceptions import InvalidMIDIError
+from utils.tracing import span
 
 
 def _open_midi_file(midi_path):
@@ -40,25 +41,25 @@ def _build_tempo_map(mid, config):
         optimization_strategy=None  # Disable expensive optimization
     )
 
-    dropped_tempo_changes = 0
+    # Collect every set_tempo first and insert them in one batch: adding
+    # them one at a time re-sorted the map on every insert, O(T^2 log T) for
+    # a tempo-automation-heavy file. IMMEDIATE changes only, for speed.
+    tempo_ticks = []
+    tempo_values = []
     for track in mid.tracks:
         current_tick = 0
         for msg in track:
             current_tick += msg.time
             if msg.type == 'set_tempo':
-                try:
-                    # Use IMMEDIATE tempo changes for speed
-                    tempo_map.add_tempo_change(
-                        current_tick,
-                        msg.tempo,
-                        TempoChangeType.IMMEDIATE
-                    )
-                except TempoValidationError:
-                    # With the widened config this should be rare; never drop a
-                    # tempo change silently (the song would play at the wrong
-                    # tempo from here on) — count it and warn after the pass (#94).
-                    dropped_tempo_changes += 1
-                    continue
+                tempo_ticks.append(current_tick)
+                tempo_values.append(msg.tempo)
+
+    # With the widened config a rejected change should be rare; never drop
+    # one silently (the song would play at the wrong tempo from there on) --
+    # it is skipped and counted, and we warn after the pass (#94).
+    with span("tempo_map_build", changes=len(tempo_ticks)):
+        dropped_tempo_changes = tempo_map.add_tempo_changes(
+            tempo_ticks, tempo_values, skip_invalid=True)
 
     if dropped_tempo_changes:
         print(f"Warning: dropped {dropped_tempo_changes} out-of-range tempo "
@@ -111,9 +112,10 @@ def _parse_frames_and_tempo_map(midi_path):
 
     track_events = defaultdict(list)
 
-    # Second pass: process notes efficiently
-    dropped_note_events = 0
-    last_drop_reason = None
+    # Second pass: collect note messages, then convert all their ticks to
+    # frames/tempos in one vectorized call against the tempo index rather
+    # than one bisect + float round per event.
+    pending_notes = []
     for i, track in enumerate(mid.tracks):
         current_tick = 0
         track_name = f"track_{i}"
@@ -132,38 +134,62 @@ def _parse_frames_and_tempo_map(midi_path):
             elif msg.type == 'program_change':
                 channel_programs[msg.channel] = msg.program
             elif msg.type in ['note_on', 'note_off']:
-                try:
-                    # Fast frame calculation
-                    frame = tempo_map.get_frame_for_tick(current_tick)
-                    note = msg.note
-                    velocity = msg.velocity if msg.type == 'note_on' else 0
-
-                    # Handle note_on with velocity 0 as note_off
-                    msg_type = 'note_off' if (msg.type == 'note_on' and velocity == 0) else msg.type
-
-                    track_events[track_name].append({
-                        "frame": frame,
-                        "note": note,
-                        "volume": velocity,
-                        "type": msg_type,
-                        # Retain the MIDI channel so downstream stages can detect
-                        # GM percussion (channel 10 / index 9). Without it the
-                        # arranger can only guess drums from the track name (#85).
-                        "channel": msg.channel,
-                        # GM program active on this channel at note time (#86).
-                        "program": channel_programs.get(msg.channel, 0),
-                        "tempo": tempo_map.get_tempo_at_tick(current_tick)
-                    })
-                except Exception as e:
-                    # Nothing on this path is expected to raise today (frame
-                    # math is pure arithmetic, tempo lookup returns a stored
-                    # value) -- this is defense against a future regression,
-                    # not a known failure mode. A dropped note changes the
-                    # song, so it must never vanish silently; count and warn
-                    # rather than swallow it (#124/SAFE-07).
-                    dropped_note_events += 1
-                    last_drop_reason = f"{type(e).__name__}: {e}"
-                    continue
+                velocity = msg.velocity if msg.type == 'note_on' else 0
+                # Handle note_on with velocity 0 as note_off
+                msg_type = 'note_off' if (msg.type == 'note_on' and velocity == 0) else msg.type
+                pending_notes.append((
+                    track_name, current_tick, msg.note, velocity, msg_type,
+                    msg.channel, channel_programs.get(msg.channel, 0),
+                ))
+
+    ticks = [note[1] for note in pending_notes]
+    try:
+        with span("tick_to_frame", events=len(ticks)):
+            frames = tempo_map.get_frames_for_ticks(ticks).tolist()
+            tempos = tempo_map.get_tempos_for_ticks(ticks).tolist()
+        if len(frames) != len(ticks) or len(tempos) != len(ticks):
+            raise ValueError(
+                f"batch conversion returned {len(frames)} frames / "
+                f"{len(tempos)} tempos for {len(ticks)} ticks")
+    except Exception:
+        # Fall back to the per-event path so a failure is pinned to the
+        # events it actually affects and counted below, not lost as a
+        # whole-song drop.
+        frames = tempos = None
+
+    dropped_note_events = 0
+    last_drop_reason = None
+    for idx, (track_name, tick, note, velocity, msg_type, channel, program) in enumerate(pending_notes):
+        if frames is not None:
+            frame, tempo = frames[idx], tempos[idx]
+        else:
+            try:
+                frame = tempo_map.get_frame_for_tick(tick)
+                tempo = tempo_map.get_tempo_at_tick(tick)
+            except Exception as e:
+                # Nothing on this path is expected to raise today (frame
+                # math is pure arithmetic, tempo lookup returns a stored
+                # value) -- this is defense against a future regression,
+                # not a known failure mode. A dropped note changes the
+                # song, so it must never vanish silently; count and warn
+                # rather than swallow it (#124/SAFE-07).
+                dropped_note_events += 1
+                last_drop_reason = f"{type(e).__name__}: {e}"
+                continue
+
+        track_events[track_name].append({
+            "frame": frame,
+            "note": note,
+            "volume": velocity,
+            "type": msg_type,
+            # Retain the MIDI channel so downstream stages can detect
+            # GM percussion (channel 10 / index 9). Without it the
+            # arranger can only guess drums from the track name (#85).
+            "channel": channel,
+            # GM program active on this channel at note time (#86).
+            "program": program,
+            "tempo": tempo
+        })
 
     if dropped_note_events:
         print(f"Warning: dropped {dropped_note_events} note event(s) due to "
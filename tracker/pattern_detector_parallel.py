@@ -1,12 +1,17 @@
-import multiprocessing as mp
 import time
 from typing import List, Dict, Tuple, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from tqdm import tqdm
 from tracker.tempo_map import EnhancedTempoMap
+from utils.tracing import span, is_tracing, init_worker_tracing, drain_events, add_events
 from tracker.pattern_detector import (
     PatternCompressor, sample_events_for_detection, score_pattern, MAX_PATTERN_EVENTS
 )
+from tracker.repetition_estimate import estimate_repetition
+from utils.executor import (
+    default_workers, get_shared_executor, load_payload, publish_payload, release_payload,
+    reset_shared_executor, submit_bounded,
+)
 
 # Below this many events, a serial run finishes before a process pool would
 # even finish spawning (pronounced under the `spawn` start method on macOS/
@@ -14,6 +19,22 @@ from tracker.pattern_detector import (
 # spawn/teardown overhead for a handful of events (#333/PERF-13).
 SERIAL_EVENT_THRESHOLD = 200
 
+# Sub-chunk sizing (#332/PERF-12). Before any chunk has been timed, a chunk
+# covers at least MIN_STARTS_PER_CHUNK window starts so tiny sub-ranges don't
+# turn into pure per-task overhead. Once workers report timings, each chunk
+# is sized to take about TARGET_CHUNK_SECONDS at the measured per-window
+# cost instead (never below ADAPTIVE_MIN_STARTS): big enough to amortise
+# dispatch, small enough to keep workers balanced.
+MIN_STARTS_PER_CHUNK = 2000
+ADAPTIVE_MIN_STARTS = 250
+TARGET_CHUNK_SECONDS = 0.05
+
+# Smoothed seconds per (window start x pattern length) measured by the
+# workers, carried across detector instances so later songs in a batch
+# start from a calibrated size. None until the first parallel run.
+_measured_window_cost: Optional[float] = None
+WINDOW_COST_SMOOTHING = 0.3
+
 class ParallelPatternDetector:
     """
     High-performance pattern detector using multiprocessing to utilize all CPU cores.
@@ -21,7 +42,7 @@ class ParallelPatternDetector:
     """
     
     def __init__(self, tempo_map: EnhancedTempoMap, min_pattern_length=3, max_pattern_length=32,
-                 max_pattern_events=MAX_PATTERN_EVENTS):
+                 max_pattern_events=MAX_PATTERN_EVENTS, max_workers: Optional[int] = None):
         self.tempo_map = tempo_map
         self.min_pattern_length = min_pattern_length
         self.max_pattern_length = max_pattern_length
@@ -31,8 +52,16 @@ class ParallelPatternDetector:
         self.max_pattern_events = max_pattern_events
         self.compressor = PatternCompressor()
 
-        # Get optimal number of workers
-        self.max_workers = max(1, mp.cpu_count() - 1)  # Leave one core for OS
+        # Worker count: explicit, else `--jobs`/`performance.max_workers`, else
+        # the CPUs this process may really use (affinity mask and cgroup
+        # quota -- mp.cpu_count() reports every host core inside a container)
+        # minus one for the OS. See utils/executor.py.
+        self.max_workers = max_workers or default_workers()
+
+        # Exact repetition precheck before the window search (see
+        # tracker/repetition_estimate.py); its result is kept for reporting.
+        self.repetition_precheck = True
+        self.repetition_estimate = None
         
     def detect_patterns(self, events: List[Dict]) -> Dict:
         """
@@ -82,11 +111,32 @@ class ParallelPatternDetector:
         # Convert to sequence for processing
         sequence = [(e['note'], e['volume']) for e in valid_events]
 
+        # Skip the search when no window repeats 3+ times, and cap it at the
+        # longest length that does -- both leave the result unchanged.
+        search_max_length = self.max_pattern_length
+        self.repetition_estimate = None
+        if self.repetition_precheck:
+            with span("repetition_precheck", cat="patterns", events=len(sequence)):
+                estimate = estimate_repetition(
+                    sequence, self.min_pattern_length, self.max_pattern_length)
+            self.repetition_estimate = estimate
+            search_max_length = estimate.max_repeat_length
+            print(f"🔎 Repetition precheck: ≤{estimate.coverage_estimate:.1f}% coverage possible, "
+                  f"longest repeat {estimate.max_repeat_length} events "
+                  f"({estimate.elapsed_ms:.1f}ms)")
+
         # Split work into chunks for parallel processing
-        patterns = self._detect_patterns_parallel(sequence, valid_events)
+        with span("pattern_search", cat="patterns", events=len(sequence)):
+            if search_max_length < self.min_pattern_length:
+                print("⏭️  No repeated windows; skipping pattern search")
+                patterns = {}
+            else:
+                patterns = self._detect_patterns_parallel(
+                    sequence, valid_events, search_max_length)
         
         # Compress patterns
-        compressed_patterns, pattern_refs = self.compressor.compress_patterns(patterns)
+        with span("pattern_compress", cat="patterns", patterns=len(patterns)):
+            compressed_patterns, pattern_refs = self.compressor.compress_patterns(patterns)
         
         # Calculate compression statistics
         compression_stats = self.compressor.calculate_compression_stats(
@@ -113,7 +163,8 @@ class ParallelPatternDetector:
                0 <= event.get('volume', 0) <= 127
         ]
     
-    def _build_work_chunks(self, sequence_len: int) -> List[Dict]:
+    def _build_work_chunks(self, sequence_len: int,
+                           max_length: Optional[int] = None) -> List[Dict]:
         """Build (pattern_length, start_range) sub-chunks for the pool.
 
         The #114 fix made each chunk one whole pattern length, so total task
@@ -122,20 +173,26 @@ class ParallelPatternDetector:
         several cores sit idle on a >10-core host (#332/PERF-12). Sub-chunk
         each length's start range so task count scales toward
         `self.max_workers`, while staying above `MIN_STARTS_PER_CHUNK` so
-        tiny sub-ranges don't turn into pure per-task overhead."""
+        tiny sub-ranges don't turn into pure per-task overhead. That floor
+        adapts to the per-window cost measured by earlier chunks (see
+        `_min_starts_per_chunk`).
+
+        `max_length` (default `max_pattern_length`) is the longest length to
+        search, lowered by the repetition precheck."""
+        max_length = self.max_pattern_length if max_length is None else max_length
         lengths = list(range(self.min_pattern_length,
-                             min(self.max_pattern_length, sequence_len) + 1))
+                             min(max_length, sequence_len) + 1))
         if not lengths:
             return []
 
-        MIN_STARTS_PER_CHUNK = 2000
         target_total_chunks = max(len(lengths), self.max_workers * 2)
         subchunks_per_length = max(1, target_total_chunks // len(lengths))
 
         work_chunks = []
         for length in lengths:
             n_starts = sequence_len - length + 1
-            n_sub = min(subchunks_per_length, max(1, n_starts // MIN_STARTS_PER_CHUNK))
+            min_starts = self._min_starts_per_chunk(length)
+            n_sub = min(subchunks_per_length, max(1, n_starts // min_starts))
             starts_per_sub = -(-n_starts // n_sub)  # ceil division
             for i in range(n_sub):
                 start = i * starts_per_sub
@@ -145,7 +202,17 @@ class ParallelPatternDetector:
                 work_chunks.append({'pattern_length': length, 'start_range': (start, end)})
         return work_chunks
 
-    def _detect_patterns_parallel(self, sequence: List[Tuple], valid_events: List[Dict]) -> Dict:
+    def _min_starts_per_chunk(self, length: int) -> int:
+        """Smallest sub-chunk, in window starts, for one pattern length:
+        MIN_STARTS_PER_CHUNK until a chunk has been timed, then whatever
+        takes TARGET_CHUNK_SECONDS at the measured per-window cost."""
+        if _measured_window_cost is None:
+            return MIN_STARTS_PER_CHUNK
+        return max(ADAPTIVE_MIN_STARTS,
+                   int(TARGET_CHUNK_SECONDS / (_measured_window_cost * length)))
+
+    def _detect_patterns_parallel(self, sequence: List[Tuple], valid_events: List[Dict],
+                                  max_length: Optional[int] = None) -> Dict:
         """Detect patterns using parallel processing.
 
         Each worker buckets window start positions for one (pattern_length,
@@ -156,9 +223,12 @@ class ParallelPatternDetector:
         once via `_select_candidates_from_groups` -- identical to what a
         single un-chunked pass over that length would produce (#332/PERF-12).
         The sequence and events are shipped to each worker process ONCE via
-        the pool `initializer` rather than embedded in every chunk dict — the
-        previous code pickled the full sequence ~(lengths × workers) times
-        per detection run (#114)."""
+        a published payload (see utils/executor.py) rather than embedded in
+        every chunk dict — the older code pickled the full sequence
+        ~(lengths × workers) times per detection run (#114). The pool is
+        the process-wide shared executor, so a batch of songs pays worker
+        start-up once, not once per song. `max_length` caps the searched lengths
+        (see `_build_work_chunks`)."""
 
         # Below this, a serial run finishes before a process pool would even
         # spawn (pronounced under the `spawn` start method), so skip pool
@@ -166,9 +236,9 @@ class ParallelPatternDetector:
         if len(sequence) < SERIAL_EVENT_THRESHOLD:
             print(f"🔄 Sequence below the {SERIAL_EVENT_THRESHOLD}-event serial "
                   f"threshold; skipping process pool")
-            return self._detect_patterns_serial(sequence, valid_events)
+            return self._detect_patterns_serial(sequence, valid_events, max_length)
 
-        work_chunks = self._build_work_chunks(len(sequence))
+        work_chunks = self._build_work_chunks(len(sequence), max_length)
         if not work_chunks:
             return {}
 
@@ -179,13 +249,14 @@ class ParallelPatternDetector:
         # chunk. Skip pool construction entirely in that case (#218).
         if len(work_chunks) == 1:
             print("🔄 Only one work chunk; skipping process pool")
-            return self._detect_patterns_serial(sequence, valid_events)
+            return self._detect_patterns_serial(sequence, valid_events, max_length)
 
         print(f"🔧 Created {len(work_chunks)} work chunks for parallel processing")
 
-        # Never spawn more worker processes than there are chunks to hand out —
-        # cpu_count()-1 is an upper bound on usable parallelism, not a target
-        # process count (#218).
+        # Never keep more chunks in flight than there are chunks to hand out,
+        # or than this detector's worker budget -- the shared pool may be
+        # wider than max_workers (e.g. after the memory budget halved it),
+        # so the bound on in-flight tasks is what limits parallelism (#218).
         pool_workers = min(self.max_workers, len(work_chunks))
 
         # Partial window-groups collected per length, as (start, groups) pairs
@@ -194,50 +265,51 @@ class ParallelPatternDetector:
         length_group_parts: Dict[int, List[Tuple[int, Dict[Tuple, List[int]]]]] = {}
         failed_subchunks = []  # (length, start_range) that failed AND couldn't be recovered
 
+        token = None
         try:
-            with ProcessPoolExecutor(
-                max_workers=pool_workers,
-                initializer=_init_pattern_worker,
-                initargs=(sequence, valid_events),
-            ) as executor:
-                # Submit all work chunks
-                future_to_chunk = {
-                    executor.submit(_detect_window_groups_worker, chunk): chunk
-                    for chunk in work_chunks
-                }
-
-                # Collect results as they complete with progress bar
-                with tqdm(total=len(work_chunks), desc="Processing pattern chunks", unit="chunk") as pbar:
-                    for future in as_completed(future_to_chunk):
-                        chunk = future_to_chunk[future]
-                        length = chunk['pattern_length']
-                        start_range = chunk['start_range']
+            executor = get_shared_executor()
+            token = publish_payload((sequence, valid_events, is_tracing()))
+            tasks = [(token, chunk) for chunk in work_chunks]
+
+            # Collect results as they complete with progress bar
+            with tqdm(total=len(work_chunks), desc="Processing pattern chunks", unit="chunk") as pbar:
+                for (_, chunk), future in submit_bounded(
+                        executor, _detect_window_groups_worker, tasks, pool_workers):
+                    length = chunk['pattern_length']
+                    start_range = chunk['start_range']
+                    try:
+                        groups, worker_spans, elapsed = future.result(timeout=30)  # 30s timeout per chunk
+                        add_events(worker_spans)
+                        _record_chunk_timing(length, start_range, elapsed)
+                    except Exception as e:
+                        # Instead of silently dropping this sub-chunk's window
+                        # groups (degrading compression with only a transient
+                        # tqdm line), recover it in-process with the same
+                        # helper the workers use. Only if that also fails is
+                        # this slice truly lost — recorded and surfaced
+                        # durably after the loop (#106).
+                        pbar.write(f"  ⚠️  Chunk for length {length} {start_range} "
+                                   f"failed: {e} — retrying serially")
                         try:
-                            groups = future.result(timeout=30)  # 30s timeout per chunk
-                        except Exception as e:
-                            # Instead of silently dropping this sub-chunk's window
-                            # groups (degrading compression with only a transient
-                            # tqdm line), recover it in-process with the same
-                            # helper the workers use. Only if that also fails is
-                            # this slice truly lost — recorded and surfaced
-                            # durably after the loop (#106).
-                            pbar.write(f"  ⚠️  Chunk for length {length} {start_range} "
-                                       f"failed: {e} — retrying serially")
-                            try:
-                                groups = _collect_window_groups(sequence, length, *start_range)
-                            except Exception as e2:
-                                failed_subchunks.append((length, start_range))
-                                groups = None
-                                pbar.write(f"  ❌ Serial retry for length {length} {start_range} "
-                                           f"also failed: {e2}")
-                        if groups is not None:
-                            length_group_parts.setdefault(length, []).append((start_range[0], groups))
-                        pbar.update(1)
+                            groups = _collect_window_groups(sequence, length, *start_range)
+                        except Exception as e2:
+                            failed_subchunks.append((length, start_range))
+                            groups = None
+                            pbar.write(f"  ❌ Serial retry for length {length} {start_range} "
+                                       f"also failed: {e2}")
+                    if groups is not None:
+                        length_group_parts.setdefault(length, []).append((start_range[0], groups))
+                    pbar.update(1)
 
         except Exception as e:
             print(f"  ❌ Parallel processing failed, falling back to serial: {e}")
+            if isinstance(e, BrokenProcessPool):
+                reset_shared_executor()
             # Fallback to serial processing
-            return self._detect_patterns_serial(sequence, valid_events)
+            return self._detect_patterns_serial(sequence, valid_events, max_length)
+        finally:
+            if token is not None:
+                release_payload(token)
 
         # Merge each length's sub-chunk groups (in start-range order) and score
         # once per length -- identical result to an un-chunked pass.
@@ -266,7 +338,8 @@ class ParallelPatternDetector:
         # Select best non-overlapping patterns
         return self._select_best_patterns(all_candidate_patterns)
     
-    def _detect_patterns_serial(self, sequence: List[Tuple], valid_events: List[Dict]) -> Dict:
+    def _detect_patterns_serial(self, sequence: List[Tuple], valid_events: List[Dict],
+                                max_length: Optional[int] = None) -> Dict:
         """Fallback serial pattern detection.
 
         Shares the same O(n·L) grouping helper as the parallel workers so the
@@ -274,9 +347,10 @@ class ParallelPatternDetector:
         (the old fallback used a different forward-only match scan)."""
         print("🔄 Using serial pattern detection")
 
+        max_length = self.max_pattern_length if max_length is None else max_length
         candidate_patterns = []
         for length in range(self.min_pattern_length,
-                          min(self.max_pattern_length, len(sequence)) + 1):
+                          min(max_length, len(sequence)) + 1):
             candidate_patterns.extend(
                 _collect_length_candidates(sequence, valid_events, length)
             )
@@ -354,18 +428,23 @@ class ParallelPatternDetector:
 
 
 # Shared, read-only data for the worker processes. The sequence and events are
-# stashed here ONCE per worker via the pool initializer (see ProcessPoolExecutor
-# initargs) instead of being pickled into every per-length work chunk (#114).
+# published once per detection run (utils.executor.publish_payload) and
+# stashed here by the first chunk each worker receives, instead of being
+# pickled into every per-length work chunk (#114).
+_WORKER_TOKEN: Optional[str] = None
 _WORKER_SEQUENCE: Optional[List[Tuple]] = None
 _WORKER_EVENTS: Optional[List[Dict]] = None
 
 
-def _init_pattern_worker(sequence: List[Tuple], events: List[Dict]) -> None:
-    """ProcessPoolExecutor initializer: stash the shared sequence/events as module
-    globals so each worker invocation reuses them instead of re-shipping them."""
+def _init_pattern_worker(sequence: List[Tuple], events: List[Dict], trace: bool = False) -> None:
+    """Stash the shared sequence/events as module globals so each chunk of
+    the same run reuses them instead of re-shipping them. `trace` mirrors
+    whether the parent is recording spans (--trace), so the worker's
+    window-grouping spans land in the same trace."""
     global _WORKER_SEQUENCE, _WORKER_EVENTS
     _WORKER_SEQUENCE = sequence
     _WORKER_EVENTS = events
+    init_worker_tracing(trace, "pattern-worker")
 
 
 def _collect_window_groups(sequence: List[Tuple], pattern_length: int,
@@ -382,9 +461,10 @@ def _collect_window_groups(sequence: List[Tuple], pattern_length: int,
     `end` may exceed `len(sequence) - pattern_length + 1`; callers clamp it.
     """
     groups: Dict[Tuple, List[int]] = {}
-    for pos in range(start, end):
-        window = tuple(sequence[pos:pos + pattern_length])
-        groups.setdefault(window, []).append(pos)
+    with span("window_grouping", cat="patterns", length=pattern_length, start=start, end=end):
+        for pos in range(start, end):
+            window = tuple(sequence[pos:pos + pattern_length])
+            groups.setdefault(window, []).append(pos)
     return groups
 
 
@@ -460,16 +540,36 @@ def _collect_length_candidates(sequence: List[Tuple], events: List[Dict],
     return _select_candidates_from_groups(groups, events, pattern_length)
 
 
-def _detect_window_groups_worker(work_chunk: Dict) -> Dict[Tuple, List[int]]:
+def _record_chunk_timing(length: int, start_range: Tuple[int, int], elapsed: float) -> None:
+    """Fold one worker-measured chunk time into `_measured_window_cost`."""
+    global _measured_window_cost
+    windows = (start_range[1] - start_range[0]) * length
+    if windows <= 0 or elapsed <= 0:
+        return
+    cost = elapsed / windows
+    if _measured_window_cost is None:
+        _measured_window_cost = cost
+    else:
+        _measured_window_cost += WINDOW_COST_SMOOTHING * (cost - _measured_window_cost)
+
+
+def _detect_window_groups_worker(task: Tuple[str, Dict]) -> Tuple[Dict[Tuple, List[int]], List[Dict], float]:
     """Worker entry point: bucket window start positions for one
-    (length, start-range) sub-chunk over the shared sequence stashed by
-    `_init_pattern_worker`. Runs in a separate process (#332/PERF-12)."""
-    sequence = _WORKER_SEQUENCE
-    if sequence is None:
-        # Defensive: only happens if invoked outside the initialised pool.
-        return {}
+    (length, start-range) sub-chunk over the shared sequence published under
+    the task's payload token. Runs in a shared-pool process (#332/PERF-12).
+
+    Returns (groups, spans, elapsed) -- `spans` are the trace events this
+    worker recorded for the chunk ([] unless tracing), merged by the parent;
+    `elapsed` is the grouping time in seconds, which sizes later chunks."""
+    global _WORKER_TOKEN
+    token, work_chunk = task
+    if token != _WORKER_TOKEN:
+        _init_pattern_worker(*load_payload(token))
+        _WORKER_TOKEN = token
     start, end = work_chunk['start_range']
-    return _collect_window_groups(sequence, work_chunk['pattern_length'], start, end)
+    began = time.perf_counter()
+    groups = _collect_window_groups(_WORKER_SEQUENCE, work_chunk['pattern_length'], start, end)
+    return groups, drain_events(), time.perf_counter() - began
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""Cheap repetition precheck run before exact-repeat pattern detection.
+
+ParallelPatternDetector groups every window of every length in
+[min_pattern_length, max_pattern_length] -- O(n·L) window tuples plus pool
+startup -- before it learns whether the song repeats at all. A
+through-composed piece pays all of that to find nothing.
+
+A pattern of length L needs at least 3 occurrences, and then every prefix of
+it occurs at least 3 times too, so "some length-K window occurs >= 3 times"
+is monotone in K. `estimate_repetition` binary-searches the longest such K
+with C-speed `Counter(zip(...))` passes over an int-encoded sequence:
+
+- no window of `min_length` repeats 3+ times -> detection cannot find a
+  pattern; the detector skips it outright;
+- otherwise lengths above `max_repeat_length` cannot produce a candidate,
+  so the detector only searches up to it.
+
+Both decisions are exact (the detector's result is unchanged), unlike
+sampling or sketch-based estimates. `coverage_estimate` -- the share of
+events inside some `min_length` window that occurs 3+ times -- is an upper
+bound on pattern coverage, reported so a user can see why detection was
+skipped or short.
+"""
+
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Sequence, Tuple
+
+# Same occurrence floor as _select_candidates_from_groups: fewer than 3
+# occurrences can never yield 3 non-overlapping matches.
+MIN_OCCURRENCES = 3
+
+
+@dataclass
+class RepetitionEstimate:
+    """Result of `estimate_repetition` over one detection sequence."""
+    events: int
+    max_repeat_length: int      # 0 when no min-length window repeats 3+ times
+    coverage_estimate: float    # percent of events, upper bound
+    elapsed_ms: float
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _encode(sequence: Sequence[Tuple]) -> List[int]:
+    """Map each distinct (note, volume) item to a small int, so window keys
+    are tuples of ints (cheap to hash) whatever the item type."""
+    codes: Dict[Tuple, int] = {}
+    return [codes.setdefault(item, len(codes)) for item in sequence]
+
+
+def _window_counts(codes: List[int], length: int) -> Counter:
+    return Counter(zip(*(codes[i:] for i in range(length))))
+
+
+def _repeats_at(codes: List[int], length: int) -> bool:
+    if length > len(codes):
+        return False
+    return max(_window_counts(codes, length).values()) >= MIN_OCCURRENCES
+
+
+def estimate_repetition(sequence: Sequence[Tuple], min_length: int,
+                        max_length: int) -> RepetitionEstimate:
+    """Longest window length (<= max_length) occurring 3+ times, and the
+    coverage upper bound at `min_length`; see the module docstring."""
+    start = time.perf_counter()
+    codes = _encode(sequence)
+    n = len(codes)
+
+    if min_length > n or not _repeats_at(codes, min_length):
+        return RepetitionEstimate(n, 0, 0.0, (time.perf_counter() - start) * 1000)
+
+    # Share of positions covered by a repeating min-length window
+    # (difference array over window starts).
+    counts = _window_counts(codes, min_length)
+    delta = [0] * (n + 1)
+    for pos, window in enumerate(zip(*(codes[i:] for i in range(min_length)))):
+        if counts[window] >= MIN_OCCURRENCES:
+            delta[pos] += 1
+            delta[pos + min_length] -= 1
+    covered = 0
+    running = 0
+    for value in delta[:n]:
+        running += value
+        if running > 0:
+            covered += 1
+
+    # Binary search the longest repeating length: lo always repeats.
+    lo, hi = min_length, min(max_length, n)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _repeats_at(codes, mid):
+            lo = mid
+        else:
+            hi = mid - 1
+
+    return RepetitionEstimate(n, lo, covered / n * 100,
+                              (time.perf_counter() - start) * 1000)
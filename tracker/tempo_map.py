@@ -123,6 +123,22 @@ class TempoMap:
         # (tick_array, tempo_array, cumulative_ms_array, len). Invalidated to
         # None whenever tempo_changes mutates. See _build_tempo_index (#113).
         self._tempo_index = None
+        # NumPy copies of the same index for the batch lookups
+        # (get_frames_for_ticks / get_tempos_for_ticks); rebuilt together
+        # with _tempo_index so the two can never disagree.
+        self._tempo_index_arrays = None
+
+    @classmethod
+    def from_changes(cls, ticks, tempos, initial_tempo=500000, ticks_per_beat=480, **kwargs):
+        """Build a tempo map from parallel tick/tempo sequences in one pass.
+
+        Equivalent to calling add_tempo_change for each pair in order, but
+        sorts once instead of once per insert (O(T log T) instead of
+        O(T^2 log T) for a T-change map). Extra keyword arguments go to the
+        constructor (e.g. EnhancedTempoMap's validation_config)."""
+        tempo_map = cls(initial_tempo=initial_tempo, ticks_per_beat=ticks_per_beat, **kwargs)
+        tempo_map.add_tempo_changes(ticks, tempos)
+        return tempo_map
 
     def add_tempo_change(self, tick: int, tempo: int):
         """Add a tempo change at the specified tick"""
@@ -137,6 +153,25 @@ class TempoMap:
         self._time_cache = {}
         self._tempo_index = None
 
+    def add_tempo_changes(self, ticks, tempos, skip_invalid: bool = False) -> int:
+        """Add many tempo changes at once, given in file order.
+
+        Same result as add_tempo_change per pair -- the single stable sort
+        keeps "last event wins" among tied ticks (#210) -- with one sort and
+        one cache invalidation for the whole batch. The base map does not
+        validate, so nothing is ever skipped; `skip_invalid` exists for
+        signature parity with EnhancedTempoMap. Returns the number of
+        changes skipped (always 0 here)."""
+        if len(ticks) != len(tempos):
+            raise ValueError(
+                f"ticks and tempos must be the same length, got "
+                f"{len(ticks)} and {len(tempos)}")
+        self.tempo_changes.extend(zip((int(t) for t in ticks), (int(t) for t in tempos)))
+        self.tempo_changes.sort(key=lambda c: c[0])
+        self._time_cache = {}
+        self._tempo_index = None
+        return 0
+
     def _build_tempo_index(self):
         """Precompute sorted tick boundaries and cumulative ms-from-tick-0 so
         tempo / time lookups are O(log T) via bisect instead of O(T) (and the
@@ -156,6 +191,11 @@ class TempoMap:
             cum_ms[i] = float(total)
         index = (ticks, tempos, cum_ms, n)
         self._tempo_index = index
+        self._tempo_index_arrays = (
+            np.asarray(ticks, dtype=np.int64),
+            np.asarray(tempos, dtype=np.int64),
+            np.asarray(cum_ms, dtype=np.float64),
+        )
         return index
 
     def _get_tempo_index(self):
@@ -176,6 +216,33 @@ class TempoMap:
         us_per_tick = np.float64(tempos[i]) / self.ticks_per_beat
         return cum_ms[i] + float((seg_ticks * us_per_tick) / 1000.0)
 
+    def _segment_indices(self, ticks):
+        """Vectorized bisect_right(boundaries, tick) - 1 (clamped at 0) over
+        an array of ticks, mirroring _cumulative_ms/get_tempo_at_tick."""
+        self._get_tempo_index()
+        b_ticks, b_tempos, b_cum_ms = self._tempo_index_arrays
+        ticks = np.asarray(ticks, dtype=np.int64)
+        seg = np.searchsorted(b_ticks, ticks, side='right') - 1
+        np.maximum(seg, 0, out=seg)
+        return ticks, seg, b_ticks, b_tempos, b_cum_ms
+
+    def get_frames_for_ticks(self, ticks) -> np.ndarray:
+        """Batch get_frame_for_tick: frame index for every tick in `ticks`.
+
+        Uses the same cumulative-ms index and the same float64 arithmetic as
+        the scalar path, and np.rint rounds half-to-even like round(), so
+        each element is identical to get_frame_for_tick(tick) -- just one
+        searchsorted over the whole array instead of a bisect per event."""
+        ticks, seg, b_ticks, b_tempos, b_cum_ms = self._segment_indices(ticks)
+        us_per_tick = b_tempos[seg].astype(np.float64) / self.ticks_per_beat
+        time_ms = b_cum_ms[seg] + ((ticks - b_ticks[seg]) * us_per_tick) / 1000.0
+        return np.rint(time_ms / FRAME_MS).astype(np.int64)
+
+    def get_tempos_for_ticks(self, ticks) -> np.ndarray:
+        """Batch get_tempo_at_tick: active tempo for every tick in `ticks`."""
+        _, seg, _, b_tempos, _ = self._segment_indices(ticks)
+        return b_tempos[seg]
+
     def get_tempo_at_tick(self, tick: int) -> int:
         """Get the active tempo at a specific tick (O(log T) via bisect)."""
         ticks, tempos, _, _ = self._get_tempo_index()
@@ -376,6 +443,66 @@ class EnhancedTempoMap(TempoMap):
         self._time_cache = {}
         self._tempo_index = None
 
+    def add_tempo_changes(self, ticks, tempos, skip_invalid: bool = False) -> int:
+        """Add many IMMEDIATE tempo changes at once, given in file order.
+
+        The per-insert path re-sorts both tempo_changes and enhanced_changes
+        on every call, which is O(T^2 log T) for a T-change file. When the
+        outcome doesn't depend on insertion order this validates each change,
+        then inserts the survivors with a single sort. Two settings make it
+        order-dependent and fall back to add_tempo_change per pair: a finite
+        max_tempo_change_ratio (each change is judged against the tempo the
+        map held when it arrived) and FRAME_ALIGNED snapping (which searches
+        the map as built so far).
+
+        With skip_invalid, a change failing validation is dropped and
+        counted instead of raising. Returns the number dropped."""
+        if len(ticks) != len(tempos):
+            raise ValueError(
+                f"ticks and tempos must be the same length, got "
+                f"{len(ticks)} and {len(tempos)}")
+
+        dropped = 0
+        if (self.optimization_strategy == TempoOptimizationStrategy.FRAME_ALIGNED or
+                self.validation_config.max_tempo_change_ratio != float('inf')):
+            for tick, tempo in zip(ticks, tempos):
+                try:
+                    self.add_tempo_change(int(tick), int(tempo), TempoChangeType.IMMEDIATE)
+                except TempoValidationError:
+                    if not skip_invalid:
+                        raise
+                    dropped += 1
+            return dropped
+
+        initial_tempo = None
+        accepted = []
+        for tick, tempo in zip(ticks, tempos):
+            change = TempoChange(int(tick), int(tempo), TempoChangeType.IMMEDIATE)
+            try:
+                # Ratio gate is disabled on this path, so validation only
+                # reads the change itself, never the map being built.
+                self._validate_basic_tempo(change)
+            except TempoValidationError:
+                if not skip_invalid:
+                    raise
+                dropped += 1
+                continue
+            if change.tick == 0:
+                # Tick 0 replaces the initial tempo; the last one wins.
+                initial_tempo = change.tempo
+            else:
+                accepted.append(change)
+
+        if initial_tempo is not None:
+            self.tempo_changes[0] = (0, initial_tempo)
+        self.tempo_changes.extend((c.tick, c.tempo) for c in accepted)
+        self.tempo_changes.sort(key=lambda c: c[0])
+        self.enhanced_changes.extend(accepted)
+        self.enhanced_changes.sort(key=lambda x: x.tick)
+        self._time_cache = {}
+        self._tempo_index = None
+        return dropped
+
     def find_nearest_frame_aligned_tick(self, tick: int) -> int:
         """Find nearest frame-aligned tick"""
         time_ms = np.float64(self.calculate_time_ms(0, tick))
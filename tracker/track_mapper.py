@@ -2,6 +2,7 @@ import random
 from collections import defaultdict
 from dpcm_sampler.drum_engine import map_drums_to_dpcm
 from arranger.pipeline_integration import _split_events_by_channel
+from utils.tracing import span
 
 
 # Simplified initial mapping strategy
@@ -318,7 +319,10 @@ def assign_tracks_to_nes_channels(midi_events, dpcm_index_path):
         # Assign harmony to pulse2 with intelligent arpeggio
         if channel_scores:
             ch, _ = channel_scores.pop(0)
-            nes_tracks['pulse2'] = apply_arpeggio_fallback(pitched_midi_events[ch], style="default")
+            # Pairs every note-on with its note-off to size the arpeggio --
+            # the map stage's hot spot on dense harmony tracks.
+            with span("note_pairing", cat="mapper", events=len(pitched_midi_events[ch])):
+                nes_tracks['pulse2'] = apply_arpeggio_fallback(pitched_midi_events[ch], style="default")
 
         # Assign bass (lowest avg pitch) to triangle
         if channel_scores:
@@ -345,7 +349,8 @@ def assign_tracks_to_nes_channels(midi_events, dpcm_index_path):
     # map_drums_to_dpcm below.
 
     # Fallback for DPCM: look for drums
-    dpcm_events, noise_events = map_drums_to_dpcm(midi_events, dpcm_index_path)
+    with span("drum_mapping", cat="mapper"):
+        dpcm_events, noise_events = map_drums_to_dpcm(midi_events, dpcm_index_path)
 
     if dpcm_events:
         nes_tracks['dpcm'] = dpcm_events
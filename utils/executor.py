@@ -0,0 +1,266 @@
+"""Process-wide worker pool shared by every parallel stage.
+
+Pattern detection, `song build` frame generation and `validate-batch` each
+used to construct (and tear down) their own ProcessPoolExecutor per call. A
+batch script converting many songs paid worker spawn plus the re-import of
+mido/numpy/the tracker modules once per song and per stage. Instead, one
+executor is created lazily on first use and kept for the rest of the
+process:
+
+- `get_shared_executor(min_workers)` returns it, sized by `default_workers`:
+  the CPUs this process may actually use (`usable_cpus`: its affinity mask,
+  capped by any cgroup CPU quota) minus one core, or the explicit limit set
+  with `set_worker_limit` (`--jobs` / `performance.max_workers`). A caller
+  that asks for more workers grows it once; it never shrinks.
+- Workers run `_warm_worker` on start, importing `WARM_MODULES` so the
+  first task doesn't pay for them (a no-op under `fork`, where they are
+  inherited; the real saving under `spawn`/`forkserver`).
+- `submit_bounded` keeps at most `max_in_flight` tasks queued per call, so a
+  stage that wants fewer workers than the pool holds (a small batch, or the
+  memory budget halving pattern-detection workers) still gets them.
+- `publish_payload` replaces the per-pool `initializer` data hand-off: the
+  parent pickles large read-only data to a temp file ONCE, tasks carry only
+  the token, and each worker loads it at most once (`load_payload`).
+- A broken pool is dropped with `reset_shared_executor` so the next caller
+  gets a fresh one; `shutdown_shared_executor` runs at interpreter exit.
+"""
+
+import atexit
+import importlib
+import math
+import os
+import pickle
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+# Imported by every worker on start-up. Modules whose top-level functions
+# are submitted to the pool, plus their heavy dependencies.
+WARM_MODULES = (
+    'tracker.pattern_detector_parallel',
+    'tracker.parser_fast',
+    'arranger',
+    'debug.batch_validator',
+    'exporter.multi_format',
+)
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+# Explicit worker count from `--jobs` / `performance.max_workers`; None means
+# derive it from the usable CPUs.
+_worker_limit: Optional[int] = None
+
+CGROUP_ROOT = Path('/sys/fs/cgroup')
+
+
+def _cgroup_dirs(base: Path, relative: str) -> Iterator[Path]:
+    """`base/relative` and each of its ancestors up to `base`."""
+    parts = [part for part in relative.split('/') if part]
+    for depth in range(len(parts), -1, -1):
+        yield base.joinpath(*parts[:depth])
+
+
+def _v2_quota_cpus(directory: Path) -> Optional[int]:
+    """CPUs granted by a cgroup v2 `cpu.max` ("<quota> <period>" or "max ...")."""
+    try:
+        fields = (directory / 'cpu.max').read_text().split()
+        if fields[0] == 'max':
+            return None
+        return max(1, math.ceil(int(fields[0]) / int(fields[1])))
+    except (OSError, ValueError, IndexError, ZeroDivisionError):
+        return None
+
+
+def _v1_quota_cpus(directory: Path) -> Optional[int]:
+    """CPUs granted by cgroup v1 `cpu.cfs_quota_us` (-1 = unlimited)."""
+    try:
+        quota = int((directory / 'cpu.cfs_quota_us').read_text())
+        if quota <= 0:
+            return None
+        period = int((directory / 'cpu.cfs_period_us').read_text())
+        return max(1, math.ceil(quota / period))
+    except (OSError, ValueError, ZeroDivisionError):
+        return None
+
+
+def cgroup_cpu_limit(root: Path = CGROUP_ROOT,
+                     proc_cgroup: str = '/proc/self/cgroup') -> Optional[int]:
+    """CPU count allowed by this process's cgroup quota, rounded up; None if
+    unlimited or not on Linux.
+
+    Container runtimes set a CPU quota but leave every host core in the
+    affinity mask, so os.cpu_count() and sched_getaffinity both report the
+    host's cores. Every group along the process's cgroup path enforces its
+    own quota, so the tightest one wins."""
+    try:
+        lines = Path(proc_cgroup).read_text().splitlines()
+    except OSError:
+        return None
+    v2_path = v1_path = None
+    for line in lines:
+        if line.count(':') < 2:
+            continue  # not a hierarchy:controllers:path entry
+        hierarchy, controllers, path = line.split(':', 2)
+        if hierarchy == '0' and not controllers:
+            v2_path = path
+        elif 'cpu' in controllers.split(','):
+            v1_path = path
+
+    limits = []
+    for base, relative, reader in ((root, v2_path, _v2_quota_cpus),
+                                   (root / 'cpu', v1_path, _v1_quota_cpus)):
+        if relative is None:
+            continue
+        for directory in _cgroup_dirs(base, relative):
+            cpus = reader(directory)
+            if cpus is not None:
+                limits.append(cpus)
+    return min(limits) if limits else None
+
+
+def usable_cpus() -> int:
+    """CPUs this process may run on: its affinity mask where available,
+    capped by the cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    return min(cpus, quota) if quota else cpus
+
+
+def default_workers() -> int:
+    """Worker count for parallel stages: the explicit limit if one was set,
+    else usable CPUs minus one core left for the OS."""
+    if _worker_limit is not None:
+        return _worker_limit
+    return max(1, usable_cpus() - 1)
+
+
+def set_worker_limit(workers: Optional[int]) -> None:
+    """Pin `default_workers()` to `workers` (None restores auto sizing)."""
+    global _worker_limit
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError(f"worker count must be a positive integer, got {workers!r}")
+    _worker_limit = workers
+
+
+def _warm_worker(modules: Tuple[str, ...]) -> None:
+    """Pool initializer: import the modules tasks will need. A module that
+    fails to import here is left for the task itself to report."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def get_shared_executor(min_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """The process-wide executor, created on first call.
+
+    `min_workers` (e.g. from `--jobs`) grows the pool if it is currently
+    smaller: the old pool finishes its queued work and is replaced."""
+    global _executor, _executor_workers
+    wanted = max(default_workers(), min_workers or 0)
+    with _lock:
+        if _executor is not None and _executor_workers >= wanted:
+            return _executor
+        previous = _executor
+        _executor = ProcessPoolExecutor(
+            max_workers=wanted, initializer=_warm_worker, initargs=(WARM_MODULES,))
+        _executor_workers = wanted
+    if previous is not None:
+        previous.shutdown(wait=True)
+    return _executor
+
+
+def shared_executor_workers() -> int:
+    """Worker count of the live shared pool (0 if none was created yet)."""
+    return _executor_workers if _executor is not None else 0
+
+
+def reset_shared_executor() -> None:
+    """Drop the shared pool (after BrokenProcessPool) without waiting on it;
+    the next `get_shared_executor` call builds a fresh one."""
+    global _executor, _executor_workers
+    with _lock:
+        executor, _executor, _executor_workers = _executor, None, 0
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_shared_executor() -> None:
+    """Graceful shutdown: cancel queued tasks, wait for running ones."""
+    global _executor, _executor_workers
+    with _lock:
+        executor, _executor, _executor_workers = _executor, None, 0
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_shared_executor)
+
+
+def submit_bounded(executor, fn: Callable, items: Iterable[Any],
+                   max_in_flight: int) -> Iterator[Tuple[Any, Future]]:
+    """Submit `fn(item)` for every item, never more than `max_in_flight` at a
+    time, yielding `(item, future)` pairs as futures complete.
+
+    The caller calls `future.result()`; a failed future doesn't stop the
+    remaining submissions. If `executor.submit` itself raises (a broken
+    pool), the exception propagates to the caller's fallback."""
+    pending = {}
+    items = iter(items)
+    max_in_flight = max(1, max_in_flight)
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < max_in_flight:
+            try:
+                item = next(items)
+            except StopIteration:
+                exhausted = True
+                break
+            pending[executor.submit(fn, item)] = item
+        if not pending:
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future
+
+
+def publish_payload(data: Any) -> str:
+    """Pickle read-only task data to a temp file and return its token (the
+    path). Tasks pass the token instead of the data; `release_payload`
+    deletes the file once the tasks are done."""
+    fd, path = tempfile.mkstemp(prefix='midi2nes-payload-', suffix='.pkl')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def release_payload(token: str) -> None:
+    try:
+        os.remove(token)
+    except OSError:
+        pass
+
+
+# Worker-side cache: the most recently loaded payload, so every task of one
+# stage run reads the file once per worker.
+_loaded_token: Optional[str] = None
+_loaded_payload: Any = None
+
+
+def load_payload(token: str) -> Any:
+    """The data published under `token`, loaded at most once per process."""
+    global _loaded_token, _loaded_payload
+    if token != _loaded_token:
+        with open(token, 'rb') as f:
+            _loaded_payload = pickle.load(f)
+        _loaded_token = token
+    return _loaded_payload
@@ -0,0 +1,139 @@
+"""Bounded in-process memo caches (`performance.enable_caching`).
+
+A handful of pure lookups run once per note or per frame for every song:
+pitch/period tables, GM instrument and drum mappings, macro compression and
+DPCM sample-name resolution. `memoized(name, maxsize)` wraps such a function
+in a named `BoundedMemo` so repeats are one dict hit, and every cache reports
+hits/misses through `cache_stats()` for the benchmark profiler.
+
+Caches are process-wide and keyed on the positional arguments only (a call
+with keyword arguments, or unhashable ones, goes straight to the function).
+Each is bounded: once `maxsize` keys are stored the oldest is evicted, which
+for these small key domains (128 notes x 5 channels, 128 GM programs, ...)
+practically never happens -- the bound is there for macro sequences, whose
+domain is open-ended.
+
+`set_caching_enabled(False)` (from `performance.enable_caching: false`)
+turns every wrapper into a plain call and drops what was cached. Pool
+workers inherit the parent's setting and contents on fork; their counters
+stay in the worker.
+"""
+
+import functools
+from typing import Any, Callable, Dict, Optional
+
+# Global switch; PerformanceConfig.enable_caching defaults to True.
+_enabled = True
+_registry: Dict[str, "BoundedMemo"] = {}
+
+
+class BoundedMemo:
+    """One named cache: a bounded dict plus hit/miss/eviction counters."""
+    __slots__ = ('name', 'maxsize', 'data', 'hits', 'misses', 'evictions')
+
+    def __init__(self, name: str, maxsize: int):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.name = name
+        self.maxsize = maxsize
+        self.data: Dict[Any, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def store(self, key, value) -> None:
+        data = self.data
+        if len(data) >= self.maxsize:
+            # dicts keep insertion order, so the first key is the oldest.
+            del data[next(iter(data))]
+            self.evictions += 1
+        data[key] = value
+
+    def clear(self) -> None:
+        self.data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.data),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def register_memo(name: str, maxsize: int) -> BoundedMemo:
+    """The process-wide cache called `name`, created on first use."""
+    memo = _registry.get(name)
+    if memo is None:
+        memo = _registry[name] = BoundedMemo(name, maxsize)
+    return memo
+
+
+def memoized(name: str, maxsize: int = 1024) -> Callable:
+    """Decorator caching a pure function's results in the memo `name`."""
+    def decorator(func):
+        memo = register_memo(name, maxsize)
+        data = memo.data
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled or kwargs:
+                return func(*args, **kwargs)
+            try:
+                value = data[args]
+            except KeyError:
+                memo.misses += 1
+                value = func(*args)
+                memo.store(args, value)
+                return value
+            except TypeError:  # unhashable argument
+                return func(*args)
+            memo.hits += 1
+            return value
+
+        wrapper.memo = memo
+        return wrapper
+    return decorator
+
+
+def is_caching_enabled() -> bool:
+    return _enabled
+
+
+def set_caching_enabled(enabled: bool) -> None:
+    """Switch every memo on or off; switching off also empties them."""
+    global _enabled
+    _enabled = bool(enabled)
+    if not _enabled:
+        clear_caches()
+
+
+def clear_caches() -> None:
+    """Empty every cache and reset its counters."""
+    for memo in _registry.values():
+        memo.clear()
+
+
+def cache_stats(name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """{cache name: stats} for every registered cache (or just `name`)."""
+    if name is not None:
+        return {name: _registry[name].stats()} if name in _registry else {}
+    return {memo_name: memo.stats() for memo_name, memo in sorted(_registry.items())}
+
+
+def diff_cache_stats(before: Dict[str, Dict[str, Any]],
+                     after: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Per-cache hits/misses between two `cache_stats()` calls, for caches
+    that saw any lookups in between."""
+    deltas = {}
+    for memo_name, stats in after.items():
+        base = before.get(memo_name, {})
+        hits = stats['hits'] - base.get('hits', 0)
+        misses = stats['misses'] - base.get('misses', 0)
+        if hits or misses:
+            deltas[memo_name] = {'hits': hits, 'misses': misses}
+    return deltas
@@ -0,0 +1,198 @@
+"""Memory budget enforcement for the full pipeline (`performance.max_memory_mb`).
+
+`ConfigManager.validate` has always range-checked `max_memory_mb`, but
+nothing acted on it, so one huge MIDI could take a shared CI runner down
+with every other build on it. `MemoryBudget` watches the RSS of this process
+plus its pool workers while `run_full_pipeline` runs, and the pipeline asks
+it before each memory-heavy step whether to trade quality or speed for
+headroom:
+
+- elevated (RSS >= ELEVATED_FRACTION of the budget): halve the pattern
+  detection worker count and spill `frames` to disk while detection runs;
+- critical (RSS >= CRITICAL_FRACTION): a single detection worker
+  and a halved `max_pattern_events` sampling cap (down to
+  MIN_PATTERN_EVENTS once the budget is already exceeded), on top of the
+  spill.
+
+Every degradation only affects compression analysis or speed -- the ROM is
+still emitted from the full `frames` dict. The decisions are recorded in
+`degradations` so the pipeline summary can say why a build came out
+differently.
+
+Pool workers are forked, so each one's RSS includes pages still shared with
+the parent; only their private part (`rss - shared`) is counted, otherwise
+seven idle workers would "use" seven copies of the parent.
+
+The watcher thread is skipped while stage profiling is active (cProfile on
+3.12+ instruments every thread; see utils/stage_profiler.py) -- the
+checkpoints between stages still sample.
+"""
+
+import pickle
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from utils.stage_profiler import is_profiling_stages
+
+# Fractions of the budget at which the pipeline starts degrading.
+ELEVATED_FRACTION = 0.5
+CRITICAL_FRACTION = 0.75
+
+# Floor for the degraded parallel-detector sampling cap; matches the
+# sequential detector's own cap (tracker/pattern_detector.py), below which
+# detection stops finding the song's structure at all.
+MIN_PATTERN_EVENTS = 1000
+
+
+def process_tree_rss_mb(process: Optional[psutil.Process] = None) -> float:
+    """RSS of `process` (default: this one) plus the private memory of its
+    live children, in MB."""
+    process = process or psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            info = child.memory_info()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue  # worker exited between listing and reading
+        total += max(0, info.rss - getattr(info, 'shared', 0))
+    return total / 1024 / 1024
+
+
+class MemoryBudget:
+    """Tracks pipeline memory against `max_memory_mb` and decides which
+    degradations to apply; see the module docstring for the policy."""
+
+    def __init__(self, max_memory_mb: int, interval_ms: int = 100):
+        if max_memory_mb <= 0:
+            raise ValueError(f"max_memory_mb must be positive, got {max_memory_mb}")
+        self.max_memory_mb = max_memory_mb
+        self.interval_ms = interval_ms
+        self.process = psutil.Process()
+        self.peak_mb = 0.0
+        self.peak_stage: Optional[str] = None
+        self.degradations: List[str] = []
+        # Stages during which the watcher saw the budget exceeded.
+        self.overruns: List[str] = []
+        self._stage = "startup"
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- sampling ---------------------------------------------------------
+
+    def sample(self) -> float:
+        """Read the current process-tree RSS and update peak/overrun state."""
+        try:
+            current = process_tree_rss_mb(self.process)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return self.peak_mb
+        with self._lock:
+            if current > self.peak_mb:
+                self.peak_mb = current
+                self.peak_stage = self._stage
+            if current > self.max_memory_mb and self._stage not in self.overruns:
+                self.overruns.append(self._stage)
+        return current
+
+    def start(self) -> "MemoryBudget":
+        """Start the background watcher (no-op while stage profiling)."""
+        self.sample()
+        if self._thread is None and not is_profiling_stages():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.sample()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval_ms / 1000.0):
+            self.sample()
+
+    def checkpoint(self, stage: str) -> float:
+        """Mark the start of `stage` and return the current RSS in MB."""
+        with self._lock:
+            self._stage = stage
+        return self.sample()
+
+    # -- policy -----------------------------------------------------------
+
+    def pressure(self, current_mb: Optional[float] = None) -> float:
+        """Current RSS as a fraction of the budget."""
+        if current_mb is None:
+            current_mb = self.sample()
+        return current_mb / self.max_memory_mb
+
+    def level(self, current_mb: Optional[float] = None) -> str:
+        """'ok', 'elevated' or 'critical'."""
+        pressure = self.pressure(current_mb)
+        if pressure >= CRITICAL_FRACTION:
+            return 'critical'
+        if pressure >= ELEVATED_FRACTION:
+            return 'elevated'
+        return 'ok'
+
+    def should_spill_frames(self, current_mb: Optional[float] = None) -> bool:
+        spill = self.level(current_mb) != 'ok'
+        if spill:
+            self.degradations.append("frames spilled to disk during pattern detection")
+        return spill
+
+    def plan_pattern_detection(self, max_pattern_events: int, max_workers: int,
+                               current_mb: Optional[float] = None) -> Tuple[int, int]:
+        """Degraded (max_pattern_events, max_workers) for the current pressure."""
+        if current_mb is None:
+            current_mb = self.sample()
+        level = self.level(current_mb)
+        events, workers = max_pattern_events, max_workers
+        if level == 'elevated':
+            workers = max(1, max_workers // 2)
+        elif level == 'critical':
+            workers = 1
+            if current_mb >= self.max_memory_mb:
+                reduced = MIN_PATTERN_EVENTS
+            else:
+                reduced = max(MIN_PATTERN_EVENTS, max_pattern_events // 2)
+            events = min(max_pattern_events, reduced)
+
+        if workers != max_workers:
+            self.degradations.append(
+                f"pattern detection workers {max_workers} -> {workers}")
+        if events != max_pattern_events:
+            self.degradations.append(
+                f"max_pattern_events {max_pattern_events:,} -> {events:,}")
+        return events, workers
+
+    def summary(self) -> Dict:
+        return {
+            'max_memory_mb': self.max_memory_mb,
+            'peak_mb': round(self.peak_mb, 1),
+            'peak_stage': self.peak_stage,
+            'overruns': list(self.overruns),
+            'degradations': list(self.degradations),
+        }
+
+
+def spill_frames(frames: Dict, path) -> Path:
+    """Write `frames` to `path` (a pipeline temp file) for `load_spilled_frames`."""
+    path = Path(path)
+    with open(path, 'wb') as f:
+        pickle.dump(frames, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def load_spilled_frames(path) -> Dict:
+    """Read back frames written by `spill_frames` and delete the file."""
+    path = Path(path)
+    with open(path, 'rb') as f:
+        frames = pickle.load(f)
+    path.unlink(missing_ok=True)
+    return frames
@@ -1,10 +1,12 @@
 """Memory and performance profiling utilities for MIDI2NES."""
 
 import functools
+import gc
+import os
 import time
 import psutil
 import tracemalloc
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass, field
 import json
 import threading
@@ -409,6 +411,108 @@ class PerformanceContext:
                   f"{memory_delta:+.1f}MB delta, {peak_memory:.1f}MB peak")
 
 
+@dataclass
+class AllocationSnapshot:
+    """Heap state at a stage boundary: tracemalloc traces plus live
+    gc-tracked object counts by type name."""
+    traces: Optional[tracemalloc.Snapshot]
+    type_counts: Dict[str, int]
+
+
+# Allocations made by the snapshotting itself (tracemalloc's own trace
+# objects, this module's type census) would otherwise top every diff.
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def take_allocation_snapshot() -> AllocationSnapshot:
+    """Snapshot the heap for a later `diff_allocation_snapshots()`.
+
+    Collects garbage first so the diff shows what a stage *kept*, not cycles
+    that happened to be awaiting collection. Traces are only recorded while
+    tracemalloc is tracing (e.g. inside a PerformanceProfiler stage); both
+    parts are O(heap size), so this is for memory investigations, not every
+    run.
+    """
+    gc.collect()
+    traces = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+    return AllocationSnapshot(traces, _object_type_census())
+
+
+# Profiler bookkeeping (snapshots, psutil readings) kept alive across a
+# stage would otherwise show up as that stage's objects.
+_CENSUS_SKIP_MODULES = ('tracemalloc', __name__, 'psutil')
+
+
+def _object_type_census() -> Dict[str, int]:
+    """Live object counts by type name.
+
+    gc.get_objects() alone misses the objects a frames table is mostly made
+    of: CPython untracks dicts and tuples holding only atoms, and never
+    tracks int/str/float. Those are all referenced by some tracked object,
+    so one level of gc.get_referents() (deduplicated by id) finds them.
+    Built from plain dicts in this module so the census's own allocations
+    fall under the snapshot filters.
+    """
+    counts: Dict[str, int] = {}
+    seen = set()
+    for obj in gc.get_objects():
+        for item in (obj, *gc.get_referents(obj)):
+            if item is not obj:
+                if gc.is_tracked(item) or id(item) in seen:
+                    continue
+                seen.add(id(item))
+            cls = type(item)
+            module = cls.__module__
+            if isinstance(module, str) and module.startswith(_CENSUS_SKIP_MODULES):
+                continue
+            counts[cls.__name__] = counts.get(cls.__name__, 0) + 1
+    return counts
+
+
+def diff_allocation_snapshots(
+    before: AllocationSnapshot,
+    after: AllocationSnapshot,
+    top_n: int = 10,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """What grew between two snapshots.
+
+    Returns {'top_sites': [...], 'object_types': [...]}: the `top_n` source
+    lines by net bytes allocated (and still live) in between, and the
+    `top_n` object types by net instance count.
+    """
+    top_sites = []
+    if before.traces is not None and after.traces is not None:
+        old = before.traces.filter_traces(_SNAPSHOT_FILTERS)
+        new = after.traces.filter_traces(_SNAPSHOT_FILTERS)
+        # compare_to orders by absolute change; only growth is wanted here.
+        grown = sorted((stat for stat in new.compare_to(old, 'lineno') if stat.size_diff > 0),
+                       key=lambda stat: stat.size_diff, reverse=True)
+        cwd = os.getcwd() + os.sep
+        for stat in grown[:top_n]:
+            frame = stat.traceback[0]
+            filename = frame.filename
+            if filename.startswith(cwd):
+                filename = filename[len(cwd):]
+            top_sites.append({
+                'site': f"{filename}:{frame.lineno}",
+                'size_kb': stat.size_diff / 1024,
+                'count': stat.count_diff,
+            })
+
+    type_diff = {name: count - before.type_counts.get(name, 0)
+                 for name, count in after.type_counts.items()}
+    grown_types = sorted((item for item in type_diff.items() if item[1] > 0),
+                         key=lambda item: item[1], reverse=True)
+    object_types = [{'type': name, 'count': count} for name, count in grown_types[:top_n]]
+    return {'top_sites': top_sites, 'object_types': object_types}
+
+
 def get_memory_usage() -> Dict[str, float]:
     """
     Get current memory usage statistics.
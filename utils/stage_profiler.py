@@ -0,0 +1,218 @@
+"""Per-stage CPU profiles for MIDI2NES (`--profile-stages DIR`).
+
+`utils/tracing.py` says *how long* each stage took; this says which
+functions inside it were hot, without hand-instrumenting anything. Each
+pipeline stage wrapped in `profile_stage(name)` is recorded with cProfile
+and written twice:
+
+- DIR/<stage>.pstats: the raw stats (snakeviz, `python -m pstats`,
+  gprof2dot) -- exact call counts and per-function own/cumulative time.
+- DIR/<stage>.collapsed: folded stacks (`stage;caller;callee <microseconds>`)
+  that flamegraph.pl, speedscope and inferno read directly
+  (`flamegraph.pl --countname us parse.collapsed > parse.svg`).
+
+cProfile only keeps caller -> callee edges, not whole stacks, so the folded
+stacks are reconstructed from the call graph: a function reached from
+several callers has its time split between them in proportion to each
+edge's cumulative time (what gprof2dot and flameprof do too). Exact for
+tree-shaped call graphs, an approximation for shared helpers.
+
+A sampling thread over `sys._current_frames()` was the other option, but on
+Python 3.12+ cProfile instruments every thread, so the sampler's own waits
+would show up at the top of the stage's pstats.
+
+Profiling is off unless `start_stage_profiling()` was called; while off,
+`profile_stage()` returns a shared no-op. A stage opened inside another
+profiled stage is folded into the outer one (cProfile can't nest), and pool
+worker processes are not profiled -- their time shows up as the parent
+waiting on the pool.
+
+Usage:
+    from utils.stage_profiler import profile_stage
+
+    with profile_stage("export"):
+        ...
+"""
+
+import cProfile
+import os
+import pstats
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Active profiler for this process, or None while stage profiling is off.
+_profiler: Optional["StageProfiler"] = None
+
+
+class _NullStage:
+    """Shared do-nothing context returned while profiling is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+# Subtrees below this share of a stage's total time are left out of the
+# folded stacks; they are invisible in a flamegraph anyway, and pruning keeps
+# the path enumeration from blowing up on call graphs with many diamonds.
+MIN_FOLDED_SHARE = 0.0005
+
+
+def _func_label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == '~':  # builtins: ('~', 0, "<built-in method ...>")
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def fold_stats(stats: Dict, root: str) -> Dict[str, int]:
+    """Folded stacks (path -> self time in microseconds) from a pstats
+    `stats` dict: {func: (cc, nc, tt, ct, {caller: (cc, nc, tt, ct)})}.
+
+    Roots are functions with no recorded caller -- the calls made directly
+    from the block that opened the stage.
+    """
+    # callees[caller] = [(callee, fraction of callee's time due to caller)]
+    callees: Dict[Tuple, List[Tuple[Tuple, float]]] = {}
+    roots = []
+    for func, (_cc, _nc, _tt, ct, callers) in stats.items():
+        recorded = [c for c in callers if c in stats]
+        if not recorded:
+            roots.append(func)
+            continue
+        # Weight by edge cumulative time; some edges come back all-zero on
+        # 3.12+ (calls whose caller frame predates enable()), so fall back
+        # to call counts, then to an even split.
+        weights = [callers[c][3] for c in recorded]
+        if sum(weights) <= 0:
+            weights = [callers[c][1] for c in recorded]
+        if sum(weights) <= 0:
+            weights = [1.0] * len(recorded)
+        total_weight = sum(weights)
+        for caller, weight in zip(recorded, weights):
+            callees.setdefault(caller, []).append((func, ct * weight / total_weight))
+
+    total = sum(stats[f][3] for f in roots)
+    cutoff = total * MIN_FOLDED_SHARE
+    folded: Dict[str, int] = {}
+
+    def visit(func, path: List[str], on_path: set, inclusive: float):
+        # `inclusive` is the part of func's cumulative time spent on this path.
+        ct = stats[func][3]
+        share = inclusive / ct if ct > 0 else 0.0
+        stack = path + [_func_label(func)]
+        self_us = int(round(stats[func][2] * share * 1e6))
+        if self_us > 0:
+            key = ";".join(stack)
+            folded[key] = folded.get(key, 0) + self_us
+        for callee, edge_ct in callees.get(func, ()):
+            if callee in on_path:
+                continue  # recursion: already counted in the ancestor's time
+            child = edge_ct * share
+            if child > cutoff:
+                on_path.add(callee)
+                visit(callee, stack, on_path, child)
+                on_path.discard(callee)
+
+    for func in roots:
+        if stats[func][3] > cutoff:
+            visit(func, [root], {func}, stats[func][3])
+    return folded
+
+
+class _Stage:
+    """One profiled stage entry; see StageProfiler.stage()."""
+
+    def __init__(self, owner: "StageProfiler", name: str):
+        self._owner = owner
+        self.name = name
+        self._profile: Optional[cProfile.Profile] = None
+
+    def __enter__(self):
+        owner = self._owner
+        profile = owner.profiles.get(self.name) or cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (e.g. the user's own cProfile run) owns the
+            # interpreter's profiling hook; leave this stage unprofiled.
+            owner.warnings.append(f"{self.name}: cProfile unavailable ({e})")
+            return self
+        owner.profiles[self.name] = profile
+        owner._active = self.name
+        self._profile = profile
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profile is not None:
+            self._profile.disable()
+            self._owner._active = None
+        return False
+
+
+class StageProfiler:
+    """Collects a cProfile profile per stage name.
+
+    Repeated stages (several files, benchmark repetitions) accumulate into
+    the same stage's profile.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.warnings: List[str] = []
+        self._active: Optional[str] = None
+
+    def stage(self, name: str):
+        """Context manager profiling the enclosed block as stage `name`."""
+        if self._active is not None:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def write(self) -> List[Path]:
+        """Write <stage>.pstats and <stage>.collapsed for every recorded
+        stage; returns the paths written."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, profile in self.profiles.items():
+            pstats_path = self.output_dir / f"{name}.pstats"
+            profile.dump_stats(str(pstats_path))
+            folded = fold_stats(pstats.Stats(profile).stats, name)
+            collapsed_path = self.output_dir / f"{name}.collapsed"
+            collapsed_path.write_text(
+                "".join(f"{stack} {us}\n" for stack, us in sorted(folded.items())))
+            written.extend([pstats_path, collapsed_path])
+        return written
+
+
+def profile_stage(name: str):
+    """Context manager recording the enclosed block as stage `name`.
+    A no-op while stage profiling is off."""
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
+
+
+def is_profiling_stages() -> bool:
+    return _profiler is not None
+
+
+def start_stage_profiling(output_dir) -> StageProfiler:
+    """Enable stage profiling for this process (replacing any active profiler)."""
+    global _profiler
+    _profiler = StageProfiler(output_dir)
+    return _profiler
+
+
+def stop_stage_profiling() -> Optional[StageProfiler]:
+    """Disable stage profiling and return the profiler (call `.write()` on it)."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler
@@ -0,0 +1,197 @@
+"""Lightweight tracing spans with Chrome trace-event export for MIDI2NES.
+
+Per-stage timing used to be scattered across PerformanceProfiler (benchmark
+suite only), PerformanceContext / profile_memory_usage (utils/profiling.py)
+and ad-hoc time.time() prints -- none of which could say where a slow
+production build actually went once it was inside a stage. `span()` marks a
+named region; spans nest naturally (a span opened inside another is drawn
+under it on the same thread's track) and are written as Chrome trace-event
+JSON, viewable in chrome://tracing or https://ui.perfetto.dev.
+
+Tracing is off unless `start_tracing()` was called (`--trace out.json` on
+the CLI). While off, `span()` is one global read returning a shared no-op
+context manager, so instrumenting hot inner phases costs nothing measurable
+in normal builds.
+
+Usage:
+    from utils.tracing import span
+
+    with span("tempo_map_build", changes=len(ticks)):
+        ...
+
+Worker processes record into their own tracer (see `init_worker_tracing`)
+and ship their spans back with each result via `drain_events()`; the parent
+merges them with `add_events()`, so pool work shows up as separate process
+tracks on the same timeline.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Active tracer for this process, or None while tracing is disabled.
+_tracer: Optional["Tracer"] = None
+
+
+class _NullSpan:
+    """Shared do-nothing span returned while tracing is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """One timed region; recorded as a Chrome 'X' (complete) event on exit."""
+    __slots__ = ('_tracer', 'name', 'cat', 'args', '_start')
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self._tracer.record(self.name, self.cat, self._start, end, self.args)
+        return False
+
+    def set(self, **args):
+        """Attach extra args (e.g. result sizes known only at the end)."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects span events for one process."""
+
+    def __init__(self, process_name: str = "midi2nes"):
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Durations come from perf_counter; anchoring it to the wall clock
+        # puts spans from separate worker processes on one shared timeline.
+        self._offset_us = time.time() * 1e6 - time.perf_counter() * 1e6
+        self.events.append({
+            'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0,
+            'args': {'name': f"{process_name} ({self.pid})"},
+        })
+
+    def record(self, name: str, cat: str, start: float, end: float,
+               args: Optional[Dict[str, Any]] = None) -> None:
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': start * 1e6 + self._offset_us,
+            'dur': (end - start) * 1e6,
+            'pid': self.pid,
+            'tid': threading.get_native_id(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Return and clear the events recorded so far."""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+
+def span(name: str, cat: str = "pipeline", **args):
+    """Context manager timing the enclosed block as a span named `name`.
+
+    Keyword args are attached to the event and shown in the trace viewer.
+    A no-op while tracing is disabled.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, cat, args)
+
+
+def traced(name: Optional[str] = None, cat: str = "pipeline") -> Callable:
+    """Decorator form of `span()`; the span name defaults to the function name."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _Span(_tracer, span_name, cat, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_tracing() -> bool:
+    return _tracer is not None
+
+
+def start_tracing(process_name: str = "midi2nes") -> Tracer:
+    """Enable tracing for this process (replacing any active tracer)."""
+    global _tracer
+    _tracer = Tracer(process_name)
+    return _tracer
+
+
+def stop_tracing() -> List[Dict[str, Any]]:
+    """Disable tracing and return every event recorded since it started."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer.drain() if tracer is not None else []
+
+
+def init_worker_tracing(enabled: bool, process_name: str = "worker") -> None:
+    """Pool-initializer hook: give a worker process its own tracer, or none.
+
+    Always resets the module state -- a forked worker otherwise inherits the
+    parent's tracer, with the parent's pid and already-recorded events.
+    """
+    global _tracer
+    _tracer = Tracer(process_name) if enabled else None
+
+
+def drain_events() -> List[Dict[str, Any]]:
+    """Events recorded in this process since the last drain ([] when not
+    tracing). Workers return this alongside each result."""
+    tracer = _tracer
+    return tracer.drain() if tracer is not None else []
+
+
+def add_events(events: List[Dict[str, Any]]) -> None:
+    """Merge events recorded elsewhere (e.g. a worker process) into this
+    process's trace. Dropped if tracing has since been stopped."""
+    tracer = _tracer
+    if tracer is not None and events:
+        with tracer._lock:
+            tracer.events.extend(events)
+
+
+def write_chrome_trace(path, events: List[Dict[str, Any]]) -> None:
+    """Write events as a Chrome trace-event JSON file."""
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}))